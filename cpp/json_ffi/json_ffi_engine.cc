@@ -149,7 +149,9 @@ class JSONFFIEngineImpl : public JSONFFIEngine, public ModuleNode {
 
     request_stream_callback = PackedFunc(frequest_stream_callback_wrapper);
     this->engine_->InitBackgroundEngine(std::move(request_stream_callback),
-                                        std::move(trace_recorder));
+                                        std::move(trace_recorder),
+                                        /*pack_stream_outputs=*/false,
+                                        /*detokenize_stream_outputs=*/false);
     this->engine_->Reload(std::move(engine_config));
   }
 
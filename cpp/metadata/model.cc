@@ -39,6 +39,18 @@ ModelMetadata::Param ModelMetadata::Param::FromJSON(const picojson::object& para
   return result;
 }
 
+ModelMetadata::KVCache ModelMetadata::KVCache::FromJSON(const picojson::object& js) {
+  KVCache kv_cache;
+  kv_cache.num_hidden_layers = json::Lookup<int64_t>(js, "num_hidden_layers");
+  kv_cache.num_attention_heads = json::Lookup<int64_t>(js, "num_attention_heads");
+  kv_cache.num_key_value_heads = json::Lookup<int64_t>(js, "num_key_value_heads");
+  kv_cache.head_dim = json::Lookup<int64_t>(js, "head_dim");
+  if (js.count("dtype")) {  // absent in the model libs compiled before it is recorded
+    kv_cache.dtype = json::Lookup<DataType>(js, "dtype");
+  }
+  return kv_cache;
+}
+
 ModelMetadata ModelMetadata::FromJSON(const picojson::object& metadata,
                                       const picojson::object& model_config) {
   ModelMetadata result;
@@ -70,6 +82,10 @@ ModelMetadata ModelMetadata::FromJSON(const picojson::object& metadata,
       memory_usage[func_name] = json::Lookup<int64_t>(json_memory_usage, func_name);
     }
   }
+  if (metadata.count("kv_cache")) {
+    result.kv_cache =
+        ModelMetadata::KVCache::FromJSON(json::Lookup<picojson::object>(metadata, "kv_cache"));
+  }
   return result;
 }
 
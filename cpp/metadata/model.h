@@ -32,6 +32,15 @@ struct ModelMetadata {
     static Param FromJSON(const picojson::object& param_obj, const picojson::object& model_config);
   };
 
+  struct KVCache {
+    int64_t num_hidden_layers = -1;
+    int64_t num_attention_heads = -1;
+    int64_t num_key_value_heads = -1;
+    int64_t head_dim = -1;
+    tvm::runtime::DataType dtype = tvm::runtime::DataType::Float(16);
+    static KVCache FromJSON(const picojson::object& js);
+  };
+
   std::string model_type;
   std::string quantization;
   int64_t context_window_size;
@@ -41,6 +50,8 @@ struct ModelMetadata {
   int64_t attention_sink_size;
   std::vector<Param> params;
   std::unordered_map<std::string, int64_t> memory_usage;
+  // The KV cache shapes, where the fields are -1 for model libs without KV cache metadata.
+  KVCache kv_cache;
 
   static ModelMetadata FromJSON(const picojson::object& json_str,
                                 const picojson::object& model_config);
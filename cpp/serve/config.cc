@@ -158,6 +158,21 @@ GenerationConfig::GenerationConfig(String config_json_str) {
     n->response_format = response_format;
   }
 
+  // Params for scheduling. Not the part of openai spec.
+  if (config.count("priority")) {
+    CHECK(config["priority"].is<int64_t>());
+    n->priority = config["priority"].get<int64_t>();
+  }
+  if (config.count("ttft_deadline_ms")) {
+    if (config["ttft_deadline_ms"].is<picojson::null>()) {
+      n->ttft_deadline_ms = -1;
+    } else {
+      CHECK(config["ttft_deadline_ms"].is<double>());
+      n->ttft_deadline_ms = config["ttft_deadline_ms"].get<double>();
+      CHECK_GE(n->ttft_deadline_ms, 0) << "TTFT deadline must be non-negative";
+    }
+  }
+
   data_ = std::move(n);
 }
 
@@ -228,6 +243,11 @@ String GenerationConfigNode::AsJSONString() const {
                                   : picojson::value();
   config["response_format"] = picojson::value(response_format);
 
+  // Params for scheduling. Not the part of openai spec.
+  config["priority"] = picojson::value(static_cast<int64_t>(this->priority));
+  config["ttft_deadline_ms"] =
+      this->ttft_deadline_ms >= 0 ? picojson::value(this->ttft_deadline_ms) : picojson::value();
+
   return picojson::value(config).serialize(true);
 }
 
@@ -240,7 +260,9 @@ EngineConfig::EngineConfig(String model, String model_lib_path, Array<String> ad
                            int kv_cache_page_size, int max_num_sequence,
                            int max_total_sequence_length, int max_single_sequence_length,
                            int prefill_chunk_size, SpeculativeMode speculative_mode,
-                           int spec_draft_length) {
+                           int spec_draft_length, int prefix_cache_max_num_recycling_seqs,
+                           bool adaptive_spec_draft_length, bool mixed_prefill_decode,
+                           double target_step_latency_ms, double kv_swap_space_gb) {
   ObjectPtr<EngineConfigNode> n = make_object<EngineConfigNode>();
   n->model = std::move(model);
   n->model_lib_path = std::move(model_lib_path);
@@ -254,6 +276,11 @@ EngineConfig::EngineConfig(String model, String model_lib_path, Array<String> ad
   n->prefill_chunk_size = prefill_chunk_size;
   n->spec_draft_length = spec_draft_length;
   n->speculative_mode = speculative_mode;
+  n->prefix_cache_max_num_recycling_seqs = prefix_cache_max_num_recycling_seqs;
+  n->adaptive_spec_draft_length = adaptive_spec_draft_length;
+  n->mixed_prefill_decode = mixed_prefill_decode;
+  n->target_step_latency_ms = target_step_latency_ms;
+  n->kv_swap_space_gb = kv_swap_space_gb;
   data_ = std::move(n);
 }
 
@@ -262,11 +289,15 @@ TVM_REGISTER_GLOBAL("mlc.serve.EngineConfig")
                        Array<String> additional_model_lib_paths, DLDevice device,
                        int kv_cache_page_size, int max_num_sequence, int max_total_sequence_length,
                        int max_single_sequence_length, int prefill_chunk_size, int speculative_mode,
-                       int spec_draft_length) {
+                       int spec_draft_length, int prefix_cache_max_num_recycling_seqs,
+                       bool adaptive_spec_draft_length, bool mixed_prefill_decode,
+                       double target_step_latency_ms, double kv_swap_space_gb) {
       return EngineConfig(std::move(model), std::move(model_lib_path), std::move(additional_models),
                           std::move(additional_model_lib_paths), device, kv_cache_page_size,
                           max_num_sequence, max_total_sequence_length, max_single_sequence_length,
-                          prefill_chunk_size, SpeculativeMode(speculative_mode), spec_draft_length);
+                          prefill_chunk_size, SpeculativeMode(speculative_mode), spec_draft_length,
+                          prefix_cache_max_num_recycling_seqs, adaptive_spec_draft_length,
+                          mixed_prefill_decode, target_step_latency_ms, kv_swap_space_gb);
     });
 
 }  // namespace serve
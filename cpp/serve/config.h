@@ -50,6 +50,18 @@ class GenerationConfigNode : public Object {
 
   ResponseFormat response_format;
 
+  /*!
+   * \brief The scheduling priority of the request. Requests of higher priority
+   * are prefilled first, and may preempt the running requests of lower priority.
+   */
+  int priority = 0;
+  /*!
+   * \brief The hint of the time-to-first-token deadline in milliseconds since
+   * the request is added, or -1 if there is no deadline. Among the requests of
+   * the same priority, the ones with earlier deadlines are prefilled first.
+   */
+  double ttft_deadline_ms = -1;
+
   String AsJSONString() const;
 
   static constexpr const char* _type_key = "mlc.serve.GenerationConfig";
@@ -82,6 +94,8 @@ enum class SpeculativeMode : int {
   kSmallDraft = 1,
   /*! \brief The eagle-style speculative decoding. */
   kEagle = 2,
+  /*! \brief The speculative decoding with n-gram prompt lookup proposal and no draft model. */
+  kNGram = 3,
 };
 
 /*! \brief The configuration of engine execution config. */
@@ -122,12 +136,47 @@ class EngineConfigNode : public Object {
   /*! \brief The maximum total sequence length in a prefill. */
   int prefill_chunk_size;
 
+  /*************** Prefill and decode mixing ***************/
+
+  /*!
+   * \brief Whether to piggyback the decode of the running requests on the prefill steps,
+   * so that each prefill step also decodes one token for every running request.
+   */
+  bool mixed_prefill_decode = false;
+  /*!
+   * \brief The target latency in milliseconds of a mixed prefill and decode step, which
+   * bounds the number of prefill tokens in the step. No target when it is not positive.
+   */
+  double target_step_latency_ms = 0.0;
+
   /*************** Speculative decoding ***************/
 
   /*! \brief The speculative mode. */
   SpeculativeMode speculative_mode;
   /*! \brief The number of tokens to generate in speculative proposal (draft). */
   int spec_draft_length = 4;
+  /*!
+   * \brief Whether to adapt the draft length of each request to its draft acceptance rate,
+   * with "spec_draft_length" as the max draft length.
+   */
+  bool adaptive_spec_draft_length = false;
+
+  /*************** Prefix cache ***************/
+
+  /*!
+   * \brief The maximum number of finished sequences kept resident in the KV cache
+   * for prefix reuse. Being "0" means prefix caching is disabled.
+   */
+  int prefix_cache_max_num_recycling_seqs = 0;
+
+  /*************** KV swap ***************/
+
+  /*!
+   * \brief The host memory in GB to hold the KV data of the preempted requests, so that
+   * they are copied back instead of recomputed when resumed. Being "0" means the
+   * preempted requests are always recomputed.
+   */
+  double kv_swap_space_gb = 0.0;
 
   String AsJSONString() const;
 
@@ -143,7 +192,10 @@ class EngineConfig : public ObjectRef {
                         Array<String> additional_model_lib_paths, DLDevice device,
                         int kv_cache_page_size, int max_num_sequence, int max_total_sequence_length,
                         int max_single_sequence_length, int prefill_chunk_size,
-                        SpeculativeMode speculative_mode, int spec_draft_length);
+                        SpeculativeMode speculative_mode, int spec_draft_length,
+                        int prefix_cache_max_num_recycling_seqs, bool adaptive_spec_draft_length,
+                        bool mixed_prefill_decode, double target_step_latency_ms,
+                        double kv_swap_space_gb);
 
   TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(EngineConfig, ObjectRef, EngineConfigNode);
 };
@@ -6,6 +6,11 @@
 
 #include <tvm/runtime/registry.h>
 
+#include <algorithm>
+#include <string>
+#include <tuple>
+#include <utility>
+
 #include "model.h"
 
 namespace mlc {
@@ -75,10 +80,39 @@ TVM_REGISTER_GLOBAL("mlc.serve.TokenData").set_body([](TVMArgs args, TVMRetValue
   *rv = TokenData(std::move(token_ids));
 });
 
+TVM_REGISTER_GLOBAL("mlc.serve.TokenDataFromShapeTuple").set_body_typed([](IntTuple token_ids) {
+  return TokenData(std::move(token_ids));
+});
+
+TVM_REGISTER_GLOBAL("mlc.serve.TokenDataFromNDArray").set_body_typed([](NDArray token_ids) {
+  CHECK_EQ(token_ids->ndim, 1) << "The token ids are expected to be a 1-D array.";
+  CHECK_EQ(token_ids->device.device_type, kDLCPU) << "The token ids are expected to be on CPU.";
+  CHECK(token_ids.IsContiguous()) << "The token ids are expected to be contiguous.";
+  int64_t num_tokens = token_ids->shape[0];
+  const char* data = static_cast<const char*>(token_ids->data) + token_ids->byte_offset;
+  DataType dtype = token_ids.DataType();
+  if (dtype == DataType::Int(32)) {
+    const int32_t* p_token_ids = reinterpret_cast<const int32_t*>(data);
+    return TokenData(IntTuple(p_token_ids, p_token_ids + num_tokens));
+  }
+  CHECK(dtype == DataType::Int(64))
+      << "The token ids are expected to be int32 or int64, while " << dtype << " is given.";
+  const int64_t* p_token_ids = reinterpret_cast<const int64_t*>(data);
+  return TokenData(IntTuple(p_token_ids, p_token_ids + num_tokens));
+});
+
 TVM_REGISTER_GLOBAL("mlc.serve.TokenDataGetTokenIds").set_body_typed([](TokenData data) {
   return data->token_ids;
 });
 
+TVM_REGISTER_GLOBAL("mlc.serve.TokenDataGetTokenIdsNDArray").set_body_typed([](TokenData data) {
+  int64_t num_tokens = data->token_ids.size();
+  NDArray token_ids =
+      NDArray::Empty({num_tokens}, DataType::Int(32), DLDevice{DLDeviceType::kDLCPU, 0});
+  std::copy(data->token_ids.begin(), data->token_ids.end(), static_cast<int32_t*>(token_ids->data));
+  return token_ids;
+});
+
 /****************** ImageData ******************/
 
 TVM_REGISTER_OBJECT_TYPE(ImageDataNode);
@@ -180,12 +214,177 @@ RequestStreamOutput::RequestStreamOutput(
   data_ = std::move(n);
 }
 
+TVM_REGISTER_GLOBAL("mlc.serve.RequestStreamOutput")
+    .set_body_typed([](String request_id, Array<IntTuple> group_delta_token_ids,
+                       Optional<Array<Array<String>>> group_delta_logprob_json_strs,
+                       Array<Optional<String>> group_finish_reason) {
+      return RequestStreamOutput(std::move(request_id), std::move(group_delta_token_ids),
+                                 std::move(group_delta_logprob_json_strs),
+                                 std::move(group_finish_reason));
+    });
+
 TVM_REGISTER_GLOBAL("mlc.serve.RequestStreamOutputUnpack")
     .set_body_typed([](RequestStreamOutput output) {
       return Array<ObjectRef>{output->request_id, output->group_delta_token_ids,
                               output->group_delta_logprob_json_strs, output->group_finish_reason};
     });
 
+/****************** RequestStreamOutputBatch ******************/
+
+TVM_REGISTER_OBJECT_TYPE(RequestStreamOutputBatchObj);
+
+/*! \brief Get the code of the finish reason in `kRequestFinishReasons`. */
+inline int32_t GetFinishReasonCode(const Optional<String>& finish_reason) {
+  if (!finish_reason.defined()) {
+    return -1;
+  }
+  constexpr int32_t kNumFinishReasons =
+      sizeof(kRequestFinishReasons) / sizeof(kRequestFinishReasons[0]);
+  for (int32_t i = 0; i < kNumFinishReasons; ++i) {
+    if (finish_reason.value() == kRequestFinishReasons[i]) {
+      return i;
+    }
+  }
+  LOG(FATAL) << "Unknown finish reason \"" << finish_reason.value() << "\"";
+  return -1;
+}
+
+/*!
+ * \brief Pack the given strings into a uint8 NDArray of their concatenated bytes,
+ * together with an int64 NDArray of their byte offsets.
+ */
+inline std::pair<NDArray, NDArray> PackStrings(const std::vector<std::string>& strs) {
+  DLDevice cpu{DLDeviceType::kDLCPU, 0};
+  int64_t num_strs = strs.size();
+  NDArray offsets = NDArray::Empty({num_strs + 1}, DataType::Int(64), cpu);
+  int64_t* p_offsets = static_cast<int64_t*>(offsets->data);
+  p_offsets[0] = 0;
+  for (int64_t i = 0; i < num_strs; ++i) {
+    p_offsets[i + 1] = p_offsets[i] + static_cast<int64_t>(strs[i].size());
+  }
+  NDArray bytes = NDArray::Empty({p_offsets[num_strs]}, DataType::UInt(8), cpu);
+  char* p_bytes = static_cast<char*>(bytes->data);
+  for (int64_t i = 0; i < num_strs; ++i) {
+    std::copy(strs[i].begin(), strs[i].end(), p_bytes + p_offsets[i]);
+  }
+  return {bytes, offsets};
+}
+
+RequestStreamOutputBatch RequestStreamOutputBatch::FromOutputs(
+    const std::vector<RequestStreamOutput>& outputs, Optional<BatchTextStreamer> text_streamer) {
+  int64_t num_generations = 0;
+  int64_t num_tokens = 0;
+  for (const RequestStreamOutput& output : outputs) {
+    num_generations += output->group_delta_token_ids.size();
+    for (const IntTuple& delta_token_ids : output->group_delta_token_ids) {
+      num_tokens += delta_token_ids.size();
+    }
+  }
+
+  DLDevice cpu{DLDeviceType::kDLCPU, 0};
+  int64_t num_requests = outputs.size();
+  NDArray group_offsets = NDArray::Empty({num_requests + 1}, DataType::Int(64), cpu);
+  NDArray token_offsets = NDArray::Empty({num_generations + 1}, DataType::Int(64), cpu);
+  NDArray token_ids = NDArray::Empty({num_tokens}, DataType::Int(32), cpu);
+  NDArray finish_reason_codes = NDArray::Empty({num_generations}, DataType::Int(32), cpu);
+  NDArray logprob_offsets = NDArray::Empty({num_generations + 1}, DataType::Int(64), cpu);
+  NDArray return_logprobs = NDArray::Empty({num_requests}, DataType::Bool(), cpu);
+  NDArray engine_timings = NDArray::Empty({num_requests, 3}, DataType::Float(64), cpu);
+  int64_t* p_group_offsets = static_cast<int64_t*>(group_offsets->data);
+  int64_t* p_token_offsets = static_cast<int64_t*>(token_offsets->data);
+  int32_t* p_token_ids = static_cast<int32_t*>(token_ids->data);
+  int32_t* p_finish_reason_codes = static_cast<int32_t*>(finish_reason_codes->data);
+  int64_t* p_logprob_offsets = static_cast<int64_t*>(logprob_offsets->data);
+  bool* p_return_logprobs = static_cast<bool*>(return_logprobs->data);
+  double* p_engine_timings = static_cast<double*>(engine_timings->data);
+
+  std::vector<std::string> request_ids;
+  request_ids.reserve(num_requests);
+  std::string logprob_json_strs;
+  int64_t num_logprob_json_strs = 0;
+  // The keys, delta tokens and finish flags of the generations for the text streamer.
+  std::vector<std::string> stream_keys;
+  std::vector<std::vector<int32_t>> stream_delta_tokens;
+  std::vector<bool> stream_finished;
+  int64_t generation_id = 0;
+  int64_t token_offset = 0;
+  p_group_offsets[0] = 0;
+  p_token_offsets[0] = 0;
+  p_logprob_offsets[0] = 0;
+  for (int64_t i = 0; i < num_requests; ++i) {
+    const RequestStreamOutput& output = outputs[i];
+    const std::string& request_id = output->request_id;
+    request_ids.push_back(request_id);
+    p_return_logprobs[i] = output->group_delta_logprob_json_strs.defined();
+    p_engine_timings[i * 3] = output->queue_time;
+    p_engine_timings[i * 3 + 1] = output->prefill_time;
+    p_engine_timings[i * 3 + 2] = static_cast<double>(output->prefix_cache_hit_length);
+
+    int num_parallel_generations = output->group_delta_token_ids.size();
+    for (int j = 0; j < num_parallel_generations; ++j, ++generation_id) {
+      const IntTuple& delta_token_ids = output->group_delta_token_ids[j];
+      std::copy(delta_token_ids.begin(), delta_token_ids.end(), p_token_ids + token_offset);
+      token_offset += delta_token_ids.size();
+      p_token_offsets[generation_id + 1] = token_offset;
+      p_finish_reason_codes[generation_id] = GetFinishReasonCode(output->group_finish_reason[j]);
+      if (text_streamer.defined()) {
+        // The request ids are length-prefixed, so the keys are unique.
+        stream_keys.push_back(std::to_string(request_id.size()) + ':' + request_id + ':' +
+                              std::to_string(j));
+        stream_delta_tokens.emplace_back(delta_token_ids.begin(), delta_token_ids.end());
+        stream_finished.push_back(output->group_finish_reason[j].defined());
+      }
+      if (p_return_logprobs[i]) {
+        for (const String& logprob_json_str : output->group_delta_logprob_json_strs.value()[j]) {
+          if (num_logprob_json_strs++ > 0) {
+            logprob_json_strs.push_back('\n');
+          }
+          logprob_json_strs.append(logprob_json_str);
+        }
+      }
+      p_logprob_offsets[generation_id + 1] = num_logprob_json_strs;
+    }
+    p_group_offsets[i + 1] = generation_id;
+  }
+
+  ObjectPtr<RequestStreamOutputBatchObj> n = make_object<RequestStreamOutputBatchObj>();
+  std::tie(n->request_id_bytes, n->request_id_offsets) = PackStrings(request_ids);
+  n->group_offsets = std::move(group_offsets);
+  n->token_offsets = std::move(token_offsets);
+  n->token_ids = std::move(token_ids);
+  n->finish_reason_codes = std::move(finish_reason_codes);
+  n->logprob_offsets = std::move(logprob_offsets);
+  n->return_logprobs = std::move(return_logprobs);
+  n->logprob_json_strs = std::move(logprob_json_strs);
+  n->engine_timings = std::move(engine_timings);
+  if (text_streamer.defined()) {
+    std::vector<std::string> delta_strs =
+        text_streamer.value()->Put(stream_keys, stream_delta_tokens, stream_finished);
+    auto [delta_text_bytes, text_offsets] = PackStrings(delta_strs);
+    n->delta_text_bytes = std::move(delta_text_bytes);
+    n->text_offsets = std::move(text_offsets);
+  }
+  return RequestStreamOutputBatch(n);
+}
+
+TVM_REGISTER_GLOBAL("mlc.serve.RequestStreamOutputBatchFromOutputs")
+    .set_body_typed([](Array<RequestStreamOutput> outputs,
+                       Optional<BatchTextStreamer> text_streamer) {
+      return RequestStreamOutputBatch::FromOutputs({outputs.begin(), outputs.end()},
+                                                   std::move(text_streamer));
+    });
+
+TVM_REGISTER_GLOBAL("mlc.serve.RequestStreamOutputBatchUnpack")
+    .set_body_typed([](RequestStreamOutputBatch batch) {
+      return Array<ObjectRef>{batch->request_id_bytes,    batch->request_id_offsets,
+                              batch->group_offsets,
+                              batch->token_offsets,       batch->token_ids,
+                              batch->finish_reason_codes, batch->logprob_offsets,
+                              batch->return_logprobs,     batch->logprob_json_strs,
+                              batch->delta_text_bytes,    batch->text_offsets,
+                              batch->engine_timings};
+    });
+
 }  // namespace serve
 }  // namespace llm
 }  // namespace mlc
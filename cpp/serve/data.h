@@ -11,6 +11,7 @@
 #include <tvm/runtime/ndarray.h>
 #include <tvm/runtime/object.h>
 
+#include "../streamer.h"
 #include "../tokenizers.h"
 
 namespace mlc {
@@ -170,6 +171,21 @@ class RequestStreamOutputObj : public Object {
    * of None if the request has not finished yet.
    */
   Array<Optional<String>> group_finish_reason;
+  /*!
+   * \brief The time in seconds of the request waiting in the engine until it starts prefill.
+   * It is only set (non-negative) in the output where some generation of the request finishes.
+   */
+  double queue_time = -1.0;
+  /*!
+   * \brief The time in seconds from the request starting prefill to its first token.
+   * It is only set (non-negative) in the output where some generation of the request finishes.
+   */
+  double prefill_time = -1.0;
+  /*!
+   * \brief The number of the request's input tokens reused from the prefix cache.
+   * It is only set (non-negative) in the output where some generation of the request finishes.
+   */
+  int64_t prefix_cache_hit_length = -1;
 
   static constexpr const char* _type_key = "mlc.serve.RequestStreamOutput";
   static constexpr const bool _type_has_method_sequal_reduce = false;
@@ -187,7 +203,112 @@ class RequestStreamOutput : public ObjectRef {
                                Optional<Array<Array<String>>> group_delta_logprob_json_strs,
                                Array<Optional<String>> finish_reason);
 
-  TVM_DEFINE_OBJECT_REF_METHODS(RequestStreamOutput, ObjectRef, RequestStreamOutputObj);
+  TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(RequestStreamOutput, ObjectRef, RequestStreamOutputObj);
+};
+
+/****************** RequestStreamOutputBatch ******************/
+
+/*!
+ * \brief The finish reasons that a request stream output can carry.
+ * The finish reason codes in RequestStreamOutputBatch index into this list.
+ * The list should be kept in sync with `_FINISH_REASONS` in "serve/data.py".
+ */
+constexpr const char* kRequestFinishReasons[] = {"stop", "length", "abort", "tool_calls",
+                                                 "error"};
+
+/*!
+ * \brief The columnar packing of a batch of request stream outputs.
+ * Instead of one object per request, the delta outputs of all the requests
+ * in the batch are packed into flat arrays, so that the callback can unpack
+ * the entire batch with a single function call.
+ */
+class RequestStreamOutputBatchObj : public Object {
+ public:
+  /*!
+   * \brief The uint8 UTF-8 bytes of the ids of the requests in the batch, concatenated.
+   * The ids are passed as bytes rather than a string, since the strings passed through
+   * FFI are truncated at the first NUL character.
+   */
+  NDArray request_id_bytes;
+  /*!
+   * \brief The int64 byte offsets of the id of each request, of shape `(num_requests + 1,)`,
+   * indexing into `request_id_bytes`.
+   */
+  NDArray request_id_offsets;
+  /*!
+   * \brief The int64 offsets of the generations of each request, of shape
+   * `(num_requests + 1,)`. The generations of the i-th request are in range
+   * `[group_offsets[i], group_offsets[i + 1])`.
+   */
+  NDArray group_offsets;
+  /*!
+   * \brief The int64 offsets of the delta tokens of each generation, of shape
+   * `(num_generations + 1,)`, indexing into `token_ids`.
+   */
+  NDArray token_offsets;
+  /*! \brief The int32 delta token ids of all the generations, flattened. */
+  NDArray token_ids;
+  /*!
+   * \brief The int32 finish reason code of each generation, of shape `(num_generations,)`.
+   * The code indexes into `kRequestFinishReasons`, and is -1 for unfinished generations.
+   */
+  NDArray finish_reason_codes;
+  /*!
+   * \brief The int64 offsets of the logprob JSON strings of each generation, of shape
+   * `(num_generations + 1,)`, indexing into the strings in `logprob_json_strs`.
+   */
+  NDArray logprob_offsets;
+  /*! \brief The boolean flags of shape `(num_requests,)` on if the requests return logprobs. */
+  NDArray return_logprobs;
+  /*!
+   * \brief The logprob JSON strings of all the generations, joined by the newline
+   * character. The logprob JSON strings never contain raw newline characters.
+   */
+  String logprob_json_strs;
+  /*!
+   * \brief The uint8 UTF-8 bytes of the decoded delta texts of all the generations,
+   * concatenated. The texts are not joined into a String, since a generated NUL
+   * character would truncate it in FFI.
+   * It is defined only when the batch is detokenized by a BatchTextStreamer.
+   */
+  Optional<NDArray> delta_text_bytes;
+  /*!
+   * \brief The int64 byte offsets of the delta text of each generation in
+   * `delta_text_bytes`, of shape `(num_generations + 1,)`.
+   * It is defined only when the batch is detokenized by a BatchTextStreamer.
+   */
+  Optional<NDArray> text_offsets;
+  /*!
+   * \brief The float64 engine timing of each request, of shape `(num_requests, 3)`.
+   * Each row is the queue time, the prefill time and the prefix cache hit length of
+   * a request, which are all negative when they are not set in the request's output.
+   * \sa RequestStreamOutputObj
+   */
+  NDArray engine_timings;
+
+  static constexpr const char* _type_key = "mlc.serve.RequestStreamOutputBatch";
+  static constexpr const bool _type_has_method_sequal_reduce = false;
+  static constexpr const bool _type_has_method_shash_reduce = false;
+  TVM_DECLARE_FINAL_OBJECT_INFO(RequestStreamOutputBatchObj, Object);
+};
+
+/*!
+ * \brief Managed reference to RequestStreamOutputBatchObj.
+ * \sa RequestStreamOutputBatchObj
+ */
+class RequestStreamOutputBatch : public ObjectRef {
+ public:
+  /*!
+   * \brief Pack the given request stream outputs into the columnar batch.
+   * \param outputs The request stream outputs to pack.
+   * \param text_streamer The optional batch text streamer. When it is given,
+   * the delta tokens of all the generations are detokenized in the batch,
+   * and the streams of finished generations are released from the streamer.
+   */
+  static RequestStreamOutputBatch FromOutputs(const std::vector<RequestStreamOutput>& outputs,
+                                              Optional<BatchTextStreamer> text_streamer);
+
+  TVM_DEFINE_OBJECT_REF_METHODS(RequestStreamOutputBatch, ObjectRef, RequestStreamOutputBatchObj);
 };
 
 }  // namespace serve
@@ -24,6 +24,7 @@
 #include "grammar/grammar_state_matcher.h"
 #include "logit_processor.h"
 #include "model.h"
+#include "prefix_cache.h"
 #include "request.h"
 #include "request_state.h"
 #include "sampler/sampler.h"
@@ -98,8 +99,22 @@ class EngineImpl : public Engine {
         max_num_tokens, static_cast<int>(this->models_.size()), trace_recorder);
     // Step 3. Initialize engine actions that represent state transitions.
     if (engine_config->speculative_mode != SpeculativeMode::kDisable) {
-      // Speculative decoding is only possible for more than one model.
-      ICHECK_GT(this->models_.size(), 1U);
+      if (engine_config->speculative_mode == SpeculativeMode::kNGram) {
+        // The n-gram proposal does not need a draft model.
+        CHECK_EQ(this->models_.size(), 1U)
+            << "The n-gram speculative mode does not use additional models.";
+      } else {
+        // Speculative decoding is only possible for more than one model.
+        ICHECK_GT(this->models_.size(), 1U);
+      }
+      SpecDraftLengthController& controller = this->estate_->spec_draft_length_controller;
+      controller.adaptive = engine_config->adaptive_spec_draft_length;
+      controller.max_draft_length = engine_config->spec_draft_length;
+      // Only the n-gram proposal can skip drafting. The first EAGLE draft token is generated
+      // along with prefill/verify, and a separate draft model must decode the last committed
+      // token in every step, or the token would be missing from its KV cache.
+      controller.min_draft_length =
+          engine_config->speculative_mode == SpeculativeMode::kNGram ? 0 : 1;
       switch (engine_config->speculative_mode) {
         case SpeculativeMode::kEagle:
           this->actions_ = {EngineAction::EagleNewRequestPrefill(this->models_,            //
@@ -115,6 +130,18 @@ class EngineImpl : public Engine {
                                                            this->model_workspaces_, engine_config,
                                                            this->trace_recorder_)};
           break;
+        case SpeculativeMode::kNGram:
+          this->actions_ = {EngineAction::NewRequestPrefill(this->models_,            //
+                                                            logit_processor,          //
+                                                            sampler,                  //
+                                                            this->model_workspaces_,  //
+                                                            engine_config,            //
+                                                            this->trace_recorder_),
+                            EngineAction::NGramBatchDraft(this->trace_recorder_,
+                                                          engine_config->spec_draft_length),
+                            EngineAction::BatchVerify(this->models_, logit_processor, sampler,
+                                                      engine_config, this->trace_recorder_)};
+          break;
         default:
           this->actions_ = {EngineAction::NewRequestPrefill(this->models_,            //
                                                             logit_processor,          //
@@ -123,11 +150,15 @@ class EngineImpl : public Engine {
                                                             engine_config,            //
                                                             this->trace_recorder_),
                             EngineAction::BatchDraft(this->models_, logit_processor, sampler,
-                                                     this->trace_recorder_),
+                                                     this->trace_recorder_,
+                                                     engine_config->spec_draft_length),
                             EngineAction::BatchVerify(this->models_, logit_processor, sampler,
                                                       engine_config, this->trace_recorder_)};
       }
     } else {
+      // The prefill steps decode the running requests as well when mixing is enabled.
+      this->estate_->prefill_token_budget_controller.target_step_latency =
+          engine_config->target_step_latency_ms / 1e3;
       this->actions_ = {EngineAction::NewRequestPrefill(this->models_,            //
                                                         logit_processor,          //
                                                         sampler,                  //
@@ -137,9 +168,48 @@ class EngineImpl : public Engine {
                         EngineAction::BatchDecode(this->models_, logit_processor, sampler,
                                                   this->trace_recorder_)};
     }
-    // Step 4. Automatically set the threading backend max concurrency.
+    // Step 4. Create the prefix cache.
+    // Prefix caching requires the KV data of each sequence to correspond to exactly
+    // its tokens, which does not hold with sliding window or speculative decoding.
+    if (engine_config->prefix_cache_max_num_recycling_seqs > 0) {
+      if (engine_config->speculative_mode == SpeculativeMode::kDisable &&
+          this->models_[0]->GetSlidingWindowSize() == -1) {
+        this->estate_->prefix_cache =
+            PrefixCache(engine_config->prefix_cache_max_num_recycling_seqs,
+                        engine_config->max_num_sequence, engine_config->max_total_sequence_length,
+                        [this](int64_t seq_id) {
+                          RemoveRequestFromModel(this->estate_, seq_id, this->models_);
+                          this->estate_->id_manager.RecycleId(seq_id);
+                        });
+      } else {
+        LOG(WARNING) << "Prefix cache is disabled since it is not supported with sliding window "
+                        "or speculative decoding.";
+      }
+    }
+    // Step 5. Create the KV swap pool.
+    // Swapping requires copying the KV data of each sequence to and from host memory,
+    // which is probed on the KV cache since not every KV cache runtime supports it.
+    if (engine_config->kv_swap_space_gb > 0) {
+      int64_t probe_seq_id = this->estate_->id_manager.GetNewId();
+      if (this->models_.size() == 1 &&
+          engine_config->speculative_mode == SpeculativeMode::kDisable &&
+          this->models_[0]->ProbeKVSwap(probe_seq_id)) {
+        this->estate_->kv_swap_pool = KVSwapPool(
+            this->models_[0],
+            static_cast<int64_t>(engine_config->kv_swap_space_gb * 1024 * 1024 * 1024));
+      } else {
+        LOG(WARNING) << "KV swap is disabled and the preempted requests are recomputed, since "
+                        "it is not supported by the KV cache or with speculative decoding.";
+      }
+      this->estate_->id_manager.RecycleId(probe_seq_id);
+    }
+    // Step 6. Automatically set the threading backend max concurrency.
     this->engine_config_ = engine_config;
     SetThreadMaxConcurrency();
+    // Step 7. Initialize the metrics. All the KV cache pages are available at this point.
+    this->estate_->metrics->kv_cache_num_total_pages.store(
+        this->models_[0]->GetNumAvailablePages(), std::memory_order_relaxed);
+    this->last_stats_ = this->estate_->stats;
   }
 
   void Reset() final {
@@ -148,12 +218,16 @@ class EngineImpl : public Engine {
     for (Model model : models_) {
       model->Reset();
     }
+    last_stats_ = estate_->stats;
+    UpdateMetrics();
   }
 
   bool Empty() final { return estate_->request_states.empty(); }
 
   String Stats() final { return estate_->stats.AsJSON(); }
 
+  EngineMetrics Metrics() final { return estate_->metrics; }
+
   Optional<PackedFunc> GetRequestStreamCallback() final { return request_stream_callback_; }
 
   void SetRequestStreamCallback(Optional<PackedFunc> request_stream_callback) final {
@@ -224,6 +298,9 @@ class EngineImpl : public Engine {
         std::find(estate_->waiting_queue.begin(), estate_->waiting_queue.end(), request);
 
     for (const RequestStateEntry& rsentry : rstate->entries) {
+      if (estate_->kv_swap_pool.defined()) {
+        estate_->kv_swap_pool->RemoveSequence(rsentry->mstates[0]->internal_id);
+      }
       estate_->id_manager.RecycleId(rsentry->mstates[0]->internal_id);
     }
     estate_->request_states.erase(request->id);
@@ -271,16 +348,21 @@ class EngineImpl : public Engine {
   void Step() final {
     CHECK(request_stream_callback_.defined())
         << "The request stream callback is not set. Engine cannot execute.";
+    bool action_taken = false;
     for (EngineAction action : actions_) {
       Array<Request> processed_requests = action->Step(estate_);
       if (!processed_requests.empty()) {
         ActionStepPostProcess(processed_requests, estate_, models_, tokenizer_,
                               request_stream_callback_.value(),
                               engine_config_->max_single_sequence_length);
-        return;
+        action_taken = true;
+        break;
       }
     }
-    ICHECK(estate_->running_queue.empty())
+    // Update the metrics in every step, including the steps where no action is taken,
+    // so that the gauges also reflect the requests added or aborted since the last step.
+    UpdateMetrics();
+    ICHECK(action_taken || estate_->running_queue.empty())
         << "Internal assumption violated: It is expected that an engine step takes at least one "
            "action (e.g. prefill, decode, etc.) but it does not.";
   }
@@ -293,6 +375,39 @@ class EngineImpl : public Engine {
   }
 
  private:
+  /*!
+   * \brief Update the gauges in the engine metrics, and accumulate the increments
+   * of engine statistics since the last update into the counters in the metrics.
+   */
+  void UpdateMetrics() {
+    EngineMetricsObj* metrics = estate_->metrics.operator->();
+    metrics->num_running_requests.store(estate_->running_queue.size(),
+                                        std::memory_order_relaxed);
+    metrics->num_waiting_requests.store(estate_->waiting_queue.size(),
+                                        std::memory_order_relaxed);
+    metrics->kv_cache_num_used_pages.store(
+        metrics->kv_cache_num_total_pages.load(std::memory_order_relaxed) -
+            models_[0]->GetNumAvailablePages(),
+        std::memory_order_relaxed);
+
+    const EngineStats& stats = estate_->stats;
+    metrics->num_draft_tokens.fetch_add(stats.total_draft_length - last_stats_.total_draft_length,
+                                        std::memory_order_relaxed);
+    metrics->num_accepted_tokens.fetch_add(
+        stats.total_accepted_length - last_stats_.total_accepted_length,
+        std::memory_order_relaxed);
+    // The engine is the single writer of the metrics.
+    metrics->engine_prefill_time.store(
+        metrics->engine_prefill_time.load(std::memory_order_relaxed) +
+            stats.engine_total_prefill_time - last_stats_.engine_total_prefill_time,
+        std::memory_order_relaxed);
+    metrics->engine_decode_time.store(
+        metrics->engine_decode_time.load(std::memory_order_relaxed) +
+            stats.engine_total_decode_time - last_stats_.engine_total_decode_time,
+        std::memory_order_relaxed);
+    last_stats_ = stats;
+  }
+
   /*! \brief Set the maximum threading backend concurrency. */
   void SetThreadMaxConcurrency() {
     int host_cpu_usage = 1;
@@ -320,6 +435,8 @@ class EngineImpl : public Engine {
 
   // Engine state, managing requests and request states.
   EngineState estate_;
+  // The engine statistics at the last update of the engine metrics.
+  EngineStats last_stats_;
   // Configurations and singletons
   EngineConfig engine_config_;
   Tokenizer tokenizer_;
@@ -361,6 +478,7 @@ class EngineModule : public ModuleNode {
   TVM_MODULE_VTABLE_ENTRY("abort_request", &EngineModule::Abort);
   TVM_MODULE_VTABLE_ENTRY("step", &EngineModule::Step);
   TVM_MODULE_VTABLE_ENTRY("stats", &EngineModule::Stats);
+  TVM_MODULE_VTABLE_ENTRY("metrics", &EngineModule::Metrics);
   TVM_MODULE_VTABLE_ENTRY("reset", &EngineModule::Reset);
   TVM_MODULE_VTABLE_ENTRY("get_request_stream_callback", &EngineModule::GetRequestStreamCallback);
   TVM_MODULE_VTABLE_ENTRY("set_request_stream_callback", &EngineModule::SetRequestStreamCallback);
@@ -392,6 +510,8 @@ class EngineModule : public ModuleNode {
   void Reset() { return GetEngine()->Reset(); }
   /*! \brief Redirection to `Engine::Stats` */
   String Stats() { return GetEngine()->Stats(); }
+  /*! \brief Redirection to `Engine::Metrics`, returning the metrics in JSON string. */
+  String Metrics() { return GetEngine()->Metrics()->AsJSON(); }
 
  private:
   Engine* GetEngine() {
@@ -10,6 +10,7 @@
 
 #include "data.h"
 #include "event_trace_recorder.h"
+#include "metrics.h"
 #include "request.h"
 #include "request_state.h"
 
@@ -68,6 +69,12 @@ class Engine {
   /*! \brief Get the statistics of the Engine in JSON string. */
   virtual String Stats() = 0;
 
+  /*!
+   * \brief Get the runtime metrics of the Engine.
+   * The metrics can be read from other threads while the engine is running.
+   */
+  virtual EngineMetrics Metrics() = 0;
+
   /*! \brief Get the request stream callback function of the engine. */
   virtual Optional<PackedFunc> GetRequestStreamCallback() = 0;
 
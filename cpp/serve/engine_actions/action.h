@@ -129,6 +129,17 @@ class EngineAction : public ObjectRef {
                                       Optional<EventTraceRecorder> trace_recorder,
                                       int draft_length = 4);
 
+  /*!
+   * \brief Create the action that proposes the speculative draft of requests in the
+   * `running_queue` of engine state by looking up the trailing n-gram of each request
+   * in its prompt and generated tokens. No draft model is involved.
+   * \param trace_recorder The event trace recorder for requests.
+   * \param draft_length The max number of draft tokens.
+   * \return The created action object.
+   */
+  static EngineAction NGramBatchDraft(Optional<EventTraceRecorder> trace_recorder,
+                                      int draft_length = 4);
+
   /*!
    * \brief Create the action that runs one-step speculative verification for requests in the
    * `running_queue` of engine state. Preempt low-priority requests
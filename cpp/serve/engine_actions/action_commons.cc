@@ -7,6 +7,10 @@
 
 #include <tvm/runtime/nvtx.h>
 
+#include <algorithm>
+#include <chrono>
+#include <tuple>
+
 namespace mlc {
 namespace llm {
 namespace serve {
@@ -16,6 +20,38 @@ void RemoveRequestFromModel(EngineState estate, int64_t req_internal_id, Array<M
   for (Model model : models) {
     model->RemoveSequence(req_internal_id);
   }
+  // Stop tracking the request in prefix cache, as its KV data no longer exist.
+  if (estate->prefix_cache.defined()) {
+    estate->prefix_cache->RemoveSequence(req_internal_id);
+  }
+}
+
+void ReleaseFinishedRequestStateEntry(const RequestStateEntry& rsentry, EngineState estate,
+                                      Array<Model> models) {
+  int64_t internal_id = rsentry->mstates[0]->internal_id;
+  if (estate->prefix_cache.defined() && estate->prefix_cache->HasSequence(internal_id)) {
+    // The KV cache holds the KV data of all the input tokens and the committed
+    // tokens except the last one, which has never been fed into the model.
+    std::vector<int32_t> tokens;
+    for (const Data& data : rsentry->request->inputs) {
+      const auto* token_input = data.as<TokenDataNode>();
+      ICHECK(token_input != nullptr);
+      tokens.insert(tokens.end(), token_input->token_ids.begin(), token_input->token_ids.end());
+    }
+    const std::vector<SampleResult>& committed_tokens = rsentry->mstates[0]->committed_tokens;
+    for (int i = 0; i + 1 < static_cast<int>(committed_tokens.size()); ++i) {
+      tokens.push_back(committed_tokens[i].sampled_token_id.first);
+    }
+    int num_cached_tokens = estate->prefix_cache->GetSequenceLength(internal_id);
+    ICHECK_LE(num_cached_tokens, static_cast<int>(tokens.size()));
+    if (estate->prefix_cache->ExtendSequence(
+            internal_id, std::vector<int32_t>(tokens.begin() + num_cached_tokens, tokens.end()))) {
+      estate->prefix_cache->RecycleSequence(internal_id);
+      return;
+    }
+  }
+  RemoveRequestFromModel(estate, internal_id, models);
+  estate->id_manager.RecycleId(internal_id);
 }
 
 void ProcessFinishedRequestStateEntries(std::vector<RequestStateEntry> finished_rsentries,
@@ -28,9 +64,8 @@ void ProcessFinishedRequestStateEntries(std::vector<RequestStateEntry> finished_
     ICHECK(rsentry->child_indices.empty());
     // Mark the status of this entry as finished.
     rsentry->status = RequestStateStatus::kFinished;
-    // Remove the request state entry from all the models.
-    RemoveRequestFromModel(estate, rsentry->mstates[0]->internal_id, models);
-    estate->id_manager.RecycleId(rsentry->mstates[0]->internal_id);
+    // Remove the request state entry from all the models, or keep it in prefix cache.
+    ReleaseFinishedRequestStateEntry(rsentry, estate, models);
 
     RequestState rstate = estate->GetRequestState(rsentry->request);
     int parent_idx = rsentry->parent_idx;
@@ -49,9 +84,8 @@ void ProcessFinishedRequestStateEntries(std::vector<RequestStateEntry> finished_
       // All the children of the parent request state entry have finished.
       // So we mark the parent entry as finished.
       rstate->entries[parent_idx]->status = RequestStateStatus::kFinished;
-      // Remove the request state entry from all the models.
-      RemoveRequestFromModel(estate, rstate->entries[parent_idx]->mstates[0]->internal_id, models);
-      estate->id_manager.RecycleId(rstate->entries[parent_idx]->mstates[0]->internal_id);
+      // Remove the request state entry from all the models, or keep it in prefix cache.
+      ReleaseFinishedRequestStateEntry(rstate->entries[parent_idx], estate, models);
       // Climb up to the parent.
       parent_idx = rstate->entries[parent_idx]->parent_idx;
     }
@@ -67,17 +101,31 @@ void ProcessFinishedRequestStateEntries(std::vector<RequestStateEntry> finished_
       // Update engine statistics.
       const RequestStateEntry& root_rsentry = rstate->entries[0];
       auto trequest_finish = std::chrono::high_resolution_clock::now();
-      estate->stats.request_total_prefill_time +=
+      double prefill_time =
           static_cast<double>((root_rsentry->tprefill_finish - root_rsentry->tadd).count()) / 1e9;
-      estate->stats.total_prefill_length += rsentry->request->input_total_length;
-      estate->stats.request_total_decode_time +=
+      double decode_time =
           static_cast<double>((trequest_finish - root_rsentry->tprefill_finish).count()) / 1e9;
-      for (const RequestStateEntry& entry : rstate->entries) {
-        estate->stats.total_decode_length += entry->mstates[0]->committed_tokens.size();
-      }
+      estate->stats.request_total_prefill_time += prefill_time;
+      estate->stats.total_prefill_length += rsentry->request->input_total_length;
+      estate->stats.request_total_decode_time += decode_time;
       // For a request, the first token in committed_tokens is generated by prefilling
       // and the rest are generated by decoding. So we subtract the first token.
-      estate->stats.total_decode_length -= rsentry->request->generation_cfg->n;
+      int64_t decode_length = -rsentry->request->generation_cfg->n;
+      for (const RequestStateEntry& entry : rstate->entries) {
+        decode_length += entry->mstates[0]->committed_tokens.size();
+      }
+      estate->stats.total_decode_length += decode_length;
+
+      // Update engine metrics.
+      estate->metrics->queue_time.Observe(
+          static_cast<double>((root_rsentry->tprefill_start - root_rsentry->tadd).count()) / 1e9);
+      estate->metrics->time_to_first_token.Observe(prefill_time);
+      estate->metrics->end_to_end_latency.Observe(prefill_time + decode_time);
+      if (decode_length > 0) {
+        // The parallel generations of a request are decoded in the same steps.
+        estate->metrics->inter_token_latency.Observe(
+            decode_time * rsentry->request->generation_cfg->n / decode_length);
+      }
     }
   }
 }
@@ -92,6 +140,7 @@ void ActionStepPostProcess(Array<Request> requests, EngineState estate, Array<Mo
 
   Array<RequestStreamOutput> callback_delta_outputs;
   callback_delta_outputs.reserve(requests.size());
+  int64_t num_output_tokens = 0;
 
   // - Collect new generated tokens and finish reasons for requests.
   for (Request request : requests) {
@@ -105,6 +154,7 @@ void ActionStepPostProcess(Array<Request> requests, EngineState estate, Array<Mo
     group_finish_reason.reserve(n);
 
     bool invoke_callback = false;
+    bool has_finished_generation = false;
     for (int i = 0; i < n; ++i) {
       const RequestStateEntry& rsentry = n == 1 ? rstate->entries[0] : rstate->entries[i + 1];
       const DeltaRequestReturn& delta_request_ret =
@@ -115,20 +165,36 @@ void ActionStepPostProcess(Array<Request> requests, EngineState estate, Array<Mo
       group_finish_reason.push_back(delta_request_ret.finish_reason);
       if (delta_request_ret.finish_reason.defined()) {
         invoke_callback = true;
+        has_finished_generation = true;
         finished_rsentries.push_back(rsentry);
       }
 
       if (!delta_request_ret.delta_token_ids.empty()) {
         invoke_callback = true;
+        num_output_tokens += delta_request_ret.delta_token_ids.size();
       }
     }
 
     if (invoke_callback) {
-      callback_delta_outputs.push_back(RequestStreamOutput(
+      RequestStreamOutput output(
           request->id, std::move(group_delta_token_ids),
           request->generation_cfg->logprobs > 0 ? std::move(group_delta_logprob_json_strs)
                                                 : Optional<Array<Array<String>>>(),
-          std::move(group_finish_reason)));
+          std::move(group_finish_reason));
+      if (has_finished_generation) {
+        // Return the engine-side timing of the request along with its finish,
+        // so that the per-request timing breakdown can be reported.
+        const RequestStateEntry& root_rsentry = rstate->entries[0];
+        output->queue_time =
+            static_cast<double>((root_rsentry->tprefill_start - root_rsentry->tadd).count()) /
+            1e9;
+        output->prefill_time = static_cast<double>(
+                                   (root_rsentry->tprefill_finish - root_rsentry->tprefill_start)
+                                       .count()) /
+                               1e9;
+        output->prefix_cache_hit_length = root_rsentry->prefix_cache_hit_length;
+      }
+      callback_delta_outputs.push_back(std::move(output));
     }
   }
 
@@ -137,16 +203,45 @@ void ActionStepPostProcess(Array<Request> requests, EngineState estate, Array<Mo
     // - Invoke the stream callback function once for all collected requests.
     request_stream_callback(callback_delta_outputs);
   }
+  estate->metrics->num_decode_tokens.fetch_add(num_output_tokens, std::memory_order_relaxed);
 
   ProcessFinishedRequestStateEntries(std::move(finished_rsentries), std::move(estate),
                                      std::move(models), max_single_sequence_length);
 }
 
+/*!
+ * \brief Check if the KV data of the given request state entry to preempt can be swapped out.
+ * Only the single entry of requests whose inputs are all tokens can be swapped, since
+ * the swapped prefix is dropped from the token inputs when the entry is swapped in.
+ */
+inline bool IsKVSwappable(const EngineState& estate, const RequestStateEntry& rsentry,
+                          const Array<Model>& models, bool partially_alive) {
+  if (!estate->kv_swap_pool.defined() || models.size() != 1 || partially_alive ||
+      rsentry->parent_idx != -1 || !rsentry->child_indices.empty() ||
+      rsentry->mstates[0]->committed_tokens.empty()) {
+    return false;
+  }
+  for (const Data& data : rsentry->request->inputs) {
+    if (!data->IsInstance<TokenDataNode>()) {
+      return false;
+    }
+  }
+  return true;
+}
+
 RequestStateEntry PreemptLastRunningRequestStateEntry(EngineState estate,
                                                       const Array<Model>& models,
                                                       Optional<EventTraceRecorder> trace_recorder) {
   ICHECK(!estate->running_queue.empty());
-  Request request = estate->running_queue.back();
+  // Select the last running request of the lowest priority.
+  int preempt_request_idx = static_cast<int>(estate->running_queue.size()) - 1;
+  for (int i = preempt_request_idx - 1; i >= 0; --i) {
+    if (estate->running_queue[i]->generation_cfg->priority <
+        estate->running_queue[preempt_request_idx]->generation_cfg->priority) {
+      preempt_request_idx = i;
+    }
+  }
+  Request request = estate->running_queue[preempt_request_idx];
 
   // Find the last alive request state entry, which is what we want to preempt.
   RequestState rstate = estate->GetRequestState(request);
@@ -193,11 +288,23 @@ RequestStateEntry PreemptLastRunningRequestStateEntry(EngineState estate,
     }
     mstate->inputs = std::move(inputs);
   }
+  // - Swap the KV data out to host memory when it is cheaper than recomputing them.
+  // The inputs above are kept, and the swapped prefix of them is dropped on swap-in.
+  if (IsKVSwappable(estate, rsentry, models, partially_alive)) {
+    // The KV cache holds the KV data of all the input tokens and the committed
+    // tokens except the last one, which has never been fed into the model.
+    int num_kv_tokens = rsentry->request->input_total_length +
+                        static_cast<int>(rsentry->mstates[0]->committed_tokens.size()) - 1;
+    if (estate->kv_swap_pool->ShouldSwapOut(num_kv_tokens)) {
+      estate->kv_swap_pool->SwapOut(rsentry->mstates[0]->internal_id, num_kv_tokens);
+      RECORD_EVENT(trace_recorder, rsentry->request->id, "swap out");
+    }
+  }
   RemoveRequestFromModel(estate, rsentry->mstates[0]->internal_id, models);
 
   if (preempt_rstate_idx == 0) {
     // Remove from running queue.
-    estate->running_queue.erase(estate->running_queue.end() - 1);
+    estate->running_queue.erase(estate->running_queue.begin() + preempt_request_idx);
   }
   if (!partially_alive && preempt_rstate_idx == static_cast<int>(rstate->entries.size()) - 1) {
     // Add to the front of waiting queue.
@@ -206,6 +313,111 @@ RequestStateEntry PreemptLastRunningRequestStateEntry(EngineState estate,
   return rsentry;
 }
 
+/*! \brief Check if the request has started, i.e., been partially prefilled or preempted. */
+inline bool IsRequestStarted(const RequestState& rstate) {
+  for (const RequestStateEntry& rsentry : rstate->entries) {
+    if (rsentry->status == RequestStateStatus::kAlive ||
+        !rsentry->mstates[0]->committed_tokens.empty()) {
+      return true;
+    }
+  }
+  return false;
+}
+
+/*!
+ * \brief Stably reorder the waiting queue by (higher priority, earlier deadline).
+ * The started requests take the earliest deadline, and the requests without
+ * deadline take the latest one.
+ */
+inline void SortWaitingQueueByPriority(EngineState estate,
+                                       Optional<EventTraceRecorder> trace_recorder) {
+  using TimePoint = std::chrono::high_resolution_clock::time_point;
+  int num_waiting_requests = estate->waiting_queue.size();
+  if (num_waiting_requests <= 1) {
+    return;
+  }
+  std::vector<std::tuple<int, TimePoint, int>> sort_keys;
+  sort_keys.reserve(num_waiting_requests);
+  for (int i = 0; i < num_waiting_requests; ++i) {
+    const Request& request = estate->waiting_queue[i];
+    RequestState rstate = estate->GetRequestState(request);
+    TimePoint deadline = TimePoint::max();
+    if (IsRequestStarted(rstate)) {
+      deadline = TimePoint::min();
+    } else if (request->generation_cfg->ttft_deadline_ms >= 0) {
+      deadline = rstate->entries[0]->tadd +
+                 std::chrono::duration_cast<TimePoint::duration>(
+                     std::chrono::duration<double, std::milli>(
+                         request->generation_cfg->ttft_deadline_ms));
+    }
+    sort_keys.emplace_back(-request->generation_cfg->priority, deadline, i);
+  }
+  std::sort(sort_keys.begin(), sort_keys.end());
+
+  std::vector<Request> waiting_queue;
+  waiting_queue.reserve(num_waiting_requests);
+  for (int i = 0; i < num_waiting_requests; ++i) {
+    int original_idx = std::get<2>(sort_keys[i]);
+    waiting_queue.push_back(estate->waiting_queue[original_idx]);
+    if (i < original_idx) {
+      RECORD_EVENT(trace_recorder, waiting_queue.back()->id,
+                   "schedule ahead in waiting queue by priority and deadline");
+    }
+  }
+  estate->waiting_queue = std::move(waiting_queue);
+}
+
+void ScheduleWaitingQueueForPrefill(EngineState estate, const Array<Model>& models,
+                                    const EngineConfig& engine_config,
+                                    Optional<EventTraceRecorder> trace_recorder) {
+  if (estate->waiting_queue.empty()) {
+    return;
+  }
+  SortWaitingQueueByPriority(estate, trace_recorder);
+
+  // - Preempt the running requests of lower priority if the KV cache cannot
+  // hold the next prefill chunk of the first waiting request, after the
+  // recycling sequences in prefix cache are all evicted.
+  Request request = estate->waiting_queue[0];
+  RequestStateEntry rsentry = estate->GetRequestState(request)->entries[0];
+  if (rsentry->status != RequestStateStatus::kPending || rsentry->mstates[0]->inputs.empty()) {
+    return;
+  }
+  int input_length =
+      std::min(rsentry->mstates[0]->GetInputLength(), engine_config->prefill_chunk_size);
+  int num_required_pages =
+      (input_length + engine_config->kv_cache_page_size - 1) / engine_config->kv_cache_page_size;
+  bool preempted = false;
+  while (models[0]->GetNumAvailablePages() < num_required_pages) {
+    // Evict the recycling sequences in prefix cache before preempting running requests.
+    if (estate->prefix_cache.defined() && estate->prefix_cache->TryFreeMemory()) {
+      continue;
+    }
+    if (estate->running_queue.empty()) {
+      break;
+    }
+    int lowest_running_priority = request->generation_cfg->priority;
+    for (const Request& running_request : estate->running_queue) {
+      lowest_running_priority =
+          std::min(lowest_running_priority, running_request->generation_cfg->priority);
+    }
+    if (lowest_running_priority >= request->generation_cfg->priority) {
+      break;
+    }
+    RECORD_EVENT(trace_recorder, request->id, "preempt lower priority request for prefill");
+    RequestStateEntry preempted_rsentry =
+        PreemptLastRunningRequestStateEntry(estate, models, trace_recorder);
+    RECORD_EVENT(trace_recorder, preempted_rsentry->request->id,
+                 "preempted by higher priority request");
+    preempted = true;
+  }
+  if (preempted) {
+    // The preempted requests are added to the front of the waiting queue.
+    // Reorder the waiting queue again so that they are behind the first request.
+    SortWaitingQueueByPriority(estate, /*trace_recorder=*/NullOpt);
+  }
+}
+
 }  // namespace serve
 }  // namespace llm
 }  // namespace mlc
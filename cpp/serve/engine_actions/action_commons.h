@@ -26,6 +26,17 @@ using namespace tvm::runtime;
  */
 void RemoveRequestFromModel(EngineState estate, int64_t req_internal_id, Array<Model> models);
 
+/*!
+ * \brief Release the sequence of a finished request state entry.
+ * The sequence is kept resident in the KV cache for prefix reuse when it is
+ * tracked by the prefix cache, or otherwise removed from the models.
+ * \param rsentry The finished request state entry.
+ * \param estate The engine state to update after release.
+ * \param models The models to remove the sequence from.
+ */
+void ReleaseFinishedRequestStateEntry(const RequestStateEntry& rsentry, EngineState estate,
+                                      Array<Model> models);
+
 /*!
  * \brief The request post-processing after an engine action step.
  * It includes
@@ -46,7 +57,9 @@ void ActionStepPostProcess(Array<Request> requests, EngineState estate, Array<Mo
                            int max_single_sequence_length);
 
 /*!
- * \brief Preempt the last running request state entry from `running_queue`.
+ * \brief Preempt the last running request state entry of the lowest priority
+ * from `running_queue`. Among the running requests of the lowest priority,
+ * the last one in `running_queue` is selected.
  * If all entries of the selected request have been preempted,
  * remove it from running request.
  * If it is not in the waiting request queue, add it to the waiting queue.
@@ -59,6 +72,25 @@ RequestStateEntry PreemptLastRunningRequestStateEntry(EngineState estate,
                                                       const Array<Model>& models,
                                                       Optional<EventTraceRecorder> trace_recorder);
 
+/*!
+ * \brief Schedule the requests in `waiting_queue` for prefill.
+ * - The waiting requests are stably reordered by priority from high to low.
+ * Among the requests of the same priority, the ones that have started (i.e.,
+ * being partially prefilled or preempted) go first, followed by the ones with
+ * earlier TTFT deadlines, and then the ones without deadline.
+ * - When the KV cache cannot hold the next prefill chunk of the first waiting
+ * request, the running request state entries of lower priority are preempted
+ * until the chunk fits.
+ * Scheduler decisions are recorded in the event trace.
+ * \param estate The engine state to update.
+ * \param models The models to remove preempted requests from.
+ * \param engine_config The engine config.
+ * \param trace_recorder The event trace recorder for requests.
+ */
+void ScheduleWaitingQueueForPrefill(EngineState estate, const Array<Model>& models,
+                                    const EngineConfig& engine_config,
+                                    Optional<EventTraceRecorder> trace_recorder);
+
 /*! \brief Get the running request entries from the engine state. */
 inline std::vector<RequestStateEntry> GetRunningRequestStateEntries(const EngineState& estate) {
   std::vector<RequestStateEntry> rsentries;
@@ -47,6 +47,10 @@ class BatchDecodeActionObj : public EngineActionObj {
       NVTXScopedRange nvtx_scope("BatchDecode getting requests");
       running_rsentries = GetRunningRequestStateEntries(estate);
       while (!CanDecode(running_rsentries.size())) {
+        // Evict the recycling sequences in prefix cache before preempting running requests.
+        if (estate->prefix_cache.defined() && estate->prefix_cache->TryFreeMemory()) {
+          continue;
+        }
         RequestStateEntry preempted =
             PreemptLastRunningRequestStateEntry(estate, models_, trace_recorder_);
         if (preempted.same_as(running_rsentries.back())) {
@@ -124,7 +128,9 @@ class BatchDecodeActionObj : public EngineActionObj {
     }
 
     auto tend = std::chrono::high_resolution_clock::now();
-    estate->stats.engine_total_decode_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->stats.engine_total_decode_time += elapsed_time;
+    estate->prefill_token_budget_controller.UpdateDecodeTime(elapsed_time);
 
     return estate->running_queue;
   }
@@ -3,6 +3,7 @@
  * \file serve/engine_actions/batch_draft.cc
  */
 
+#include <algorithm>
 #include <numeric>
 
 #include "../config.h"
@@ -50,44 +51,48 @@ class BatchDraftActionObj : public EngineActionObj {
 
     auto tstart = std::chrono::high_resolution_clock::now();
 
-    int num_rsentries = running_rsentries.size();
-    Array<String> request_ids;
-    std::vector<int64_t> request_internal_ids;
-    Array<GenerationConfig> generation_cfg;
-    std::vector<RandomGenerator*> rngs;
-    request_ids.reserve(num_rsentries);
-    request_internal_ids.reserve(num_rsentries);
-    generation_cfg.reserve(num_rsentries);
+    // The draft length of each request, which is at most `draft_length_`.
+    std::vector<int> draft_lengths;
+    draft_lengths.reserve(running_rsentries.size());
+    int num_rounds = 0;
     for (const RequestStateEntry& rsentry : running_rsentries) {
-      request_ids.push_back(rsentry->request->id);
-      request_internal_ids.push_back(rsentry->mstates[0]->internal_id);
-      generation_cfg.push_back(rsentry->request->generation_cfg);
-      rngs.push_back(&rsentry->rng);
+      draft_lengths.push_back(std::min(
+          estate->spec_draft_length_controller.GetDraftLength(rsentry), draft_length_));
+      // Skipping the draft model would leave the last committed token out of its KV cache.
+      ICHECK_GE(draft_lengths.back(), 1);
+      num_rounds = std::max(num_rounds, draft_lengths.back());
     }
 
     // The first model doesn't get involved in draft proposal.
     for (int model_id = 1; model_id < static_cast<int>(models_.size()); ++model_id) {
-      // Collect
-      // - the last committed token,
-      // - the request model state
-      // of each request.
-      std::vector<int> input_tokens;
-      Array<RequestModelState> mstates;
-      input_tokens.reserve(num_rsentries);
-      mstates.reserve(num_rsentries);
-      for (const RequestStateEntry& rsentry : running_rsentries) {
-        mstates.push_back(rsentry->mstates[model_id]);
-      }
-      // draft_length_ rounds of draft proposal.
-      for (int draft_id = 0; draft_id < draft_length_; ++draft_id) {
-        // prepare new input tokens
-        input_tokens.clear();
-        for (int i = 0; i < num_rsentries; ++i) {
+      // Rounds of draft proposal, each of which runs the requests whose draft is not finished.
+      for (int draft_id = 0; draft_id < num_rounds; ++draft_id) {
+        // Collect
+        // - the last committed or draft token,
+        // - the request model state
+        // of each request in this round.
+        Array<String> request_ids;
+        std::vector<int64_t> request_internal_ids;
+        Array<GenerationConfig> generation_cfg;
+        std::vector<RandomGenerator*> rngs;
+        std::vector<int> input_tokens;
+        Array<RequestModelState> mstates;
+        for (int i = 0; i < static_cast<int>(running_rsentries.size()); ++i) {
+          if (draft_lengths[i] <= draft_id) {
+            continue;
+          }
+          const RequestStateEntry& rsentry = running_rsentries[i];
+          request_ids.push_back(rsentry->request->id);
+          request_internal_ids.push_back(rsentry->mstates[0]->internal_id);
+          generation_cfg.push_back(rsentry->request->generation_cfg);
+          rngs.push_back(&rsentry->rng);
+          mstates.push_back(rsentry->mstates[model_id]);
           // The first draft proposal uses the last committed token.
           input_tokens.push_back(
-              draft_id == 0 ? mstates[i]->committed_tokens.back().sampled_token_id.first
-                            : mstates[i]->draft_output_tokens.back().sampled_token_id.first);
+              draft_id == 0 ? mstates.back()->committed_tokens.back().sampled_token_id.first
+                            : mstates.back()->draft_output_tokens.back().sampled_token_id.first);
         }
+        int num_rsentries = mstates.size();
 
         // - Compute embeddings.
         RECORD_EVENT(trace_recorder_, request_ids, "start proposal embedding");
@@ -131,7 +136,9 @@ class BatchDraftActionObj : public EngineActionObj {
     }
 
     auto tend = std::chrono::high_resolution_clock::now();
-    estate->stats.engine_total_decode_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->stats.engine_total_decode_time += elapsed_time;
+    estate->spec_draft_length_controller.UpdateDraftTime(elapsed_time, num_rounds);
 
     return {};
   }
@@ -158,7 +165,7 @@ class BatchDraftActionObj : public EngineActionObj {
   Sampler sampler_;
   /*! \brief Event trace recorder. */
   Optional<EventTraceRecorder> trace_recorder_;
-  /*! \brief Draft proposal length */
+  /*! \brief The max draft proposal length */
   int draft_length_;
 };
 
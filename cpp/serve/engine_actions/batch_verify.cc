@@ -35,11 +35,14 @@ class BatchVerifyActionObj : public EngineActionObj {
         sampler_(std::move(sampler)),
         engine_config_(std::move(engine_config)),
         trace_recorder_(std::move(trace_recorder)),
-        rng_(RandomGenerator::GetInstance()) {}
+        rng_(RandomGenerator::GetInstance()),
+        draft_model_id_(static_cast<int>(models_.size()) - 1) {}
 
   Array<Request> Step(EngineState estate) final {
-    // - Only run spec decode when there are two models (llm+ssm) and >=1 running requests.
-    if (models_.size() != 2 || estate->running_queue.empty()) {
+    // - Only run spec decode when there are two models (llm+ssm), or one model in the n-gram
+    // mode, and >=1 running requests.
+    int num_models = engine_config_->speculative_mode == SpeculativeMode::kNGram ? 1 : 2;
+    if (static_cast<int>(models_.size()) != num_models || estate->running_queue.empty()) {
       return {};
     }
 
@@ -87,6 +90,11 @@ class BatchVerifyActionObj : public EngineActionObj {
       rngs.push_back(&rsentries[i]->rng);
       draft_output_tokens.push_back(draft_mstate->draft_output_tokens);
       draft_output_prob_dist.push_back(draft_mstate->draft_output_prob_dist);
+      if (draft_model_id_ == verify_model_id_) {
+        // The draft is proposed without a draft model and kept in the state of the verify model.
+        // Remove the draft so that the verify model state only has the committed tokens.
+        verify_mstate->RemoveAllDraftTokens();
+      }
     }
 
     RECORD_EVENT(trace_recorder_, request_ids, "start verify embedding");
@@ -131,9 +139,13 @@ class BatchVerifyActionObj : public EngineActionObj {
       int accept_length = sample_results.size();
       for (SampleResult sample_result : sample_results) {
         rsentries[i]->mstates[verify_model_id_]->CommitToken(sample_result);
-        rsentries[i]->mstates[draft_model_id_]->CommitToken(sample_result);
+        if (draft_model_id_ != verify_model_id_) {
+          rsentries[i]->mstates[draft_model_id_]->CommitToken(sample_result);
+        }
       }
       estate->stats.total_accepted_length += accept_length;
+      estate->spec_draft_length_controller.UpdateAcceptance(
+          rsentries[i], verify_lengths[i] - 1, accept_length - 1);
       int rollback_length =
           std::max(cum_verify_lengths[i + 1] - cum_verify_lengths[i] - accept_length, 0);
       // rollback kv cache
@@ -142,8 +154,10 @@ class BatchVerifyActionObj : public EngineActionObj {
       if (rollback_length > 0) {
         models_[verify_model_id_]->PopNFromKVCache(
             rsentries[i]->mstates[verify_model_id_]->internal_id, rollback_length);
-        models_[draft_model_id_]->PopNFromKVCache(
-            rsentries[i]->mstates[draft_model_id_]->internal_id, rollback_length);
+        if (draft_model_id_ != verify_model_id_) {
+          models_[draft_model_id_]->PopNFromKVCache(
+              rsentries[i]->mstates[draft_model_id_]->internal_id, rollback_length);
+        }
       }
     }
 
@@ -153,7 +167,9 @@ class BatchVerifyActionObj : public EngineActionObj {
     }
 
     auto tend = std::chrono::high_resolution_clock::now();
-    estate->stats.engine_total_decode_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->stats.engine_total_decode_time += elapsed_time;
+    estate->spec_draft_length_controller.UpdateVerifyTime(elapsed_time);
 
     return estate->running_queue;
   }
@@ -228,9 +244,12 @@ class BatchVerifyActionObj : public EngineActionObj {
   Optional<EventTraceRecorder> trace_recorder_;
   /*! \brief Random number generator. */
   RandomGenerator& rng_;
-  /*! \brief The ids of verify/draft models. */
+  /*!
+   * \brief The ids of verify/draft models. They are the same in the n-gram mode,
+   * where the draft is proposed without a draft model.
+   */
   const int verify_model_id_ = 0;
-  const int draft_model_id_ = 1;
+  const int draft_model_id_;
   const float eps_ = 1e-5;
 };
 
@@ -3,6 +3,7 @@
  * \file serve/engine_actions/eagle_batch_draft.cc
  */
 
+#include <algorithm>
 #include <numeric>
 
 #include "../config.h"
@@ -52,57 +53,67 @@ class EagleBatchDraftActionObj : public EngineActionObj {
 
     auto tstart = std::chrono::high_resolution_clock::now();
 
-    int num_rsentries = running_rsentries.size();
-    Array<String> request_ids;
-    std::vector<int64_t> request_internal_ids;
-    Array<GenerationConfig> generation_cfg;
-    std::vector<RandomGenerator*> rngs;
-    request_ids.reserve(num_rsentries);
-    request_internal_ids.reserve(num_rsentries);
-    generation_cfg.reserve(num_rsentries);
+    // The draft length of each request, which is at least 1 since the first draft token
+    // has been generated in prefill/verify stage.
+    std::vector<int> draft_lengths;
+    draft_lengths.reserve(running_rsentries.size());
+    int num_rounds = 0;
     for (const RequestStateEntry& rsentry : running_rsentries) {
-      request_ids.push_back(rsentry->request->id);
-      request_internal_ids.push_back(rsentry->mstates[0]->internal_id);
-      generation_cfg.push_back(rsentry->request->generation_cfg);
-      rngs.push_back(&rsentry->rng);
+      draft_lengths.push_back(std::max(
+          std::min(estate->spec_draft_length_controller.GetDraftLength(rsentry), draft_length_),
+          1));
+      num_rounds = std::max(num_rounds, draft_lengths.back());
     }
 
     // The first model doesn't get involved in draft proposal.
     for (int model_id = 1; model_id < static_cast<int>(models_.size()); ++model_id) {
-      // Collect
-      // - the last committed token,
-      // - the request model state
-      // of each request.
-      std::vector<int> input_tokens;
-      Array<RequestModelState> mstates;
-      input_tokens.reserve(num_rsentries);
-      mstates.reserve(num_rsentries);
-      for (const RequestStateEntry& rsentry : running_rsentries) {
-        mstates.push_back(rsentry->mstates[model_id]);
-      }
-      // draft_length_ rounds of draft proposal.
       NDArray hidden_states_nd{nullptr};
       ObjectRef last_hidden_states{nullptr};
       ObjectRef hidden_states = model_workspaces_[model_id].hidden_states;
-      // Concat last hidden_states
-      std::vector<NDArray> previous_hidden_on_device;
-      for (int i = 0; i < num_rsentries; ++i) {
-        previous_hidden_on_device.push_back(mstates[i]->draft_last_hidden_on_device.back());
-      }
-      hidden_states_nd =
-          models_[model_id]->ConcatLastHidden(previous_hidden_on_device, &hidden_states);
-      ICHECK_EQ(hidden_states_nd->ndim, 2);
-      ICHECK_EQ(hidden_states_nd->shape[0], num_rsentries);
-      hidden_states_nd = hidden_states_nd.CreateView(
-          {hidden_states_nd->shape[0], 1, hidden_states_nd->shape[1]}, hidden_states_nd->dtype);
-      last_hidden_states = hidden_states_nd;
+      int num_prev_rsentries = -1;
       // The first draft token has been generated in prefill/verify stage
-      for (int draft_id = 1; draft_id < draft_length_; ++draft_id) {
-        // prepare new input tokens
-        input_tokens.clear();
-        for (int i = 0; i < num_rsentries; ++i) {
-          ICHECK(!mstates[i]->draft_output_tokens.empty());
-          input_tokens.push_back(mstates[i]->draft_output_tokens.back().sampled_token_id.first);
+      for (int draft_id = 1; draft_id < num_rounds; ++draft_id) {
+        // Collect
+        // - the last draft token,
+        // - the request model state
+        // of each request whose draft is not finished.
+        Array<String> request_ids;
+        std::vector<int64_t> request_internal_ids;
+        Array<GenerationConfig> generation_cfg;
+        std::vector<RandomGenerator*> rngs;
+        std::vector<int> input_tokens;
+        Array<RequestModelState> mstates;
+        for (int i = 0; i < static_cast<int>(running_rsentries.size()); ++i) {
+          if (draft_lengths[i] <= draft_id) {
+            continue;
+          }
+          const RequestStateEntry& rsentry = running_rsentries[i];
+          request_ids.push_back(rsentry->request->id);
+          request_internal_ids.push_back(rsentry->mstates[0]->internal_id);
+          generation_cfg.push_back(rsentry->request->generation_cfg);
+          rngs.push_back(&rsentry->rng);
+          mstates.push_back(rsentry->mstates[model_id]);
+          ICHECK(!mstates.back()->draft_output_tokens.empty());
+          input_tokens.push_back(mstates.back()->draft_output_tokens.back().sampled_token_id.first);
+        }
+        int num_rsentries = mstates.size();
+
+        if (num_rsentries != num_prev_rsentries) {
+          // Concat last hidden_states when the requests change. The hidden states of the
+          // previous round are reused otherwise.
+          std::vector<NDArray> previous_hidden_on_device;
+          for (int i = 0; i < num_rsentries; ++i) {
+            previous_hidden_on_device.push_back(mstates[i]->draft_last_hidden_on_device.back());
+          }
+          hidden_states_nd =
+              models_[model_id]->ConcatLastHidden(previous_hidden_on_device, &hidden_states);
+          ICHECK_EQ(hidden_states_nd->ndim, 2);
+          ICHECK_EQ(hidden_states_nd->shape[0], num_rsentries);
+          hidden_states_nd = hidden_states_nd.CreateView(
+              {hidden_states_nd->shape[0], 1, hidden_states_nd->shape[1]},
+              hidden_states_nd->dtype);
+          last_hidden_states = hidden_states_nd;
+          num_prev_rsentries = num_rsentries;
         }
 
         // - Compute embeddings.
@@ -164,7 +175,9 @@ class EagleBatchDraftActionObj : public EngineActionObj {
     }
 
     auto tend = std::chrono::high_resolution_clock::now();
-    estate->stats.engine_total_decode_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->stats.engine_total_decode_time += elapsed_time;
+    estate->spec_draft_length_controller.UpdateDraftTime(elapsed_time, num_rounds - 1);
 
     return {};
   }
@@ -213,7 +226,7 @@ class EagleBatchDraftActionObj : public EngineActionObj {
   std::vector<ModelWorkspace> model_workspaces_;
   /*! \brief Event trace recorder. */
   Optional<EventTraceRecorder> trace_recorder_;
-  /*! \brief Draft proposal length */
+  /*! \brief The max draft proposal length */
   int draft_length_;
 };
 
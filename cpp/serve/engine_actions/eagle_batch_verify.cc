@@ -148,6 +148,8 @@ class EagleBatchVerifyActionObj : public EngineActionObj {
         rsentries[i]->mstates[draft_model_id_]->CommitToken(sample_result);
       }
       estate->stats.total_accepted_length += accept_length - 1;
+      estate->spec_draft_length_controller.UpdateAcceptance(
+          rsentries[i], cum_verify_lengths[i + 1] - cum_verify_lengths[i] - 1, accept_length - 1);
       // - Minus one because the last draft token has no kv cache entry
       // - Take max with 0 in case of all accepted.
       int rollback_length =
@@ -251,7 +253,9 @@ class EagleBatchVerifyActionObj : public EngineActionObj {
     }
 
     auto tend = std::chrono::high_resolution_clock::now();
-    estate->stats.engine_total_decode_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->stats.engine_total_decode_time += elapsed_time;
+    estate->spec_draft_length_controller.UpdateVerifyTime(elapsed_time);
 
     return estate->running_queue;
   }
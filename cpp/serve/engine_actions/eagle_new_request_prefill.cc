@@ -5,6 +5,8 @@
 
 #include <tvm/runtime/nvtx.h>
 
+#include <numeric>
+
 #include "../config.h"
 #include "../model.h"
 #include "../sampler/sampler.h"
@@ -75,6 +77,11 @@ class EagleNewRequestPrefillActionObj : public EngineActionObj {
           estate->running_queue.push_back(request);
         }
       }
+      // - Set the prefill start time when the request is first-time prefilled.
+      const RequestStateEntry& root_rsentry = request_rstate->entries[0];
+      if (root_rsentry->tprefill_start < root_rsentry->tadd) {
+        root_rsentry->tprefill_start = tstart;
+      }
       rstates_of_entries.push_back(std::move(request_rstate));
     }
 
@@ -315,6 +322,9 @@ class EagleNewRequestPrefillActionObj : public EngineActionObj {
 
     auto tend = std::chrono::high_resolution_clock::now();
     estate->stats.engine_total_prefill_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->metrics->num_prefill_tokens.fetch_add(
+        std::accumulate(prefill_lengths.begin(), prefill_lengths.end(), int64_t{0}),
+        std::memory_order_relaxed);
 
     // - Remove the request from waiting queue if all its request states
     // are now alive and have no remaining chunked inputs.
@@ -367,6 +377,9 @@ class EagleNewRequestPrefillActionObj : public EngineActionObj {
       // No request to prefill.
       return {};
     }
+    // - Order the waiting requests by priority and deadline, and preempt the
+    // running requests of lower priority when the KV cache is insufficient.
+    ScheduleWaitingQueueForPrefill(estate, models_, engine_config_, trace_recorder_);
 
     std::vector<PrefillInput> prefill_inputs;
 
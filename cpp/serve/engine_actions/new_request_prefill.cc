@@ -5,6 +5,8 @@
 
 #include <tvm/runtime/nvtx.h>
 
+#include <numeric>
+
 #include "../config.h"
 #include "../model.h"
 #include "../sampler/sampler.h"
@@ -17,7 +19,8 @@ namespace serve {
 
 /*!
  * \brief The action that prefills requests in the `waiting_queue` of
- * the engine state.
+ * the engine state. When prefill and decode mixing is enabled, the running
+ * requests decode one token in the same model invocation as the prefill.
  */
 class NewRequestPrefillActionObj : public EngineActionObj {
  public:
@@ -34,16 +37,39 @@ class NewRequestPrefillActionObj : public EngineActionObj {
 
   Array<Request> Step(EngineState estate) final {
     // - Find the requests in `waiting_queue` that can prefill in this step.
+    // When prefill and decode are mixed, the prefill shares the step with one decode
+    // token of each running request entry, and is bounded by the prefill token budget.
+    bool mix_decode = engine_config_->mixed_prefill_decode && models_.size() == 1 &&
+                      engine_config_->speculative_mode == SpeculativeMode::kDisable;
     std::vector<PrefillInput> prefill_inputs;
+    std::vector<RequestStateEntry> decode_rsentries;
     {
       NVTXScopedRange nvtx_scope("NewRequestPrefill getting requests");
-      prefill_inputs = GetRequestStateEntriesToPrefill(estate);
+      int max_prefill_length = engine_config_->prefill_chunk_size;
+      if (mix_decode) {
+        int max_mixed_prefill_length =
+            max_prefill_length - static_cast<int>(GetDecodeRequestStateEntries(estate).size());
+        if (max_mixed_prefill_length > 0) {
+          max_prefill_length = estate->prefill_token_budget_controller.GetPrefillTokenBudget(
+              max_mixed_prefill_length);
+        } else {
+          // The decode tokens alone fill the prefill chunk, so the prefill runs by itself.
+          mix_decode = false;
+        }
+      }
+      prefill_inputs = GetRequestStateEntriesToPrefill(estate, max_prefill_length);
       if (prefill_inputs.empty()) {
         return {};
       }
+      if (mix_decode) {
+        // Collect the decode entries after scheduling, which may preempt running requests.
+        decode_rsentries = GetDecodeRequestStateEntries(estate);
+      }
     }
 
     int num_rsentries = prefill_inputs.size();
+    int num_decode_rsentries = decode_rsentries.size();
+    int num_sequences = num_decode_rsentries + num_rsentries;
     auto tstart = std::chrono::high_resolution_clock::now();
 
     // - Update status of request states from pending to alive.
@@ -74,20 +100,45 @@ class NewRequestPrefillActionObj : public EngineActionObj {
           estate->running_queue.push_back(request);
         }
       }
+      // - Set the prefill start time when the request is first-time prefilled.
+      const RequestStateEntry& root_rsentry = request_rstate->entries[0];
+      if (root_rsentry->tprefill_start < root_rsentry->tadd) {
+        root_rsentry->tprefill_start = tstart;
+      }
       rstates_of_entries.push_back(std::move(request_rstate));
     }
 
+    Array<String> decode_request_ids;
+    decode_request_ids.reserve(num_decode_rsentries);
+    for (const RequestStateEntry& rsentry : decode_rsentries) {
+      decode_request_ids.push_back(rsentry->request->id);
+    }
+
     // - Get embedding and run prefill for each model.
+    // The decode sequences come first in the batch, each with its last committed token.
     std::vector<int> prefill_lengths;
     prefill_lengths.resize(/*size=*/num_rsentries, /*value=*/-1);
+    // The prefilled tokens of each sequence tracked by prefix cache.
+    std::vector<std::vector<int32_t>> prefix_cache_prefill_tokens(num_rsentries);
     NDArray logits_for_sample{nullptr};
     for (int model_id = 0; model_id < static_cast<int>(models_.size()); ++model_id) {
       std::vector<int64_t> request_internal_ids;
-      request_internal_ids.reserve(num_rsentries);
+      request_internal_ids.reserve(num_sequences);
       ObjectRef embeddings = model_workspaces_[model_id].embeddings;
       int cum_prefill_length = 0;
-      bool single_input =
-          num_rsentries == 1 && prefill_inputs[0].rsentry->mstates[model_id]->inputs.size() == 1;
+      bool single_input = num_decode_rsentries == 0 && num_rsentries == 1 &&
+                          prefill_inputs[0].rsentry->mstates[model_id]->inputs.size() == 1;
+      RECORD_EVENT(trace_recorder_, decode_request_ids, "start embedding");
+      for (const RequestStateEntry& rsentry : decode_rsentries) {
+        const RequestModelState& mstate = rsentry->mstates[model_id];
+        TokenData decode_input(
+            std::vector<int32_t>{mstate->committed_tokens.back().sampled_token_id.first});
+        embeddings = decode_input->GetEmbedding(models_[model_id], /*dst=*/&embeddings,
+                                                /*offset=*/cum_prefill_length);
+        cum_prefill_length += 1;
+        request_internal_ids.push_back(mstate->internal_id);
+      }
+      RECORD_EVENT(trace_recorder_, decode_request_ids, "finish embedding");
       for (int i = 0; i < num_rsentries; ++i) {
         const RequestStateEntry& rsentry = prefill_inputs[i].rsentry;
         RequestModelState mstate = rsentry->mstates[model_id];
@@ -101,10 +152,14 @@ class NewRequestPrefillActionObj : public EngineActionObj {
 
         ICHECK(mstate->draft_output_tokens.empty());
         ICHECK(mstate->draft_output_prob_dist.empty());
-        if (status_before_prefill[i] == RequestStateStatus::kPending) {
+        if (status_before_prefill[i] == RequestStateStatus::kPending &&
+            !prefill_inputs[i].forked_from_prefix_cache && !prefill_inputs[i].swapped_in) {
           // Add the sequence to the model, or fork the sequence from its parent.
           if (rsentry->parent_idx == -1) {
             models_[model_id]->AddNewSequence(mstate->internal_id);
+            if (model_id == 0 && IsPrefixCacheable(estate, rsentry)) {
+              estate->prefix_cache->AddSequence(mstate->internal_id);
+            }
           } else {
             models_[model_id]->ForkSequence(
                 rstates_of_entries[i]->entries[rsentry->parent_idx]->mstates[model_id]->internal_id,
@@ -116,6 +171,16 @@ class NewRequestPrefillActionObj : public EngineActionObj {
           }
         }
         request_internal_ids.push_back(mstate->internal_id);
+        if (model_id == 0 && estate->prefix_cache.defined() &&
+            estate->prefix_cache->HasSequence(mstate->internal_id)) {
+          for (const Data& data : input_data) {
+            const auto* token_input = data.as<TokenDataNode>();
+            ICHECK(token_input != nullptr);
+            prefix_cache_prefill_tokens[i].insert(prefix_cache_prefill_tokens[i].end(),
+                                                  token_input->token_ids.begin(),
+                                                  token_input->token_ids.end());
+          }
+        }
         RECORD_EVENT(trace_recorder_, rsentry->request->id, "start embedding");
         for (int i = 0; i < static_cast<int>(input_data.size()); ++i) {
           embeddings = input_data[i]->GetEmbedding(models_[model_id],
@@ -126,13 +191,18 @@ class NewRequestPrefillActionObj : public EngineActionObj {
         RECORD_EVENT(trace_recorder_, rsentry->request->id, "finish embedding");
       }
 
+      std::vector<int> sequence_lengths(num_decode_rsentries, 1);
+      sequence_lengths.insert(sequence_lengths.end(), prefill_lengths.begin(),
+                              prefill_lengths.end());
+      RECORD_EVENT(trace_recorder_, decode_request_ids, "start decode");
       RECORD_EVENT(trace_recorder_, request_ids, "start prefill");
       NDArray logits =
-          models_[model_id]->BatchPrefill(embeddings, request_internal_ids, prefill_lengths);
+          models_[model_id]->BatchPrefill(embeddings, request_internal_ids, sequence_lengths);
       RECORD_EVENT(trace_recorder_, request_ids, "finish prefill");
+      RECORD_EVENT(trace_recorder_, decode_request_ids, "finish decode");
       ICHECK_EQ(logits->ndim, 3);
       ICHECK_EQ(logits->shape[0], 1);
-      ICHECK_EQ(logits->shape[1], num_rsentries);
+      ICHECK_EQ(logits->shape[1], num_sequences);
 
       if (model_id == 0) {
         // We only need to sample for model 0 in prefill.
@@ -140,26 +210,45 @@ class NewRequestPrefillActionObj : public EngineActionObj {
       }
     }
 
+    // - Record the prefilled tokens, whose KV data are now computed, in prefix cache.
+    if (estate->prefix_cache.defined()) {
+      for (int i = 0; i < num_rsentries; ++i) {
+        if (!prefix_cache_prefill_tokens[i].empty()) {
+          estate->prefix_cache->ExtendSequence(
+              prefill_inputs[i].rsentry->mstates[0]->internal_id, prefix_cache_prefill_tokens[i]);
+        }
+      }
+    }
+
     // - Update logits.
     ICHECK(logits_for_sample.defined());
     Array<GenerationConfig> generation_cfg;
     Array<RequestModelState> mstates_for_logitproc;
-    generation_cfg.reserve(num_rsentries);
-    mstates_for_logitproc.reserve(num_rsentries);
+    Array<String> sequence_request_ids;
+    generation_cfg.reserve(num_sequences);
+    mstates_for_logitproc.reserve(num_sequences);
+    sequence_request_ids.reserve(num_sequences);
+    for (const RequestStateEntry& rsentry : decode_rsentries) {
+      generation_cfg.push_back(rsentry->request->generation_cfg);
+      mstates_for_logitproc.push_back(rsentry->mstates[0]);
+      sequence_request_ids.push_back(rsentry->request->id);
+    }
     for (int i = 0; i < num_rsentries; ++i) {
       generation_cfg.push_back(prefill_inputs[i].rsentry->request->generation_cfg);
       mstates_for_logitproc.push_back(prefill_inputs[i].rsentry->mstates[0]);
+      sequence_request_ids.push_back(request_ids[i]);
     }
-    logits_for_sample = logits_for_sample.CreateView({num_rsentries, logits_for_sample->shape[2]},
+    logits_for_sample = logits_for_sample.CreateView({num_sequences, logits_for_sample->shape[2]},
                                                      logits_for_sample->dtype);
     logit_processor_->InplaceUpdateLogits(logits_for_sample, generation_cfg, mstates_for_logitproc,
-                                          request_ids);
+                                          sequence_request_ids);
 
     // - Compute probability distributions.
-    NDArray probs_on_device =
-        logit_processor_->ComputeProbsFromLogits(logits_for_sample, generation_cfg, request_ids);
+    NDArray probs_on_device = logit_processor_->ComputeProbsFromLogits(
+        logits_for_sample, generation_cfg, sequence_request_ids);
 
     // - Sample tokens.
+    //   Sample a token for each decode rsentry.
     //   For rsentries which have children, sample
     //   one token for each rstate that is depending.
     //   Otherwise, sample a token for the current rstate.
@@ -167,12 +256,21 @@ class NewRequestPrefillActionObj : public EngineActionObj {
     std::vector<RequestStateEntry> rsentries_for_sample;
     std::vector<RandomGenerator*> rngs;
     std::vector<bool> rsentry_activated;
-    sample_indices.reserve(num_rsentries);
-    rsentries_for_sample.reserve(num_rsentries);
-    rngs.reserve(num_rsentries);
-    rsentry_activated.reserve(num_rsentries);
+    sample_indices.reserve(num_sequences);
+    rsentries_for_sample.reserve(num_sequences);
+    rngs.reserve(num_sequences);
+    rsentry_activated.reserve(num_sequences);
     request_ids.clear();
     generation_cfg.clear();
+    for (int i = 0; i < num_decode_rsentries; ++i) {
+      const RequestStateEntry& rsentry = decode_rsentries[i];
+      sample_indices.push_back(i);
+      rsentries_for_sample.push_back(rsentry);
+      request_ids.push_back(rsentry->request->id);
+      generation_cfg.push_back(rsentry->request->generation_cfg);
+      rngs.push_back(&rsentry->rng);
+      rsentry_activated.push_back(true);
+    }
     for (int i = 0; i < num_rsentries; ++i) {
       const RequestStateEntry& rsentry = prefill_inputs[i].rsentry;
       // No sample for rsentries with remaining inputs.
@@ -190,7 +288,7 @@ class NewRequestPrefillActionObj : public EngineActionObj {
             !rstates_of_entries[i]->entries[child_idx]->mstates[0]->committed_tokens.empty()) {
           continue;
         }
-        sample_indices.push_back(i);
+        sample_indices.push_back(num_decode_rsentries + i);
         rsentries_for_sample.push_back(rstates_of_entries[i]->entries[child_idx]);
         request_ids.push_back(rsentry->request->id);
         generation_cfg.push_back(rsentry->request->generation_cfg);
@@ -221,7 +319,7 @@ class NewRequestPrefillActionObj : public EngineActionObj {
       }
       if (rsentry->child_indices.empty()) {
         // If rsentry has no child, we sample a token for itself.
-        sample_indices.push_back(i);
+        sample_indices.push_back(num_decode_rsentries + i);
         rsentries_for_sample.push_back(rsentry);
         request_ids.push_back(rsentry->request->id);
         generation_cfg.push_back(rsentry->request->generation_cfg);
@@ -252,13 +350,32 @@ class NewRequestPrefillActionObj : public EngineActionObj {
     }
 
     auto tend = std::chrono::high_resolution_clock::now();
-    estate->stats.engine_total_prefill_time += static_cast<double>((tend - tstart).count()) / 1e9;
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    int64_t num_prefill_tokens =
+        std::accumulate(prefill_lengths.begin(), prefill_lengths.end(), int64_t{0});
+    if (num_decode_rsentries > 0) {
+      // Attribute the decode-only step time to decode, and the rest to prefill.
+      PrefillTokenBudgetController& controller = estate->prefill_token_budget_controller;
+      double decode_time = std::min(controller.decode_time_ewma, elapsed_time);
+      estate->stats.engine_total_decode_time += decode_time;
+      estate->stats.engine_total_prefill_time += elapsed_time - decode_time;
+      controller.UpdateMixedStepTime(elapsed_time, num_prefill_tokens);
+      if (estate->kv_swap_pool.defined()) {
+        estate->kv_swap_pool->UpdatePrefillTime(elapsed_time - decode_time, num_prefill_tokens);
+      }
+    } else {
+      estate->stats.engine_total_prefill_time += elapsed_time;
+      if (estate->kv_swap_pool.defined()) {
+        estate->kv_swap_pool->UpdatePrefillTime(elapsed_time, num_prefill_tokens);
+      }
+    }
+    estate->metrics->num_prefill_tokens.fetch_add(num_prefill_tokens, std::memory_order_relaxed);
 
     // - Remove the request from waiting queue if all its request states
     // are now alive and have no remaining chunked inputs.
     std::vector<Request> processed_requests;
     {
-      processed_requests.reserve(num_rsentries);
+      processed_requests.reserve(num_sequences);
       std::unordered_set<const RequestNode*> dedup_map;
       for (int i = 0; i < num_rsentries; ++i) {
         const RequestStateEntry& rsentry = prefill_inputs[i].rsentry;
@@ -283,6 +400,12 @@ class NewRequestPrefillActionObj : public EngineActionObj {
           estate->waiting_queue.erase(it);
         }
       }
+      // - The requests decoded along with the prefill are processed as well.
+      for (const RequestStateEntry& rsentry : decode_rsentries) {
+        if (dedup_map.insert(rsentry->request.get()).second) {
+          processed_requests.push_back(rsentry->request);
+        }
+      }
     }
     return processed_requests;
   }
@@ -293,23 +416,31 @@ class NewRequestPrefillActionObj : public EngineActionObj {
     RequestStateEntry rsentry;
     int max_prefill_length = 0;
     int num_child_to_activate = 0;
+    bool forked_from_prefix_cache = false;
+    bool swapped_in = false;
   };
 
   /*!
    * \brief Find one or multiple request state entries to run prefill.
    * \param estate The engine state.
+   * \param max_prefill_length The maximum total prefill length of the entries.
    * \return The request entries to prefill, together with their input lengths.
    */
-  std::vector<PrefillInput> GetRequestStateEntriesToPrefill(EngineState estate) {
+  std::vector<PrefillInput> GetRequestStateEntriesToPrefill(EngineState estate,
+                                                            int max_prefill_length) {
     if (estate->waiting_queue.empty()) {
       // No request to prefill.
       return {};
     }
+    // - Order the waiting requests by priority and deadline, and preempt the
+    // running requests of lower priority when the KV cache is insufficient.
+    ScheduleWaitingQueueForPrefill(estate, models_, engine_config_, trace_recorder_);
 
     std::vector<PrefillInput> prefill_inputs;
 
     // - Try to prefill pending requests.
     int total_input_length = 0;
+    int total_swapped_length = 0;
     int total_required_pages = 0;
     int num_available_pages = models_[0]->GetNumAvailablePages();
     int num_running_rsentries = GetRunningRequestStateEntries(estate).size();
@@ -330,19 +461,33 @@ class NewRequestPrefillActionObj : public EngineActionObj {
           continue;
         }
 
-        int input_length = rsentry->mstates[0]->GetInputLength();
-        int num_require_pages = (input_length + engine_config_->kv_cache_page_size - 1) /
-                                engine_config_->kv_cache_page_size;
+        // - The swapped out KV data of a preempted entry are copied back rather than
+        // prefilled, though they occupy the KV cache pages as well.
+        int swapped_length = GetSwappedLength(estate, rsentry);
+        // - Match the inputs against prefix cache, so that only the unmatched suffix is
+        // prefilled. The matched sequence is pinned until the entry is forked from it.
+        auto [matched_length, matched_seq_id] = swapped_length == 0
+                                                    ? MatchPrefixCache(estate, rsentry)
+                                                    : std::pair<int, int64_t>{0, -1};
+        int input_length = rsentry->mstates[0]->GetInputLength() - matched_length - swapped_length;
+        int num_require_pages =
+            (swapped_length + input_length + engine_config_->kv_cache_page_size - 1) /
+            engine_config_->kv_cache_page_size;
         total_input_length += input_length;
+        total_swapped_length += swapped_length;
         total_required_pages += num_require_pages;
         // - Attempt 1. Check if the entire request state entry can fit for prefill.
         bool can_prefill = false;
         for (int num_child_to_activate = rsentry->child_indices.size(); num_child_to_activate >= 0;
              --num_child_to_activate) {
           if (CanPrefill(estate, num_prefill_rsentries + 1 + num_child_to_activate,
-                         total_input_length, total_required_pages, num_available_pages,
-                         current_total_seq_len, num_running_rsentries)) {
-            prefill_inputs.push_back({rsentry, input_length, num_child_to_activate});
+                         total_input_length, total_swapped_length, max_prefill_length,
+                         total_required_pages, &num_available_pages, &current_total_seq_len,
+                         num_running_rsentries, matched_seq_id)) {
+            bool forked = ForkFromPrefixCache(estate, rsentry, matched_length, matched_seq_id);
+            bool swapped_in = SwapInFromHost(estate, rsentry);
+            prefill_inputs.push_back(
+                {rsentry, input_length, num_child_to_activate, forked, swapped_in});
             num_prefill_rsentries += 1 + num_child_to_activate;
             can_prefill = true;
             break;
@@ -352,12 +497,13 @@ class NewRequestPrefillActionObj : public EngineActionObj {
           continue;
         }
         total_input_length -= input_length;
+        total_swapped_length -= swapped_length;
         total_required_pages -= num_require_pages;
 
         // - Attempt 2. Check if the request state entry can partially fit by input chunking.
-        ICHECK_LE(total_input_length, engine_config_->prefill_chunk_size);
-        if (engine_config_->prefill_chunk_size - total_input_length >= input_length ||
-            engine_config_->prefill_chunk_size == total_input_length) {
+        ICHECK_LE(total_input_length, max_prefill_length);
+        if (max_prefill_length - total_input_length >= input_length ||
+            max_prefill_length == total_input_length) {
           // 1. If the input length can fit the remaining prefill chunk size,
           // it means the failure of attempt 1 is not because of the input
           // length being too long, and thus chunking does not help.
@@ -367,14 +513,19 @@ class NewRequestPrefillActionObj : public EngineActionObj {
           prefill_stops = true;
           break;
         }
-        input_length = engine_config_->prefill_chunk_size - total_input_length;
-        num_require_pages = (input_length + engine_config_->kv_cache_page_size - 1) /
-                            engine_config_->kv_cache_page_size;
+        input_length = max_prefill_length - total_input_length;
+        num_require_pages =
+            (swapped_length + input_length + engine_config_->kv_cache_page_size - 1) /
+            engine_config_->kv_cache_page_size;
         total_input_length += input_length;
+        total_swapped_length += swapped_length;
         total_required_pages += num_require_pages;
-        if (CanPrefill(estate, num_prefill_rsentries + 1, total_input_length, total_required_pages,
-                       num_available_pages, current_total_seq_len, num_running_rsentries)) {
-          prefill_inputs.push_back({rsentry, input_length, 0});
+        if (CanPrefill(estate, num_prefill_rsentries + 1, total_input_length, total_swapped_length,
+                       max_prefill_length, total_required_pages, &num_available_pages,
+                       &current_total_seq_len, num_running_rsentries, matched_seq_id)) {
+          bool forked = ForkFromPrefixCache(estate, rsentry, matched_length, matched_seq_id);
+          bool swapped_in = SwapInFromHost(estate, rsentry);
+          prefill_inputs.push_back({rsentry, input_length, 0, forked, swapped_in});
           num_prefill_rsentries += 1;
         }
 
@@ -390,10 +541,18 @@ class NewRequestPrefillActionObj : public EngineActionObj {
     return prefill_inputs;
   }
 
-  /*! \brief Check if the input requests can be prefilled under conditions. */
+  /*!
+   * \brief Check if the input requests can be prefilled under conditions.
+   * When the KV cache capacity does not suffice, the recycling sequences in
+   * prefix cache are evicted, and the KV cache status is updated in place.
+   * \param total_swapped_length The total length of the swapped out KV data to copy back.
+   * \param max_prefill_length The maximum total prefill length.
+   * \param pinned_seq_id The prefix cache sequence that must not be evicted, or -1.
+   */
   bool CanPrefill(EngineState estate, int num_prefill_rsentries, int total_input_length,
-                  int num_required_pages, int num_available_pages, int current_total_seq_len,
-                  int num_running_rsentries) {
+                  int total_swapped_length, int max_prefill_length, int num_required_pages,
+                  int* num_available_pages, int* current_total_seq_len, int num_running_rsentries,
+                  int64_t pinned_seq_id) {
     ICHECK_LE(num_running_rsentries, engine_config_->max_num_sequence);
 
     // No exceeding of the maximum allowed requests that can
@@ -407,16 +566,164 @@ class NewRequestPrefillActionObj : public EngineActionObj {
     }
 
     // NOTE: The conditions are heuristic and can be revised.
-    // Cond 1: total input length <= prefill chunk size.
+    // Cond 1: total input length <= max prefill length.
     // Cond 2: at least one decode can be performed after prefill.
     // Cond 3: number of total tokens after 8 times of decode does not
     // exceed the limit, where 8 is a watermark number can
     // be configured and adjusted in the future.
     int new_batch_size = num_running_rsentries + num_prefill_rsentries;
-    return total_input_length <= engine_config_->prefill_chunk_size &&
-           num_required_pages + new_batch_size <= num_available_pages &&
-           current_total_seq_len + total_input_length + 8 * new_batch_size <=
-               engine_config_->max_total_sequence_length;
+    if (total_input_length > max_prefill_length) {
+      return false;
+    }
+    while (num_required_pages + new_batch_size > *num_available_pages ||
+           *current_total_seq_len + total_swapped_length + total_input_length +
+                   8 * new_batch_size >
+               engine_config_->max_total_sequence_length) {
+      if (!estate->prefix_cache.defined() ||
+          !estate->prefix_cache->TryFreeMemory(pinned_seq_id)) {
+        return false;
+      }
+      *num_available_pages = models_[0]->GetNumAvailablePages();
+      *current_total_seq_len = models_[0]->GetCurrentTotalSequenceLength();
+    }
+    return true;
+  }
+
+  /*!
+   * \brief Get the running request state entries that decode along with the prefill,
+   * which are the entries with committed tokens and no remaining inputs.
+   */
+  std::vector<RequestStateEntry> GetDecodeRequestStateEntries(const EngineState& estate) {
+    std::vector<RequestStateEntry> rsentries;
+    for (const RequestStateEntry& rsentry : GetRunningRequestStateEntries(estate)) {
+      if (rsentry->mstates[0]->inputs.empty() && !rsentry->mstates[0]->committed_tokens.empty()) {
+        rsentries.push_back(rsentry);
+      }
+    }
+    return rsentries;
+  }
+
+  /*!
+   * \brief Check if the given request state entry can be tracked by prefix cache.
+   * Only the root entry of requests whose inputs are all tokens can be tracked,
+   * since other kinds of input data are not identified by tokens.
+   */
+  bool IsPrefixCacheable(const EngineState& estate, const RequestStateEntry& rsentry) {
+    if (!estate->prefix_cache.defined() || rsentry->parent_idx != -1) {
+      return false;
+    }
+    for (const Data& data : rsentry->request->inputs) {
+      if (!data->IsInstance<TokenDataNode>()) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  /*!
+   * \brief Match the inputs of a pending request state entry against prefix cache.
+   * At least one input token is left unmatched, so that the prefill produces logits.
+   * \return The matched prefix length and the sequence id to fork from,
+   * which is -1 when there is no match.
+   */
+  std::pair<int, int64_t> MatchPrefixCache(const EngineState& estate,
+                                           const RequestStateEntry& rsentry) {
+    if (rsentry->status != RequestStateStatus::kPending || !IsPrefixCacheable(estate, rsentry)) {
+      return {0, -1};
+    }
+    std::vector<int32_t> tokens;
+    tokens.reserve(rsentry->mstates[0]->GetInputLength());
+    for (const Data& data : rsentry->mstates[0]->inputs) {
+      const auto* token_input = data.as<TokenDataNode>();
+      ICHECK(token_input != nullptr);
+      tokens.insert(tokens.end(), token_input->token_ids.begin(), token_input->token_ids.end());
+    }
+    if (tokens.size() <= 1) {
+      return {0, -1};
+    }
+    tokens.pop_back();
+    return estate->prefix_cache->MatchPrefix(tokens);
+  }
+
+  /*!
+   * \brief Fork the sequence of the given request state entry from the matched
+   * prefix cache sequence in all models, and drop the matched prefix from the inputs.
+   * \return A boolean indicating if the sequence is forked.
+   */
+  bool ForkFromPrefixCache(EngineState estate, const RequestStateEntry& rsentry,
+                           int matched_length, int64_t matched_seq_id) {
+    if (matched_seq_id == -1) {
+      return false;
+    }
+    ICHECK_GT(matched_length, 0);
+    for (int model_id = 0; model_id < static_cast<int>(models_.size()); ++model_id) {
+      RequestModelState mstate = rsentry->mstates[model_id];
+      models_[model_id]->ForkSequence(matched_seq_id, mstate->internal_id, matched_length);
+      std::vector<int32_t> remaining_tokens;
+      int num_skipped_tokens = 0;
+      for (const Data& data : mstate->inputs) {
+        const auto* token_input = data.as<TokenDataNode>();
+        ICHECK(token_input != nullptr);
+        for (int64_t token_id : token_input->token_ids) {
+          if (num_skipped_tokens < matched_length) {
+            ++num_skipped_tokens;
+          } else {
+            remaining_tokens.push_back(token_id);
+          }
+        }
+      }
+      ICHECK(!remaining_tokens.empty());
+      mstate->inputs = Array<Data>{TokenData(std::move(remaining_tokens))};
+    }
+    estate->prefix_cache->ForkSequence(rsentry->mstates[0]->internal_id, matched_seq_id,
+                                       matched_length);
+    estate->stats.total_prefix_cache_hit_length += matched_length;
+    rsentry->prefix_cache_hit_length = matched_length;
+    RECORD_EVENT(trace_recorder_, rsentry->request->id, "prefix cache hit");
+    return true;
+  }
+
+  /*!
+   * \brief Get the length of the swapped out KV data of a pending request state entry,
+   * which is 0 when the entry is not swapped out.
+   */
+  int GetSwappedLength(const EngineState& estate, const RequestStateEntry& rsentry) {
+    if (!estate->kv_swap_pool.defined() || rsentry->status != RequestStateStatus::kPending ||
+        !estate->kv_swap_pool->HasSequence(rsentry->mstates[0]->internal_id)) {
+      return 0;
+    }
+    return estate->kv_swap_pool->GetSequenceLength(rsentry->mstates[0]->internal_id);
+  }
+
+  /*!
+   * \brief Add the sequence of the given swapped out request state entry back to the model
+   * with its KV data copied from host memory, and drop the swapped prefix from the inputs.
+   * \return A boolean indicating if the sequence is swapped in.
+   */
+  bool SwapInFromHost(EngineState estate, const RequestStateEntry& rsentry) {
+    if (GetSwappedLength(estate, rsentry) == 0) {
+      return false;
+    }
+    RequestModelState mstate = rsentry->mstates[0];
+    int swapped_length = estate->kv_swap_pool->SwapIn(mstate->internal_id);
+    std::vector<int32_t> remaining_tokens;
+    int num_skipped_tokens = 0;
+    for (const Data& data : mstate->inputs) {
+      const auto* token_input = data.as<TokenDataNode>();
+      ICHECK(token_input != nullptr);
+      for (int64_t token_id : token_input->token_ids) {
+        if (num_skipped_tokens < swapped_length) {
+          ++num_skipped_tokens;
+        } else {
+          remaining_tokens.push_back(token_id);
+        }
+      }
+    }
+    ICHECK(!remaining_tokens.empty());
+    mstate->inputs = Array<Data>{TokenData(std::move(remaining_tokens))};
+    estate->stats.total_swap_in_length += swapped_length;
+    RECORD_EVENT(trace_recorder_, rsentry->request->id, "swap in");
+    return true;
   }
 
   /*!
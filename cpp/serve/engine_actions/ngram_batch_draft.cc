@@ -0,0 +1,107 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/engine_actions/ngram_batch_draft.cc
+ */
+
+#include <algorithm>
+
+#include "../config.h"
+#include "action.h"
+#include "action_commons.h"
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+/*!
+ * \brief The action that proposes the draft of requests in the `running_queue`
+ * of engine state by prompt lookup: the trailing n-gram of each request is matched
+ * against its prompt and committed tokens, and the tokens following the previous
+ * occurrence are proposed. The proposal is deterministic, and the draft tokens
+ * have no probability distribution, which the verification treats as one-hot.
+ */
+class NGramBatchDraftActionObj : public EngineActionObj {
+ public:
+  explicit NGramBatchDraftActionObj(Optional<EventTraceRecorder> trace_recorder,
+                                    int draft_length)
+      : trace_recorder_(std::move(trace_recorder)), draft_length_(draft_length) {
+    ICHECK_GT(draft_length_, 0);
+  }
+
+  Array<Request> Step(EngineState estate) final {
+    if (estate->running_queue.empty()) {
+      return {};
+    }
+
+    auto tstart = std::chrono::high_resolution_clock::now();
+
+    std::vector<RequestStateEntry> running_rsentries = GetRunningRequestStateEntries(estate);
+    Array<String> request_ids;
+    request_ids.reserve(running_rsentries.size());
+    for (const RequestStateEntry& rsentry : running_rsentries) {
+      request_ids.push_back(rsentry->request->id);
+    }
+
+    RECORD_EVENT(trace_recorder_, request_ids, "start ngram proposal");
+    int max_proposal_length = 0;
+    for (const RequestStateEntry& rsentry : running_rsentries) {
+      RequestModelState mstate = rsentry->mstates[0];
+      ICHECK(mstate->draft_output_tokens.empty());
+      UpdateNGramIndex(rsentry);
+      int draft_length =
+          std::min(estate->spec_draft_length_controller.GetDraftLength(rsentry), draft_length_);
+      std::vector<int32_t> proposal = rsentry->ngram_index.Propose(draft_length);
+      for (int32_t token_id : proposal) {
+        SampleResult sample_result;
+        sample_result.sampled_token_id = {token_id, 1.0f};
+        mstate->AddDraftToken(sample_result, NDArray());
+        estate->stats.total_draft_length += 1;
+      }
+      max_proposal_length = std::max(max_proposal_length, static_cast<int>(proposal.size()));
+    }
+    RECORD_EVENT(trace_recorder_, request_ids, "finish ngram proposal");
+
+    auto tend = std::chrono::high_resolution_clock::now();
+    double elapsed_time = static_cast<double>((tend - tstart).count()) / 1e9;
+    estate->stats.engine_total_decode_time += elapsed_time;
+    estate->spec_draft_length_controller.UpdateDraftTime(elapsed_time, max_proposal_length);
+
+    return {};
+  }
+
+ private:
+  /*! \brief Index the prompt and the newly committed tokens of the request state entry. */
+  void UpdateNGramIndex(const RequestStateEntry& rsentry) {
+    if (rsentry->ngram_num_indexed_committed_tokens == -1) {
+      for (const Data& input : rsentry->request->inputs) {
+        if (const auto* token_input = input.as<TokenDataNode>()) {
+          for (int64_t token_id : token_input->token_ids) {
+            rsentry->ngram_index.Append(token_id);
+          }
+        }
+      }
+      rsentry->ngram_num_indexed_committed_tokens = 0;
+    }
+    const std::vector<SampleResult>& committed_tokens = rsentry->mstates[0]->committed_tokens;
+    for (int i = rsentry->ngram_num_indexed_committed_tokens;
+         i < static_cast<int>(committed_tokens.size()); ++i) {
+      rsentry->ngram_index.Append(committed_tokens[i].sampled_token_id.first);
+    }
+    rsentry->ngram_num_indexed_committed_tokens = committed_tokens.size();
+  }
+
+  /*! \brief Event trace recorder. */
+  Optional<EventTraceRecorder> trace_recorder_;
+  /*! \brief The max draft proposal length */
+  int draft_length_;
+};
+
+EngineAction EngineAction::NGramBatchDraft(Optional<EventTraceRecorder> trace_recorder,
+                                           int draft_length) {
+  return EngineAction(
+      make_object<NGramBatchDraftActionObj>(std::move(trace_recorder), draft_length));
+}
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
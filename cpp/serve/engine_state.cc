@@ -6,22 +6,27 @@
 
 #include <picojson.h>
 
+#include <algorithm>
+
 namespace mlc {
 namespace llm {
 namespace serve {
 
 String EngineStats::AsJSON() const {
   picojson::object config;
-  config["single_token_prefill_latency"] =
-      picojson::value(request_total_prefill_time / total_prefill_length);
-  config["single_token_decode_latency"] =
-      picojson::value(request_total_decode_time / total_decode_length);
+  // The latencies are zero before any request finishes, since picojson rejects NaN.
+  config["single_token_prefill_latency"] = picojson::value(
+      total_prefill_length > 0 ? request_total_prefill_time / total_prefill_length : 0.0);
+  config["single_token_decode_latency"] = picojson::value(
+      total_decode_length > 0 ? request_total_decode_time / total_decode_length : 0.0);
   config["engine_total_prefill_time"] = picojson::value(engine_total_prefill_time);
   config["engine_total_decode_time"] = picojson::value(engine_total_decode_time);
   config["total_prefill_tokens"] = picojson::value(total_prefill_length);
   config["total_decode_tokens"] = picojson::value(total_decode_length);
   config["total_accepted_tokens"] = picojson::value(total_accepted_length);
   config["total_draft_tokens"] = picojson::value(total_draft_length);
+  config["total_prefix_cache_hit_tokens"] = picojson::value(total_prefix_cache_hit_length);
+  config["total_swap_in_tokens"] = picojson::value(total_swap_in_length);
   return picojson::value(config).serialize(true);
 }
 
@@ -34,8 +39,149 @@ void EngineStats::Reset() {
   total_decode_length = 0;
   total_accepted_length = 0;
   total_draft_length = 0;
+  total_prefix_cache_hit_length = 0;
+  total_swap_in_length = 0;
+}
+
+/****************** SpecDraftLengthController ******************/
+
+/*! \brief The decay of the acceptance statistics of a request at each verification. */
+constexpr double kRequestAcceptanceDecay = 0.7;
+/*! \brief The decay of the acceptance statistics of all requests at each verification. */
+constexpr double kGlobalAcceptanceDecay = 0.95;
+/*! \brief The decay of the step time statistics at each step. */
+constexpr double kTimeDecay = 0.9;
+/*! \brief The weight in verified positions of the global rate in the rate of a request. */
+constexpr double kGlobalRatePriorWeight = 2.0;
+/*! \brief The acceptance rate assumed before any verification. */
+constexpr double kInitialAcceptanceRate = 0.5;
+/*! \brief The number of steps without draft after which a request drafts again. */
+constexpr int kNumStepsToRedraft = 16;
+
+int SpecDraftLengthController::GetDraftLength(RequestStateEntry rsentry) {
+  if (!adaptive || draft_round_time_ewma <= 0.0 || verify_time_ewma <= 0.0) {
+    // Use the max draft length until both the draft and verification are timed.
+    return max_draft_length;
+  }
+  if (rsentry->spec_num_steps_without_draft >= kNumStepsToRedraft) {
+    // Draft again to refresh the acceptance rate after the fallback to plain decode.
+    rsentry->spec_num_steps_without_draft = 0;
+    return std::max(min_draft_length, 1);
+  }
+  // The acceptance rate of the request, smoothed towards the rate of all requests.
+  double rate = (rsentry->spec_accepted_ewma + kGlobalRatePriorWeight * GetAcceptanceRate()) /
+                (rsentry->spec_verified_ewma + kGlobalRatePriorWeight);
+  rate = std::min(std::max(rate, 0.0), 1.0);
+  // With a draft of length d, the expected number of committed tokens is
+  // 1 + rate + ... + rate^d, and the cost is d draft rounds plus one verification.
+  int best_draft_length = min_draft_length;
+  double best_efficiency = -1.0;
+  double expected_num_tokens = 0.0;
+  double rate_power = 1.0;
+  for (int draft_length = 0; draft_length <= max_draft_length; ++draft_length) {
+    expected_num_tokens += rate_power;
+    rate_power *= rate;
+    if (draft_length < min_draft_length) {
+      continue;
+    }
+    double efficiency =
+        expected_num_tokens / (draft_length * draft_round_time_ewma + verify_time_ewma);
+    if (efficiency > best_efficiency) {
+      best_efficiency = efficiency;
+      best_draft_length = draft_length;
+    }
+  }
+  if (best_draft_length == 0) {
+    ++rsentry->spec_num_steps_without_draft;
+  } else {
+    rsentry->spec_num_steps_without_draft = 0;
+  }
+  return best_draft_length;
+}
+
+void SpecDraftLengthController::UpdateAcceptance(RequestStateEntry rsentry, int draft_length,
+                                                 int num_accepted) {
+  if (draft_length <= 0) {
+    return;
+  }
+  // The draft tokens are verified in order until the first rejection.
+  num_accepted = std::min(num_accepted, draft_length);
+  double num_verified = num_accepted + (num_accepted < draft_length ? 1 : 0);
+  rsentry->spec_accepted_ewma =
+      kRequestAcceptanceDecay * rsentry->spec_accepted_ewma + num_accepted;
+  rsentry->spec_verified_ewma =
+      kRequestAcceptanceDecay * rsentry->spec_verified_ewma + num_verified;
+  accepted_ewma = kGlobalAcceptanceDecay * accepted_ewma + num_accepted;
+  verified_ewma = kGlobalAcceptanceDecay * verified_ewma + num_verified;
+}
+
+void SpecDraftLengthController::UpdateDraftTime(double seconds, int num_rounds) {
+  if (num_rounds <= 0) {
+    return;
+  }
+  double round_time = seconds / num_rounds;
+  draft_round_time_ewma = draft_round_time_ewma > 0.0
+                              ? kTimeDecay * draft_round_time_ewma + (1 - kTimeDecay) * round_time
+                              : round_time;
+}
+
+void SpecDraftLengthController::UpdateVerifyTime(double seconds) {
+  verify_time_ewma = verify_time_ewma > 0.0
+                         ? kTimeDecay * verify_time_ewma + (1 - kTimeDecay) * seconds
+                         : seconds;
+}
+
+double SpecDraftLengthController::GetAcceptanceRate() const {
+  return verified_ewma > 0.0 ? accepted_ewma / verified_ewma : kInitialAcceptanceRate;
 }
 
+void SpecDraftLengthController::Reset() {
+  accepted_ewma = 0.0;
+  verified_ewma = 0.0;
+  draft_round_time_ewma = 0.0;
+  verify_time_ewma = 0.0;
+}
+
+/****************** PrefillTokenBudgetController ******************/
+
+/*! \brief The min prefill token budget, so that the prefill always makes progress. */
+constexpr int kMinPrefillTokenBudget = 16;
+
+int PrefillTokenBudgetController::GetPrefillTokenBudget(int max_num_tokens) const {
+  if (target_step_latency <= 0.0 || decode_time_ewma <= 0.0 || prefill_token_time_ewma <= 0.0) {
+    // Use the max budget until both the decode and the prefill tokens are timed.
+    return max_num_tokens;
+  }
+  double budget = (target_step_latency - decode_time_ewma) / prefill_token_time_ewma;
+  budget = std::min(budget, static_cast<double>(max_num_tokens));
+  return std::min(std::max(static_cast<int>(budget), kMinPrefillTokenBudget), max_num_tokens);
+}
+
+void PrefillTokenBudgetController::UpdateDecodeTime(double seconds) {
+  decode_time_ewma = decode_time_ewma > 0.0
+                         ? kTimeDecay * decode_time_ewma + (1 - kTimeDecay) * seconds
+                         : seconds;
+}
+
+void PrefillTokenBudgetController::UpdateMixedStepTime(double seconds, int num_prefill_tokens) {
+  if (num_prefill_tokens <= 0 || decode_time_ewma <= 0.0) {
+    // The prefill time cannot be told apart from the decode time before decode is timed.
+    return;
+  }
+  double token_time = std::max(seconds - decode_time_ewma, 0.0) / num_prefill_tokens;
+  prefill_token_time_ewma =
+      prefill_token_time_ewma > 0.0
+          ? kTimeDecay * prefill_token_time_ewma + (1 - kTimeDecay) * token_time
+          : token_time;
+}
+
+void PrefillTokenBudgetController::Reset() {
+  decode_time_ewma = 0.0;
+  prefill_token_time_ewma = 0.0;
+}
+
+/****************** EngineState ******************/
+
 TVM_REGISTER_OBJECT_TYPE(EngineStateObj);
 
 EngineState::EngineState() { data_ = make_object<EngineStateObj>(); }
@@ -46,6 +192,14 @@ void EngineStateObj::Reset() {
   request_states.clear();
   id_manager.Reset();
   stats.Reset();
+  spec_draft_length_controller.Reset();
+  prefill_token_budget_controller.Reset();
+  if (prefix_cache.defined()) {
+    prefix_cache->Reset();
+  }
+  if (kv_swap_pool.defined()) {
+    kv_swap_pool->Reset();
+  }
 }
 
 RequestState EngineStateObj::GetRequestState(Request request) {
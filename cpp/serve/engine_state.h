@@ -7,6 +7,9 @@
 
 #include <tvm/runtime/container/string.h>
 
+#include "kv_swap_pool.h"
+#include "metrics.h"
+#include "prefix_cache.h"
 #include "request.h"
 #include "request_state.h"
 
@@ -34,6 +37,10 @@ struct EngineStats {
   int64_t total_accepted_length = 0;
   /*! \brief The total number of speculated draft tokens. */
   int64_t total_draft_length = 0;
+  /*! \brief The total number of prompt tokens whose prefill is skipped by prefix cache. */
+  int64_t total_prefix_cache_hit_length = 0;
+  /*! \brief The total number of tokens whose KV data are restored from the KV swap pool. */
+  int64_t total_swap_in_length = 0;
 
   /*!
    * \brief Return the engine runtime statistics in JSON string.
@@ -44,6 +51,8 @@ struct EngineStats {
    * - engine time for decode (sec)
    * - total number of processed tokens in prefill.
    * - total number of processed tokens in decode.
+   * - total number of prompt tokens reused from prefix cache.
+   * - total number of tokens restored from the KV swap pool instead of recomputed.
    * \return The statistics in JSON string.
    */
   String AsJSON() const;
@@ -51,6 +60,82 @@ struct EngineStats {
   void Reset();
 };
 
+/*!
+ * \brief The controller of the speculative draft length of each request.
+ * \details It tracks the acceptance rate of the draft tokens of each request and
+ * of all requests with EWMA, together with the EWMA time of one draft round and of
+ * one verification. For each step, it picks the draft length that maximizes the
+ * expected number of tokens committed per unit of draft and verification time.
+ * When the min draft length is zero, a draft length of zero falls back to plain decode
+ * through the verification, and such requests draft again periodically to refresh
+ * their acceptance rate.
+ */
+struct SpecDraftLengthController {
+  /*! \brief Whether to adapt the draft length. The max draft length is always used otherwise. */
+  bool adaptive = false;
+  /*! \brief The max draft length. */
+  int max_draft_length = 4;
+  /*!
+   * \brief The min draft length, which is 0 only for the proposals without a draft model.
+   * The draft models take the last committed token in the first draft round of each step.
+   */
+  int min_draft_length = 0;
+  /*! \brief The EWMA number of accepted draft tokens of all requests. */
+  double accepted_ewma = 0.0;
+  /*! \brief The EWMA number of verified draft positions of all requests. */
+  double verified_ewma = 0.0;
+  /*! \brief The EWMA time in seconds of one draft round of the batch. */
+  double draft_round_time_ewma = 0.0;
+  /*! \brief The EWMA time in seconds of one verification of the batch. */
+  double verify_time_ewma = 0.0;
+
+  /*! \brief Return the draft length of the given request state entry for the next step. */
+  int GetDraftLength(RequestStateEntry rsentry);
+  /*!
+   * \brief Update the acceptance rates with the verification result of a request state entry.
+   * \param rsentry The verified request state entry.
+   * \param draft_length The number of verified draft tokens.
+   * \param num_accepted The number of accepted draft tokens.
+   */
+  void UpdateAcceptance(RequestStateEntry rsentry, int draft_length, int num_accepted);
+  /*! \brief Update the draft round time with the time of a draft step and its number of rounds. */
+  void UpdateDraftTime(double seconds, int num_rounds);
+  /*! \brief Update the verification time with the time of a verification. */
+  void UpdateVerifyTime(double seconds);
+  /*! \brief Return the acceptance rate of the draft tokens of all requests. */
+  double GetAcceptanceRate() const;
+  /*! \brief Clear the tracked statistics. */
+  void Reset();
+};
+
+/*!
+ * \brief The controller of the prefill token budget of the steps that mix prefill and decode.
+ * \details It tracks the EWMA time of the decode-only steps, and the EWMA time of each prefill
+ * token on top of the decode in the mixed steps. The prefill token budget of a mixed step is
+ * the number of prefill tokens that fit the target step latency after the decode, so that the
+ * running requests keep a steady inter-token latency while new requests are prefilled.
+ */
+struct PrefillTokenBudgetController {
+  /*! \brief The target latency in seconds of a mixed step. No target when it is not positive. */
+  double target_step_latency = 0.0;
+  /*! \brief The EWMA time in seconds of a decode-only step. */
+  double decode_time_ewma = 0.0;
+  /*! \brief The EWMA time in seconds of one prefill token in a mixed step. */
+  double prefill_token_time_ewma = 0.0;
+
+  /*!
+   * \brief Return the number of prefill tokens of the next mixed step.
+   * \param max_num_tokens The max number of prefill tokens allowed by the prefill chunk size.
+   */
+  int GetPrefillTokenBudget(int max_num_tokens) const;
+  /*! \brief Update the decode time with the time of a decode-only step. */
+  void UpdateDecodeTime(double seconds);
+  /*! \brief Update the prefill token time with the time of a mixed step. */
+  void UpdateMixedStepTime(double seconds, int num_prefill_tokens);
+  /*! \brief Clear the tracked statistics. */
+  void Reset();
+};
+
 /*! \brief The manager of internal id for requests in engine. */
 struct EngineInternalIDManager {
   std::vector<int64_t> available_ids;
@@ -93,6 +178,19 @@ class EngineStateObj : public Object {
   EngineInternalIDManager id_manager;
   /*! \brief Runtime statistics. */
   EngineStats stats;
+  /*! \brief Runtime metrics for monitoring. They are not cleared when the state is reset. */
+  EngineMetrics metrics;
+  /*! \brief The prefix cache. It is undefined when prefix caching is disabled. */
+  PrefixCache prefix_cache{nullptr};
+  /*!
+   * \brief The host memory pool of the KV data of the preempted requests.
+   * It is undefined when the preempted requests are always recomputed.
+   */
+  KVSwapPool kv_swap_pool{nullptr};
+  /*! \brief The controller of the speculative draft length. */
+  SpecDraftLengthController spec_draft_length_controller;
+  /*! \brief The controller of the prefill token budget of the mixed prefill and decode steps. */
+  PrefillTokenBudgetController prefill_token_budget_controller;
 
   /*! \brief Reset the engine state and clear the statistics. */
   void Reset();
@@ -10,6 +10,7 @@
 
 #include <algorithm>
 #include <chrono>
+#include <functional>
 #include <mutex>
 #include <unordered_map>
 #include <utility>
@@ -19,135 +20,265 @@ namespace mlc {
 namespace llm {
 namespace serve {
 
-namespace detail {
+TVM_REGISTER_OBJECT_TYPE(EventTraceRecorderObj);
 
-struct PairHash {
-  template <class T1, class T2>
-  std::size_t operator()(const std::pair<T1, T2>& p) const {
-    auto h1 = std::hash<T1>{}(p.first);
-    auto h2 = std::hash<T2>{}(p.second);
-    return h1 ^ h2;
-  }
+/*! \brief The phase of an event in Chrome Trace Event Format. */
+enum class EventPhase : int8_t {
+  kBegin = 0,
+  kEnd = 1,
+  kInstant = 2,
 };
 
-}  // namespace detail
-
-TVM_REGISTER_OBJECT_TYPE(EventTraceRecorderObj);
+/*! \brief The compact binary record of an event in the ring buffer. */
+struct EventRecord {
+  /*! \brief The event time in microseconds since epoch. */
+  int64_t time_us;
+  /*! \brief The slot of the request in the request table. */
+  int32_t request_slot;
+  /*! \brief The id of the event name (without "start "/"finish ") in the name table. */
+  int32_t name_id;
+  /*! \brief The number of the same event recorded before for the request. */
+  int32_t count;
+  /*! \brief The event phase. */
+  EventPhase phase;
+};
 
 /*! \brief The implementation of event trace recorder. */
 class EventTraceRecorderImpl : public EventTraceRecorderObj {
  public:
-  void AddEvent(const String& request_id, const std::string& event) final {
-    double event_time = std::chrono::duration_cast<std::chrono::duration<double>>(
-                            std::chrono::system_clock::now().time_since_epoch())
-                            .count();
+  explicit EventTraceRecorderImpl(int64_t capacity, double sample_rate)
+      : records_(capacity), sample_rate_(sample_rate) {
+    CHECK_GT(capacity, 0) << "The event trace capacity should be positive.";
+  }
 
+  void AddEvent(const String& request_id, const std::string& event) final {
+    if (!IsSampled(request_id)) {
+      return;
+    }
+    int64_t event_time_us = NowInMicroseconds();
     {
       std::lock_guard<std::mutex> lock(mutex_);
-      AddEventInternal(request_id, event, event_time);
+      AddEventInternal(request_id, event, event_time_us);
     }
   }
 
   void AddEvent(const Array<String>& request_ids, const std::string& event) final {
-    double event_time = std::chrono::duration_cast<std::chrono::duration<double>>(
-                            std::chrono::system_clock::now().time_since_epoch())
-                            .count();
-
+    std::vector<const String*> sampled_request_ids;
+    sampled_request_ids.reserve(request_ids.size());
+    for (const String& request_id : request_ids) {
+      if (IsSampled(request_id)) {
+        sampled_request_ids.push_back(&request_id);
+      }
+    }
+    if (sampled_request_ids.empty()) {
+      return;
+    }
+    int64_t event_time_us = NowInMicroseconds();
     {
       std::lock_guard<std::mutex> lock(mutex_);
-      for (const String& request_id : request_ids) {
-        AddEventInternal(request_id, event, event_time);
+      for (const String* request_id : sampled_request_ids) {
+        AddEventInternal(*request_id, event, event_time_us);
       }
     }
   }
 
   std::string DumpJSON() final {
-    std::unordered_map<std::string, std::vector<std::pair<std::string, double>>> local_events;
-    {
-      std::lock_guard<std::mutex> lock(mutex_);
-      local_events = events_;
-    }
+    std::lock_guard<std::mutex> lock(mutex_);
+    return DumpJSONInternal(std::max(num_recorded_ - Capacity(), static_cast<int64_t>(0)));
+  }
 
-    auto fcmp_events = [](const std::pair<int64_t, picojson::value>& lhs,
-                          const std::pair<int64_t, picojson::value>& rhs) {
-      return lhs.first < rhs.first;
-    };
+  std::string ExportJSON() final {
+    std::lock_guard<std::mutex> lock(mutex_);
+    int64_t begin = std::max(num_recorded_ - Capacity(), num_exported_);
+    std::string json = DumpJSONInternal(begin);
+    num_exported_ = num_recorded_;
+    return json;
+  }
 
-    picojson::array event_array;
-    for (const std::string& request_id : request_id_in_order_) {
-      std::vector<std::pair<std::string, double>> event_pairs = local_events.at(request_id);
-      std::vector<std::pair<int64_t, picojson::value>> events_to_sort;
-      events_to_sort.reserve(event_pairs.size());
-      for (int i = 0; i < static_cast<int>(event_pairs.size()); ++i) {
-        std::string event = event_pairs[i].first;
-        double event_time = event_pairs[i].second;
-        std::string name;
-        std::string phase;
-        if (event.compare(0, 6, "start ") == 0) {
-          // Duration begin.
-          name = event.substr(6);
-          phase = "B";
-        } else if (event.compare(0, 7, "finish ") == 0) {
-          // Duration end.
-          name = event.substr(7);
-          phase = "E";
-        } else {
-          // Instant event.
-          name = event;
-          phase = "i";
-        }
-        int64_t event_time_in_ms = static_cast<int64_t>(event_time * 1e6);
+  int64_t GetNumDroppedEvents() final {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return num_dropped_;
+  }
 
-        picojson::object event_json;
-        event_json["name"] = picojson::value(name);
-        event_json["ph"] = picojson::value(phase);
-        event_json["ts"] = picojson::value(event_time_in_ms);
-        event_json["pid"] = picojson::value(static_cast<int64_t>(1));
-        event_json["tid"] = picojson::value(request_id);
+  TVM_DECLARE_BASE_OBJECT_INFO(EventTraceRecorderImpl, EventTraceRecorderObj);
+
+ private:
+  /*! \brief The state of a request with events in the ring buffer. */
+  struct RequestSlot {
+    std::string request_id;
+    /*! \brief The number of events of the request in the ring buffer. */
+    int64_t num_records = 0;
+    /*! \brief The number of each event recorded for the request, keyed by name id and phase. */
+    std::unordered_map<int64_t, int32_t> event_counter;
+  };
+
+  static int64_t NowInMicroseconds() {
+    return std::chrono::duration_cast<std::chrono::microseconds>(
+               std::chrono::system_clock::now().time_since_epoch())
+        .count();
+  }
+
+  int64_t Capacity() const { return static_cast<int64_t>(records_.size()); }
+
+  /*! \brief Check if the request is sampled, by the hash of its id. */
+  bool IsSampled(const String& request_id) const {
+    if (sample_rate_ >= 1.0) {
+      return true;
+    }
+    if (sample_rate_ <= 0.0) {
+      return false;
+    }
+    uint64_t hash = std::hash<std::string>{}(request_id);
+    return static_cast<double>(hash % 1000000) < sample_rate_ * 1000000;
+  }
+
+  /*! \brief The internal impl of AddEvent, taking the event time as input. */
+  void AddEventInternal(const std::string& request_id, const std::string& event,
+                        int64_t event_time_us) {
+    EventRecord record;
+    record.time_us = event_time_us;
+    std::string name;
+    if (event.compare(0, 6, "start ") == 0) {
+      // Duration begin.
+      name = event.substr(6);
+      record.phase = EventPhase::kBegin;
+    } else if (event.compare(0, 7, "finish ") == 0) {
+      // Duration end.
+      name = event.substr(7);
+      record.phase = EventPhase::kEnd;
+    } else {
+      // Instant event.
+      name = event;
+      record.phase = EventPhase::kInstant;
+    }
+    auto name_it = name_ids_.find(name);
+    if (name_it == name_ids_.end()) {
+      name_it = name_ids_.emplace(name, static_cast<int32_t>(names_.size())).first;
+      names_.push_back(name);
+    }
+    record.name_id = name_it->second;
 
-        events_to_sort.push_back({event_time_in_ms, picojson::value(event_json)});
+    record.request_slot = AcquireRequestSlot(request_id);
+    // Overwrite the oldest record when the buffer is full.
+    EventRecord& slot_record = records_[num_recorded_ % Capacity()];
+    if (num_recorded_ >= Capacity()) {
+      ReleaseRequestSlot(slot_record.request_slot);
+      if (num_recorded_ - Capacity() >= num_exported_) {
+        ++num_dropped_;
       }
-      std::sort(events_to_sort.begin(), events_to_sort.end(), fcmp_events);
-      for (auto [timestamp, event] : events_to_sort) {
-        event_array.push_back(std::move(event));
+    }
+    RequestSlot& request_slot = request_slots_[record.request_slot];
+    int64_t counter_key = (static_cast<int64_t>(record.name_id) << 2) |
+                          static_cast<int64_t>(record.phase);
+    record.count = request_slot.event_counter[counter_key]++;
+    slot_record = record;
+    ++num_recorded_;
+  }
+
+  /*! \brief Get the slot of the request, and count one more record of the request. */
+  int32_t AcquireRequestSlot(const std::string& request_id) {
+    auto it = request_slot_ids_.find(request_id);
+    int32_t slot;
+    if (it != request_slot_ids_.end()) {
+      slot = it->second;
+    } else {
+      if (!free_request_slots_.empty()) {
+        slot = free_request_slots_.back();
+        free_request_slots_.pop_back();
+      } else {
+        slot = static_cast<int32_t>(request_slots_.size());
+        request_slots_.emplace_back();
       }
+      request_slots_[slot].request_id = request_id;
+      request_slot_ids_.emplace(request_id, slot);
     }
-    return picojson::value(event_array).serialize();
+    ++request_slots_[slot].num_records;
+    return slot;
   }
 
-  TVM_DECLARE_BASE_OBJECT_INFO(EventTraceRecorderImpl, EventTraceRecorderObj);
+  /*! \brief Count one less record of the request, and free its slot when it has no records. */
+  void ReleaseRequestSlot(int32_t slot) {
+    RequestSlot& request_slot = request_slots_[slot];
+    if (--request_slot.num_records > 0) {
+      return;
+    }
+    request_slot_ids_.erase(request_slot.request_id);
+    request_slot.request_id.clear();
+    request_slot.event_counter.clear();
+    free_request_slots_.push_back(slot);
+  }
 
- private:
-  /*! \brief The internal impl of AddEvent, taking the event time as input. */
-  void AddEventInternal(const std::string& request_id, const std::string& event,
-                        double event_time) {
-    if (std::find(request_id_in_order_.begin(), request_id_in_order_.end(), request_id) ==
-        request_id_in_order_.end()) {
-      request_id_in_order_.push_back(request_id);
+  /*! \brief Dump the records from the given record index to the latest in JSON string. */
+  std::string DumpJSONInternal(int64_t begin) {
+    // Group the events by request in the order of the first event of each request,
+    // and sort the events of each request by time.
+    std::unordered_map<int32_t, int> request_order;
+    std::vector<std::vector<const EventRecord*>> request_records;
+    for (int64_t i = begin; i < num_recorded_; ++i) {
+      const EventRecord& record = records_[i % Capacity()];
+      auto it = request_order.find(record.request_slot);
+      if (it == request_order.end()) {
+        it = request_order.emplace(record.request_slot, static_cast<int>(request_records.size()))
+                 .first;
+        request_records.emplace_back();
+      }
+      request_records[it->second].push_back(&record);
+    }
+
+    static const char* kPhases[] = {"B", "E", "i"};
+    picojson::array event_array;
+    event_array.reserve(num_recorded_ - begin);
+    for (std::vector<const EventRecord*>& records : request_records) {
+      std::stable_sort(records.begin(), records.end(),
+                       [](const EventRecord* lhs, const EventRecord* rhs) {
+                         return lhs->time_us < rhs->time_us;
+                       });
+      for (const EventRecord* record : records) {
+        picojson::object event_json;
+        event_json["name"] = picojson::value(names_[record->name_id] + " (" +
+                                             std::to_string(record->count) + ")");
+        event_json["ph"] = picojson::value(kPhases[static_cast<int>(record->phase)]);
+        event_json["ts"] = picojson::value(record->time_us);
+        event_json["pid"] = picojson::value(static_cast<int64_t>(1));
+        event_json["tid"] = picojson::value(request_slots_[record->request_slot].request_id);
+        event_array.push_back(picojson::value(std::move(event_json)));
+      }
     }
-    int event_cnt = event_counter_[{request_id, event}]++;
-    events_[request_id].push_back({event + " (" + std::to_string(event_cnt) + ")", event_time});
+    return picojson::value(event_array).serialize();
   }
 
   /*! \brief The mutex ensuring only one thread can access critical regions. */
   std::mutex mutex_;
 
   /************** Critical Regions **************/
-  /*! \brief The request ids in time order. Each id only appears once. */
-  std::vector<std::string> request_id_in_order_;
-  /*! \brief The number of a certain event for a request. */
-  std::unordered_map<std::pair<std::string, std::string>, int, detail::PairHash> event_counter_;
-  /*! \brief The event list of each request together with the timestamps. */
-  std::unordered_map<std::string, std::vector<std::pair<std::string, double>>> events_;
+  /*! \brief The ring buffer of the event records. */
+  std::vector<EventRecord> records_;
+  /*! \brief The total number of recorded events, where the i-th is at `i % capacity`. */
+  int64_t num_recorded_ = 0;
+  /*! \brief The total number of recorded events when the last export happened. */
+  int64_t num_exported_ = 0;
+  /*! \brief The number of events overwritten before they are exported. */
+  int64_t num_dropped_ = 0;
+  /*! \brief The event names without "start "/"finish ", and the map to their ids. */
+  std::vector<std::string> names_;
+  std::unordered_map<std::string, int32_t> name_ids_;
+  /*! \brief The table of the requests with events in the ring buffer, and the free slots. */
+  std::vector<RequestSlot> request_slots_;
+  std::vector<int32_t> free_request_slots_;
+  std::unordered_map<std::string, int32_t> request_slot_ids_;
+
+  /*! \brief The fraction of requests whose events are recorded. */
+  const double sample_rate_;
 };
 
-EventTraceRecorder EventTraceRecorder::Create() {
-  return EventTraceRecorder(make_object<EventTraceRecorderImpl>());
+EventTraceRecorder EventTraceRecorder::Create(int64_t capacity, double sample_rate) {
+  return EventTraceRecorder(make_object<EventTraceRecorderImpl>(capacity, sample_rate));
 }
 
-TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorder").set_body_typed([]() {
-  return EventTraceRecorder::Create();
-});
+TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorder")
+    .set_body_typed([](int64_t capacity, double sample_rate) {
+      return EventTraceRecorder::Create(capacity, sample_rate);
+    });
 
 TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorderAddEvent")
     .set_body_typed([](const EventTraceRecorder& trace_recorder, const String& request_id,
@@ -156,6 +287,12 @@ TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorderAddEvent")
 TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorderDumpJSON")
     .set_body_method<EventTraceRecorder>(&EventTraceRecorderObj::DumpJSON);
 
+TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorderExportJSON")
+    .set_body_method<EventTraceRecorder>(&EventTraceRecorderObj::ExportJSON);
+
+TVM_REGISTER_GLOBAL("mlc.serve.EventTraceRecorderGetNumDroppedEvents")
+    .set_body_method<EventTraceRecorder>(&EventTraceRecorderObj::GetNumDroppedEvents);
+
 }  // namespace serve
 }  // namespace llm
 }  // namespace mlc
@@ -18,7 +18,12 @@ namespace serve {
 
 using namespace tvm::runtime;
 
-/*! \brief The event trace recorder for requests. */
+/*!
+ * \brief The event trace recorder for requests.
+ * The events are recorded in a bounded ring buffer of compact binary records,
+ * where the oldest events are overwritten when the buffer is full. Only the
+ * events of the sampled requests are recorded.
+ */
 class EventTraceRecorderObj : public Object {
  public:
   /*!
@@ -36,9 +41,19 @@ class EventTraceRecorderObj : public Object {
   /*! \brief Record a event for the list of input requests. */
   virtual void AddEvent(const Array<String>& request_ids, const std::string& event) = 0;
 
-  /*! \brief Dump the logged events in Chrome Trace Event Format in JSON string. */
+  /*! \brief Dump the events in the buffer in Chrome Trace Event Format in JSON string. */
   virtual std::string DumpJSON() = 0;
 
+  /*!
+   * \brief Dump the events recorded since the last export in Chrome Trace Event Format
+   * in JSON string, and mark them exported. The events overwritten before they are
+   * exported are dropped.
+   */
+  virtual std::string ExportJSON() = 0;
+
+  /*! \brief Return the number of events overwritten before they are exported. */
+  virtual int64_t GetNumDroppedEvents() = 0;
+
   static constexpr const char* _type_key = "mlc.serve.EventTraceRecorder";
   static constexpr const bool _type_has_method_sequal_reduce = false;
   static constexpr const bool _type_has_method_shash_reduce = false;
@@ -51,8 +66,14 @@ class EventTraceRecorderObj : public Object {
  */
 class EventTraceRecorder : public ObjectRef {
  public:
-  /*! \brief Create an event trace recorder. */
-  static EventTraceRecorder Create();
+  /*!
+   * \brief Create an event trace recorder.
+   * \param capacity The maximum number of events kept in the ring buffer.
+   * \param sample_rate The fraction of requests whose events are recorded.
+   * Whether a request is sampled is decided by the hash of its id, so that
+   * either all or none of the events of a request are recorded.
+   */
+  static EventTraceRecorder Create(int64_t capacity, double sample_rate);
 
   TVM_DEFINE_MUTABLE_NOTNULLABLE_OBJECT_REF_METHODS(EventTraceRecorder, ObjectRef,
                                                     EventTraceRecorderObj);
@@ -260,6 +260,15 @@ void FunctionTable::_InitFunctions() {
       *tvm::runtime::Registry::Get("vm.builtin.attention_kv_cache_get_num_available_pages");
   this->kv_cache_get_total_sequence_length_func_ =
       *tvm::runtime::Registry::Get("vm.builtin.attention_kv_cache_get_total_sequence_length");
+  if (!this->use_disco) {
+    // The KV data copy for swapping sequences to host memory is optional in the runtime.
+    if (const PackedFunc* f = Registry::Get("vm.builtin.attention_kv_cache_debug_get_kv")) {
+      this->kv_cache_debug_get_kv_func_ = *f;
+    }
+    if (const PackedFunc* f = Registry::Get("vm.builtin.attention_kv_cache_debug_set_kv")) {
+      this->kv_cache_debug_set_kv_func_ = *f;
+    }
+  }
   if (Sampler::SupportGPUSampler(local_gpu_device)) {
     gpu_multinomial_from_uniform_func_ = mod->GetFunction("multinomial_from_uniform", true);
     gpu_argsort_probs_func_ = mod->GetFunction("argsort_probs", true);
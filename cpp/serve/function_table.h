@@ -100,6 +100,8 @@ struct FunctionTable {
   PackedFunc kv_cache_popn_func_;
   PackedFunc kv_cache_get_num_available_pages_func_;
   PackedFunc kv_cache_get_total_sequence_length_func_;
+  PackedFunc kv_cache_debug_get_kv_func_;
+  PackedFunc kv_cache_debug_set_kv_func_;
   PackedFunc gpu_multinomial_from_uniform_func_;
   PackedFunc gpu_argsort_probs_func_;
   PackedFunc gpu_sample_with_top_p_func_;
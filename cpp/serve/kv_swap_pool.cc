@@ -0,0 +1,150 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/kv_swap_pool.cc
+ */
+#include "kv_swap_pool.h"
+
+#include <tvm/runtime/logging.h>
+
+#include <algorithm>
+#include <chrono>
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+/*! \brief The number of tokens held by each block of the KV swap pool. */
+constexpr int kKVSwapBlockSize = 64;
+/*! \brief The decay of the time statistics at each update. */
+constexpr double kKVSwapTimeDecay = 0.9;
+
+TVM_REGISTER_OBJECT_TYPE(KVSwapPoolObj);
+
+KVSwapPool::KVSwapPool(Model model, int64_t max_num_bytes) {
+  ObjectPtr<KVSwapPoolObj> n = make_object<KVSwapPoolObj>();
+  n->model = std::move(model);
+  n->block_size = kKVSwapBlockSize;
+  // Allocate the first block ahead, which also gives the number of bytes of a block.
+  KVSwapPoolObj::Block block{n->model->AllocHostKVTensor(kKVSwapBlockSize),
+                             n->model->AllocHostKVTensor(kKVSwapBlockSize)};
+  int64_t block_num_bytes = 2 * GetDataSize(*(block.k_data.operator->()));
+  n->max_num_blocks = max_num_bytes / block_num_bytes;
+  n->free_blocks_.push_back(std::move(block));
+  data_ = std::move(n);
+}
+
+bool KVSwapPoolObj::ShouldSwapOut(int num_tokens) const {
+  int num_blocks = (num_tokens + block_size - 1) / block_size;
+  if (num_tokens <= 0 || num_used_blocks_ + num_blocks > max_num_blocks) {
+    return false;
+  }
+  if (block_copy_time_ewma <= 0.0 || prefill_token_time_ewma <= 0.0) {
+    // Swap until both the copy and the prefill are timed.
+    return true;
+  }
+  // The blocks are copied out now and copied back in later.
+  return 2 * num_blocks * block_copy_time_ewma < num_tokens * prefill_token_time_ewma;
+}
+
+void KVSwapPoolObj::SwapOut(int64_t seq_id, int num_tokens) {
+  CHECK(!swapped_seqs_.count(seq_id)) << "The sequence " << seq_id << " is already swapped out.";
+  auto tstart = std::chrono::high_resolution_clock::now();
+  SwappedSequence swapped_seq{num_tokens, {}};
+  for (int start_pos = 0; start_pos < num_tokens; start_pos += block_size) {
+    Block block;
+    if (!free_blocks_.empty()) {
+      block = std::move(free_blocks_.back());
+      free_blocks_.pop_back();
+    } else {
+      block = {model->AllocHostKVTensor(block_size), model->AllocHostKVTensor(block_size)};
+    }
+    int length = std::min(block_size, num_tokens - start_pos);
+    ShapeTuple shape{block.k_data->shape[0], length, block.k_data->shape[2],
+                     block.k_data->shape[3]};
+    model->CopyKVToHost(seq_id, start_pos, block.k_data.CreateView(shape, block.k_data->dtype),
+                        block.v_data.CreateView(shape, block.v_data->dtype));
+    swapped_seq.blocks.push_back(std::move(block));
+  }
+  int num_blocks = swapped_seq.blocks.size();
+  num_used_blocks_ += num_blocks;
+  swapped_seqs_.emplace(seq_id, std::move(swapped_seq));
+  auto tend = std::chrono::high_resolution_clock::now();
+  UpdateBlockCopyTime(static_cast<double>((tend - tstart).count()) / 1e9, num_blocks);
+}
+
+int KVSwapPoolObj::SwapIn(int64_t seq_id) {
+  auto it = swapped_seqs_.find(seq_id);
+  CHECK(it != swapped_seqs_.end()) << "The sequence " << seq_id << " is not swapped out.";
+  auto tstart = std::chrono::high_resolution_clock::now();
+  SwappedSequence& swapped_seq = it->second;
+  model->AddNewSequence(seq_id);
+  for (int i = 0; i < static_cast<int>(swapped_seq.blocks.size()); ++i) {
+    const Block& block = swapped_seq.blocks[i];
+    int start_pos = i * block_size;
+    int length = std::min(block_size, swapped_seq.num_tokens - start_pos);
+    ShapeTuple shape{block.k_data->shape[0], length, block.k_data->shape[2],
+                     block.k_data->shape[3]};
+    model->CopyKVFromHost(seq_id, start_pos, block.k_data.CreateView(shape, block.k_data->dtype),
+                          block.v_data.CreateView(shape, block.v_data->dtype));
+  }
+  int num_tokens = swapped_seq.num_tokens;
+  int num_blocks = swapped_seq.blocks.size();
+  RemoveSequence(seq_id);
+  auto tend = std::chrono::high_resolution_clock::now();
+  UpdateBlockCopyTime(static_cast<double>((tend - tstart).count()) / 1e9, num_blocks);
+  return num_tokens;
+}
+
+void KVSwapPoolObj::RemoveSequence(int64_t seq_id) {
+  auto it = swapped_seqs_.find(seq_id);
+  if (it == swapped_seqs_.end()) {
+    return;
+  }
+  num_used_blocks_ -= it->second.blocks.size();
+  for (Block& block : it->second.blocks) {
+    free_blocks_.push_back(std::move(block));
+  }
+  swapped_seqs_.erase(it);
+}
+
+int KVSwapPoolObj::GetSequenceLength(int64_t seq_id) const {
+  auto it = swapped_seqs_.find(seq_id);
+  CHECK(it != swapped_seqs_.end()) << "The sequence " << seq_id << " is not swapped out.";
+  return it->second.num_tokens;
+}
+
+void KVSwapPoolObj::UpdatePrefillTime(double seconds, int num_tokens) {
+  if (num_tokens <= 0) {
+    return;
+  }
+  double token_time = seconds / num_tokens;
+  prefill_token_time_ewma = prefill_token_time_ewma > 0.0
+                                ? kKVSwapTimeDecay * prefill_token_time_ewma +
+                                      (1 - kKVSwapTimeDecay) * token_time
+                                : token_time;
+}
+
+void KVSwapPoolObj::UpdateBlockCopyTime(double seconds, int num_blocks) {
+  if (num_blocks <= 0) {
+    return;
+  }
+  double block_time = seconds / num_blocks;
+  block_copy_time_ewma = block_copy_time_ewma > 0.0
+                             ? kKVSwapTimeDecay * block_copy_time_ewma +
+                                   (1 - kKVSwapTimeDecay) * block_time
+                             : block_time;
+}
+
+void KVSwapPoolObj::Reset() {
+  std::vector<int64_t> seq_ids;
+  for (const auto& [seq_id, swapped_seq] : swapped_seqs_) {
+    seq_ids.push_back(seq_id);
+  }
+  for (int64_t seq_id : seq_ids) {
+    RemoveSequence(seq_id);
+  }
+}
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
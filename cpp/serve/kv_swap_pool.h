@@ -0,0 +1,142 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/kv_swap_pool.h
+ * \brief The host memory pool of the KV data of the sequences swapped out on preemption.
+ */
+#ifndef MLC_LLM_SERVE_KV_SWAP_POOL_H_
+#define MLC_LLM_SERVE_KV_SWAP_POOL_H_
+
+#include <tvm/runtime/ndarray.h>
+#include <tvm/runtime/object.h>
+
+#include <cstdint>
+#include <unordered_map>
+#include <vector>
+
+#include "model.h"
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+using namespace tvm::runtime;
+
+/*!
+ * \brief The host memory pool of the KV data of the sequences swapped out on preemption.
+ * When a running sequence is preempted, its KV data are either copied to the pool and
+ * copied back when the sequence is scheduled again, or dropped and recomputed by prefill.
+ *
+ * The KV data are held in blocks of a fixed number of tokens. The blocks are reused across
+ * swaps, so that page-locked host memory is allocated only when the pool grows.
+ *
+ * The pool decides between swapping and recomputing for each preempted sequence. It tracks
+ * the EWMA time of copying one block in either direction and the EWMA prefill time of one
+ * token, and swaps a sequence out only when copying its blocks out and back in is faster
+ * than prefilling its tokens again. Since each block costs the same regardless of how many
+ * tokens it holds, short sequences are usually recomputed and long sequences swapped.
+ */
+class KVSwapPoolObj : public Object {
+ public:
+  /*!
+   * \brief Check if a preempted sequence of the given length should be swapped out
+   * rather than recomputed, which requires enough free space in the pool.
+   * \param num_tokens The number of tokens whose KV data are in the KV cache.
+   */
+  bool ShouldSwapOut(int num_tokens) const;
+
+  /*!
+   * \brief Copy the KV data of the given sequence to the pool.
+   * The caller removes the sequence from the model afterwards.
+   * \param seq_id The id of the sequence.
+   * \param num_tokens The number of tokens whose KV data are in the KV cache.
+   */
+  void SwapOut(int64_t seq_id, int num_tokens);
+
+  /*!
+   * \brief Add the given swapped sequence back to the model with its KV data copied
+   * from the pool, and release its blocks.
+   * \param seq_id The id of the sequence.
+   * \return The number of tokens whose KV data are restored.
+   */
+  int SwapIn(int64_t seq_id);
+
+  /*!
+   * \brief Release the blocks of a swapped sequence without restoring it.
+   * It is a no-op for the sequences that are not swapped out.
+   */
+  void RemoveSequence(int64_t seq_id);
+
+  /*! \brief Check if the given sequence is swapped out to the pool. */
+  bool HasSequence(int64_t seq_id) const { return swapped_seqs_.count(seq_id); }
+
+  /*! \brief Get the number of tokens of the given swapped sequence. */
+  int GetSequenceLength(int64_t seq_id) const;
+
+  /*! \brief Update the prefill time per token with the time of a prefill step. */
+  void UpdatePrefillTime(double seconds, int num_tokens);
+
+  /*! \brief Reset the pool, releasing the blocks of all the swapped sequences. */
+  void Reset();
+
+  /*! \brief The model whose KV data are swapped. */
+  Model model{nullptr};
+  /*! \brief The number of tokens held by each block. */
+  int block_size;
+  /*! \brief The maximum number of blocks of the pool. */
+  int max_num_blocks;
+  /*! \brief The EWMA time in seconds of copying one block between the device and the host. */
+  double block_copy_time_ewma = 0.0;
+  /*! \brief The EWMA prefill time in seconds of one token. */
+  double prefill_token_time_ewma = 0.0;
+
+  static constexpr const char* _type_key = "mlc.serve.KVSwapPool";
+  static constexpr const bool _type_has_method_sequal_reduce = false;
+  static constexpr const bool _type_has_method_shash_reduce = false;
+  TVM_DECLARE_FINAL_OBJECT_INFO(KVSwapPoolObj, Object);
+
+ private:
+  /*! \brief The host tensors of the K and V data of a block. */
+  struct Block {
+    NDArray k_data;
+    NDArray v_data;
+  };
+  /*! \brief The length and the blocks of a swapped sequence. */
+  struct SwappedSequence {
+    int num_tokens;
+    std::vector<Block> blocks;
+  };
+
+  /*! \brief Update the block copy time with the time of copying the given number of blocks. */
+  void UpdateBlockCopyTime(double seconds, int num_blocks);
+
+  /*! \brief The released blocks to reuse. */
+  std::vector<Block> free_blocks_;
+  /*! \brief The number of blocks held by the swapped sequences. */
+  int num_used_blocks_ = 0;
+  /*! \brief The swapped sequences. */
+  std::unordered_map<int64_t, SwappedSequence> swapped_seqs_;
+
+  friend class KVSwapPool;
+};
+
+/*!
+ * \brief Managed reference of KVSwapPoolObj.
+ * \sa KVSwapPoolObj
+ */
+class KVSwapPool : public ObjectRef {
+ public:
+  /*!
+   * \brief Constructor of KV swap pool.
+   * \param model The model whose KV data are swapped.
+   * \param max_num_bytes The maximum number of bytes of host memory held by the pool.
+   */
+  explicit KVSwapPool(Model model, int64_t max_num_bytes);
+
+  TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(KVSwapPool, ObjectRef, KVSwapPoolObj);
+};
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
+
+#endif  // MLC_LLM_SERVE_KV_SWAP_POOL_H_
@@ -0,0 +1,97 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/metrics.cc
+ */
+#include "metrics.h"
+
+#include <tvm/runtime/logging.h>
+
+#include <algorithm>
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+/*! \brief The bucket bounds in seconds of the request-level latency histograms. */
+const std::vector<double> kRequestLatencyBuckets = {0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                                                    2.5,  5.0,   10.0, 25.0, 50.0, 100.0};
+/*! \brief The bucket bounds in seconds of the inter-token latency histogram. */
+const std::vector<double> kInterTokenLatencyBuckets = {0.001, 0.0025, 0.005, 0.01, 0.02, 0.04,
+                                                       0.06,  0.08,   0.1,   0.25, 0.5,  1.0};
+
+/****************** Histogram ******************/
+
+Histogram::Histogram(std::vector<double> bucket_bounds)
+    : bucket_bounds_(std::move(bucket_bounds)),
+      bucket_counts_(new std::atomic<int64_t>[bucket_bounds_.size() + 1]) {
+  ICHECK(std::is_sorted(bucket_bounds_.begin(), bucket_bounds_.end()));
+  for (int i = 0; i <= static_cast<int>(bucket_bounds_.size()); ++i) {
+    bucket_counts_[i].store(0, std::memory_order_relaxed);
+  }
+}
+
+void Histogram::Observe(double value) {
+  int bucket = std::lower_bound(bucket_bounds_.begin(), bucket_bounds_.end(), value) -
+               bucket_bounds_.begin();
+  bucket_counts_[bucket].fetch_add(1, std::memory_order_relaxed);
+  // There is a single writer, so the load and store do not lose updates.
+  sum_.store(sum_.load(std::memory_order_relaxed) + value, std::memory_order_relaxed);
+  count_.fetch_add(1, std::memory_order_relaxed);
+}
+
+picojson::object Histogram::AsJSON() const {
+  picojson::array bounds;
+  picojson::array counts;
+  bounds.reserve(bucket_bounds_.size());
+  counts.reserve(bucket_bounds_.size() + 1);
+  for (double bound : bucket_bounds_) {
+    bounds.push_back(picojson::value(bound));
+  }
+  for (int i = 0; i <= static_cast<int>(bucket_bounds_.size()); ++i) {
+    counts.push_back(picojson::value(bucket_counts_[i].load(std::memory_order_relaxed)));
+  }
+  picojson::object histogram;
+  histogram["bucket_bounds"] = picojson::value(bounds);
+  histogram["bucket_counts"] = picojson::value(counts);
+  histogram["sum"] = picojson::value(sum_.load(std::memory_order_relaxed));
+  histogram["count"] = picojson::value(count_.load(std::memory_order_relaxed));
+  return histogram;
+}
+
+/****************** EngineMetrics ******************/
+
+TVM_REGISTER_OBJECT_TYPE(EngineMetricsObj);
+
+EngineMetricsObj::EngineMetricsObj()
+    : queue_time(kRequestLatencyBuckets),
+      time_to_first_token(kRequestLatencyBuckets),
+      inter_token_latency(kInterTokenLatencyBuckets),
+      end_to_end_latency(kRequestLatencyBuckets) {}
+
+String EngineMetricsObj::AsJSON() const {
+  auto load = [](const auto& value) {
+    return picojson::value(value.load(std::memory_order_relaxed));
+  };
+  picojson::object metrics;
+  metrics["queue_time"] = picojson::value(queue_time.AsJSON());
+  metrics["time_to_first_token"] = picojson::value(time_to_first_token.AsJSON());
+  metrics["inter_token_latency"] = picojson::value(inter_token_latency.AsJSON());
+  metrics["end_to_end_latency"] = picojson::value(end_to_end_latency.AsJSON());
+  metrics["num_running_requests"] = load(num_running_requests);
+  metrics["num_waiting_requests"] = load(num_waiting_requests);
+  metrics["kv_cache_num_total_pages"] = load(kv_cache_num_total_pages);
+  metrics["kv_cache_num_used_pages"] = load(kv_cache_num_used_pages);
+  metrics["num_prefill_tokens"] = load(num_prefill_tokens);
+  metrics["num_decode_tokens"] = load(num_decode_tokens);
+  metrics["num_draft_tokens"] = load(num_draft_tokens);
+  metrics["num_accepted_tokens"] = load(num_accepted_tokens);
+  metrics["engine_prefill_time"] = load(engine_prefill_time);
+  metrics["engine_decode_time"] = load(engine_decode_time);
+  return picojson::value(metrics).serialize(true);
+}
+
+EngineMetrics::EngineMetrics() { data_ = make_object<EngineMetricsObj>(); }
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
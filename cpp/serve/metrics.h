@@ -0,0 +1,119 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/metrics.h
+ * \brief The runtime metrics of the serving engine, which can be read from other threads.
+ */
+#ifndef MLC_LLM_SERVE_METRICS_H_
+#define MLC_LLM_SERVE_METRICS_H_
+
+#include <picojson.h>
+#include <tvm/runtime/container/string.h>
+#include <tvm/runtime/object.h>
+
+#include <atomic>
+#include <memory>
+#include <vector>
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+using namespace tvm::runtime;
+
+/*!
+ * \brief A histogram with fixed bucket bounds.
+ * The histogram is lock-free. It has a single writer (the engine thread),
+ * and can be read by any thread at any time.
+ */
+class Histogram {
+ public:
+  /*! \param bucket_bounds The ascending upper bounds of the buckets, excluding +inf. */
+  explicit Histogram(std::vector<double> bucket_bounds);
+
+  /*! \brief Record an observed value. Only the engine thread can invoke this method. */
+  void Observe(double value);
+
+  /*!
+   * \brief Return the histogram in JSON, with the bucket bounds, the count of each bucket
+   * (the last one for +inf), the sum and the count of all the observed values.
+   */
+  picojson::object AsJSON() const;
+
+ private:
+  /*! \brief The ascending upper bounds of the buckets, excluding +inf. */
+  std::vector<double> bucket_bounds_;
+  /*! \brief The number of observed values in each bucket, including the +inf bucket. */
+  std::unique_ptr<std::atomic<int64_t>[]> bucket_counts_;
+  /*! \brief The sum of the observed values. */
+  std::atomic<double> sum_ = 0.0;
+  /*! \brief The number of the observed values. */
+  std::atomic<int64_t> count_ = 0;
+};
+
+/*!
+ * \brief The runtime metrics of the engine, for monitoring the engine from other threads.
+ * Different from EngineStats, all the metrics are atomic counters, gauges or histograms,
+ * which the engine updates on the fly, and which can be read without synchronizing with
+ * the engine thread. The metrics are not cleared when the engine is reset, so that the
+ * counters are monotonic for the monitoring systems.
+ */
+class EngineMetricsObj : public Object {
+ public:
+  EngineMetricsObj();
+
+  /*! \brief The time of a request waiting in the engine until it starts prefill. */
+  Histogram queue_time;
+  /*! \brief The time from a request being added to the engine to its first token. */
+  Histogram time_to_first_token;
+  /*! \brief The average time between two consecutive output tokens of a request. */
+  Histogram inter_token_latency;
+  /*! \brief The time from a request being added to the engine to its finish. */
+  Histogram end_to_end_latency;
+
+  /*! \brief The number of running requests. */
+  std::atomic<int64_t> num_running_requests = 0;
+  /*! \brief The number of requests waiting for prefill. */
+  std::atomic<int64_t> num_waiting_requests = 0;
+  /*! \brief The total number of KV cache pages. */
+  std::atomic<int64_t> kv_cache_num_total_pages = 0;
+  /*! \brief The number of KV cache pages in use. */
+  std::atomic<int64_t> kv_cache_num_used_pages = 0;
+
+  /*! \brief The total number of tokens processed by prefill. */
+  std::atomic<int64_t> num_prefill_tokens = 0;
+  /*! \brief The total number of output tokens generated for the requests. */
+  std::atomic<int64_t> num_decode_tokens = 0;
+  /*! \brief The total number of speculated draft tokens. */
+  std::atomic<int64_t> num_draft_tokens = 0;
+  /*! \brief The total number of draft tokens accepted in speculation verification. */
+  std::atomic<int64_t> num_accepted_tokens = 0;
+  /*! \brief The total engine time on prefill in seconds. */
+  std::atomic<double> engine_prefill_time = 0.0;
+  /*! \brief The total engine time on decode in seconds. */
+  std::atomic<double> engine_decode_time = 0.0;
+
+  /*! \brief Return the metrics in JSON string. */
+  String AsJSON() const;
+
+  static constexpr const char* _type_key = "mlc.serve.EngineMetrics";
+  static constexpr const bool _type_has_method_sequal_reduce = false;
+  static constexpr const bool _type_has_method_shash_reduce = false;
+  TVM_DECLARE_FINAL_OBJECT_INFO(EngineMetricsObj, Object);
+};
+
+/*!
+ * \brief Managed reference of EngineMetricsObj.
+ * \sa EngineMetricsObj
+ */
+class EngineMetrics : public ObjectRef {
+ public:
+  explicit EngineMetrics();
+
+  TVM_DEFINE_MUTABLE_NOTNULLABLE_OBJECT_REF_METHODS(EngineMetrics, ObjectRef, EngineMetricsObj);
+};
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
+
+#endif  // MLC_LLM_SERVE_METRICS_H_
@@ -772,6 +772,69 @@ class ModelImpl : public ModelObj {
     }
   }
 
+  /************** KV Swap **************/
+
+  bool ProbeKVSwap(int64_t probe_seq_id) final {
+    if (ft_.use_disco || sliding_window_size_ != -1 ||
+        !ft_.kv_cache_debug_get_kv_func_.defined() ||
+        !ft_.kv_cache_debug_set_kv_func_.defined() ||
+        ft_.model_metadata_.kv_cache.num_hidden_layers == -1) {
+      return false;
+    }
+    NDArray k_data = AllocHostKVTensor(/*num_tokens=*/1);
+    NDArray v_data = AllocHostKVTensor(/*num_tokens=*/1);
+    bool supported = true;
+    AddNewSequence(probe_seq_id);
+    try {
+      CopyKVFromHost(probe_seq_id, /*start_pos=*/0, k_data, v_data);
+      CopyKVToHost(probe_seq_id, /*start_pos=*/0, k_data, v_data);
+    } catch (const std::exception& e) {
+      LOG(WARNING) << "The KV cache cannot copy KV data from and to host memory, "
+                   << "and the preempted requests will be recomputed: " << e.what();
+      supported = false;
+    }
+    RemoveSequence(probe_seq_id);
+    return supported;
+  }
+
+  NDArray AllocHostKVTensor(int num_tokens) final {
+    const ModelMetadata::KVCache& kv_cache_metadata = ft_.model_metadata_.kv_cache;
+    Device host_device = device_.device_type == kDLCUDA ? Device{kDLCUDAHost, 0}
+                                                        : Device{kDLCPU, 0};
+    return NDArray::Empty({kv_cache_metadata.num_hidden_layers, num_tokens,
+                           kv_cache_metadata.num_key_value_heads, kv_cache_metadata.head_dim},
+                          kv_cache_metadata.dtype, host_device);
+  }
+
+  void CopyKVToHost(int64_t seq_id, int start_pos, NDArray k_data, NDArray v_data) final {
+    int num_tokens = k_data->shape[1];
+    auto [k_staging, v_staging] = GetKVSwapStagingTensors(num_tokens);
+    ft_.kv_cache_debug_get_kv_func_(kv_cache_, seq_id, start_pos, start_pos + num_tokens,
+                                    k_staging, v_staging);
+    k_data.CopyFrom(k_staging);
+    v_data.CopyFrom(v_staging);
+    TVMSynchronize(device_.device_type, device_.device_id, nullptr);
+  }
+
+  void CopyKVFromHost(int64_t seq_id, int start_pos, NDArray k_data, NDArray v_data) final {
+    int num_tokens = k_data->shape[1];
+    auto [k_staging, v_staging] = GetKVSwapStagingTensors(num_tokens);
+    k_staging.CopyFrom(k_data);
+    v_staging.CopyFrom(v_data);
+    // Extend the sequence with the tokens first, and then overwrite their KV data.
+    IntTuple seq_ids_tuple{seq_id};
+    IntTuple lengths_tuple{num_tokens};
+    ft_.kv_cache_begin_forward_func_(kv_cache_, seq_ids_tuple, lengths_tuple);
+    try {
+      ft_.kv_cache_debug_set_kv_func_(kv_cache_, seq_id, start_pos, k_staging, v_staging);
+    } catch (...) {
+      // End the forward even when the copy fails, so that the KV cache stays usable.
+      ft_.kv_cache_end_forward_func_(kv_cache_);
+      throw;
+    }
+    ft_.kv_cache_end_forward_func_(kv_cache_);
+  }
+
   /************** Raw Info Query **************/
 
   int GetNumAvailablePages() const final {
@@ -784,6 +847,22 @@ class ModelImpl : public ModelObj {
 
   /*********************** Utilities  ***********************/
 
+  /*!
+   * \brief Get the device tensors to stage the KV data of the given number of tokens
+   * in the copies from and to host memory. They are reallocated only when growing.
+   */
+  std::pair<NDArray, NDArray> GetKVSwapStagingTensors(int num_tokens) {
+    const ModelMetadata::KVCache& kv_cache_metadata = ft_.model_metadata_.kv_cache;
+    ShapeTuple shape{kv_cache_metadata.num_hidden_layers, num_tokens,
+                     kv_cache_metadata.num_key_value_heads, kv_cache_metadata.head_dim};
+    if (!kv_swap_k_staging_.defined() || kv_swap_k_staging_->shape[1] < num_tokens) {
+      kv_swap_k_staging_ = NDArray::Empty(shape, kv_cache_metadata.dtype, device_);
+      kv_swap_v_staging_ = NDArray::Empty(shape, kv_cache_metadata.dtype, device_);
+    }
+    return {kv_swap_k_staging_.CreateView(shape, kv_cache_metadata.dtype),
+            kv_swap_v_staging_.CreateView(shape, kv_cache_metadata.dtype)};
+  }
+
   LogitProcessor CreateLogitProcessor(int max_num_token,
                                       Optional<EventTraceRecorder> trace_recorder) {
     return LogitProcessor(max_num_token, vocab_size_, &this->ft_, device_,
@@ -810,6 +889,8 @@ class ModelImpl : public ModelObj {
     return max_window_size_ != -1 ? max_window_size_ : std::numeric_limits<int>::max();
   }
 
+  int GetSlidingWindowSize() const final { return sliding_window_size_; }
+
   ObjectRef AllocEmbeddingTensor() final {
     // Allocate the embedding tensor.
     ObjectRef embedding = ft_.alloc_embedding_tensor_func_();
@@ -944,6 +1025,9 @@ class ModelImpl : public ModelObj {
   // Shared NDArray
   memory::Storage token_ids_storage_{nullptr};
   NDArray logit_pos_arr_{nullptr};
+  // The device tensors staging the KV data copied from and to host memory.
+  NDArray kv_swap_k_staging_{nullptr};
+  NDArray kv_swap_v_staging_{nullptr};
   // A boolean indicating if tracing is enabled.
   bool trace_enabled_;
 };
@@ -259,6 +259,34 @@ class ModelObj : public Object {
    */
   virtual void EnableSlidingWindowForSeq(int64_t seq_id) = 0;
 
+  /************** KV Swap **************/
+
+  /*!
+   * \brief Check if the KV data of sequences can be copied to and from host memory,
+   * by copying the KV data of a temporary sequence with the given id.
+   * It is always false for the models with tensor parallelism or sliding window.
+   */
+  virtual bool ProbeKVSwap(int64_t probe_seq_id) = 0;
+
+  /*!
+   * \brief Allocate a host tensor for the K or V data of the given number of tokens,
+   * in shape (num_layers, num_tokens, num_kv_heads, head_dim).
+   * The tensor is page-locked when the model runs on CUDA.
+   */
+  virtual NDArray AllocHostKVTensor(int num_tokens) = 0;
+
+  /*!
+   * \brief Copy the KV data of a sequence to host tensors, starting from the given position.
+   * The number of copied tokens is the length of the tensors.
+   */
+  virtual void CopyKVToHost(int64_t seq_id, int start_pos, NDArray k_data, NDArray v_data) = 0;
+
+  /*!
+   * \brief Extend a sequence of length `start_pos` in the KV cache with the KV data
+   * in host tensors, without running the model.
+   */
+  virtual void CopyKVFromHost(int64_t seq_id, int start_pos, NDArray k_data, NDArray v_data) = 0;
+
   /************** Raw Info Query **************/
 
   /*! \brief Get the number of available pages in KV cache. */
@@ -289,6 +317,9 @@ class ModelObj : public Object {
   /*! \brief Get the max window size of the model. "-1" means infinite length. */
   virtual int GetMaxWindowSize() const = 0;
 
+  /*! \brief Get the sliding window size of the model. "-1" means sliding window is disabled. */
+  virtual int GetSlidingWindowSize() const = 0;
+
   /*! \brief Allocate an embedding tensor with the prefill chunk size. */
   virtual ObjectRef AllocEmbeddingTensor() = 0;
 
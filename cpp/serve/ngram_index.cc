@@ -0,0 +1,65 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/ngram_index.cc
+ */
+#include "ngram_index.h"
+
+#include <algorithm>
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+/*! \brief The max size of the n-grams to match. */
+constexpr int kMaxNGramSize = 3;
+/*! \brief The min size of the n-grams to match. */
+constexpr int kMinNGramSize = 1;
+
+void NGramIndex::Append(int32_t token) {
+  if (tables_.empty()) {
+    tables_.resize(kMaxNGramSize);
+  }
+  tokens_.push_back(token);
+  // Index the n-grams which are followed by the new token.
+  int pos = static_cast<int>(tokens_.size()) - 1;
+  for (int ngram_size = kMinNGramSize; ngram_size <= std::min(kMaxNGramSize, pos); ++ngram_size) {
+    tables_[ngram_size - 1][HashNGram(pos - ngram_size, ngram_size)] = pos;
+  }
+}
+
+std::vector<int32_t> NGramIndex::Propose(int max_num_tokens) const {
+  int num_tokens = tokens_.size();
+  if (max_num_tokens <= 0 || tables_.empty()) {
+    return {};
+  }
+  for (int ngram_size = std::min(kMaxNGramSize, num_tokens - 1); ngram_size >= kMinNGramSize;
+       --ngram_size) {
+    int start = num_tokens - ngram_size;
+    const std::unordered_map<uint64_t, int>& table = tables_[ngram_size - 1];
+    auto it = table.find(HashNGram(start, ngram_size));
+    if (it == table.end()) {
+      continue;
+    }
+    int match_end = it->second;
+    // Skip hash collisions.
+    if (!std::equal(tokens_.begin() + match_end - ngram_size, tokens_.begin() + match_end,
+                    tokens_.begin() + start)) {
+      continue;
+    }
+    int draft_end = std::min(match_end + max_num_tokens, num_tokens);
+    return {tokens_.begin() + match_end, tokens_.begin() + draft_end};
+  }
+  return {};
+}
+
+uint64_t NGramIndex::HashNGram(int start, int ngram_size) const {
+  uint64_t hash = 14695981039346656037ULL;
+  for (int i = start; i < start + ngram_size; ++i) {
+    hash = (hash ^ static_cast<uint32_t>(tokens_[i])) * 1099511628211ULL;
+  }
+  return hash;
+}
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
@@ -0,0 +1,58 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/ngram_index.h
+ * \brief The n-gram index of a token sequence for prompt-lookup draft proposal.
+ */
+#ifndef MLC_LLM_SERVE_NGRAM_INDEX_H_
+#define MLC_LLM_SERVE_NGRAM_INDEX_H_
+
+#include <cstdint>
+#include <unordered_map>
+#include <vector>
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+/*!
+ * \brief The n-gram index of the token sequence of a request, which is its prompt
+ * followed by the generated tokens. For each n-gram size, the index maps each n-gram
+ * to the position right after its latest occurrence, so that the tokens which follow
+ * the previous occurrence of the trailing n-gram can be proposed as the draft.
+ * \note Appending a token and proposing a draft both take O(max n-gram size) time.
+ */
+class NGramIndex {
+ public:
+  /*! \brief Append a token to the end of the indexed sequence. */
+  void Append(int32_t token);
+
+  /*!
+   * \brief Propose the draft tokens that follow the sequence. The trailing n-gram of
+   * the largest size which occurred before in the sequence is matched, and the tokens
+   * following its latest previous occurrence are proposed.
+   * \param max_num_tokens The max number of tokens to propose.
+   * \return The proposed tokens, which are empty when no trailing n-gram matches.
+   */
+  std::vector<int32_t> Propose(int max_num_tokens) const;
+
+  /*! \brief Return the number of indexed tokens. */
+  int GetNumTokens() const { return static_cast<int>(tokens_.size()); }
+
+ private:
+  /*! \brief Return the hash of the n-gram of the given size starting at the given position. */
+  uint64_t HashNGram(int start, int ngram_size) const;
+
+  /*! \brief The indexed tokens. */
+  std::vector<int32_t> tokens_;
+  /*!
+   * \brief The table of each n-gram size, which maps the hash of an n-gram to the
+   * position right after its latest occurrence.
+   */
+  std::vector<std::unordered_map<uint64_t, int>> tables_;
+};
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
+
+#endif  // MLC_LLM_SERVE_NGRAM_INDEX_H_
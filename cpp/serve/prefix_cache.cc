@@ -0,0 +1,146 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/prefix_cache.cc
+ */
+#include "prefix_cache.h"
+
+#include <tvm/runtime/logging.h>
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+/*! \brief The size in bytes of each radix tree page used by the prefix cache. */
+constexpr size_t kRadixTreePageBytes = 512;
+/*! \brief A lower bound of the number of tokens each radix tree page can hold. */
+constexpr size_t kRadixTreePageTokens = 96;
+
+TVM_REGISTER_OBJECT_TYPE(PrefixCacheObj);
+
+PrefixCache::PrefixCache(int max_num_recycling_seqs, int max_num_sequence,
+                         int max_total_sequence_length,
+                         std::function<void(int64_t)> remove_callback) {
+  ObjectPtr<PrefixCacheObj> n = make_object<PrefixCacheObj>();
+  n->max_num_recycling_seqs = max_num_recycling_seqs;
+  n->radix_tree_num_seqs = max_num_sequence + max_num_recycling_seqs;
+  // Every radix tree node is either full, or ends at a sequence or a branch.
+  // So the number of pages is bounded by the token capacity plus twice the number of sequences.
+  n->radix_tree_num_pages =
+      max_total_sequence_length / kRadixTreePageTokens + 2 * n->radix_tree_num_seqs + 1;
+  n->radix_tree =
+      PagedRadixTree(n->radix_tree_num_pages, kRadixTreePageBytes, n->radix_tree_num_seqs);
+  n->remove_callback = std::move(remove_callback);
+  data_ = std::move(n);
+}
+
+std::pair<int, int64_t> PrefixCacheObj::MatchPrefix(const std::vector<int32_t>& tokens) {
+  if (tokens.empty() || seq_states_.empty()) {
+    return {0, -1};
+  }
+  auto [matched_length, matched_seq_ids] =
+      radix_tree->MatchPrefix(IntTuple{tokens.begin(), tokens.end()});
+  if (matched_length == 0 || matched_seq_ids.empty()) {
+    return {0, -1};
+  }
+  // All the matched sequences share the matched prefix. Prefer the recycling
+  // ones so that they are refreshed in the LRU list.
+  int64_t forked_seq_id = matched_seq_ids[0];
+  for (int64_t seq_id : matched_seq_ids) {
+    auto it = seq_states_.find(seq_id);
+    ICHECK(it != seq_states_.end());
+    if (it->second != lru_.end()) {
+      forked_seq_id = seq_id;
+      lru_.splice(lru_.end(), lru_, it->second);
+      break;
+    }
+  }
+  return {static_cast<int>(matched_length), forked_seq_id};
+}
+
+void PrefixCacheObj::AddSequence(int64_t seq_id) {
+  ICHECK(!HasSequence(seq_id)) << "The sequence " << seq_id << " is already in prefix cache.";
+  radix_tree->AddSequence(seq_id);
+  seq_states_[seq_id] = lru_.end();
+}
+
+void PrefixCacheObj::ForkSequence(int64_t seq_id, int64_t parent_seq_id, int fork_pos) {
+  ICHECK(!HasSequence(seq_id)) << "The sequence " << seq_id << " is already in prefix cache.";
+  ICHECK(HasSequence(parent_seq_id))
+      << "The parent sequence " << parent_seq_id << " is not in prefix cache.";
+  radix_tree->ForkSequence(seq_id, parent_seq_id, fork_pos);
+  seq_states_[seq_id] = lru_.end();
+}
+
+bool PrefixCacheObj::ExtendSequence(int64_t seq_id, const std::vector<int32_t>& tokens) {
+  if (!HasSequence(seq_id)) {
+    return false;
+  }
+  if (tokens.empty()) {
+    return true;
+  }
+  // Reserve one extra page for the possible page split.
+  size_t required_capacity = tokens.size() + kRadixTreePageTokens;
+  while (radix_tree->FreeCapacity() < required_capacity) {
+    if (!TryFreeMemory(/*pinned_seq_id=*/seq_id)) {
+      RemoveSequence(seq_id);
+      return false;
+    }
+  }
+  radix_tree->ExtendSequence(seq_id, IntTuple{tokens.begin(), tokens.end()});
+  return true;
+}
+
+void PrefixCacheObj::RecycleSequence(int64_t seq_id) {
+  auto it = seq_states_.find(seq_id);
+  ICHECK(it != seq_states_.end()) << "The sequence " << seq_id << " is not in prefix cache.";
+  ICHECK(it->second == lru_.end()) << "The sequence " << seq_id << " is already recycling.";
+  it->second = lru_.insert(lru_.end(), seq_id);
+  while (NumRecyclingSequences() > max_num_recycling_seqs) {
+    EvictSequence(lru_.front());
+  }
+}
+
+void PrefixCacheObj::RemoveSequence(int64_t seq_id) {
+  auto it = seq_states_.find(seq_id);
+  if (it == seq_states_.end()) {
+    return;
+  }
+  if (it->second != lru_.end()) {
+    lru_.erase(it->second);
+  }
+  seq_states_.erase(it);
+  radix_tree->RemoveSequence(seq_id);
+}
+
+int PrefixCacheObj::GetSequenceLength(int64_t seq_id) const {
+  ICHECK(HasSequence(seq_id)) << "The sequence " << seq_id << " is not in prefix cache.";
+  return radix_tree->GetSequenceLength(seq_id);
+}
+
+bool PrefixCacheObj::TryFreeMemory(int64_t pinned_seq_id) {
+  for (int64_t seq_id : lru_) {
+    if (seq_id != pinned_seq_id) {
+      EvictSequence(seq_id);
+      return true;
+    }
+  }
+  return false;
+}
+
+void PrefixCacheObj::EvictSequence(int64_t seq_id) {
+  auto it = seq_states_.find(seq_id);
+  ICHECK(it != seq_states_.end() && it->second != lru_.end())
+      << "Only recycling sequences can be evicted from prefix cache.";
+  RemoveSequence(seq_id);
+  remove_callback(seq_id);
+}
+
+void PrefixCacheObj::Reset() {
+  lru_.clear();
+  seq_states_.clear();
+  radix_tree = PagedRadixTree(radix_tree_num_pages, kRadixTreePageBytes, radix_tree_num_seqs);
+}
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
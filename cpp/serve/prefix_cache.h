@@ -0,0 +1,166 @@
+/*!
+ *  Copyright (c) 2023 by Contributors
+ * \file serve/prefix_cache.h
+ * \brief The prefix cache which reuses the KV cache of sequences sharing common prefixes.
+ */
+#ifndef MLC_LLM_SERVE_PREFIX_CACHE_H_
+#define MLC_LLM_SERVE_PREFIX_CACHE_H_
+
+#include <tvm/runtime/container/shape_tuple.h>
+#include <tvm/runtime/object.h>
+
+#include <functional>
+#include <list>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+#include "radix_tree.h"
+
+namespace mlc {
+namespace llm {
+namespace serve {
+
+using namespace tvm::runtime;
+
+/*!
+ * \brief The prefix cache of the engine.
+ * It records the tokens whose KV data are held in the KV cache for each
+ * sequence in a paged radix tree, so that a new sequence can be forked
+ * from the longest cached prefix and prefill only the unmatched suffix.
+ *
+ * A tracked sequence is either
+ * - active, when it is still owned by a running request, or
+ * - recycling, when its request has finished and the sequence is kept
+ * resident in the KV cache only for prefix reuse. Recycling sequences
+ * are evicted in LRU order under memory pressure.
+ *
+ * \note The invariant maintained by the engine is that the tokens recorded
+ * for a sequence always have their KV data computed in the KV cache. Thereby
+ * forking any matched sequence at the matched length is always valid.
+ */
+class PrefixCacheObj : public Object {
+ public:
+  /*!
+   * \brief Match the given tokens against the cached sequences.
+   * \param tokens The tokens to match.
+   * \return The matched prefix length and the sequence id to fork from.
+   * The sequence id is -1 when there is no matched prefix.
+   */
+  std::pair<int, int64_t> MatchPrefix(const std::vector<int32_t>& tokens);
+
+  /*!
+   * \brief Start tracking an empty active sequence.
+   * \param seq_id The id of the sequence.
+   */
+  void AddSequence(int64_t seq_id);
+
+  /*!
+   * \brief Start tracking an active sequence forked from a cached sequence.
+   * \param seq_id The id of the new sequence.
+   * \param parent_seq_id The id of the cached sequence to fork from.
+   * \param fork_pos The number of leading tokens of the parent to share.
+   */
+  void ForkSequence(int64_t seq_id, int64_t parent_seq_id, int fork_pos);
+
+  /*!
+   * \brief Append the tokens whose KV data have just been computed to a tracked sequence.
+   * Recycling sequences are evicted when the radix tree is out of capacity.
+   * When the capacity still does not suffice, the sequence is no longer tracked.
+   * \param seq_id The id of the sequence.
+   * \param tokens The tokens to append.
+   * \return A boolean indicating if the sequence is still tracked.
+   */
+  bool ExtendSequence(int64_t seq_id, const std::vector<int32_t>& tokens);
+
+  /*!
+   * \brief Mark an active sequence as recycling, keeping its KV data resident.
+   * Least recently used recycling sequences are evicted if the number of
+   * recycling sequences exceeds the limit.
+   * \param seq_id The id of the sequence.
+   */
+  void RecycleSequence(int64_t seq_id);
+
+  /*!
+   * \brief Stop tracking the given sequence. It is a no-op for untracked sequences.
+   * \param seq_id The id of the sequence.
+   */
+  void RemoveSequence(int64_t seq_id);
+
+  /*! \brief Check if the given sequence is tracked by the prefix cache. */
+  bool HasSequence(int64_t seq_id) const { return seq_states_.count(seq_id); }
+
+  /*! \brief Get the number of tracked tokens of the given sequence. */
+  int GetSequenceLength(int64_t seq_id) const;
+
+  /*!
+   * \brief Evict the least recently used recycling sequence.
+   * \param pinned_seq_id The sequence that must not be evicted, or -1.
+   * \return A boolean indicating if any sequence is evicted.
+   */
+  bool TryFreeMemory(int64_t pinned_seq_id = -1);
+
+  /*! \brief Get the number of recycling sequences. */
+  int NumRecyclingSequences() const { return static_cast<int>(lru_.size()); }
+
+  /*! \brief Reset the prefix cache, dropping all records without invoking the removal callback. */
+  void Reset();
+
+  /*! \brief The maximum number of recycling sequences to keep. */
+  int max_num_recycling_seqs;
+  /*! \brief The number of radix tree pages, kept for resetting. */
+  size_t radix_tree_num_pages;
+  /*! \brief The maximum number of tracked sequences, kept for resetting. */
+  size_t radix_tree_num_seqs;
+  /*! \brief The radix tree recording the tokens of each tracked sequence. */
+  PagedRadixTree radix_tree{nullptr};
+  /*!
+   * \brief The callback which removes an evicted sequence from the models
+   * and recycles its internal id.
+   */
+  std::function<void(int64_t)> remove_callback;
+
+  static constexpr const char* _type_key = "mlc.serve.PrefixCache";
+  static constexpr const bool _type_has_method_sequal_reduce = false;
+  static constexpr const bool _type_has_method_shash_reduce = false;
+  TVM_DECLARE_FINAL_OBJECT_INFO(PrefixCacheObj, Object);
+
+ private:
+  /*! \brief Evict the given recycling sequence. */
+  void EvictSequence(int64_t seq_id);
+
+  /*! \brief The sequences in LRU order, where the front is the least recently used. */
+  std::list<int64_t> lru_;
+  /*!
+   * \brief The tracked sequences. The value is the position of the sequence
+   * in `lru_` for recycling sequences, or `lru_.end()` for active sequences.
+   */
+  std::unordered_map<int64_t, std::list<int64_t>::iterator> seq_states_;
+};
+
+/*!
+ * \brief Managed reference of PrefixCacheObj.
+ * \sa PrefixCacheObj
+ */
+class PrefixCache : public ObjectRef {
+ public:
+  /*!
+   * \brief Constructor of prefix cache.
+   * \param max_num_recycling_seqs The maximum number of recycling sequences to keep.
+   * \param max_num_sequence The maximum number of running sequences in the engine.
+   * \param max_total_sequence_length The total token capacity of the KV cache.
+   * \param remove_callback The callback which removes an evicted sequence from
+   * the models and recycles its internal id.
+   */
+  explicit PrefixCache(int max_num_recycling_seqs, int max_num_sequence,
+                       int max_total_sequence_length,
+                       std::function<void(int64_t)> remove_callback);
+
+  TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(PrefixCache, ObjectRef, PrefixCacheObj);
+};
+
+}  // namespace serve
+}  // namespace llm
+}  // namespace mlc
+
+#endif  // MLC_LLM_SERVE_PREFIX_CACHE_H_
@@ -413,9 +413,9 @@ class PagedRadixTreeImpl : public PagedRadixTreeObj {
   RedixPage* root = nullptr;
 
   explicit PagedRadixTreeImpl(size_t num_pages, size_t page_size, size_t num_seqs) {
-    num_pages = num_pages;
-    page_size = page_size;
-    num_seqs = num_seqs;
+    this->num_pages = num_pages;
+    this->page_size = page_size;
+    this->num_seqs = num_seqs;
 
     seq_id_node_pool = new SequenceIDNodePool(num_seqs);
     radix_page_pool = new RadixPagePool(page_size, num_pages);
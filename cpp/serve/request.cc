@@ -72,6 +72,10 @@ TVM_REGISTER_GLOBAL("mlc.serve.Request")
                      GenerationConfig(std::move(generation_cfg_json)));
     });
 
+TVM_REGISTER_GLOBAL("mlc.serve.RequestGetRequestId").set_body_typed([](Request request) {
+  return request->id;
+});
+
 TVM_REGISTER_GLOBAL("mlc.serve.RequestGetInputs").set_body_typed([](Request request) {
   return request->inputs;
 });
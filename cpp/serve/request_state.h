@@ -16,6 +16,7 @@
 #include "../streamer.h"
 #include "config.h"
 #include "grammar/grammar_state_matcher.h"
+#include "ngram_index.h"
 #include "request.h"
 
 namespace mlc {
@@ -201,8 +202,28 @@ class RequestStateEntryNode : public Object {
 
   /*! \brief The time of adding the request to engine. */
   std::chrono::high_resolution_clock::time_point tadd;
+  /*!
+   * \brief The time of starting prefill stage.
+   * It is only set for the first request state entry of a request.
+   */
+  std::chrono::high_resolution_clock::time_point tprefill_start;
   /*! \brief The time of finishing prefill stage. */
   std::chrono::high_resolution_clock::time_point tprefill_finish;
+  /*! \brief The number of input tokens whose KV data are reused from the prefix cache. */
+  int prefix_cache_hit_length = 0;
+  /*! \brief The EWMA number of accepted draft tokens in speculative decoding. */
+  double spec_accepted_ewma = 0.0;
+  /*! \brief The EWMA number of verified draft positions in speculative decoding. */
+  double spec_verified_ewma = 0.0;
+  /*! \brief The number of consecutive steps the adaptive draft length is zero. */
+  int spec_num_steps_without_draft = 0;
+  /*! \brief The n-gram index of the prompt and committed tokens for n-gram draft proposal. */
+  NGramIndex ngram_index;
+  /*!
+   * \brief The number of committed tokens in the n-gram index.
+   * Being "-1" means the prompt has not been indexed either.
+   */
+  int ngram_num_indexed_committed_tokens = -1;
 
   /*!
    * \brief Get the delta token ids and the logprob JSON strings for this request to return since
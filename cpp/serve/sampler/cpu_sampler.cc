@@ -478,15 +478,23 @@ class CPUSampler : public SamplerObj {
             // normalize a new probability distribution
             double sum_v = 0.0;
             NDArray q_dist = draft_output_prob_dist[i][cur_token_idx];
-            ICHECK(q_dist->device.device_type == kDLCPU);
-            ICHECK(q_dist->ndim == 1);
-            ICHECK(vocab_size == q_dist->shape[q_dist->ndim - 1]);
-            const float* __restrict p_qdist =
-                static_cast<float*>(__builtin_assume_aligned(q_dist->data, 4));
-
-            for (int j = 0; j < vocab_size; ++j) {
-              p_probs[j] = std::max(p_probs[j] - p_qdist[j], 0.0f);
-              sum_v += p_probs[j];
+            if (q_dist.defined()) {
+              ICHECK(q_dist->device.device_type == kDLCPU);
+              ICHECK(q_dist->ndim == 1);
+              ICHECK(vocab_size == q_dist->shape[q_dist->ndim - 1]);
+              const float* __restrict p_qdist =
+                  static_cast<float*>(__builtin_assume_aligned(q_dist->data, 4));
+
+              for (int j = 0; j < vocab_size; ++j) {
+                p_probs[j] = std::max(p_probs[j] - p_qdist[j], 0.0f);
+                sum_v += p_probs[j];
+              }
+            } else {
+              // The undefined distribution denotes a deterministic draft, i.e., one-hot.
+              p_probs[cur_token] = 0.0f;
+              for (int j = 0; j < vocab_size; ++j) {
+                sum_v += p_probs[j];
+              }
             }
             for (int j = 0; j < vocab_size; ++j) {
               p_probs[j] /= sum_v;
@@ -8,6 +8,8 @@
 #include <tvm/runtime/nvtx.h>
 #include <tvm/runtime/packed_func.h>
 
+#include <algorithm>
+
 #include "../../random.h"
 #include "sampler.h"
 
@@ -184,6 +186,29 @@ class GPUSampler : public SamplerObj {
     NDArray draft_tokens_host = draft_tokens_host_.CreateView({num_nodes}, dtype_i32_);
     NDArray draft_tokens_device = draft_tokens_device_.CreateView({num_nodes}, dtype_i32_);
 
+    // The undefined distribution denotes a deterministic draft, i.e., one-hot. When there are
+    // one-hot drafts, all the draft prob distributions are staged in a host buffer and copied
+    // to GPU in a single transfer, instead of one copy and synchronization per draft token.
+    bool stage_draft_probs = false;
+    for (const std::vector<NDArray>& draft_output_prob_dist_i : draft_output_prob_dist) {
+      for (const NDArray& prob_dist : draft_output_prob_dist_i) {
+        stage_draft_probs |= !prob_dist.defined();
+      }
+    }
+    NDArray draft_probs_host;
+    if (stage_draft_probs) {
+      if (!draft_probs_host_.defined()) {
+        // Allocated on the first use, since only the speculative modes without draft
+        // distributions need it. The buffer is kept zero outside of verification.
+        DLDevice device_cpu{DLDeviceType::kDLCPU, /*device_id=*/0};
+        draft_probs_host_ = NDArray::Empty({max_num_sample_, vocab_size_}, dtype_f32_, device_cpu);
+        float* p_draft_probs_host = static_cast<float*>(draft_probs_host_->data);
+        std::fill(p_draft_probs_host,
+                  p_draft_probs_host + static_cast<int64_t>(max_num_sample_) * vocab_size_, 0.0f);
+      }
+      draft_probs_host = draft_probs_host_.CreateView({num_nodes, vocab_size_}, dtype_f32_);
+    }
+
     // Concat draft prob distributions to a ragged tensor (num_nodes, vocab_size)
     for (int i = 0; i < num_sequence; i++) {
       const std::vector<SampleResult>& draft_output_tokens_i = draft_output_tokens[i];
@@ -198,15 +223,23 @@ class GPUSampler : public SamplerObj {
         // Copy prob dist
         ICHECK_EQ(draft_probs_device->dtype.bits, 32);
         float* p_draft_probs =
-            static_cast<float*>(draft_probs_device->data) +
-            (j + start + 1) *
+            static_cast<float*>(stage_draft_probs ? draft_probs_host->data
+                                                  : draft_probs_device->data) +
+            static_cast<int64_t>(j + start + 1) *
                 vocab_size_;  // shift by one, q of the last committed token is undefined
+        int draft_token_id = draft_output_tokens_i[j].sampled_token_id.first;
+        if (draft_output_prob_dist_i[j].defined()) {
+          draft_output_prob_dist_i[j].CopyToBytes(p_draft_probs, vocab_size_ * sizeof(float));
+        } else {
+          p_draft_probs[draft_token_id] = 1.0f;
+        }
         // Copy sampled token id
-        draft_output_prob_dist_i[j].CopyToBytes(p_draft_probs, vocab_size_ * sizeof(float));
-        *(static_cast<int*>(draft_tokens_host->data) + j + start + 1) =
-            draft_output_tokens_i[j].sampled_token_id.first;
+        *(static_cast<int*>(draft_tokens_host->data) + j + start + 1) = draft_token_id;
       }
     }
+    if (stage_draft_probs) {
+      CopyArray(draft_probs_host, draft_probs_device, copy_stream_);
+    }
     CopyArray(draft_tokens_host, draft_tokens_device, copy_stream_);
 
     float* p_uniform_samples = static_cast<float*>(uniform_samples_host->data);
@@ -238,7 +271,8 @@ class GPUSampler : public SamplerObj {
       // Assuming no tree structure for now
       int start = cum_verify_lengths[i];
       int end = cum_verify_lengths[i + 1];
-      ICHECK_GE(end - start, 2);
+      // A sequence without draft tokens only has the root, from which a token is sampled.
+      ICHECK_GE(end - start, 1);
       token_tree_child_to_parent[start] = -1;  // root has no parent
       for (int j = 0; j < end - start; j++) {
         int cur_node = j + start;
@@ -264,6 +298,11 @@ class GPUSampler : public SamplerObj {
 
     CopyArray(token_tree_parent_ptr_device, token_tree_parent_ptr_host, compute_stream_);
     TVMSynchronize(device_.device_type, device_.device_id, compute_stream_);
+    if (stage_draft_probs) {
+      // The copy of the staged draft probs has finished. Reset the host buffer to zero.
+      ClearStagedDraftProbs(draft_probs_host, cum_verify_lengths, draft_output_tokens,
+                            draft_output_prob_dist);
+    }
 
     std::vector<int> sample_indices;
 
@@ -543,6 +582,26 @@ class GPUSampler : public SamplerObj {
             top_prob_indices_device};
   }
 
+  /*! \brief Reset the rows of the staged draft probs on CPU to zero. */
+  void ClearStagedDraftProbs(NDArray draft_probs_host, const std::vector<int>& cum_verify_lengths,
+                             const std::vector<std::vector<SampleResult>>& draft_output_tokens,
+                             const std::vector<std::vector<NDArray>>& draft_output_prob_dist) {
+    int num_sequence = static_cast<int>(cum_verify_lengths.size()) - 1;
+    for (int i = 0; i < num_sequence; i++) {
+      int start = cum_verify_lengths[i];
+      for (int j = 0; j < static_cast<int>(draft_output_prob_dist[i].size()); j++) {
+        float* p_draft_probs = static_cast<float*>(draft_probs_host->data) +
+                               static_cast<int64_t>(j + start + 1) * vocab_size_;
+        if (draft_output_prob_dist[i][j].defined()) {
+          std::fill(p_draft_probs, p_draft_probs + vocab_size_, 0.0f);
+        } else {
+          // Only the draft token is set in a one-hot row.
+          p_draft_probs[draft_output_tokens[i][j].sampled_token_id.first] = 0.0f;
+        }
+      }
+    }
+  }
+
   /*! \brief Copy the results of GPU sampling functions back to CPU. */
   std::vector<NDArray> CopyArraysToCPU(const std::vector<NDArray>& device_arrays,  //
                                        int num_samples, bool need_prob_values, int num_top_probs) {
@@ -611,6 +670,7 @@ class GPUSampler : public SamplerObj {
   NDArray sampled_probs_host_;
   NDArray top_prob_probs_host_;
   NDArray top_prob_indices_host_;
+  NDArray draft_probs_host_;
   // Auxiliary NDArrays on GPU
   NDArray uniform_samples_device_;
   NDArray sample_indices_device_;
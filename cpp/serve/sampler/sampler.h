@@ -109,7 +109,8 @@ class SamplerObj : public Object {
    * \param draft_output_tokens The draft tokens generated by the small model for
    * each sequence.
    * \param draft_output_prob_dist The probability distribution computed from the
-   * small model for each sequence.
+   * small model for each sequence. An undefined distribution denotes a deterministic
+   * draft token, whose distribution is one-hot.
    * \return The list of accepted tokens for each request.
    */
   virtual std::vector<std::vector<SampleResult>> BatchVerifyDraftTokensWithProbAfterTopP(
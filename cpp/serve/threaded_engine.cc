@@ -10,6 +10,7 @@
 #include <tvm/runtime/registry.h>
 
 #include <atomic>
+#include <chrono>
 #include <condition_variable>
 #include <mutex>
 
@@ -23,6 +24,9 @@ namespace serve {
 using tvm::Device;
 using namespace tvm::runtime;
 
+/*! \brief The minimum interval between two refreshes of the engine statistics snapshot. */
+constexpr std::chrono::milliseconds kStatsRefreshInterval(100);
+
 /*! \brief The threaded engine instruction kind. */
 enum class InstructionKind : int {
   kAddRequest = 0,
@@ -37,11 +41,16 @@ enum class InstructionKind : int {
 class ThreadedEngineImpl : public ThreadedEngine {
  public:
   void InitBackgroundEngine(Optional<PackedFunc> request_stream_callback,
-                            Optional<EventTraceRecorder> trace_recorder) final {
+                            Optional<EventTraceRecorder> trace_recorder,
+                            bool pack_stream_outputs, bool detokenize_stream_outputs) final {
     CHECK(request_stream_callback.defined())
         << "ThreadedEngine requires request stream callback function, but it is not given.";
+    CHECK(pack_stream_outputs || !detokenize_stream_outputs)
+        << "Detokenizing stream outputs requires packing stream outputs.";
     request_stream_callback_ = request_stream_callback.value();
     trace_recorder_ = trace_recorder;
+    pack_stream_outputs_ = pack_stream_outputs;
+    detokenize_stream_outputs_ = detokenize_stream_outputs;
   }
 
   void Reload(EngineConfig engine_config) final {
@@ -109,6 +118,20 @@ class ThreadedEngineImpl : public ThreadedEngine {
     }
   }
 
+  String Stats() final {
+    std::lock_guard<std::mutex> lock(stats_mutex_);
+    return stats_json_;
+  }
+
+  String Metrics() final {
+    Optional<EngineMetrics> metrics;
+    {
+      std::lock_guard<std::mutex> lock(stats_mutex_);
+      metrics = metrics_;
+    }
+    return metrics.defined() ? metrics.value()->AsJSON() : String("{}");
+  }
+
   void RunBackgroundLoop() final {
     // The local vectors that load the requests from critical regions.
     std::vector<std::pair<InstructionKind, ObjectRef>> local_instruction_queue;
@@ -143,6 +166,10 @@ class ThreadedEngineImpl : public ThreadedEngine {
         } else if (kind == InstructionKind::kResetEngine) {
           if (background_engine_ != nullptr) {
             background_engine_->Reset();
+            MaybeRefreshStats(/*force=*/true);
+          }
+          if (tokenizer_.defined()) {
+            ResetBatchTextStreamer();
           }
         } else if (kind == InstructionKind::kDebugCallFuncOnAllAllWorker) {
           CHECK(background_engine_ != nullptr) << "Background engine is not loaded.";
@@ -153,6 +180,7 @@ class ThreadedEngineImpl : public ThreadedEngine {
       }
       if (background_engine_ != nullptr) {
         background_engine_->Step();
+        MaybeRefreshStats();
       }
     }
   }
@@ -161,6 +189,7 @@ class ThreadedEngineImpl : public ThreadedEngine {
     // The local vectors that load the request stream callback inputs from critical regions.
     std::vector<Array<RequestStreamOutput>> local_request_stream_callback_inputs;
     std::vector<RequestStreamOutput> flattened_callback_inputs;
+    Optional<BatchTextStreamer> batch_text_streamer;
 
     while (!exit_now_.load(std::memory_order_relaxed)) {
       {
@@ -175,6 +204,7 @@ class ThreadedEngineImpl : public ThreadedEngine {
         local_request_stream_callback_inputs = request_stream_callback_inputs_;
         request_stream_callback_inputs_.clear();
         pending_request_stream_callback_cnt_ = 0;
+        batch_text_streamer = batch_text_streamer_;
       }
       for (const Array<RequestStreamOutput>& callback_inputs :
            local_request_stream_callback_inputs) {
@@ -183,7 +213,12 @@ class ThreadedEngineImpl : public ThreadedEngine {
         }
       }
       if (!flattened_callback_inputs.empty()) {
-        request_stream_callback_(Array<RequestStreamOutput>(flattened_callback_inputs));
+        if (pack_stream_outputs_) {
+          request_stream_callback_(RequestStreamOutputBatch::FromOutputs(
+              flattened_callback_inputs, batch_text_streamer));
+        } else {
+          request_stream_callback_(Array<RequestStreamOutput>(flattened_callback_inputs));
+        }
       }
       flattened_callback_inputs.clear();
     }
@@ -230,15 +265,28 @@ class ThreadedEngineImpl : public ThreadedEngine {
       }
     };
 
+    if (detokenize_stream_outputs_) {
+      tokenizer_ = Tokenizer::FromPath(engine_config->model);
+      ResetBatchTextStreamer();
+    }
     Optional<PackedFunc> request_stream_callback = PackedFunc(frequest_stream_callback_wrapper);
     background_engine_ = Engine::Create(std::move(engine_config),
                                         std::move(request_stream_callback), trace_recorder_);
+
+    MaybeRefreshStats(/*force=*/true);
+    std::lock_guard<std::mutex> lock(stats_mutex_);
+    metrics_ = background_engine_->Metrics();
   }
 
   void EngineUnloadImpl() {
     if (background_engine_ != nullptr) {
       background_engine_->AbortAllRequests();
       background_engine_ = nullptr;
+      {
+        std::lock_guard<std::mutex> lock(stats_mutex_);
+        stats_json_ = "{}";
+        metrics_ = NullOpt;
+      }
       // Clear the allocated memory in cached memory pool.
       const PackedFunc* fclear_memory_manager =
           tvm::runtime::Registry::Get("vm.builtin.memory_manager.clear");
@@ -247,16 +295,49 @@ class ThreadedEngineImpl : public ThreadedEngine {
     }
   }
 
+  /*!
+   * \brief Refresh the engine statistics snapshot returned by `Stats`,
+   * if the last refresh is older than the refresh interval or `force` is true.
+   */
+  void MaybeRefreshStats(bool force = false) {
+    auto now = std::chrono::steady_clock::now();
+    if (!force && now - last_stats_refresh_time_ < kStatsRefreshInterval) {
+      return;
+    }
+    last_stats_refresh_time_ = now;
+    String stats_json = background_engine_->Stats();
+    std::lock_guard<std::mutex> lock(stats_mutex_);
+    stats_json_ = std::move(stats_json);
+  }
+
+  /*!
+   * \brief Replace the batch text streamer with a new one, which drops the
+   * detokenization states of all the unfinished requests.
+   */
+  void ResetBatchTextStreamer() {
+    std::lock_guard<std::mutex> lock(request_stream_callback_mutex_);
+    batch_text_streamer_ = BatchTextStreamer(tokenizer_.value());
+  }
+
   /*! \brief The background normal engine for request processing. */
   std::unique_ptr<Engine> background_engine_;
   /*! \brief The request stream callback. */
   PackedFunc request_stream_callback_;
   /*! \brief Event trace recorder. */
   Optional<EventTraceRecorder> trace_recorder_;
+  /*! \brief A boolean flag denoting if the stream back loop packs the stream outputs. */
+  bool pack_stream_outputs_ = false;
+  /*! \brief A boolean flag denoting if the stream back loop detokenizes the stream outputs. */
+  bool detokenize_stream_outputs_ = false;
+  /*! \brief The tokenizer of the loaded model for detokenizing the stream outputs. */
+  Optional<Tokenizer> tokenizer_;
+  /*! \brief The time of the last refresh of the engine statistics snapshot. */
+  std::chrono::steady_clock::time_point last_stats_refresh_time_;
 
   /*! \brief The mutex ensuring only one thread can access critical regions. */
   std::mutex background_loop_mutex_;
   std::mutex request_stream_callback_mutex_;
+  std::mutex stats_mutex_;
   /*! \brief The condition variable preventing threaded engine from spinning. */
   std::condition_variable background_loop_cv_;
   std::condition_variable request_stream_callback_cv_;
@@ -281,6 +362,12 @@ class ThreadedEngineImpl : public ThreadedEngine {
    * consumed by the foreground thread.
    */
   std::vector<Array<RequestStreamOutput>> request_stream_callback_inputs_;
+  /*! \brief The batch text streamer that detokenizes the stream outputs. */
+  Optional<BatchTextStreamer> batch_text_streamer_;
+  /*! \brief The latest snapshot of the engine statistics in JSON string. */
+  String stats_json_ = "{}";
+  /*! \brief The runtime metrics of the background engine. */
+  Optional<EngineMetrics> metrics_;
   /*!
    * \brief Number of pending request operations, should be the size of
    * `requests_to_add_` and `requests_to_abort_`.
@@ -305,6 +392,8 @@ class ThreadedEngineModule : public ThreadedEngineImpl, public ModuleNode {
   TVM_MODULE_VTABLE_ENTRY("reload", &ThreadedEngineImpl::Reload);
   TVM_MODULE_VTABLE_ENTRY("add_request", &ThreadedEngineImpl::AddRequest);
   TVM_MODULE_VTABLE_ENTRY("abort_request", &ThreadedEngineImpl::AbortRequest);
+  TVM_MODULE_VTABLE_ENTRY("stats", &ThreadedEngineImpl::Stats);
+  TVM_MODULE_VTABLE_ENTRY("metrics", &ThreadedEngineImpl::Metrics);
   TVM_MODULE_VTABLE_ENTRY("run_background_loop", &ThreadedEngineImpl::RunBackgroundLoop);
   TVM_MODULE_VTABLE_ENTRY("run_background_stream_back_loop",
                           &ThreadedEngineImpl::RunBackgroundStreamBackLoop);
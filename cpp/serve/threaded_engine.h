@@ -37,9 +37,16 @@ class ThreadedEngine {
    * \brief Initialize the threaded engine from packed arguments in TVMArgs.
    * \param request_stream_callback The request stream callback function to.
    * \param trace_recorder Event trace recorder for requests.
+   * \param pack_stream_outputs A boolean indicating if the stream back loop packs
+   * the request stream outputs into a RequestStreamOutputBatch when invoking the
+   * request stream callback, instead of passing an Array of RequestStreamOutput.
+   * \param detokenize_stream_outputs A boolean indicating if the stream back loop
+   * detokenizes the delta tokens of all the requests in the packed batch, with the
+   * tokenizer of the loaded model. It requires `pack_stream_outputs` to be true.
    */
   virtual void InitBackgroundEngine(Optional<PackedFunc> request_stream_callback,
-                                    Optional<EventTraceRecorder> trace_recorder) = 0;
+                                    Optional<EventTraceRecorder> trace_recorder,
+                                    bool pack_stream_outputs, bool detokenize_stream_outputs) = 0;
 
   /*!
    * \brief Reload the engine with the new engine config.
@@ -72,6 +79,22 @@ class ThreadedEngine {
   /*! \brief Abort the input request (specified by id string) from engine. */
   virtual void AbortRequest(const String& request_id) = 0;
 
+  /*!
+   * \brief Return the runtime statistics of the background engine in JSON string.
+   * The statistics are a snapshot which the background loop refreshes periodically,
+   * so that this method can be invoked by other threads without waiting for engine steps.
+   * \sa EngineStats::AsJSON
+   */
+  virtual String Stats() = 0;
+
+  /*!
+   * \brief Return the runtime metrics of the background engine in JSON string.
+   * The metrics are read from the lock-free counters which the background engine
+   * updates on the fly, and are empty when the engine is not loaded.
+   * \sa EngineMetricsObj::AsJSON
+   */
+  virtual String Metrics() = 0;
+
   /************** Debug/Profile **************/
 
   /*! \brief Call the given global function on all workers. Only for debug purpose. */
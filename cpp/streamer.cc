@@ -149,6 +149,84 @@ TVM_REGISTER_GLOBAL("mlc.TextStreamerPut")
 TVM_REGISTER_GLOBAL("mlc.TextStreamerFinish")
     .set_body_method<TextStreamer>(&TextStreamerObj::Finish);
 
+/****************** BatchTextStreamer ******************/
+
+TVM_REGISTER_OBJECT_TYPE(BatchTextStreamerObj);
+
+BatchTextStreamerObj::BatchTextStreamerObj(Tokenizer tokenizer)
+    : tokenizer_(std::move(tokenizer)) {}
+
+BatchTextStreamer::BatchTextStreamer(Tokenizer tokenizer) {
+  data_ = make_object<BatchTextStreamerObj>(std::move(tokenizer));
+}
+
+std::vector<std::string> BatchTextStreamerObj::Put(
+    const std::vector<std::string>& keys, const std::vector<std::vector<int32_t>>& delta_tokens,
+    const std::vector<bool>& finished) {
+  int num_streams = keys.size();
+  CHECK_EQ(delta_tokens.size(), num_streams);
+  CHECK_EQ(finished.size(), num_streams);
+
+  // Group the streams by key, so that the streams of the same key are put in order.
+  // The groups are decoded serially, since the tokenizer is not safe to call concurrently.
+  std::vector<TextStreamer> group_streamers;
+  std::vector<std::vector<int>> group_stream_indices;
+  std::unordered_map<std::string, int> key_to_group;
+  for (int i = 0; i < num_streams; ++i) {
+    auto [it, inserted] = key_to_group.emplace(keys[i], group_streamers.size());
+    if (inserted) {
+      auto streamer_it = streamers_.find(keys[i]);
+      group_streamers.push_back(streamer_it != streamers_.end() ? streamer_it->second
+                                                                : TextStreamer(tokenizer_));
+      group_stream_indices.push_back({});
+    }
+    group_stream_indices[it->second].push_back(i);
+  }
+
+  std::vector<std::string> delta_strs(num_streams);
+  int num_groups = group_streamers.size();
+  for (int group_id = 0; group_id < num_groups; ++group_id) {
+    TextStreamer& streamer = group_streamers[group_id];
+    for (int i : group_stream_indices[group_id]) {
+      delta_strs[i] = streamer->Put(delta_tokens[i]);
+      if (finished[i]) {
+        delta_strs[i] += streamer->Finish();
+      }
+    }
+  }
+
+  // Update the text streamers of the unfinished streams.
+  for (int group_id = 0; group_id < num_groups; ++group_id) {
+    const std::string& key = keys[group_stream_indices[group_id][0]];
+    if (finished[group_stream_indices[group_id].back()]) {
+      streamers_.erase(key);
+    } else {
+      streamers_.emplace(key, group_streamers[group_id]);
+    }
+  }
+  return delta_strs;
+}
+
+TVM_REGISTER_GLOBAL("mlc.BatchTextStreamer").set_body_typed([](Tokenizer tokenizer) {
+  return BatchTextStreamer(std::move(tokenizer));
+});
+
+TVM_REGISTER_GLOBAL("mlc.BatchTextStreamerPut")
+    .set_body_typed([](BatchTextStreamer streamer, Array<String> keys,
+                       Array<IntTuple> delta_tokens, IntTuple finished) {
+      std::vector<std::vector<int32_t>> delta_token_vecs;
+      delta_token_vecs.reserve(delta_tokens.size());
+      for (const IntTuple& tokens : delta_tokens) {
+        delta_token_vecs.emplace_back(tokens.begin(), tokens.end());
+      }
+      std::vector<std::string> delta_strs = streamer->Put(
+          {keys.begin(), keys.end()}, delta_token_vecs, {finished.begin(), finished.end()});
+      return Array<String>(std::vector<String>(delta_strs.begin(), delta_strs.end()));
+    });
+
+TVM_REGISTER_GLOBAL("mlc.BatchTextStreamerReset")
+    .set_body_typed([](BatchTextStreamer streamer) { streamer->Reset(); });
+
 /****************** StopStrHandler ******************/
 
 TVM_REGISTER_OBJECT_TYPE(StopStrHandlerObj);
@@ -11,6 +11,10 @@
 #include <tvm/runtime/container/string.h>
 #include <tvm/runtime/object.h>
 
+#include <string>
+#include <unordered_map>
+#include <vector>
+
 #include "tokenizers.h"
 
 namespace mlc {
@@ -68,6 +72,59 @@ class TextStreamer : public ObjectRef {
   TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(TextStreamer, ObjectRef, TextStreamerObj);
 };
 
+/****************** BatchTextStreamer ******************/
+
+/*!
+ * \brief The class that streams back the validated utf-8 text strings of
+ * a batch of streams at a time. Each stream is identified by a string key,
+ * and owns a TextStreamer which is created when the key is put for the
+ * first time, and is released after the stream finishes.
+ */
+class BatchTextStreamerObj : public Object {
+ public:
+  explicit BatchTextStreamerObj(Tokenizer tokenizer);
+
+  /*!
+   * \brief Put the new delta tokens of a batch of streams into the streamer, and
+   * get the UTF-8-valid delta string of each stream. For a finished stream,
+   * the returned string also contains the string decoded by the remaining tokens.
+   * A key may appear multiple times in the batch, in which case its delta tokens
+   * are put in order.
+   * \param keys The key of each stream in the batch.
+   * \param delta_tokens The new delta tokens of each stream in the batch.
+   * \param finished The flags denoting if each stream finishes after the delta tokens.
+   * \return The decoded delta string of each stream in the batch.
+   */
+  std::vector<std::string> Put(const std::vector<std::string>& keys,
+                               const std::vector<std::vector<int32_t>>& delta_tokens,
+                               const std::vector<bool>& finished);
+
+  /*! \brief Release the text streamers of all the unfinished streams. */
+  void Reset() { streamers_.clear(); }
+
+  static constexpr const char* _type_key = "mlc.BatchTextStreamer";
+  static constexpr const bool _type_has_method_sequal_reduce = false;
+  static constexpr const bool _type_has_method_shash_reduce = false;
+  TVM_DECLARE_FINAL_OBJECT_INFO(BatchTextStreamerObj, Object);
+
+ private:
+  Tokenizer tokenizer_;
+  /*! \brief The text streamers of the unfinished streams. */
+  std::unordered_map<std::string, TextStreamer> streamers_;
+};
+
+/*!
+ * \brief Managed reference to BatchTextStreamerObj
+ * \sa BatchTextStreamerObj
+ */
+class BatchTextStreamer : public ObjectRef {
+ public:
+  /*! \brief Construct a batch text streamer with tokenizer. */
+  explicit BatchTextStreamer(Tokenizer tokenizer);
+
+  TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(BatchTextStreamer, ObjectRef, BatchTextStreamerObj);
+};
+
 /****************** StopStrHandler ******************/
 
 /*!
@@ -8,9 +8,13 @@
 #include <tokenizers_cpp.h>
 #include <tvm/runtime/logging.h>
 #include <tvm/runtime/registry.h>
+#include <tvm/runtime/threading_backend.h>
 
+#include <algorithm>
+#include <atomic>
 #include <filesystem>
 #include <fstream>
+#include <mutex>
 #include <string>
 
 #include "./support/load_bytes_from_file.h"
@@ -20,18 +24,114 @@ namespace llm {
 
 TVM_REGISTER_OBJECT_TYPE(TokenizerObj);
 
-Tokenizer::Tokenizer(std::unique_ptr<tokenizers::Tokenizer> tokenizer) {
+Tokenizer::Tokenizer(std::function<std::unique_ptr<tokenizers::Tokenizer>()> create_handle) {
   ObjectPtr<TokenizerObj> n = make_object<TokenizerObj>();
-  n->tokenizer = std::move(tokenizer);
+  n->tokenizer = create_handle();
+  n->create_handle_ = std::move(create_handle);
   data_ = std::move(n);
 }
 
+std::unique_ptr<tokenizers::Tokenizer> TokenizerObj::AcquireHandle() const {
+  {
+    std::lock_guard<std::mutex> lock(handles_mutex_);
+    if (!idle_handles_.empty()) {
+      std::unique_ptr<tokenizers::Tokenizer> handle = std::move(idle_handles_.back());
+      idle_handles_.pop_back();
+      return handle;
+    }
+  }
+  // Create the handle outside the lock, so that the other callers are not blocked.
+  return create_handle_();
+}
+
+void TokenizerObj::ReleaseHandle(std::unique_ptr<tokenizers::Tokenizer> handle) const {
+  std::lock_guard<std::mutex> lock(handles_mutex_);
+  idle_handles_.push_back(std::move(handle));
+}
+
 std::vector<int32_t> TokenizerObj::Encode(const std::string& text) const {
-  return tokenizer->Encode(text);
+  std::unique_ptr<tokenizers::Tokenizer> handle = AcquireHandle();
+  std::vector<int32_t> token_ids = handle->Encode(text);
+  ReleaseHandle(std::move(handle));
+  return token_ids;
 }
 
 std::string TokenizerObj::Decode(const std::vector<int32_t>& token_ids) const {
-  return tokenizer->Decode(token_ids);
+  std::unique_ptr<tokenizers::Tokenizer> handle = AcquireHandle();
+  std::string text = handle->Decode(token_ids);
+  ReleaseHandle(std::move(handle));
+  return text;
+}
+
+void TokenizerObj::ParallelForWithHandles(
+    int num_items, const std::function<void(tokenizers::Tokenizer*, int)>& f_run) const {
+  int num_workers = std::min(num_items, tvm::runtime::threading::MaxConcurrency());
+  if (num_workers <= 1) {
+    std::unique_ptr<tokenizers::Tokenizer> handle = AcquireHandle();
+    for (int i = 0; i < num_items; ++i) {
+      f_run(handle.get(), i);
+    }
+    ReleaseHandle(std::move(handle));
+    return;
+  }
+  // The workers take the items one by one, so that a long item does not hold back the others.
+  std::atomic<int> next_item{0};
+  tvm::runtime::parallel_for_with_threading_backend(
+      [this, num_items, &f_run, &next_item](int /*worker_id*/) {
+        std::unique_ptr<tokenizers::Tokenizer> handle = AcquireHandle();
+        for (int i = next_item++; i < num_items; i = next_item++) {
+          f_run(handle.get(), i);
+        }
+        ReleaseHandle(std::move(handle));
+      },
+      0, num_workers);
+}
+
+Array<NDArray> TokenizerObj::EncodeBatch(const Array<String>& texts) const {
+  int num_texts = texts.size();
+  std::vector<std::vector<int32_t>> token_ids(num_texts);
+  ParallelForWithHandles(num_texts, [&texts, &token_ids](tokenizers::Tokenizer* handle, int i) {
+    token_ids[i] = handle->Encode(texts[i]);
+  });
+
+  NDArray offsets =
+      NDArray::Empty({num_texts + 1}, DataType::Int(64), DLDevice{DLDeviceType::kDLCPU, 0});
+  int64_t* p_offsets = static_cast<int64_t*>(offsets->data);
+  p_offsets[0] = 0;
+  for (int i = 0; i < num_texts; ++i) {
+    p_offsets[i + 1] = p_offsets[i] + token_ids[i].size();
+  }
+  NDArray flattened = NDArray::Empty({p_offsets[num_texts]}, DataType::Int(32),
+                                     DLDevice{DLDeviceType::kDLCPU, 0});
+  int32_t* p_flattened = static_cast<int32_t*>(flattened->data);
+  for (int i = 0; i < num_texts; ++i) {
+    std::copy(token_ids[i].begin(), token_ids[i].end(), p_flattened + p_offsets[i]);
+  }
+  return {flattened, offsets};
+}
+
+Array<String> TokenizerObj::DecodeBatch(const NDArray& token_ids, const NDArray& offsets) const {
+  CHECK_EQ(token_ids->ndim, 1);
+  CHECK_EQ(offsets->ndim, 1);
+  CHECK(token_ids.DataType() == DataType::Int(32))
+      << "The token ids are expected to be int32, while " << token_ids.DataType() << " is given";
+  CHECK(offsets.DataType() == DataType::Int(64))
+      << "The offsets are expected to be int64, while " << offsets.DataType() << " is given";
+  CHECK_EQ(token_ids->device.device_type, kDLCPU);
+  CHECK_EQ(offsets->device.device_type, kDLCPU);
+  CHECK_GE(offsets->shape[0], 1);
+  int num_seqs = offsets->shape[0] - 1;
+  const int32_t* p_token_ids = static_cast<const int32_t*>(token_ids->data);
+  const int64_t* p_offsets = static_cast<const int64_t*>(offsets->data);
+  CHECK_EQ(p_offsets[num_seqs], token_ids->shape[0]);
+
+  std::vector<String> texts(num_seqs);
+  ParallelForWithHandles(
+      num_seqs, [&texts, p_token_ids, p_offsets](tokenizers::Tokenizer* handle, int i) {
+        texts[i] = handle->Decode(
+            std::vector<int32_t>(p_token_ids + p_offsets[i], p_token_ids + p_offsets[i + 1]));
+      });
+  return Array<String>(texts);
 }
 
 Tokenizer Tokenizer::FromPath(const String& _path) {
@@ -46,7 +146,8 @@ Tokenizer Tokenizer::FromPath(const String& _path) {
   rwkvworld = path / "tokenizer_model";
   if (std::filesystem::exists(huggingface)) {
     LOG(INFO) << "Loading huggingface tokenizer";
-    return Tokenizer(tokenizers::Tokenizer::FromBlobJSON(LoadBytesFromFile(huggingface.string())));
+    std::string blob = LoadBytesFromFile(huggingface.string());
+    return Tokenizer([blob]() { return tokenizers::Tokenizer::FromBlobJSON(blob); });
   }
 
   if (std::filesystem::is_directory(path)) {
@@ -64,7 +165,9 @@ Tokenizer Tokenizer::FromPath(const String& _path) {
         std::string merges = LoadBytesFromFile(merges_path.string());
         std::string added_tokens = LoadBytesFromFile(added_tokens_path.string());
         LOG(INFO) << "Loading ByteLevelBPE tokenizer";
-        return Tokenizer(tokenizers::Tokenizer::FromBlobByteLevelBPE(vocab, merges, added_tokens));
+        return Tokenizer([vocab, merges, added_tokens]() {
+          return tokenizers::Tokenizer::FromBlobByteLevelBPE(vocab, merges, added_tokens);
+        });
       }
     }
   } else {
@@ -80,11 +183,13 @@ Tokenizer Tokenizer::FromPath(const String& _path) {
         << "since currently, files like `added_tokens.json`, `tokenizer_config.json` are ignored.\n"
         << "Consider converting `tokenizer.model` to `tokenizer.json` by compiling the model "
         << "with MLC again, or see if MLC's huggingface provides this file.";
-    return Tokenizer(
-        tokenizers::Tokenizer::FromBlobSentencePiece(LoadBytesFromFile(sentencepiece.string())));
+    std::string blob = LoadBytesFromFile(sentencepiece.string());
+    return Tokenizer([blob]() { return tokenizers::Tokenizer::FromBlobSentencePiece(blob); });
   }
   if (std::filesystem::exists(rwkvworld)) {
-    return Tokenizer(tokenizers::Tokenizer::FromBlobRWKVWorld(rwkvworld.string()));
+    std::string model_path = rwkvworld.string();
+    return Tokenizer(
+        [model_path]() { return tokenizers::Tokenizer::FromBlobRWKVWorld(model_path); });
   }
   LOG(FATAL) << "Cannot find any tokenizer under: " << _path;
 }
@@ -146,5 +251,16 @@ TVM_REGISTER_GLOBAL("mlc.TokenizerDecode")
       return tokenizer->Decode({token_ids->data, token_ids->data + token_ids->size});
     });
 
+TVM_REGISTER_GLOBAL("mlc.TokenizerEncodeBatch")
+    .set_body_typed([](const Tokenizer& tokenizer, const Array<String>& texts) {
+      return tokenizer->EncodeBatch(texts);
+    });
+
+TVM_REGISTER_GLOBAL("mlc.TokenizerDecodeBatch")
+    .set_body_typed([](const Tokenizer& tokenizer, const NDArray& token_ids,
+                       const NDArray& offsets) {
+      return tokenizer->DecodeBatch(token_ids, offsets);
+    });
+
 }  // namespace llm
 }  // namespace mlc
@@ -8,10 +8,15 @@
 #define MLC_LLM_TOKENIZER_H_
 
 #include <tokenizers_cpp.h>
+#include <tvm/runtime/container/array.h>
 #include <tvm/runtime/container/string.h>
+#include <tvm/runtime/ndarray.h>
 #include <tvm/runtime/object.h>
 
+#include <functional>
+#include <mutex>
 #include <unordered_map>
+#include <vector>
 
 #include "base.h"
 
@@ -23,13 +28,33 @@ using namespace tvm::runtime;
 /*! \brief A wrapper object class for tokenizer. */
 class TokenizerObj : public Object {
  public:
-  /*! \brief The underlying tokenizer. */
+  /*! \brief The underlying tokenizer, which is used for the token table. */
   std::unique_ptr<tokenizers::Tokenizer> tokenizer;
 
-  /*! \brief Encode text into ids. */
+  /*!
+   * \brief Encode text into ids. The concurrent calls on the same tokenizer run
+   * in parallel on separate underlying tokenizer handles.
+   */
   std::vector<int32_t> Encode(const std::string& text) const;
-  /*! \brief Decode token ids into text. */
+  /*! \brief Decode token ids into text. The concurrent calls run on separate handles. */
   std::string Decode(const std::vector<int32_t>& token_ids) const;
+  /*!
+   * \brief Encode a batch of texts into ids in parallel on the threading backend,
+   * where each worker encodes on its own underlying tokenizer handle.
+   * \param texts The texts to encode.
+   * \return The flattened int32 token ids of all texts, and the int64 offsets
+   * of length `texts.size() + 1`, where the token ids of the i-th text are in
+   * range `[offsets[i], offsets[i + 1])`. Both are NDArrays on CPU.
+   */
+  Array<NDArray> EncodeBatch(const Array<String>& texts) const;
+  /*!
+   * \brief Decode a batch of token id sequences into texts in parallel on the threading
+   * backend, where each worker decodes on its own underlying tokenizer handle.
+   * \param token_ids The flattened int32 token ids of all sequences on CPU.
+   * \param offsets The int64 offsets of each sequence in the flattened token ids on CPU.
+   * \return The decoded texts.
+   */
+  Array<String> DecodeBatch(const NDArray& token_ids, const NDArray& offsets) const;
   /*! \brief Return the token table of the tokenizer. */
   const std::vector<std::string>& TokenTable();
 
@@ -55,8 +80,33 @@ class TokenizerObj : public Object {
   TVM_DECLARE_FINAL_OBJECT_INFO(TokenizerObj, Object);
 
  private:
+  /*!
+   * \brief Take an idle underlying tokenizer handle for exclusive use, or create one
+   * from the tokenizer blob when all the handles are in use.
+   */
+  std::unique_ptr<tokenizers::Tokenizer> AcquireHandle() const;
+  /*! \brief Return the handle taken by `AcquireHandle` for reuse. */
+  void ReleaseHandle(std::unique_ptr<tokenizers::Tokenizer> handle) const;
+  /*!
+   * \brief Run `f_run(handle, i)` for each index i in range [0, num_items) in parallel
+   * on the threading backend, where each worker runs with its own exclusive handle.
+   */
+  void ParallelForWithHandles(
+      int num_items, const std::function<void(tokenizers::Tokenizer*, int)>& f_run) const;
+
   /*! \brief The cached token table. */
   std::vector<std::string> token_table_;
+  /*! \brief The function that creates an underlying tokenizer handle from the tokenizer blob. */
+  std::function<std::unique_ptr<tokenizers::Tokenizer>()> create_handle_;
+  /*!
+   * \brief The idle underlying tokenizer handles for encoding and decoding. The underlying
+   * tokenizer is not safe to call concurrently, so each call takes a handle exclusively.
+   */
+  mutable std::vector<std::unique_ptr<tokenizers::Tokenizer>> idle_handles_;
+  /*! \brief The mutex that guards the idle handles. */
+  mutable std::mutex handles_mutex_;
+
+  friend class Tokenizer;
 };
 
 class Tokenizer : public ObjectRef {
@@ -67,7 +117,7 @@ class Tokenizer : public ObjectRef {
   TVM_DEFINE_MUTABLE_OBJECT_REF_METHODS(Tokenizer, ObjectRef, TokenizerObj);
 
  private:
-  explicit Tokenizer(std::unique_ptr<tokenizers::Tokenizer> tokenizer);
+  explicit Tokenizer(std::function<std::unique_ptr<tokenizers::Tokenizer>()> create_handle);
 };
 
 }  // namespace llm
@@ -50,14 +50,114 @@ def main(argv):
     parser.add_argument(
         "--speculative-mode",
         type=str,
-        choices=["DISABLE", "SMALL_DRAFT", "EAGLE"],
+        choices=["DISABLE", "SMALL_DRAFT", "EAGLE", "NGRAM"],
         default="DISABLE",
         help=HELP["speculative_mode_serve"],
     )
     parser.add_argument(
         "--spec-draft-length", type=int, default=4, help=HELP["spec_draft_length_serve"]
     )
+    parser.add_argument(
+        "--adaptive-spec-draft-length",
+        action="store_true",
+        help=HELP["adaptive_spec_draft_length_serve"],
+    )
+    parser.add_argument(
+        "--prefix-cache-max-num-recycling-seqs",
+        type=int,
+        help=HELP["prefix_cache_max_num_recycling_seqs_serve"],
+    )
+    parser.add_argument(
+        "--mixed-prefill-decode",
+        action="store_true",
+        help=HELP["mixed_prefill_decode_serve"],
+    )
+    parser.add_argument(
+        "--target-step-latency-ms",
+        type=float,
+        help=HELP["target_step_latency_ms_serve"],
+    )
+    parser.add_argument(
+        "--kv-swap-space-gb",
+        type=float,
+        default=0.0,
+        help=HELP["kv_swap_space_gb_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument(
+        "--stream-encoding",
+        type=str,
+        choices=["fast", "pydantic"],
+        default="fast",
+        help=HELP["stream_encoding_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument(
+        "--preprocess-num-threads",
+        type=int,
+        default=4,
+        help=HELP["preprocess_num_threads_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument(
+        "--preprocess-inline-threshold",
+        type=int,
+        default=8192,
+        help=HELP["preprocess_inline_threshold_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument(
+        "--response-cache-max-num-entries",
+        type=int,
+        default=0,
+        help=HELP["response_cache_max_num_entries_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument(
+        "--response-cache-max-num-bytes",
+        type=int,
+        default=256 * 1024 * 1024,
+        help=HELP["response_cache_max_num_bytes_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument("--response-cache-ttl", type=float, help=HELP["response_cache_ttl_serve"])
+    parser.add_argument(
+        "--max-num-waiting-requests", type=int, help=HELP["max_num_waiting_requests_serve"]
+    )
+    parser.add_argument("--max-queue-delay", type=float, help=HELP["max_queue_delay_serve"])
+    parser.add_argument(
+        "--hosted-models", type=str, nargs="*", default=[], help=HELP["hosted_models_serve"]
+    )
+    parser.add_argument("--memory-budget", type=float, help=HELP["memory_budget_serve"])
+    parser.add_argument(
+        "--num-frontends",
+        type=int,
+        default=1,
+        help=HELP["num_frontends_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument("--batch-dir", type=str, help=HELP["batch_dir_serve"])
+    parser.add_argument("--embedding-model", type=str, help=HELP["embedding_model_serve"])
+    parser.add_argument(
+        "--embedding-pooling",
+        type=str,
+        choices=["mean", "last", "cls"],
+        default="last",
+        help=HELP["embedding_pooling_serve"] + ' (default: "%(default)s")',
+    )
     parser.add_argument("--enable-tracing", action="store_true", help=HELP["enable_tracing_serve"])
+    parser.add_argument(
+        "--trace-capacity",
+        type=int,
+        default=1 << 20,
+        help=HELP["trace_capacity_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument(
+        "--trace-sample-rate",
+        type=float,
+        default=1.0,
+        help=HELP["trace_sample_rate_serve"] + ' (default: "%(default)s")',
+    )
+    parser.add_argument("--trace-export-dir", type=str, help=HELP["trace_export_dir_serve"])
+    parser.add_argument(
+        "--trace-export-interval",
+        type=float,
+        default=60.0,
+        help=HELP["trace_export_interval_serve"] + ' (default: "%(default)s")',
+    )
     parser.add_argument(
         "--host",
         type=str,
@@ -103,7 +203,30 @@ def main(argv):
         gpu_memory_utilization=parsed.gpu_memory_utilization,
         speculative_mode=SpeculativeMode[parsed.speculative_mode],
         spec_draft_length=parsed.spec_draft_length,
+        adaptive_spec_draft_length=parsed.adaptive_spec_draft_length,
+        prefix_cache_max_num_recycling_seqs=parsed.prefix_cache_max_num_recycling_seqs,
+        mixed_prefill_decode=parsed.mixed_prefill_decode,
+        target_step_latency_ms=parsed.target_step_latency_ms,
+        kv_swap_space_gb=parsed.kv_swap_space_gb,
+        enable_fast_stream_encoding=parsed.stream_encoding == "fast",
+        preprocess_num_threads=parsed.preprocess_num_threads,
+        preprocess_inline_threshold=parsed.preprocess_inline_threshold,
+        response_cache_max_num_entries=parsed.response_cache_max_num_entries,
+        response_cache_max_num_bytes=parsed.response_cache_max_num_bytes,
+        response_cache_ttl=parsed.response_cache_ttl,
+        max_num_waiting_requests=parsed.max_num_waiting_requests,
+        max_queue_delay=parsed.max_queue_delay,
+        hosted_models=parsed.hosted_models,
+        memory_budget=parsed.memory_budget,
+        num_frontends=parsed.num_frontends,
+        batch_dir=parsed.batch_dir,
+        embedding_model=parsed.embedding_model,
+        embedding_pooling=parsed.embedding_pooling,
         enable_tracing=parsed.enable_tracing,
+        trace_capacity=parsed.trace_capacity,
+        trace_sample_rate=parsed.trace_sample_rate,
+        trace_export_dir=parsed.trace_export_dir,
+        trace_export_interval=parsed.trace_export_interval,
         host=parsed.host,
         port=parsed.port,
         allow_credentials=parsed.allow_credentials,
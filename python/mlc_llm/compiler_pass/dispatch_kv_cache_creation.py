@@ -1,9 +1,10 @@
 """A pass that rewrites KV cache creation functions in IRModule."""
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import tvm
 from tvm import IRModule, relax
+from tvm.relax.expr_functor import PyExprMutator, mutator
 
 from mlc_llm.nn import RopeMode, kv_cache
 
@@ -51,7 +52,11 @@ class DispatchKVCacheCreation:  # pylint: disable=too-many-instance-attributes
     """Rewrite KV cache creation functions to IRModule."""
 
     def __init__(
-        self, target: tvm.target.Target, flashinfer: bool, metadata: Dict[str, Any]
+        self,
+        target: tvm.target.Target,
+        flashinfer: bool,
+        metadata: Dict[str, Any],
+        fp8_attention_dtype: Optional[str] = None,
     ) -> None:
         """Initializer.
 
@@ -67,10 +72,19 @@ class DispatchKVCacheCreation:  # pylint: disable=too-many-instance-attributes
             The model's metadata for KV cache creation.
             Note that the metadata will be updated in this pass -- the
             KV cache metadata will be attached.
+
+        fp8_attention_dtype : Optional[str]
+            The float8 dtype of the experimental float8 attention, or None to disable it.
+            The KV cache runtime uses a single dtype for the q/k/v data, the K/V data
+            and the attention output, so the fused q/k/v data are cast to float8 before
+            attention and the attention output is cast back to the model dtype. It
+            quantizes the queries and the attention output as well as the K/V data, and
+            is not a K/V-only compression.
         """
         self.target = target
         self.flashinfer = flashinfer
         self.metadata = metadata
+        self.fp8_attention_dtype = fp8_attention_dtype
 
     def transform_module(self, mod: IRModule, _ctx: tvm.transform.PassContext) -> IRModule:
         """Entrypoint"""
@@ -91,6 +105,9 @@ class DispatchKVCacheCreation:  # pylint: disable=too-many-instance-attributes
             new_mod = new_mod.with_attrs(mod.attrs)
 
         kwargs = extract_creation_args(creation_func)
+        if self.fp8_attention_dtype is not None:
+            kwargs["dtype"] = self.fp8_attention_dtype
+            new_mod = _AttentionDtypeRewriter(new_mod, self.fp8_attention_dtype).transform()
         self.attach_kv_cache_metadata(kwargs)
 
         bb = relax.BlockBuilder(new_mod)
@@ -105,6 +122,7 @@ class DispatchKVCacheCreation:  # pylint: disable=too-many-instance-attributes
             "num_attention_heads": kwargs["num_attention_heads"],
             "num_key_value_heads": kwargs["num_key_value_heads"],
             "head_dim": kwargs["head_dim"],
+            "dtype": str(kwargs["dtype"]),
         }
 
     def create_tir_paged_kv_cache(self, bb: relax.BlockBuilder, kwargs: Dict[str, Any]) -> None:
@@ -185,3 +203,43 @@ class DispatchKVCacheCreation:  # pylint: disable=too-many-instance-attributes
         ):
             cache = kv_cache.FlashInferPagedKVCache(target=self.target, **kwargs)
             bb.emit_func_output(cache._expr)  # pylint: disable=protected-access
+
+
+@mutator
+class _AttentionDtypeRewriter(PyExprMutator):  # pylint: disable=abstract-method
+    """Cast the fused q/k/v data to the attention dtype before each attention with
+    the KV cache, and cast the attention output back to the model dtype."""
+
+    def __init__(self, mod: IRModule, attention_dtype: str) -> None:
+        super().__init__(mod)
+        self.mod = mod
+        self.attention_dtype = attention_dtype
+
+    def transform(self) -> IRModule:
+        """Entry point"""
+        for g_var, func in self.mod.functions_items():
+            if isinstance(func, relax.Function):
+                self.builder_.update_func(g_var, self.visit_expr(func))
+        return self.builder_.get()
+
+    def visit_call_(self, call: relax.Call) -> relax.Expr:  # pylint: disable=arguments-renamed
+        call = super().visit_call_(call)
+        if (
+            call.op != tvm.ir.Op.get("relax.call_dps_packed")
+            or not isinstance(call.args[0], relax.ExternFunc)
+            or not isinstance(call.args[1], relax.Tuple)
+            or call.args[0].global_symbol
+            != "vm.builtin.attention_kv_cache_attention_with_fused_qkv"
+        ):
+            return call
+        *args, qkv = call.args[1].fields
+        out_sinfo = call.sinfo_args[0]
+        qkv = self.builder_.emit(relax.op.astype(qkv, self.attention_dtype))
+        output = self.builder_.emit(
+            relax.call_dps_packed(
+                call.args[0],
+                relax.Tuple([*args, qkv]),
+                out_sinfo=relax.TensorStructInfo(out_sinfo.shape, self.attention_dtype),
+            )
+        )
+        return relax.op.astype(output, out_sinfo.dtype)
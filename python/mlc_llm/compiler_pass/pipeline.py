@@ -84,6 +84,7 @@ def _mlc_llm_pipeline(  # pylint: disable=too-many-arguments
     metadata: Dict[str, Any] = None,
     ext_mods: List[nn.ExternModule] = None,
     debug_dump: Optional[Path] = None,
+    fp8_attention_dtype: Optional[str] = None,
 ):
     variable_bounds = variable_bounds or {}
     cuda_graph_symbolic_capture_hints = cuda_graph_symbolic_capture_hints or {}
@@ -96,7 +97,7 @@ def _mlc_llm_pipeline(  # pylint: disable=too-many-arguments
         seq = tvm.transform.Sequential(
             [
                 # Phase 0. Add additional information for compilation and remove unused Relax func
-                DispatchKVCacheCreation(target, flashinfer, metadata),
+                DispatchKVCacheCreation(target, flashinfer, metadata, fp8_attention_dtype),
                 AttachVariableBounds(variable_bounds),
                 AttachCUDAGraphSymbolicCaptureHints(cuda_graph_symbolic_capture_hints),
                 AttachLogitProcessFunc(target),
@@ -152,12 +152,102 @@ on the vRAM size on GPU.
 The maximum number of tokens the model passes for prefill each time.
 It should not exceed the prefill chunk size in model config.
 If not specified, this defaults to the prefill chunk size in model config.
+""".strip(),
+    "stream_encoding_serve": """
+The encoder of the streaming responses of the OpenAI-compatible entrypoints.
+"fast" writes the server-sent events directly from the engine outputs without
+building and validating the response models, while "pydantic" dumps the response
+models. Both produce the same JSON.
+""".strip(),
+    "preprocess_num_threads_serve": """
+The number of threads which preprocess the requests, including conversation template
+rendering, tokenization and image fetching, off the server event loop, so that long
+prompts do not stall the token streaming of other requests. Requests are preprocessed
+in the event loop when it is 0.
+""".strip(),
+    "preprocess_inline_threshold_serve": """
+The number of prompt characters below which a request is preprocessed directly in the
+server event loop instead of the preprocessing threads.
+""".strip(),
+    "response_cache_max_num_entries_serve": """
+The maximum number of responses in the response cache of each engine. The response cache
+replays the outputs of the deterministic requests (with zero temperature or a fixed seed)
+whose prompt tokens and generation config are the same as a previous request, without running
+them in the engine. The entries are evicted in LRU order. The cache is disabled when it is 0.
+""".strip(),
+    "response_cache_max_num_bytes_serve": """
+The maximum total bytes of the responses in the response cache of each engine.
+""".strip(),
+    "response_cache_ttl_serve": """
+The time to live in seconds of the responses in the response cache. No expiration if not set.
+""".strip(),
+    "max_num_waiting_requests_serve": """
+The maximum number of requests waiting for prefill in the engine. When the limit is reached,
+the server rejects new requests with status 429 and a "Retry-After" header, so that clients
+or load balancers can retry on other servers. No limit if not specified.
+""".strip(),
+    "max_queue_delay_serve": """
+The maximum estimated queue delay in seconds, i.e., the time for the engine to start all the
+requests waiting for prefill, estimated from the recent engine throughput. When the delay is
+exceeded, the server rejects new requests with status 429 and a "Retry-After" header.
+No limit if not specified.
+""".strip(),
+    "hosted_models_serve": """
+The other models to serve together with the main model, each in the format of either
+"{MODEL_PATH}" or "{MODEL_PATH}:{MODEL_LIB_PATH}". When specified, the engine of each model
+(the main model included) is loaded on the first request of the model, and the least recently
+used idle engines are unloaded when a new engine does not fit in "--memory-budget".
+The engine options apply to every model, while the additional models and speculative decoding
+only apply to the main model. Since mode "server" sizes the KV cache of each engine after the
+entire GPU memory, mode "local" or "--max-total-seq-length" is suggested for multiple models.
+""".strip(),
+    "memory_budget_serve": """
+The device memory budget in GB of all the loaded engines when serving "--hosted-models".
+It defaults to the GPU memory size times the GPU memory utilization.
+""".strip(),
+    "num_frontends_serve": """
+The number of front-end processes serving HTTP. When it is more than 1, the engine runs alone
+in the main process, and each front-end process runs the request validation, tokenization and
+response encoding, receiving the engine outputs through shared memory. Image inputs and
+"--hosted-models" are not supported with multiple front-end processes.
+""".strip(),
+    "batch_dir_serve": """
+The directory to store the uploaded files and the batches of the batch API ("/v1/files" and
+"/v1/batches") in. The batches unfinished when the server stops are resumed from their output
+files when the server restarts with the same directory. The batch API is disabled if not set.
+""".strip(),
+    "embedding_model_serve": """
+The embedding model to serve "/v1/embeddings" with, in the format of either "{MODEL_PATH}" or
+"{MODEL_PATH}:{MODEL_LIB_PATH}". The inputs of the concurrent embedding requests are packed
+into the same prefills of the model. The embedding API is disabled if not set.
+""".strip(),
+    "embedding_pooling_serve": """
+The default pooling method of the hidden states of the embedding model. "mean" averages the
+hidden states of all the tokens, "last" takes the hidden state of the last token, and "cls"
+takes the hidden state of the first token.
 """.strip(),
     "enable_tracing_serve": """
 Enable Chrome Tracing for the server.
 After enabling, you can send POST request to the "debug/dump_event_trace" entrypoint
 to get the Chrome Trace. For example,
 "curl -X POST http://127.0.0.1:8000/debug/dump_event_trace -H "Content-Type: application/json" -d '{"model": "dist/llama"}'"
+""".strip(),
+    "trace_capacity_serve": """
+The maximum number of events kept in the ring buffer of the event trace recorder of each engine,
+beyond which the oldest events are overwritten. Each event takes 24 bytes.
+""".strip(),
+    "trace_sample_rate_serve": """
+The fraction of requests whose events are recorded when tracing is enabled, in range [0, 1].
+For example, 0.01 traces 1% of the requests, which keeps the tracing overhead low enough to
+leave tracing on in production.
+""".strip(),
+    "trace_export_dir_serve": """
+The directory to periodically export the recorded events to when tracing is enabled. Each
+export writes the events since the previous export to a new file in Chrome Trace Event Format,
+which can be opened in chrome://tracing or https://ui.perfetto.dev.
+""".strip(),
+    "trace_export_interval_serve": """
+The interval in seconds to export the recorded events to "--trace-export-dir".
 """.strip(),
     "mode_serve": """
 The engine mode in MLC LLM. We provide three preset modes: "local", "interactive" and "server".
@@ -193,14 +283,50 @@ Under mode "local" or "interactive", the actual memory usage may be significantl
 this number. Under mode "server", the actual memory usage may be slightly larger than this number.
 """,
     "speculative_mode_serve": """
-The speculative decoding mode. Right now three options are supported:
+The speculative decoding mode. Right now four options are supported:
  - DISABLE, where speculative decoding is not enabled,
  - SMALL_DRAFT, denoting the normal speculative decoding (small draft) style,
- - EAGLE, denoting the eagle-style speculative decoding.
+ - EAGLE, denoting the eagle-style speculative decoding,
+ - NGRAM, denoting the speculative decoding whose draft tokens are looked up from the
+   prompt and the generated tokens by n-gram matching. It needs no additional draft model,
+   and speeds up the outputs copying spans of the prompt, e.g., in summarization or code editing.
 The default mode is "DISABLE".
 """,
     "spec_draft_length_serve": """
 The number of draft tokens to generate in speculative proposal. The default values is 4.
+""",
+    "adaptive_spec_draft_length_serve": """
+A boolean indicating if to adapt the draft length of each request to its live draft acceptance
+rate, with "--spec-draft-length" as the max draft length. Each step drafts the length which
+maximizes the expected accepted tokens per unit of the measured draft and verification time,
+and requests whose drafts are mostly rejected fall back to plain decode.
+""",
+    "prefix_cache_max_num_recycling_seqs_serve": """
+The maximum number of finished sequences kept resident in the KV cache for prefix reuse.
+Requests sharing a prefix with a resident or running sequence (e.g., the system prompt and
+conversation history in multi-turn chat) only prefill the unmatched suffix.
+Resident sequences are evicted in LRU order under memory pressure.
+If not specified, this defaults to 0, which disables prefix caching.
+""",
+    "mixed_prefill_decode_serve": """
+A boolean indicating if to piggyback the decode of the running requests on the chunked prefill
+of new requests. Each prefill step then decodes one token for every running request in the
+same batch, so that running requests keep generating while long prompts are prefilled.
+It only applies when speculative decoding is disabled.
+""",
+    "target_step_latency_ms_serve": """
+The target latency in milliseconds of a step mixing prefill and decode, which is used with
+"--mixed-prefill-decode". The number of prefill tokens in each mixed step is derived from the
+measured decode and per-token prefill time so that the step fits the target, which keeps the
+inter-token latency of running requests flat. If not specified, each mixed step is bounded by
+the prefill chunk size only.
+""",
+    "kv_swap_space_gb_serve": """
+The page-locked host memory in GB to hold the KV data of the requests preempted under KV cache
+pressure. A preempted request is swapped out to the host memory when copying its KV data out
+and back is measured to be faster than recomputing them by prefill, which usually holds for
+long sequences, and is recomputed otherwise. Setting it to 0 disables swapping. It only applies
+when speculative decoding is disabled and the KV cache supports copying KV data to host memory.
 """,
     "engine_config_serve": """
 The MLCEngine execution configuration.
@@ -192,6 +192,7 @@ def _compile(args: CompileArgs, model_config: ConfigBase):
                     ext_mods=ext_mods,
                     metadata=metadata,
                     debug_dump=args.debug_dump,
+                    fp8_attention_dtype=args.opt.experimental_fp8_attention or None,
                 ),
             )
         _report_memory_usage(metadata=metadata, config=model_config)
@@ -22,6 +22,12 @@ class IPCAllReduceStrategyType(enum.IntEnum):
     AUTO = 3
 
 
+# The float8 dtypes of the experimental float8 attention. The KV cache runtime uses
+# a single dtype for the queries, the K/V data and the attention output, so the
+# queries and the attention output are quantized as well as the stored K/V data.
+FP8_ATTENTION_DTYPES = ("e4m3_float8", "e5m2_float8")
+
+
 @dataclasses.dataclass
 class OptimizationFlags:
     """Optimization flags"""
@@ -32,6 +38,7 @@ class OptimizationFlags:
     cudagraph: bool = False
     cutlass: bool = False
     ipc_allreduce_strategy: IPCAllReduceStrategyType = IPCAllReduceStrategyType.NONE
+    experimental_fp8_attention: str = ""
 
     def __repr__(self) -> str:
         out = StringIO()
@@ -41,6 +48,12 @@ class OptimizationFlags:
         print(f";cudagraph={int(self.cudagraph)}", file=out, end="")
         print(f";cutlass={int(self.cutlass)}", file=out, end="")
         print(f";ipc_allreduce_strategy={self.ipc_allreduce_strategy.name}", file=out, end="")
+        if self.experimental_fp8_attention:
+            print(
+                f";experimental_fp8_attention={self.experimental_fp8_attention}",
+                file=out,
+                end="",
+            )
         return out.getvalue().rstrip()
 
     @staticmethod
@@ -69,6 +82,12 @@ class OptimizationFlags:
             choices=["NONE", "ONESHOT", "TWOSHOT", "AUTO"],
             default="NONE",
         )
+        parser.add_argument(
+            "--experimental_fp8_attention",
+            type=str,
+            choices=["", *FP8_ATTENTION_DTYPES],
+            default="",
+        )
         results = parser.parse_args([f"--{i}" for i in source.split(";") if i])
         return OptimizationFlags(
             flashinfer=results.flashinfer,
@@ -77,6 +96,7 @@ class OptimizationFlags:
             cudagraph=results.cudagraph,
             cutlass=results.cutlass,
             ipc_allreduce_strategy=IPCAllReduceStrategyType[results.ipc_allreduce_strategy],
+            experimental_fp8_attention=results.experimental_fp8_attention,
         )
 
     def update(self, target, quantization) -> None:
@@ -124,10 +144,29 @@ class OptimizationFlags:
                 return False
             return self.cutlass
 
+        def _experimental_fp8_attention(target) -> str:
+            """correct experimental_fp8_attention flag"""
+            if not self.experimental_fp8_attention:
+                return ""
+            if target.kind.name != "cuda":
+                logger.warning(
+                    "Float8 attention %s is only supported on CUDA, using the model dtype",
+                    self.experimental_fp8_attention,
+                )
+                return ""
+            logger.warning(
+                "Float8 attention %s is experimental. Besides the K/V data in the KV cache, "
+                "the queries and the attention output are quantized to float8 as well, "
+                "which changes the model numerics.",
+                self.experimental_fp8_attention,
+            )
+            return self.experimental_fp8_attention
+
         self.flashinfer = _flashinfer(target)
         self.cublas_gemm = _cublas_gemm(target, quantization)
         self.faster_transformer = _faster_transformer(target)
         self.cutlass = _cutlass(target)
+        self.experimental_fp8_attention = _experimental_fp8_attention(target)
 
 
 @dataclasses.dataclass
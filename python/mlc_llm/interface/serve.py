@@ -1,16 +1,32 @@
 """Python entrypoint of serve."""
 
-from typing import Any, List, Literal, Optional
+import multiprocessing
+import socket
+import threading
+from typing import Any, Dict, List, Literal, Optional
 
 import fastapi
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 
 from mlc_llm.protocol import error_protocol
-from mlc_llm.serve import engine
+from mlc_llm.serve import engine, engine_base
+from mlc_llm.serve.embedding_engine import AsyncEmbeddingEngine
 from mlc_llm.serve.config import SpeculativeMode
-from mlc_llm.serve.entrypoints import debug_entrypoints, openai_entrypoints
-from mlc_llm.serve.server import ServerContext
+from mlc_llm.serve.entrypoints import (
+    batch_entrypoints,
+    debug_entrypoints,
+    metrics_entrypoints,
+    openai_entrypoints,
+)
+from mlc_llm.serve.server import (
+    EngineHost,
+    EnginePool,
+    FrontendAsyncMLCEngine,
+    ServerContext,
+)
+from mlc_llm.serve.server.multi_process import FrontendSpec
+from mlc_llm.support.auto_device import detect_device
 
 
 def serve(
@@ -25,7 +41,30 @@ def serve(
     gpu_memory_utilization: Optional[float],
     speculative_mode: SpeculativeMode,
     spec_draft_length: int,
+    adaptive_spec_draft_length: bool,
+    prefix_cache_max_num_recycling_seqs: Optional[int],
+    mixed_prefill_decode: bool,
+    target_step_latency_ms: Optional[float],
+    kv_swap_space_gb: float,
+    enable_fast_stream_encoding: bool,
+    preprocess_num_threads: int,
+    preprocess_inline_threshold: int,
+    response_cache_max_num_entries: int,
+    response_cache_max_num_bytes: int,
+    response_cache_ttl: Optional[float],
+    max_num_waiting_requests: Optional[int],
+    max_queue_delay: Optional[float],
+    hosted_models: List[str],
+    memory_budget: Optional[float],
+    num_frontends: int,
+    batch_dir: Optional[str],
+    embedding_model: Optional[str],
+    embedding_pooling: Literal["mean", "last", "cls"],
     enable_tracing: bool,
+    trace_capacity: int,
+    trace_sample_rate: float,
+    trace_export_dir: Optional[str],
+    trace_export_interval: float,
     host: str,
     port: int,
     allow_credentials: bool,
@@ -34,37 +73,246 @@ def serve(
     allow_headers: Any,
 ):  # pylint: disable=too-many-arguments, too-many-locals
     """Serve the model with the specified configuration."""
-    # Create engine and start the background loop
-    async_engine = engine.AsyncMLCEngine(
-        model=model,
-        device=device,
-        model_lib_path=model_lib_path,
-        mode=mode,
-        additional_models=additional_models,
-        max_batch_size=max_batch_size,
-        max_total_sequence_length=max_total_sequence_length,
-        prefill_chunk_size=prefill_chunk_size,
-        gpu_memory_utilization=gpu_memory_utilization,
-        speculative_mode=speculative_mode,
-        spec_draft_length=spec_draft_length,
-        enable_tracing=enable_tracing,
-    )
+    # The model paths and model lib paths of the served models.
+    model_lib_paths = {model: model_lib_path}
+    for hosted_model in hosted_models:
+        splits = hosted_model.split(":", maxsplit=1)
+        model_lib_paths[splits[0]] = splits[1] if len(splits) == 2 else None
+
+    tracing_kwargs = {
+        "trace_capacity": trace_capacity,
+        "trace_sample_rate": trace_sample_rate,
+        "trace_export_dir": trace_export_dir,
+        "trace_export_interval": trace_export_interval,
+    }
+
+    def _kv_cache_kwargs(
+        served_model: str, engine_memory_budget: Optional[float]
+    ) -> Dict[str, Any]:
+        # The engine in the engine pool sizes its KV cache against the memory budget
+        # given by the pool rather than the whole device.
+        if engine_memory_budget is not None:
+            gpu_memory_fraction = engine_memory_budget / detect_device(device).total_global_memory
+        else:
+            gpu_memory_fraction = gpu_memory_utilization
+        return {
+            "model": served_model,
+            "device": device,
+            "model_lib_path": model_lib_paths[served_model],
+            "mode": mode,
+            "additional_models": additional_models if served_model == model else None,
+            "max_batch_size": max_batch_size,
+            "max_total_sequence_length": max_total_sequence_length,
+            "prefill_chunk_size": prefill_chunk_size,
+            "gpu_memory_utilization": gpu_memory_fraction,
+        }
+
+    def _create_engine(
+        served_model: str, engine_memory_budget: Optional[float] = None
+    ) -> engine.AsyncMLCEngine:
+        # Create engine and start the background loop
+        return engine.AsyncMLCEngine(
+            **_kv_cache_kwargs(served_model, engine_memory_budget),
+            speculative_mode=speculative_mode if served_model == model else SpeculativeMode.DISABLE,
+            spec_draft_length=spec_draft_length,
+            adaptive_spec_draft_length=adaptive_spec_draft_length,
+            prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+            mixed_prefill_decode=mixed_prefill_decode,
+            target_step_latency_ms=target_step_latency_ms,
+            kv_swap_space_gb=kv_swap_space_gb,
+            enable_tracing=enable_tracing,
+            **tracing_kwargs,
+            enable_fast_stream_encoding=enable_fast_stream_encoding,
+            preprocess_num_threads=preprocess_num_threads,
+            preprocess_inline_threshold=preprocess_inline_threshold,
+            response_cache_max_num_entries=response_cache_max_num_entries,
+            response_cache_max_num_bytes=response_cache_max_num_bytes,
+            response_cache_ttl=response_cache_ttl,
+        )
+
+    if num_frontends > 1:
+        if len(hosted_models) > 0:
+            raise ValueError("Hosted models are not supported with multiple front-end processes.")
+        if batch_dir is not None:
+            raise ValueError("The batch API is not supported with multiple front-end processes.")
+        if embedding_model is not None:
+            raise ValueError(
+                "The embedding model is not supported with multiple front-end processes."
+            )
+        # The engine runs in this process, and the front-end processes serve HTTP.
+        _serve_multi_process(
+            engine.MLCEngine(
+                **_kv_cache_kwargs(model, engine_memory_budget=None),
+                speculative_mode=speculative_mode,
+                spec_draft_length=spec_draft_length,
+                adaptive_spec_draft_length=adaptive_spec_draft_length,
+                prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+                mixed_prefill_decode=mixed_prefill_decode,
+                target_step_latency_ms=target_step_latency_ms,
+                kv_swap_space_gb=kv_swap_space_gb,
+                enable_tracing=enable_tracing,
+                **tracing_kwargs,
+            ),
+            num_frontends=num_frontends,
+            host=host,
+            port=port,
+            model=model,
+            engine_kwargs={
+                "enable_tracing": enable_tracing,
+                **tracing_kwargs,
+                "enable_fast_stream_encoding": enable_fast_stream_encoding,
+                "preprocess_num_threads": preprocess_num_threads,
+                "preprocess_inline_threshold": preprocess_inline_threshold,
+                "response_cache_max_num_entries": response_cache_max_num_entries,
+                "response_cache_max_num_bytes": response_cache_max_num_bytes,
+                "response_cache_ttl": response_cache_ttl,
+            },
+            context_kwargs={
+                "max_num_waiting_requests": max_num_waiting_requests,
+                "max_queue_delay": max_queue_delay,
+            },
+            app_kwargs={
+                "allow_credentials": allow_credentials,
+                "allow_origins": allow_origins,
+                "allow_methods": allow_methods,
+                "allow_headers": allow_headers,
+            },
+        )
+        return
+
+    engine_pool: Optional[EnginePool] = None
+    if len(hosted_models) > 0:
+        # Serve all the models in the engine pool, which loads the engines on demand.
+        if memory_budget is None:
+            memory_budget_bytes = detect_device(device).total_global_memory * (
+                gpu_memory_utilization if gpu_memory_utilization is not None else 0.85
+            )
+        else:
+            memory_budget_bytes = memory_budget * 1024 * 1024 * 1024
+        engine_pool = EnginePool(
+            models=list(model_lib_paths.keys()),
+            create_engine=_create_engine,
+            estimate_memory_usage=lambda served_model, budget: (
+                engine_base.estimate_engine_memory_usage(**_kv_cache_kwargs(served_model, budget))
+            ),
+            memory_budget=memory_budget_bytes,
+        )
 
-    with ServerContext() as server_context:
-        server_context.add_model(model, async_engine)
+    with ServerContext(
+        max_num_waiting_requests=max_num_waiting_requests,
+        max_queue_delay=max_queue_delay,
+        engine_pool=engine_pool,
+        batch_dir=batch_dir,
+    ) as server_context:
+        if engine_pool is None:
+            server_context.add_model(model, _create_engine(model))
+        if embedding_model is not None:
+            splits = embedding_model.split(":", maxsplit=1)
+            server_context.add_embedding_engine(
+                splits[0],
+                AsyncEmbeddingEngine(
+                    model=splits[0],
+                    device=device,
+                    model_lib_path=splits[1] if len(splits) == 2 else None,
+                    pooling=embedding_pooling,
+                ),
+            )
 
-        app = fastapi.FastAPI()
-        app.add_middleware(
-            CORSMiddleware,
+        app = _create_app(
             allow_credentials=allow_credentials,
             allow_origins=allow_origins,
             allow_methods=allow_methods,
             allow_headers=allow_headers,
         )
+        uvicorn.run(app, host=host, port=port, log_level="info")
+
+
+def _create_app(
+    allow_credentials: bool, allow_origins: Any, allow_methods: Any, allow_headers: Any
+) -> fastapi.FastAPI:
+    """Create the FastAPI app with all the entrypoints."""
+    app = fastapi.FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=allow_credentials,
+        allow_origins=allow_origins,
+        allow_methods=allow_methods,
+        allow_headers=allow_headers,
+    )
+
+    app.include_router(openai_entrypoints.app)
+    app.include_router(batch_entrypoints.app)
+    app.include_router(debug_entrypoints.app)
+    app.include_router(metrics_entrypoints.app)
+    app.exception_handler(error_protocol.BadRequestError)(error_protocol.bad_request_error_handler)
+    return app
+
 
-        app.include_router(openai_entrypoints.app)
-        app.include_router(debug_entrypoints.app)
-        app.exception_handler(error_protocol.BadRequestError)(
-            error_protocol.bad_request_error_handler
+def _serve_multi_process(  # pylint: disable=too-many-arguments
+    mlc_engine: engine.MLCEngine,
+    num_frontends: int,
+    host: str,
+    port: int,
+    model: str,
+    engine_kwargs: Dict[str, Any],
+    context_kwargs: Dict[str, Any],
+    app_kwargs: Dict[str, Any],
+) -> None:
+    """Serve the engine in this process with multiple front-end processes,
+    which accept the connections on the same listening socket."""
+    mp_context = multiprocessing.get_context("spawn")
+    engine_host = EngineHost(mlc_engine, num_frontends, mp_context)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    processes = [
+        mp_context.Process(
+            target=_run_frontend,
+            args=(
+                engine_host.get_frontend_spec(frontend_id),
+                sock,
+                model,
+                engine_kwargs,
+                context_kwargs,
+                app_kwargs,
+            ),
         )
-        uvicorn.run(app, host=host, port=port, log_level="info")
+        for frontend_id in range(num_frontends)
+    ]
+    for process in processes:
+        process.start()
+
+    def _stop_when_frontends_exit():
+        for process in processes:
+            process.join()
+        engine_host.stop()
+
+    threading.Thread(target=_stop_when_frontends_exit, daemon=True).start()
+    try:
+        engine_host.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        sock.close()
+        engine_host.close()
+        mlc_engine.terminate()
+
+
+def _run_frontend(  # pylint: disable=too-many-arguments
+    spec: FrontendSpec,
+    sock: socket.socket,
+    model: str,
+    engine_kwargs: Dict[str, Any],
+    context_kwargs: Dict[str, Any],
+    app_kwargs: Dict[str, Any],
+) -> None:
+    """The entry of a front-end process, which serves HTTP on the given socket."""
+    with ServerContext(**context_kwargs) as server_context:
+        server_context.add_model(model, FrontendAsyncMLCEngine(spec, **engine_kwargs))
+        app = _create_app(**app_kwargs)
+        uvicorn.Server(uvicorn.Config(app, log_level="info")).run(sockets=[sock])
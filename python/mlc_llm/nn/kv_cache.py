@@ -457,14 +457,21 @@ def _rope(
     qkv_dtype="float16",
 ):
     d = indices[-1]
-    cos_freq, sin_freq = rope_freq(offset * scale, d, rotary_dim, theta, qkv_dtype)
-    cos = cos_freq * buffer[indices]
+    compute_dtype = _compute_dtype(qkv_dtype)
+    cos_freq, sin_freq = rope_freq(offset * scale, d, rotary_dim, theta, compute_dtype)
+    cos = cos_freq * buffer[indices].astype(compute_dtype)
     sin = sin_freq * tir.if_then_else(
         d < rotary_dim // 2,
-        -buffer[indices[:-1] + (d + rotary_dim // 2,)],
-        buffer[indices[:-1] + (d - rotary_dim // 2,)],
+        -buffer[indices[:-1] + (d + rotary_dim // 2,)].astype(compute_dtype),
+        buffer[indices[:-1] + (d - rotary_dim // 2,)].astype(compute_dtype),
     )
-    return cos + sin
+    return (cos + sin).astype(qkv_dtype)
+
+
+def _compute_dtype(dtype: str) -> str:
+    """Return the dtype to compute the elementwise ops of the given data in.
+    The float8 data are only stored, and are computed in float16."""
+    return "float16" if "float8" in dtype else dtype
 
 
 def _var(dtype):
@@ -1198,7 +1205,8 @@ def _merge_state_inplace(
                             # merge
                             for vec in T.serial(VEC_SIZE):
                                 v_vec[vec] = (
-                                    v_vec[vec] * scale[0] + v_other_vec[vec] * other_scale[0]
+                                    T.cast(v_vec[vec], "float32") * scale[0]
+                                    + T.cast(v_other_vec[vec], "float32") * other_scale[0]
                                 )
 
                             # store v
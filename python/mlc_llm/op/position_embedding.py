@@ -207,7 +207,9 @@ def llama_rope_with_position_map(  # pylint: disable=too-many-arguments
     fused_heads = num_q_heads + num_kv_heads * 2
     if rotary_dim is None:
         rotary_dim = head_dim
-    scale = tir.const(scale, dtype)
+    # The float8 qkv data are only stored, and RoPE is computed in float16.
+    compute_dtype = "float16" if "float8" in dtype else dtype
+    scale = tir.const(scale, compute_dtype)
 
     def _rope(  # pylint: disable=too-many-arguments
         x: T.Buffer,
@@ -216,14 +218,14 @@ def llama_rope_with_position_map(  # pylint: disable=too-many-arguments
         d: tir.Var,
         pos: tir.Var,
     ):
-        cos_freq, sin_freq = rope_freq(pos * scale, d, rotary_dim, theta, dtype)
-        cos = cos_freq * x[s, h, d]
+        cos_freq, sin_freq = rope_freq(pos * scale, d, rotary_dim, theta, compute_dtype)
+        cos = cos_freq * x[s, h, d].astype(compute_dtype)
         sin = sin_freq * tir.if_then_else(
             d < rotary_dim // 2,
-            -x[s, h, d + rotary_dim // 2],
-            x[s, h, d - rotary_dim // 2],
+            -x[s, h, d + rotary_dim // 2].astype(compute_dtype),
+            x[s, h, d - rotary_dim // 2].astype(compute_dtype),
         )
-        return cos + sin
+        return (cos + sin).astype(dtype)
 
     @T.prim_func
     def fused_rope(  # pylint: disable=too-many-locals
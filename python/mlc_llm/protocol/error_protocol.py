@@ -1,6 +1,7 @@
 """Error protocols in MLC LLM"""
 
 from http import HTTPStatus
+from typing import Dict, Optional
 
 import fastapi
 from pydantic import BaseModel
@@ -21,11 +22,24 @@ class ErrorResponse(BaseModel):
     code: int = None
 
 
-def create_error_response(status_code: HTTPStatus, message: str) -> fastapi.responses.JSONResponse:
+def create_error_response(
+    status_code: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None
+) -> fastapi.responses.JSONResponse:
     """Create a JSON response that reports error with regarding the input message."""
     return fastapi.responses.JSONResponse(
         ErrorResponse(message=message, code=status_code.value).model_dump_json(),
         status_code=status_code.value,
+        headers=headers,
+    )
+
+
+def create_too_many_requests_response(retry_after: int) -> fastapi.responses.JSONResponse:
+    """Create a JSON response that rejects the request when the server is overloaded,
+    and suggests the client to retry after the given number of seconds."""
+    return create_error_response(
+        HTTPStatus.TOO_MANY_REQUESTS,
+        message="The server is overloaded. Please retry later.",
+        headers={"Retry-After": str(retry_after)},
     )
 
 
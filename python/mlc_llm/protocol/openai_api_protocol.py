@@ -10,7 +10,14 @@ import time
 from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
 import shortuuid
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    SerializerFunctionWrapHandler,
+    field_validator,
+    model_serializer,
+    model_validator,
+)
 
 from .conversation_protocol import Conversation
 from .error_protocol import BadRequestError
@@ -40,18 +47,49 @@ class LogProbs(BaseModel):
     content: List[LogProbsContent]
 
 
+class TimingInfo(BaseModel):
+    """The timing breakdown of a request in seconds. Not the part of openai spec.
+    It is returned in the usage of the final response when the request sets `include_timing`.
+    """
+
+    queue_time: Optional[float] = None
+    tokenization_time: float = 0.0
+    prefill_time: Optional[float] = None
+    ttft: Optional[float] = None
+    inter_token_time_mean: Optional[float] = None
+    inter_token_time_p99: Optional[float] = None
+    decode_time: Optional[float] = None
+    prefix_cache_hit_tokens: Optional[int] = None
+
+
 class UsageInfo(BaseModel):
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
-
-    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0):
+    # Extension for the per-request timing breakdown. Not the part of openai spec.
+    timing: Optional[TimingInfo] = None
+
+    def __init__(
+        self,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        timing: Optional[TimingInfo] = None,
+    ):
         super().__init__(
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             total_tokens=prompt_tokens + completion_tokens,
+            timing=timing,
         )
 
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler: SerializerFunctionWrapHandler) -> Dict[str, Any]:
+        # Omit the timing when it is not requested, so that the usage conforms to openai spec.
+        usage = handler(self)
+        if usage.get("timing", None) is None:
+            usage.pop("timing", None)
+        return usage
+
 
 ################ v1/models ################
 
@@ -104,6 +142,11 @@ class CompletionRequest(BaseModel):
     user: Optional[str] = None
     ignore_eos: bool = False
     response_format: Optional[RequestResponseFormat] = None
+    # Extensions for request scheduling. Not the part of openai spec.
+    priority: int = 0
+    ttft_deadline_ms: Optional[float] = None
+    # Extension for returning the timing breakdown in usage. Not the part of openai spec.
+    include_timing: bool = False
 
     @field_validator("frequency_penalty", "presence_penalty")
     @classmethod
@@ -113,6 +156,14 @@ class CompletionRequest(BaseModel):
             raise ValueError("Penalty value should be in range [-2, 2].")
         return penalty_value
 
+    @field_validator("ttft_deadline_ms")
+    @classmethod
+    def check_ttft_deadline(cls, ttft_deadline_ms: Optional[float]) -> Optional[float]:
+        """Check if the TTFT deadline is non-negative."""
+        if ttft_deadline_ms is not None and ttft_deadline_ms < 0:
+            raise ValueError("TTFT deadline should be non-negative.")
+        return ttft_deadline_ms
+
     @field_validator("logit_bias")
     @classmethod
     def check_logit_bias(
@@ -218,6 +269,11 @@ class ChatCompletionRequest(BaseModel):
     user: Optional[str] = None
     ignore_eos: bool = False
     response_format: Optional[RequestResponseFormat] = None
+    # Extensions for request scheduling. Not the part of openai spec.
+    priority: int = 0
+    ttft_deadline_ms: Optional[float] = None
+    # Extension for returning the timing breakdown in usage. Not the part of openai spec.
+    include_timing: bool = False
 
     @field_validator("frequency_penalty", "presence_penalty")
     @classmethod
@@ -227,6 +283,14 @@ class ChatCompletionRequest(BaseModel):
             raise ValueError("Penalty value should be in range [-2, 2].")
         return penalty_value
 
+    @field_validator("ttft_deadline_ms")
+    @classmethod
+    def check_ttft_deadline(cls, ttft_deadline_ms: Optional[float]) -> Optional[float]:
+        """Check if the TTFT deadline is non-negative."""
+        if ttft_deadline_ms is not None and ttft_deadline_ms < 0:
+            raise ValueError("TTFT deadline should be non-negative.")
+        return ttft_deadline_ms
+
     @field_validator("logit_bias")
     @classmethod
     def check_logit_bias(
@@ -367,6 +431,122 @@ class ChatCompletionStreamResponse(BaseModel):
     )
 
 
+################ v1/embeddings ################
+
+
+class EmbeddingRequest(BaseModel):
+    """OpenAI embedding request protocol.
+    API reference: https://platform.openai.com/docs/api-reference/embeddings/create
+    """
+
+    model: Optional[str] = None
+    input: Union[str, List[str], List[int], List[List[int]]]
+    encoding_format: Literal["float", "base64"] = "float"
+    dimensions: Optional[int] = None
+    user: Optional[str] = None
+    # Extension for the pooling method of the hidden states. Not the part of openai spec.
+    pooling: Optional[Literal["mean", "last", "cls"]] = None
+
+
+class EmbeddingData(BaseModel):
+    object: Literal["embedding"] = "embedding"
+    embedding: Union[List[float], str]
+    index: int
+
+
+class EmbeddingResponse(BaseModel):
+    """OpenAI embedding response protocol.
+    API reference: https://platform.openai.com/docs/api-reference/embeddings/object
+    """
+
+    object: Literal["list"] = "list"
+    data: List[EmbeddingData]
+    model: Optional[str] = None
+    usage: UsageInfo
+
+
+################ v1/files ################
+
+
+class FileObject(BaseModel):
+    """OpenAI file object protocol.
+    API reference: https://platform.openai.com/docs/api-reference/files/object
+    """
+
+    id: str
+    object: Literal["file"] = "file"
+    bytes: int
+    created_at: int = Field(default_factory=lambda: int(time.time()))
+    filename: str
+    purpose: str
+
+
+################ v1/batches ################
+
+
+class BatchRequest(BaseModel):
+    """OpenAI batch creation request protocol.
+    API reference: https://platform.openai.com/docs/api-reference/batch/create
+    """
+
+    input_file_id: str
+    endpoint: Literal["/v1/chat/completions", "/v1/completions"]
+    completion_window: str = "24h"
+    metadata: Optional[Dict[str, str]] = None
+
+
+class BatchRequestCounts(BaseModel):
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+class BatchThroughput(BaseModel):
+    """The throughput of a batch. Not the part of openai spec."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    elapsed_time: float = 0.0
+    requests_per_second: float = 0.0
+    completion_tokens_per_second: float = 0.0
+
+
+class BatchObject(BaseModel):
+    """OpenAI batch object protocol.
+    API reference: https://platform.openai.com/docs/api-reference/batch/object
+    """
+
+    id: str
+    object: Literal["batch"] = "batch"
+    endpoint: Literal["/v1/chat/completions", "/v1/completions"]
+    errors: Optional[Dict[str, Any]] = None
+    input_file_id: str
+    completion_window: str
+    status: Literal[
+        "validating",
+        "failed",
+        "in_progress",
+        "finalizing",
+        "completed",
+        "cancelling",
+        "cancelled",
+    ] = "validating"
+    output_file_id: Optional[str] = None
+    created_at: int = Field(default_factory=lambda: int(time.time()))
+    in_progress_at: Optional[int] = None
+    completed_at: Optional[int] = None
+    failed_at: Optional[int] = None
+    cancelled_at: Optional[int] = None
+    request_counts: BatchRequestCounts = Field(
+        default_factory=lambda: BatchRequestCounts()  # pylint: disable=unnecessary-lambda
+    )
+    metadata: Optional[Dict[str, str]] = None
+    # Extension for throughput reporting. Not the part of openai spec.
+    throughput: BatchThroughput = Field(
+        default_factory=lambda: BatchThroughput()  # pylint: disable=unnecessary-lambda
+    )
+
+
 ################################################
 
 
@@ -404,6 +584,8 @@ def openai_api_get_generation_config(
         "logit_bias",
         "seed",
         "ignore_eos",
+        "priority",
+        "ttft_deadline_ms",
     ]
     for arg_name in arg_names:
         kwargs[arg_name] = getattr(request, arg_name)
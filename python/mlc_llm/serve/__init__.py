@@ -3,7 +3,15 @@
 # Load MLC LLM library by importing base
 from .. import base
 from .config import EngineConfig, GenerationConfig, SpeculativeMode
-from .data import Data, ImageData, RequestStreamOutput, TextData, TokenData
+from .data import (
+    Data,
+    ImageData,
+    RequestStreamOutput,
+    RequestStreamOutputBatch,
+    TextData,
+    TokenData,
+)
+from .embedding_engine import AsyncEmbeddingEngine, EmbeddingModel
 from .engine import AsyncMLCEngine, MLCEngine
 from .grammar import BNFGrammar, GrammarStateMatcher
 from .radix_tree import PagedRadixTree
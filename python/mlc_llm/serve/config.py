@@ -98,6 +98,16 @@ class GenerationConfig:  # pylint: disable=too-many-instance-attributes
 
     response_format : ResponseFormat
         The response format of the generation output.
+
+    priority : int
+        The scheduling priority of the request. Requests of higher priority
+        are prefilled first, and may preempt the running requests of lower
+        priority when the KV cache is insufficient. Default is set to 0.
+
+    ttft_deadline_ms : Optional[float]
+        The hint of the time-to-first-token deadline in milliseconds since the
+        request is added to the engine. Among the requests of the same priority,
+        the ones with earlier deadlines are prefilled first.
     """
 
     n: int = 1
@@ -118,6 +128,9 @@ class GenerationConfig:  # pylint: disable=too-many-instance-attributes
 
     response_format: ResponseFormat = field(default_factory=ResponseFormat)
 
+    priority: int = 0
+    ttft_deadline_ms: Optional[float] = None
+
     def asjson(self) -> str:
         """Return the config in string of JSON format."""
         return json.dumps(asdict(self))
@@ -137,6 +150,8 @@ class SpeculativeMode(enum.IntEnum):
     SMALL_DRAFT = 1
     # The eagle-style speculative decoding.
     EAGLE = 2
+    # The speculative decoding with n-gram prompt lookup proposal and no draft model.
+    NGRAM = 3
 
 
 @tvm._ffi.register_object("mlc.serve.EngineConfig")  # pylint: disable=protected-access
@@ -182,6 +197,26 @@ class EngineConfig(tvm.runtime.Object):
 
     spec_draft_length : int
         The number of tokens to generate in speculative proposal (draft).
+
+    prefix_cache_max_num_recycling_seqs : int
+        The maximum number of finished sequences kept resident in the KV cache
+        for prefix reuse. Prefix caching is disabled when it is 0, which is the default.
+
+    adaptive_spec_draft_length : bool
+        Whether to adapt the draft length of each request to its draft acceptance rate
+        in speculative decoding, with "spec_draft_length" as the max draft length.
+
+    mixed_prefill_decode : bool
+        Whether to decode the running requests in the same model invocation as the
+        prefill of new requests, so that the running requests are not stalled by prefill.
+
+    target_step_latency_ms : float
+        The target latency in milliseconds of a mixed prefill and decode step, which
+        bounds the number of prefill tokens in the step. No target when it is 0.
+
+    kv_swap_space_gb : float
+        The host memory in GB to hold the KV data of the preempted requests, so that
+        they are copied back instead of recomputed when resumed. Disabled when it is 0.
     """
 
     def __init__(  # pylint: disable=too-many-arguments
@@ -198,6 +233,11 @@ class EngineConfig(tvm.runtime.Object):
         prefill_chunk_size: int,
         speculative_mode: SpeculativeMode,
         spec_draft_length: int,
+        prefix_cache_max_num_recycling_seqs: int = 0,
+        adaptive_spec_draft_length: bool = False,
+        mixed_prefill_decode: bool = False,
+        target_step_latency_ms: float = 0.0,
+        kv_swap_space_gb: float = 0.0,
     ) -> None:
         self.__init_handle_by_constructor__(
             _ffi_api.EngineConfig,  # type: ignore  # pylint: disable=no-member
@@ -213,4 +253,9 @@ class EngineConfig(tvm.runtime.Object):
             prefill_chunk_size,
             speculative_mode,
             spec_draft_length,
+            prefix_cache_max_num_recycling_seqs,
+            adaptive_spec_draft_length,
+            mixed_prefill_decode,
+            target_step_latency_ms,
+            kv_swap_space_gb,
         )
@@ -1,13 +1,16 @@
 """Classes denoting multi-modality data used in MLC LLM serving"""
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import tvm
 import tvm._ffi
-from tvm.runtime import Object
+from tvm.runtime import Object, ShapeTuple
 from tvm.runtime.ndarray import NDArray
 
+from mlc_llm.streamer import BatchTextStreamer
+
 from . import _ffi_api
 
 
@@ -47,17 +50,36 @@ class TokenData(Data):
 
     Parameters
     ----------
-    token_ids : List[int]
-        The list of token ids.
+    token_ids : Union[List[int], np.ndarray, NDArray, ShapeTuple]
+        The token ids. A ShapeTuple is taken without copy, and the 1-D int32 or
+        int64 NumPy arrays and NDArrays are copied in bulk in native code.
+        A list is converted to a NumPy array first, which is much faster than
+        passing the token ids one by one through the FFI.
     """
 
-    def __init__(self, token_ids: List[int]):
-        self.__init_handle_by_constructor__(_ffi_api.TokenData, *token_ids)  # type: ignore  # pylint: disable=no-member
+    def __init__(self, token_ids: Union[List[int], np.ndarray, NDArray, ShapeTuple]):
+        if isinstance(token_ids, ShapeTuple):
+            self.__init_handle_by_constructor__(_ffi_api.TokenDataFromShapeTuple, token_ids)  # type: ignore  # pylint: disable=no-member
+            return
+        if not isinstance(token_ids, NDArray):
+            token_ids = np.asarray(token_ids)
+            if token_ids.dtype not in (np.int32, np.int64):
+                token_ids = token_ids.astype(np.int32)
+            token_ids = tvm.nd.array(np.ascontiguousarray(token_ids))
+        self.__init_handle_by_constructor__(_ffi_api.TokenDataFromNDArray, token_ids)  # type: ignore  # pylint: disable=no-member
 
     @property
     def token_ids(self) -> List[int]:
         """Return the token ids of the TokenData."""
-        return list(_ffi_api.TokenDataGetTokenIds(self))  # type: ignore  # pylint: disable=no-member
+        return self.token_ids_array.tolist()
+
+    @property
+    def token_ids_array(self) -> np.ndarray:
+        """Return the token ids of the TokenData as a 1-D int32 NumPy array."""
+        return _ffi_api.TokenDataGetTokenIdsNDArray(self).numpy()  # type: ignore  # pylint: disable=no-member
+
+    def __len__(self) -> int:
+        return len(_ffi_api.TokenDataGetTokenIds(self))  # type: ignore  # pylint: disable=no-member
 
 
 @tvm._ffi.register_object("mlc.serve.ImageData")  # type: ignore  # pylint: disable=protected-access
@@ -137,6 +159,27 @@ class ImageData(Data):
         return image_size
 
 
+@dataclass
+class RequestEngineTiming:
+    """The engine-side timing of a request, returned when the request finishes.
+
+    Attributes
+    ----------
+    queue_time : float
+        The time in seconds of the request waiting in the engine until it starts prefill.
+
+    prefill_time : float
+        The time in seconds from the request starting prefill to its first token.
+
+    prefix_cache_hit_tokens : int
+        The number of the request's input tokens reused from the prefix cache.
+    """
+
+    queue_time: float
+    prefill_time: float
+    prefix_cache_hit_tokens: int
+
+
 @dataclass
 class SingleRequestStreamOutput:
     """The request stream output of a single request.
@@ -154,11 +197,21 @@ class SingleRequestStreamOutput:
     finish_reason : Optional[str]
         The finish reason of the request when it is finished,
         of None if the request has not finished yet.
+
+    delta_text : Optional[str]
+        The UTF-8-valid delta text decoded from the new generated tokens,
+        which is only available when the output is detokenized by the engine.
+
+    engine_timing : Optional[RequestEngineTiming]
+        The engine-side timing of the request, which is only available
+        in the output where some generation of the request finishes.
     """
 
     delta_token_ids: List[int]
     delta_logprob_json_strs: Optional[List[str]]
     finish_reason: Optional[str]
+    delta_text: Optional[str] = None
+    engine_timing: Optional[RequestEngineTiming] = None
 
 
 @tvm._ffi.register_object("mlc.serve.RequestStreamOutput")  # pylint: disable=protected-access
@@ -207,3 +260,117 @@ class RequestStreamOutput(Object):
                 )
             )
         return request_id, stream_outputs
+
+
+# The finish reasons indexed by the finish reason codes of RequestStreamOutputBatch.
+# It should be kept in sync with `kRequestFinishReasons` in "cpp/serve/data.h".
+_FINISH_REASONS = ("stop", "length", "abort", "tool_calls", "error")
+
+
+def _unpack_strings(bytes_array: NDArray, offsets_array: NDArray) -> List[str]:
+    """Unpack the strings packed into a uint8 array of their concatenated UTF-8 bytes
+    and an int64 array of their byte offsets."""
+    buffer = bytes_array.numpy().tobytes()
+    offsets = offsets_array.numpy().tolist()
+    return [buffer[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+@tvm._ffi.register_object("mlc.serve.RequestStreamOutputBatch")  # pylint: disable=protected-access
+class RequestStreamOutputBatch(Object):
+    """The columnar packing of the delta outputs of a batch of requests
+    that is streamed back through callback stream function.
+    The request ids, the delta token ids, the finish reasons and the logprobs
+    of all the requests are packed into flat arrays, so that the entire batch
+    can be unpacked with a single FFI call.
+    The batch may also carry the delta texts of all the requests, when it is
+    detokenized by a BatchTextStreamer.
+
+    Note
+    ----
+    We do not provide constructor, since in practice only C++ side
+    instantiates this class.
+    """
+
+    def unpack(self) -> List[Tuple[str, List[SingleRequestStreamOutput]]]:
+        """Unpack the batch into the fields of each request's delta output.
+
+        Returns
+        -------
+        outputs : List[Tuple[str, List[SingleRequestStreamOutput]]]
+            The request id and the output instances of each request in the batch,
+            in the same format as `RequestStreamOutput.unpack`.
+        """
+        fields = _ffi_api.RequestStreamOutputBatchUnpack(self)  # type: ignore  # pylint: disable=no-member
+        group_offsets = fields[2].numpy().tolist()
+        if len(group_offsets) == 1:
+            return []
+        request_ids = _unpack_strings(fields[0], fields[1])
+        token_offsets = fields[3].numpy().tolist()
+        token_ids = fields[4].numpy().tolist()
+        finish_reason_codes = fields[5].numpy().tolist()
+        logprob_offsets = fields[6].numpy().tolist()
+        return_logprobs = fields[7].numpy().tolist()
+        logprob_json_strs = str(fields[8]).split("\n")
+        delta_texts = _unpack_strings(fields[9], fields[10]) if fields[9] is not None else None
+        engine_timings = fields[11].numpy().tolist()
+
+        outputs = []
+        for i, request_id in enumerate(request_ids):
+            queue_time, prefill_time, prefix_cache_hit_tokens = engine_timings[i]
+            engine_timing = (
+                RequestEngineTiming(queue_time, prefill_time, int(prefix_cache_hit_tokens))
+                if queue_time >= 0
+                else None
+            )
+            stream_outputs = []
+            for j in range(group_offsets[i], group_offsets[i + 1]):
+                finish_reason_code = finish_reason_codes[j]
+                stream_outputs.append(
+                    SingleRequestStreamOutput(
+                        delta_token_ids=token_ids[token_offsets[j] : token_offsets[j + 1]],
+                        delta_logprob_json_strs=(
+                            logprob_json_strs[logprob_offsets[j] : logprob_offsets[j + 1]]
+                            if return_logprobs[i]
+                            else None
+                        ),
+                        finish_reason=(
+                            _FINISH_REASONS[finish_reason_code] if finish_reason_code >= 0 else None
+                        ),
+                        delta_text=delta_texts[j] if delta_texts is not None else None,
+                        engine_timing=engine_timing,
+                    )
+                )
+            outputs.append((request_id, stream_outputs))
+        return outputs
+
+
+def unpack_request_stream_outputs(
+    delta_outputs: Union[RequestStreamOutputBatch, List[RequestStreamOutput]],
+    text_streamer: Optional[BatchTextStreamer] = None,
+) -> List[Tuple[str, List[SingleRequestStreamOutput]]]:
+    """Unpack the delta outputs passed to the request stream callback.
+
+    Parameters
+    ----------
+    delta_outputs : Union[RequestStreamOutputBatch, List[RequestStreamOutput]]
+        The delta outputs, either packed into a batch by the threaded engine,
+        or a list of the delta outputs of each request.
+        A list is packed into a batch first, so that it is also unpacked
+        with constant number of FFI calls rather than one call per request.
+
+    text_streamer : Optional[BatchTextStreamer]
+        The batch text streamer to detokenize a list of delta outputs with
+        when packing it. The streams of the generations are keyed by the
+        request ids and the generation indices.
+
+    Returns
+    -------
+    outputs : List[Tuple[str, List[SingleRequestStreamOutput]]]
+        The request id and the output instances of each request.
+    """
+    if isinstance(delta_outputs, RequestStreamOutputBatch):
+        return delta_outputs.unpack()
+    if len(delta_outputs) == 0:
+        return []
+    batch = _ffi_api.RequestStreamOutputBatchFromOutputs(delta_outputs, text_streamer)  # type: ignore  # pylint: disable=no-member
+    return batch.unpack()
@@ -0,0 +1,414 @@
+"""The embedding engine in MLC LLM serving, which packs the inputs of the
+concurrent requests into ragged prefills and pools the hidden states."""
+
+import asyncio
+import collections
+import dataclasses
+import json
+import threading
+from typing import Any, Deque, List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import tvm
+from tvm import relax
+from tvm.contrib import tvmjs
+from tvm.runtime import ShapeTuple
+
+from mlc_llm.protocol.error_protocol import BadRequestError
+from mlc_llm.serve import engine_base
+from mlc_llm.support import logging
+from mlc_llm.support.auto_device import detect_device
+from mlc_llm.tokenizer import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+PoolingMethod = Literal["mean", "last", "cls"]
+EmbeddingInput = Union[str, List[str], List[int], List[List[int]]]
+
+
+def pool_hidden_states(
+    hidden_states: np.ndarray, lengths: Sequence[int], poolings: Sequence[PoolingMethod]
+) -> np.ndarray:
+    """Pool the packed hidden states of the sequences into one vector per sequence.
+
+    Parameters
+    ----------
+    hidden_states : np.ndarray
+        The hidden states of all the tokens of the packed sequences,
+        in shape ``(sum(lengths), hidden_size)``.
+
+    lengths : Sequence[int]
+        The number of tokens of each sequence.
+
+    poolings : Sequence[PoolingMethod]
+        The pooling method of each sequence. "mean" averages the hidden states
+        of all the tokens, "last" takes the hidden state of the last token, and
+        "cls" takes the hidden state of the first token.
+
+    Returns
+    -------
+    pooled : np.ndarray
+        The float32 pooled hidden states in shape ``(len(lengths), hidden_size)``.
+    """
+    pooled = np.empty((len(lengths), hidden_states.shape[1]), dtype="float32")
+    offset = 0
+    for i, (length, pooling) in enumerate(zip(lengths, poolings)):
+        if pooling == "mean":
+            pooled[i] = hidden_states[offset : offset + length].astype("float32").mean(axis=0)
+        elif pooling == "last":
+            pooled[i] = hidden_states[offset + length - 1]
+        elif pooling == "cls":
+            pooled[i] = hidden_states[offset]
+        else:
+            raise ValueError(f'Unknown pooling method "{pooling}"')
+        offset += length
+    return pooled
+
+
+class EmbeddingModel:  # pylint: disable=too-many-instance-attributes
+    """The model that computes the embeddings of a batch of token sequences
+    in one ragged prefill, with the model's own tokenizer.
+
+    Parameters
+    ----------
+    model : str
+        A path to ``mlc-chat-config.json``, or an MLC model directory that contains
+        `mlc-chat-config.json`. It can also be a link to a HF repository pointing
+        to an MLC compiled model.
+
+    device: Union[str, Device]
+        The device used to deploy the model such as "cuda" or "cuda:0".
+        Will default to "auto" and detect from local available GPUs if not specified.
+
+    model_lib_path : Optional[str]
+        The full path to the model library file to use (e.g. a ``.so`` file).
+        The model is compiled with JIT if it is not specified.
+
+    max_batch_size : Optional[int]
+        The maximum number of sequences in one prefill. It defaults to,
+        and cannot exceed, the max batch size the model is compiled with.
+    """
+
+    def __init__(  # pylint: disable=too-many-locals
+        self,
+        model: str,
+        device: Union[str, tvm.runtime.Device] = "auto",
+        model_lib_path: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+    ) -> None:
+        self.device = detect_device(device) if isinstance(device, str) else device
+        # pylint: disable=protected-access
+        model_args, config_file_paths, _ = engine_base._process_model_args(
+            [engine_base.ModelInfo(model, model_lib_path)], self.device
+        )
+        # pylint: enable=protected-access
+        model_path, model_lib_path = model_args[0]
+        with open(config_file_paths[0], "r", encoding="utf-8") as file:
+            model_max_batch_size = json.load(file)["model_config"]["max_batch_size"]
+
+        executable = tvm.runtime.load_module(model_lib_path)
+        self._mod = relax.VirtualMachine(executable, self.device).module
+        metadata = json.loads(self._mod["_metadata"]())
+        if metadata["tensor_parallel_shards"] > 1:
+            raise ValueError("The embedding model does not support tensor parallelism.")
+        if not self._mod.implements_function("batch_prefill_to_last_hidden_states"):
+            raise ValueError(
+                f'The model "{model}" does not support embeddings, as it does not have '
+                'function "batch_prefill_to_last_hidden_states".'
+            )
+        params, _ = tvmjs.load_ndarray_cache(model_path, self.device)
+        self._params = [params[param["name"]] for param in metadata["params"]]
+        self.tokenizer = Tokenizer(model_path)
+
+        self.max_batch_size = (
+            min(max_batch_size, model_max_batch_size)
+            if max_batch_size is not None
+            else model_max_batch_size
+        )
+        # All the sequences of a prefill are processed in one chunk.
+        self.prefill_chunk_size: int = metadata["prefill_chunk_size"]
+        self.max_input_length = self.prefill_chunk_size
+        if metadata["context_window_size"] != -1:
+            self.max_input_length = min(self.max_input_length, metadata["context_window_size"])
+
+        self._embed_func = self._mod["embed"]
+        self._prefill_func = self._mod["batch_prefill_to_last_hidden_states"]
+        self._select_func = (
+            self._mod["batch_select_last_hidden_states"]
+            if self._mod.implements_function("batch_select_last_hidden_states")
+            else None
+        )
+        self._nd_view_func = tvm.get_global_func("vm.builtin.reshape")
+        self._clear_func = tvm.get_global_func("vm.builtin.kv_state_clear")
+        self._add_sequence_func = tvm.get_global_func("vm.builtin.kv_state_add_sequence")
+        self._begin_forward_func = tvm.get_global_func("vm.builtin.kv_state_begin_forward")
+        self._end_forward_func = tvm.get_global_func("vm.builtin.kv_state_end_forward")
+        if self._mod.implements_function("create_flashinfer_paged_kv_cache"):
+            create_kv_cache_func = self._mod["create_flashinfer_paged_kv_cache"]
+        else:
+            create_kv_cache_func = self._mod["create_tir_paged_kv_cache"]
+        page_size = 16
+        # Each sequence wastes at most one partially filled page.
+        self._kv_cache = create_kv_cache_func(
+            ShapeTuple([self.max_batch_size]),
+            ShapeTuple([self.prefill_chunk_size + self.max_batch_size * page_size]),
+            ShapeTuple([self.prefill_chunk_size]),
+            ShapeTuple([page_size]),
+            ShapeTuple([int(metadata["sliding_window_size"] != -1)]),
+        )
+
+    def tokenize(self, inputs: EmbeddingInput) -> List[np.ndarray]:
+        """Tokenize the embedding inputs into int32 token id arrays, one per input.
+        The inputs are either texts, or already tokenized token ids.
+        Raise `BadRequestError` if any input is empty or too long for the model."""
+        if isinstance(inputs, str) or (len(inputs) > 0 and isinstance(inputs[0], int)):
+            inputs = [inputs]  # type: ignore
+        if len(inputs) == 0:
+            raise BadRequestError("The embedding input is empty.")
+        if isinstance(inputs[0], str):
+            token_ids, offsets = self.tokenizer.encode_batch(inputs)  # type: ignore
+            token_ids, offsets = token_ids.numpy(), offsets.numpy()
+            sequences = [token_ids[offsets[i] : offsets[i + 1]] for i in range(len(inputs))]
+        else:
+            sequences = [np.asarray(tokens, dtype="int32") for tokens in inputs]
+        for i, sequence in enumerate(sequences):
+            if len(sequence) == 0:
+                raise BadRequestError(f"The embedding input {i} is empty.")
+            if len(sequence) > self.max_input_length:
+                raise BadRequestError(
+                    f"The embedding input {i} has {len(sequence)} tokens, which exceeds "
+                    f"the maximum input length {self.max_input_length} of the model."
+                )
+        return sequences
+
+    def forward(
+        self, sequences: Sequence[np.ndarray], poolings: Sequence[PoolingMethod]
+    ) -> np.ndarray:
+        """Run one ragged prefill of the token sequences, and return their pooled
+        hidden states in float32. The sequences should fit in one prefill, i.e.,
+        at most `max_batch_size` sequences of at most `prefill_chunk_size` tokens in total.
+        """
+        lengths = [len(sequence) for sequence in sequences]
+        total_length = sum(lengths)
+        assert len(sequences) <= self.max_batch_size
+        assert total_length <= self.prefill_chunk_size
+
+        seq_ids = list(range(len(sequences)))
+        for seq_id in seq_ids:
+            self._add_sequence_func(self._kv_cache, seq_id)
+        try:
+            input_ids = tvm.nd.array(np.concatenate(sequences).astype("int32"), self.device)
+            embeddings = self._embed_func(input_ids, self._params)
+            embeddings = self._nd_view_func(
+                embeddings, ShapeTuple([1, total_length, embeddings.shape[-1]])
+            )
+            self._begin_forward_func(self._kv_cache, ShapeTuple(seq_ids), ShapeTuple(lengths))
+            hidden_states = self._prefill_func(embeddings, self._kv_cache, self._params)[0]
+            self._end_forward_func(self._kv_cache)
+            hidden_size = hidden_states.shape[-1]
+            hidden_states = self._nd_view_func(
+                hidden_states, ShapeTuple([total_length, hidden_size])
+            )
+
+            if self._select_func is None or "mean" in poolings:
+                return pool_hidden_states(hidden_states.numpy(), lengths, poolings)
+            # Only copy the selected hidden states to CPU.
+            offsets = np.cumsum([0] + lengths[:-1])
+            positions = [
+                offset + (length - 1 if pooling == "last" else 0)
+                for offset, length, pooling in zip(offsets, lengths, poolings)
+            ]
+            selected = self._select_func(
+                hidden_states, tvm.nd.array(np.array(positions, dtype="int32"), self.device)
+            )
+            return selected.numpy().astype("float32")
+        finally:
+            self._clear_func(self._kv_cache)
+
+
+@dataclasses.dataclass
+class _EmbeddingRequest:
+    """The state of an embedding request in the embedding engine."""
+
+    sequences: List[np.ndarray]
+    pooling: PoolingMethod
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    embeddings: List[Optional[np.ndarray]]
+    num_finished: int = 0
+    failed: bool = False
+
+
+class AsyncEmbeddingEngine:
+    """The asynchronous embedding engine, which batches the inputs of the
+    concurrent requests dynamically. A background thread runs the model, and
+    packs the sequences of the requests that arrive while the previous prefill
+    is running into the next ragged prefill.
+
+    Parameters
+    ----------
+    model : str
+        The embedding model. See `EmbeddingModel`.
+
+    device: Union[str, Device]
+        The device used to deploy the model.
+
+    model_lib_path : Optional[str]
+        The full path to the model library file to use.
+
+    max_batch_size : Optional[int]
+        The maximum number of sequences in one prefill.
+
+    pooling : PoolingMethod
+        The default pooling method of the hidden states, which is
+        overridden by the pooling method of the request.
+
+    normalize : bool
+        Whether to normalize the embeddings to unit length.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        model: str,
+        device: Union[str, tvm.runtime.Device] = "auto",
+        model_lib_path: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+        pooling: PoolingMethod = "last",
+        normalize: bool = True,
+    ) -> None:
+        self.model = EmbeddingModel(model, device, model_lib_path, max_batch_size)
+        self.pooling = pooling
+        self.normalize = normalize
+        self._new_requests: Deque[Optional[_EmbeddingRequest]] = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run_background_loop, daemon=True)
+        self._thread.start()
+
+    def terminate(self) -> None:
+        """Terminate the background thread of the engine."""
+        with self._cond:
+            self._new_requests.append(None)
+            self._cond.notify()
+        self._thread.join()
+
+    async def embed(
+        self,
+        inputs: EmbeddingInput,
+        pooling: Optional[PoolingMethod] = None,
+        dimensions: Optional[int] = None,
+    ) -> Tuple[List[np.ndarray], int]:
+        """Compute the embeddings of the inputs.
+
+        Parameters
+        ----------
+        inputs : EmbeddingInput
+            A text, a list of texts, a token id list, or a list of token id lists.
+
+        pooling : Optional[PoolingMethod]
+            The pooling method. The engine's default pooling method is used if None.
+
+        dimensions : Optional[int]
+            The number of dimensions to truncate the embeddings to.
+
+        Returns
+        -------
+        embeddings : List[np.ndarray]
+            The float32 embedding of each input.
+
+        num_tokens : int
+            The total number of tokens of the inputs.
+        """
+        loop = asyncio.get_running_loop()
+        # The native tokenizer releases the GIL, so the texts are tokenized in the
+        # default executor without blocking the event loop.
+        sequences = await loop.run_in_executor(None, self.model.tokenize, inputs)
+        request = _EmbeddingRequest(
+            sequences=sequences,
+            pooling=pooling if pooling is not None else self.pooling,
+            future=loop.create_future(),
+            loop=loop,
+            embeddings=[None] * len(sequences),
+        )
+        with self._cond:
+            self._new_requests.append(request)
+            self._cond.notify()
+        embeddings: List[np.ndarray] = await request.future
+
+        if dimensions is not None:
+            if dimensions <= 0 or dimensions > embeddings[0].shape[0]:
+                raise BadRequestError(
+                    f'"dimensions" should be in range [1, {embeddings[0].shape[0]}], '
+                    f"but got {dimensions}."
+                )
+            embeddings = [embedding[:dimensions] for embedding in embeddings]
+        if self.normalize:
+            embeddings = [_normalize(embedding) for embedding in embeddings]
+        return embeddings, sum(len(sequence) for sequence in sequences)
+
+    def _run_background_loop(self) -> None:
+        # The sequences waiting for prefill, in (request, index in request).
+        pending: Deque[Tuple[_EmbeddingRequest, int]] = collections.deque()
+        while True:
+            with self._cond:
+                while len(pending) == 0 and len(self._new_requests) == 0:
+                    self._cond.wait()
+                new_requests = list(self._new_requests)
+                self._new_requests.clear()
+            for request in new_requests:
+                if request is None:
+                    return
+                pending.extend((request, i) for i in range(len(request.sequences)))
+
+            batch: List[Tuple[_EmbeddingRequest, int]] = []
+            num_tokens = 0
+            while len(pending) > 0 and len(batch) < self.model.max_batch_size:
+                request, index = pending[0]
+                length = len(request.sequences[index])
+                if num_tokens + length > self.model.prefill_chunk_size:
+                    break
+                pending.popleft()
+                if not request.failed:
+                    batch.append((request, index))
+                    num_tokens += length
+            if len(batch) > 0:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[_EmbeddingRequest, int]]) -> None:
+        try:
+            pooled = self.model.forward(
+                [request.sequences[index] for request, index in batch],
+                [request.pooling for request, _ in batch],
+            )
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to compute the embeddings: %s", exception)
+            for request, _ in batch:
+                if not request.failed:
+                    request.failed = True
+                    request.loop.call_soon_threadsafe(
+                        _set_future_exception, request.future, exception
+                    )
+            return
+
+        for (request, index), embedding in zip(batch, pooled):
+            request.embeddings[index] = embedding
+            request.num_finished += 1
+            if request.num_finished == len(request.sequences):
+                request.loop.call_soon_threadsafe(
+                    _set_future_result, request.future, request.embeddings
+                )
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm > 0 else embedding
+
+
+def _set_future_result(future: asyncio.Future, result: Any) -> None:
+    # The future is cancelled when the client disconnects.
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future: asyncio.Future, exception: Exception) -> None:
+    if not future.done():
+        future.set_exception(exception)
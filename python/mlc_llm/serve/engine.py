@@ -3,17 +3,21 @@
 # pylint: disable=too-many-lines
 
 import asyncio
-import queue
+import concurrent.futures
+import copy
+import functools
 import sys
 import weakref
 from typing import (
     Any,
     AsyncGenerator,
+    Callable,
     Dict,
     Iterator,
     List,
     Literal,
     Optional,
+    TypeVar,
     Union,
     overload,
 )
@@ -24,14 +28,16 @@ from mlc_llm.protocol import openai_api_protocol
 from mlc_llm.serve import data, engine_utils
 from mlc_llm.serve.config import GenerationConfig, SpeculativeMode
 from mlc_llm.serve.request import Request
-from mlc_llm.streamer import TextStreamer
 from mlc_llm.support import logging
 
-from . import engine_base
+from . import engine_base, stream_encoder
+from .response_cache import ResponseCache
 
 logging.enable_logging()
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 
 class Chat:  # pylint: disable=too-few-public-methods
     """The proxy class to direct to chat completions."""
@@ -79,6 +85,8 @@ class AsyncChatCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> AsyncGenerator[openai_api_protocol.ChatCompletionStreamResponse, Any]:
         """Asynchronous streaming chat completion interface with OpenAI API compatibility.
@@ -129,6 +137,8 @@ class AsyncChatCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> openai_api_protocol.ChatCompletionResponse:
         """Asynchronous non-streaming chat completion interface with OpenAI API compatibility.
@@ -178,6 +188,8 @@ class AsyncChatCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Union[
         AsyncGenerator[openai_api_protocol.ChatCompletionStreamResponse, Any],
@@ -217,6 +229,8 @@ class AsyncChatCompletion:  # pylint: disable=too-few-public-methods
             tool_choice=tool_choice,
             user=user,
             ignore_eos=ignore_eos,
+            priority=priority,
+            ttft_deadline_ms=ttft_deadline_ms,
             response_format=response_format,
             request_id=request_id,
         )
@@ -256,6 +270,8 @@ class ChatCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Iterator[openai_api_protocol.ChatCompletionStreamResponse]:
         """Synchronous streaming chat completion interface with OpenAI API compatibility.
@@ -306,6 +322,8 @@ class ChatCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> openai_api_protocol.ChatCompletionResponse:
         """Synchronous non-streaming chat completion interface with OpenAI API compatibility.
@@ -353,6 +371,8 @@ class ChatCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Union[
         Iterator[openai_api_protocol.ChatCompletionStreamResponse],
@@ -392,6 +412,8 @@ class ChatCompletion:  # pylint: disable=too-few-public-methods
             tool_choice=tool_choice,
             user=user,
             ignore_eos=ignore_eos,
+            priority=priority,
+            ttft_deadline_ms=ttft_deadline_ms,
             response_format=response_format,
             request_id=request_id,
         )
@@ -432,6 +454,8 @@ class AsyncCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> AsyncGenerator[openai_api_protocol.CompletionResponse, Any]:
         """Asynchronous streaming completion interface with OpenAI API compatibility.
@@ -483,6 +507,8 @@ class AsyncCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> openai_api_protocol.CompletionResponse:
         """Asynchronous non-streaming completion interface with OpenAI API compatibility.
@@ -531,6 +557,8 @@ class AsyncCompletion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Union[
         AsyncGenerator[openai_api_protocol.CompletionResponse, Any],
@@ -571,6 +599,8 @@ class AsyncCompletion:  # pylint: disable=too-few-public-methods
             top_p=top_p,
             user=user,
             ignore_eos=ignore_eos,
+            priority=priority,
+            ttft_deadline_ms=ttft_deadline_ms,
             response_format=response_format,
             request_id=request_id,
         )
@@ -611,6 +641,8 @@ class Completion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> openai_api_protocol.CompletionResponse:
         """Synchronous streaming completion interface with OpenAI API compatibility.
@@ -662,6 +694,8 @@ class Completion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Iterator[openai_api_protocol.CompletionResponse]:
         """Synchronous non-streaming completion interface with OpenAI API compatibility.
@@ -710,6 +744,8 @@ class Completion:  # pylint: disable=too-few-public-methods
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Iterator[openai_api_protocol.CompletionResponse]:
         """Synchronous completion interface with OpenAI API compatibility.
@@ -747,6 +783,8 @@ class Completion:  # pylint: disable=too-few-public-methods
             top_p=top_p,
             user=user,
             ignore_eos=ignore_eos,
+            priority=priority,
+            ttft_deadline_ms=ttft_deadline_ms,
             response_format=response_format,
             request_id=request_id,
         )
@@ -824,6 +862,42 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         significantly smaller than this number. Under mode "server", the actual
         memory usage may be slightly larger than this number.
 
+    prefix_cache_max_num_recycling_seqs : Optional[int]
+        The maximum number of finished sequences kept resident in the KV cache
+        so that later requests sharing their prefix skip prefilling the shared part.
+        The resident sequences are evicted in LRU order under memory pressure.
+        If not specified, this defaults to 0, which disables prefix caching.
+
+    adaptive_spec_draft_length : bool
+        A boolean indicating if to adapt the draft length of each request in
+        speculative decoding to its live draft acceptance rate, with
+        "spec_draft_length" as the max draft length. Each step drafts the length
+        which maximizes the expected accepted tokens per unit of the measured draft
+        and verification time, and falls back to plain decode for the requests
+        whose drafts are mostly rejected.
+
+    mixed_prefill_decode : bool
+        A boolean indicating if to piggyback the decode of the running requests
+        on the chunked prefill of new requests. Each prefill step then decodes one
+        token for every running request in the same ragged batch, so that the
+        running requests keep generating while long prompts are prefilled.
+        It only applies when speculative decoding is disabled.
+
+    target_step_latency_ms : Optional[float]
+        The target latency in milliseconds of a mixed prefill and decode step.
+        When specified, the number of prefill tokens in each mixed step is derived
+        from the measured decode and per-token prefill time so that the step fits
+        the target, which keeps the inter-token latency of the running requests flat.
+        Otherwise, each mixed step is bounded by the prefill chunk size only.
+
+    kv_swap_space_gb : float
+        The page-locked host memory in GB to hold the KV data of the requests
+        preempted under KV cache pressure. A preempted request is swapped out to
+        the host memory when copying its KV data out and back is measured to be
+        faster than recomputing them, and is recomputed otherwise. Swapping is
+        disabled when it is 0, or when the KV cache does not support copying
+        KV data to host memory. It only applies when speculative decoding is disabled.
+
     engine_config : Optional[EngineConfig]
         The MLCEngine execution configuration.
         Currently speculative decoding mode is specified via engine config.
@@ -833,6 +907,60 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
 
     enable_tracing : bool
         A boolean indicating if to enable event logging for requests.
+
+    trace_capacity : int
+        The maximum number of events kept in the ring buffer of the event trace
+        recorder, beyond which the oldest events are overwritten.
+
+    trace_sample_rate : float
+        The fraction of requests whose events are recorded, in range [0, 1].
+
+    trace_export_dir : Optional[str]
+        The directory to periodically export the recorded events to, in
+        Chrome Trace Event Format files. The events are not exported if it is None.
+
+    trace_export_interval : float
+        The interval in seconds to export the recorded events.
+
+    enable_stream_coalescing : bool
+        A boolean indicating if to merge the delta outputs of a request that
+        are generated while the consumer has not pulled the previous ones.
+        When enabled, a consumer slower than decoding receives the accumulated
+        delta text, token count and logprobs in one output, instead of a queue
+        of per-step outputs that grows without bound.
+
+    enable_fast_stream_encoding : bool
+        A boolean indicating if to encode the streaming responses served by
+        the OpenAI-compatible server with the validation-free encoders in
+        `mlc_llm.serve.stream_encoder`, which write the server-sent events
+        directly instead of building and dumping the pydantic response models.
+
+    preprocess_num_threads : int
+        The number of threads which preprocess the OpenAI API requests, including
+        the conversation template rendering, tokenization, prompt length checks
+        and image fetching, so that long prompts do not block the event loop.
+        Tokenization releases the GIL and runs concurrently with the event loop.
+        Requests are preprocessed inline in the event loop when it is 0.
+
+    preprocess_inline_threshold : int
+        The number of prompt characters (or token ids) below which a request is
+        preprocessed inline in the event loop, where the thread pool overhead
+        outweighs the blocking time. Requests with images are always preprocessed
+        in the thread pool.
+
+    response_cache_max_num_entries : int
+        The maximum number of responses in the response cache, which replays
+        the outputs of the deterministic requests (with zero temperature or a
+        fixed seed) that have the same prompt tokens and generation config as
+        a previous request, without running them in the engine.
+        The response cache is disabled when it is 0.
+
+    response_cache_max_num_bytes : int
+        The maximum total bytes of the responses in the response cache.
+
+    response_cache_ttl : Optional[float]
+        The time to live in seconds of the responses in the response cache.
+        The responses do not expire if it is None.
     """
 
     def __init__(  # pylint: disable=too-many-arguments
@@ -849,7 +977,23 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         gpu_memory_utilization: Optional[float] = None,
         speculative_mode: SpeculativeMode = SpeculativeMode.DISABLE,
         spec_draft_length: int = 4,
+        adaptive_spec_draft_length: bool = False,
+        prefix_cache_max_num_recycling_seqs: Optional[int] = None,
+        mixed_prefill_decode: bool = False,
+        target_step_latency_ms: Optional[float] = None,
+        kv_swap_space_gb: float = 0.0,
         enable_tracing: bool = False,
+        trace_capacity: int = 1 << 20,
+        trace_sample_rate: float = 1.0,
+        trace_export_dir: Optional[str] = None,
+        trace_export_interval: float = 60.0,
+        enable_stream_coalescing: bool = True,
+        enable_fast_stream_encoding: bool = True,
+        preprocess_num_threads: int = 4,
+        preprocess_inline_threshold: int = 8192,
+        response_cache_max_num_entries: int = 0,
+        response_cache_max_num_bytes: int = 256 * 1024 * 1024,
+        response_cache_ttl: Optional[float] = None,
     ) -> None:
         super().__init__(
             "async",
@@ -864,11 +1008,52 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
             gpu_memory_utilization=gpu_memory_utilization,
             speculative_mode=speculative_mode,
             spec_draft_length=spec_draft_length,
+            adaptive_spec_draft_length=adaptive_spec_draft_length,
+            prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+            mixed_prefill_decode=mixed_prefill_decode,
+            target_step_latency_ms=target_step_latency_ms,
+            kv_swap_space_gb=kv_swap_space_gb,
             enable_tracing=enable_tracing,
+            trace_capacity=trace_capacity,
+            trace_sample_rate=trace_sample_rate,
+            trace_export_dir=trace_export_dir,
+            trace_export_interval=trace_export_interval,
+        )
+        self.enable_stream_coalescing = enable_stream_coalescing
+        self.enable_fast_stream_encoding = enable_fast_stream_encoding
+        self.preprocess_inline_threshold = preprocess_inline_threshold
+        self._preprocess_executor: Optional[concurrent.futures.ThreadPoolExecutor] = (
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=preprocess_num_threads, thread_name_prefix="mlc_llm_preprocess"
+            )
+            if preprocess_num_threads > 0
+            else None
+        )
+        self.response_cache: Optional[ResponseCache] = (
+            ResponseCache(
+                response_cache_max_num_entries, response_cache_max_num_bytes, response_cache_ttl
+            )
+            if response_cache_max_num_entries > 0
+            else None
         )
         self.chat = Chat(weakref.ref(self))
         self.completions = AsyncCompletion(weakref.ref(self))
 
+    def terminate(self):
+        """Terminate the engine."""
+        super().terminate()
+        if self._preprocess_executor is not None:
+            self._preprocess_executor.shutdown(wait=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """The engine runtime metrics for monitoring. See `MLCEngineBase.metrics`.
+        When the response cache is enabled, the metrics also include "response_cache",
+        the dict of the cache hits, misses, evictions, entries and bytes."""
+        metrics = super().metrics()
+        if self.response_cache is not None and len(metrics) > 0:
+            metrics["response_cache"] = self.response_cache.metrics()
+        return metrics
+
     async def abort(self, request_id: str) -> None:
         """Generation abortion interface.
 
@@ -901,6 +1086,8 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Union[
         AsyncGenerator[openai_api_protocol.ChatCompletionStreamResponse, Any],
@@ -924,81 +1111,45 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         if request_id is None:
             request_id = f"chatcmpl-{engine_utils.random_uuid()}"
 
-        chatcmpl_generator = self._handle_chat_completion(
-            openai_api_protocol.ChatCompletionRequest(
-                messages=[
-                    openai_api_protocol.ChatCompletionMessage.model_validate(message)
-                    for message in messages
-                ],
-                model=model,
-                frequency_penalty=frequency_penalty,
-                presence_penalty=presence_penalty,
-                logprobs=logprobs,
-                top_logprobs=top_logprobs,
-                logit_bias=logit_bias,
-                max_tokens=max_tokens,
-                n=n,
-                seed=seed,
-                stop=stop,
-                stream=stream,
-                temperature=temperature,
-                top_p=top_p,
-                tools=(
-                    [openai_api_protocol.ChatTool.model_validate(tool) for tool in tools]
-                    if tools is not None
-                    else None
-                ),
-                tool_choice=tool_choice,
-                user=user,
-                ignore_eos=ignore_eos,
-                response_format=(
-                    openai_api_protocol.RequestResponseFormat.model_validate(response_format)
-                    if response_format is not None
-                    else None
-                ),
+        request = openai_api_protocol.ChatCompletionRequest(
+            messages=[
+                openai_api_protocol.ChatCompletionMessage.model_validate(message)
+                for message in messages
+            ],
+            model=model,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            logprobs=logprobs,
+            top_logprobs=top_logprobs,
+            logit_bias=logit_bias,
+            max_tokens=max_tokens,
+            n=n,
+            seed=seed,
+            stop=stop,
+            stream=stream,
+            temperature=temperature,
+            top_p=top_p,
+            tools=(
+                [openai_api_protocol.ChatTool.model_validate(tool) for tool in tools]
+                if tools is not None
+                else None
+            ),
+            tool_choice=tool_choice,
+            user=user,
+            ignore_eos=ignore_eos,
+            priority=priority,
+            ttft_deadline_ms=ttft_deadline_ms,
+            response_format=(
+                openai_api_protocol.RequestResponseFormat.model_validate(response_format)
+                if response_format is not None
+                else None
             ),
-            request_id=request_id,
         )
         if stream:
             # Stream response.
-            return chatcmpl_generator
+            return self._handle_chat_completion(request, request_id=request_id)
         # Normal response.
-        num_prompt_tokens = 0
-        num_completion_tokens = 0
-        output_texts = ["" for _ in range(n)]
-        finish_reasons: List[Optional[str]] = [None for _ in range(n)]
-        logprob_results: Optional[List[List[openai_api_protocol.LogProbsContent]]] = (
-            [[] for _ in range(n)] if logprobs else None
-        )
-        async for response in chatcmpl_generator:
-            num_prompt_tokens = response.usage.prompt_tokens
-            num_completion_tokens = response.usage.completion_tokens
-            for choice in response.choices:
-                assert isinstance(choice.delta.content, str)
-                output_texts[choice.index] += choice.delta.content
-                if choice.finish_reason is not None and finish_reasons[choice.index] is None:
-                    finish_reasons[choice.index] = choice.finish_reason
-                if choice.logprobs is not None:
-                    assert logprob_results is not None
-                    logprob_results[  # pylint: disable=unsupported-assignment-operation
-                        choice.index
-                    ] += choice.logprobs.content
-
-        assert all(finish_reason is not None for finish_reason in finish_reasons)
-        use_function_calling, tool_calls_list = engine_base.process_function_call_output(
-            output_texts, finish_reasons
-        )
-        return engine_base.wrap_chat_completion_response(
-            request_id=request_id,
-            model=model,
-            output_texts=output_texts,
-            finish_reasons=finish_reasons,
-            tool_calls_list=tool_calls_list,
-            logprob_results=logprob_results,
-            use_function_calling=use_function_calling,
-            num_prompt_tokens=num_prompt_tokens,
-            num_completion_tokens=num_completion_tokens,
-        )
+        return await self._aggregate_chat_completion(request, request_id)
 
     async def _completion(  # pylint: disable=too-many-arguments,too-many-locals
         self,
@@ -1023,6 +1174,8 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Union[
         AsyncGenerator[openai_api_protocol.CompletionResponse, Any],
@@ -1045,79 +1198,58 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         """
         if request_id is None:
             request_id = f"cmpl-{engine_utils.random_uuid()}"
-        cmpl_generator = self._handle_completion(
-            openai_api_protocol.CompletionRequest(
-                model=model,
-                prompt=prompt,
-                best_of=best_of,
-                echo=echo,
-                frequency_penalty=frequency_penalty,
-                presence_penalty=presence_penalty,
-                logprobs=logprobs,
-                top_logprobs=top_logprobs,
-                logit_bias=logit_bias,
-                max_tokens=max_tokens,
-                n=n,
-                seed=seed,
-                stop=stop,
-                stream=stream,
-                suffix=suffix,
-                temperature=temperature,
-                top_p=top_p,
-                user=user,
-                ignore_eos=ignore_eos,
-                response_format=(
-                    openai_api_protocol.RequestResponseFormat.model_validate(response_format)
-                    if response_format is not None
-                    else None
-                ),
+        request = openai_api_protocol.CompletionRequest(
+            model=model,
+            prompt=prompt,
+            best_of=best_of,
+            echo=echo,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            logprobs=logprobs,
+            top_logprobs=top_logprobs,
+            logit_bias=logit_bias,
+            max_tokens=max_tokens,
+            n=n,
+            seed=seed,
+            stop=stop,
+            stream=stream,
+            suffix=suffix,
+            temperature=temperature,
+            top_p=top_p,
+            user=user,
+            ignore_eos=ignore_eos,
+            priority=priority,
+            ttft_deadline_ms=ttft_deadline_ms,
+            response_format=(
+                openai_api_protocol.RequestResponseFormat.model_validate(response_format)
+                if response_format is not None
+                else None
             ),
-            request_id,
         )
         if stream:
             # Stream response.
-            return cmpl_generator
+            return self._handle_completion(request, request_id)
         # Normal response.
-        num_prompt_tokens = 0
-        num_completion_tokens = 0
-        output_texts = ["" for _ in range(n)]
-        finish_reasons: List[Optional[str]] = [None for _ in range(n)]
-        logprob_results: Optional[List[List[openai_api_protocol.LogProbsContent]]] = (
-            [[] for _ in range(n)] if logprobs else None
-        )
-
-        async for response in cmpl_generator:
-            num_prompt_tokens = response.usage.prompt_tokens
-            num_completion_tokens = response.usage.completion_tokens
-            for choice in response.choices:
-                output_texts[choice.index] += choice.text
-                if choice.finish_reason is not None and finish_reasons[choice.index] is None:
-                    finish_reasons[choice.index] = choice.finish_reason
-                if choice.logprobs is not None:
-                    assert logprob_results is not None
-                    logprob_results[  # pylint: disable=unsupported-assignment-operation
-                        choice.index
-                    ] += choice.logprobs.content
-
-        assert all(finish_reason is not None for finish_reason in finish_reasons)
-        return engine_base.wrap_completion_response(
-            request_id=request_id,
-            model=model,
-            output_texts=output_texts,
-            finish_reasons=finish_reasons,
-            logprob_results=logprob_results,
-            num_prompt_tokens=num_prompt_tokens,
-            num_completion_tokens=num_completion_tokens,
-        )
+        return await self._aggregate_completion(request, request_id)
 
     async def _handle_chat_completion(
-        self, request: openai_api_protocol.ChatCompletionRequest, request_id: str
-    ) -> AsyncGenerator[openai_api_protocol.ChatCompletionStreamResponse, Any]:
+        self,
+        request: openai_api_protocol.ChatCompletionRequest,
+        request_id: str,
+        encode_sse: bool = False,
+    ) -> AsyncGenerator[Union[openai_api_protocol.ChatCompletionStreamResponse, str], Any]:
         """The implementation fo asynchronous ChatCompletionRequest handling.
 
+        Parameters
+        ----------
+        encode_sse : bool
+            A boolean indicating if to yield the server-sent event strings
+            encoded by `stream_encoder.ChatCompletionStreamEncoder` instead
+            of the response models.
+
         Yields
         ------
-        stream_response : ChatCompletionStreamResponse
+        stream_response : Union[ChatCompletionStreamResponse, str]
             The stream response conforming to OpenAI API.
             See mlc_llm/protocol/openai_api_protocol.py or
             https://platform.openai.com/docs/api-reference/chat/streaming for specification.
@@ -1127,50 +1259,89 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         e : BadRequestError
             BadRequestError is raised when the request is invalid.
         """
+        timer = engine_base.RequestTimer() if request.include_timing else None
         (
             prompts,
             generation_cfg,
             use_function_calling,
             prompt_length,
-        ) = engine_base.process_chat_completion_request(
+        ) = await self._preprocess(
+            request,
+            engine_base.process_chat_completion_request,
             request,
             request_id,
             self.state,
             self.model_config_dicts[0],
-            self.tokenizer.encode,
+            self.tokenizer.encode_array,
             self.max_input_sequence_length,
             self.conv_template.model_copy(deep=True),
         )
+        if timer is not None:
+            timer.record_tokenization()
 
         finish_reasons: List[Optional[str]] = [None for _ in range(generation_cfg.n)]
         num_completion_tokens = 0
+        # The timing is attached to the response models,
+        # so the requests including timing are not encoded by the stream encoder.
+        encoder = (
+            stream_encoder.ChatCompletionStreamEncoder(
+                request_id, self.state, request.model, use_function_calling, prompt_length
+            )
+            if encode_sse and timer is None
+            else None
+        )
         self.state.record_event(request_id, event="invoke generate")
         async for delta_outputs in self._generate(
-            prompts, generation_cfg, request_id  # type: ignore
+            prompts, generation_cfg, request_id, timer  # type: ignore
         ):
-            response, num_completion_tokens = engine_base.process_chat_completion_stream_output(
-                delta_outputs,
-                request_id,
-                self.state,
-                request.model,
-                generation_cfg,
-                use_function_calling,
-                prompt_length,
-                finish_reasons,
-                num_completion_tokens,
-            )
+            response: Optional[Union[openai_api_protocol.ChatCompletionStreamResponse, str]]
+            if encoder is not None:
+                response, num_completion_tokens = encoder.encode(
+                    delta_outputs, finish_reasons, num_completion_tokens
+                )
+            else:
+                (
+                    response,
+                    num_completion_tokens,
+                ) = engine_base.process_chat_completion_stream_output(
+                    delta_outputs,
+                    request_id,
+                    self.state,
+                    request.model,
+                    generation_cfg,
+                    use_function_calling,
+                    prompt_length,
+                    finish_reasons,
+                    num_completion_tokens,
+                )
             if response is not None:
+                if timer is not None and all(
+                    finish_reason is not None for finish_reason in finish_reasons
+                ):
+                    # Return the timing breakdown in the usage of the final response.
+                    response.usage.timing = timer.timing_info()
                 yield response
         self.state.record_event(request_id, event="finish")
 
     async def _handle_completion(
-        self, request: openai_api_protocol.CompletionRequest, request_id: str
-    ) -> AsyncGenerator[openai_api_protocol.CompletionResponse, Any]:
+        self,
+        request: openai_api_protocol.CompletionRequest,
+        request_id: str,
+        encode_sse: bool = False,
+    ) -> AsyncGenerator[Union[openai_api_protocol.CompletionResponse, str], Any]:
         """The implementation fo asynchronous CompletionRequest handling.
 
+        Parameters
+        ----------
+        encode_sse : bool
+            A boolean indicating if to yield the server-sent event strings
+            encoded by `stream_encoder.CompletionStreamEncoder` instead of the
+            response models for the generated deltas. The echo and suffix
+            responses are still yielded as response models.
+
         Yields
         ------
-        stream_response : CompletionResponse
+        stream_response : Union[CompletionResponse, str]
             The stream response conforming to OpenAI API.
             See mlc_llm/protocol/openai_api_protocol.py or
             https://platform.openai.com/docs/api-reference/completions/object for specification.
@@ -1180,12 +1351,15 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         e : BadRequestError
             BadRequestError is raised when the request is invalid.
         """
+        timer = engine_base.RequestTimer() if request.include_timing else None
         (
             prompt,
             generation_cfg,
             prompt_length,
             echo_response,
-        ) = engine_base.process_completion_request(
+        ) = await self._preprocess(
+            request,
+            engine_base.process_completion_request,
             request,
             request_id,
             self.state,
@@ -1193,40 +1367,220 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
             self.tokenizer,
             self.max_input_sequence_length,
         )
+        if timer is not None:
+            timer.record_tokenization()
         if echo_response is not None:
             yield echo_response
 
         num_completion_tokens = 0
         finish_reasons: List[Optional[str]] = [None for _ in range(generation_cfg.n)]
+        # The timing is attached to the response models,
+        # so the requests including timing are not encoded by the stream encoder.
+        encoder = (
+            stream_encoder.CompletionStreamEncoder(
+                request_id, self.state, request.model, prompt_length
+            )
+            if encode_sse and timer is None
+            else None
+        )
         self.state.record_event(request_id, event="invoke generate")
         async for delta_outputs in self._generate(
-            prompt, generation_cfg, request_id  # type: ignore
+            prompt, generation_cfg, request_id, timer  # type: ignore
         ):
-            response, num_completion_tokens = engine_base.process_completion_stream_output(
-                delta_outputs,
-                request_id,
-                self.state,
-                request.model,
-                generation_cfg,
-                prompt_length,
-                finish_reasons,
-                num_completion_tokens,
-            )
+            response: Optional[Union[openai_api_protocol.CompletionResponse, str]]
+            if encoder is not None:
+                response, num_completion_tokens = encoder.encode(
+                    delta_outputs, finish_reasons, num_completion_tokens
+                )
+            else:
+                response, num_completion_tokens = engine_base.process_completion_stream_output(
+                    delta_outputs,
+                    request_id,
+                    self.state,
+                    request.model,
+                    generation_cfg,
+                    prompt_length,
+                    finish_reasons,
+                    num_completion_tokens,
+                )
             if response is not None:
+                if (
+                    timer is not None
+                    and request.suffix is None
+                    and all(finish_reason is not None for finish_reason in finish_reasons)
+                ):
+                    # Return the timing breakdown in the usage of the final response.
+                    response.usage.timing = timer.timing_info()
                 yield response
 
         suffix_response = engine_base.create_completion_suffix_response(
             request, request_id, prompt_length, finish_reasons, num_completion_tokens
         )
         if suffix_response is not None:
+            if timer is not None:
+                suffix_response.usage.timing = timer.timing_info()
             yield suffix_response
         self.state.record_event(request_id, event="finish")
 
+    async def _aggregate_chat_completion(
+        self, request: openai_api_protocol.ChatCompletionRequest, request_id: str
+    ) -> openai_api_protocol.ChatCompletionResponse:
+        """The implementation of non-streaming ChatCompletionRequest handling.
+        The delta outputs are accumulated into per-choice buffers directly,
+        and the response is created once when all generations finish.
+
+        Returns
+        -------
+        response : ChatCompletionResponse
+            The response conforming to OpenAI API.
+            See mlc_llm/protocol/openai_api_protocol.py or
+            https://platform.openai.com/docs/api-reference/chat/object for specification.
+
+        Raises
+        ------
+        e : BadRequestError
+            BadRequestError is raised when the request is invalid.
+        """
+        timer = engine_base.RequestTimer() if request.include_timing else None
+        (
+            prompts,
+            generation_cfg,
+            use_function_calling,
+            prompt_length,
+        ) = await self._preprocess(
+            request,
+            engine_base.process_chat_completion_request,
+            request,
+            request_id,
+            self.state,
+            self.model_config_dicts[0],
+            self.tokenizer.encode_array,
+            self.max_input_sequence_length,
+            self.conv_template.model_copy(deep=True),
+        )
+        if timer is not None:
+            timer.record_tokenization()
+
+        aggregator = engine_base.StreamOutputAggregator(generation_cfg.n, use_function_calling)
+        self.state.record_event(request_id, event="invoke generate")
+        async for delta_outputs in self._generate(
+            prompts, generation_cfg, request_id, timer  # type: ignore
+        ):
+            aggregator.add(delta_outputs)
+        self.state.record_event(request_id, event="finish")
+
+        finish_reasons = aggregator.finish_reasons
+        assert all(finish_reason is not None for finish_reason in finish_reasons)
+        output_texts = aggregator.output_texts()
+        use_function_calling, tool_calls_list = engine_base.process_function_call_output(
+            output_texts, finish_reasons  # type: ignore
+        )
+        return engine_base.wrap_chat_completion_response(
+            request_id=request_id,
+            model=request.model,
+            output_texts=output_texts,
+            finish_reasons=finish_reasons,  # type: ignore
+            tool_calls_list=tool_calls_list,
+            logprob_results=aggregator.logprob_results(request.logprobs),
+            use_function_calling=use_function_calling,
+            num_prompt_tokens=prompt_length,
+            num_completion_tokens=aggregator.num_completion_tokens,
+            timing=timer.timing_info() if timer is not None else None,
+        )
+
+    async def _aggregate_completion(
+        self, request: openai_api_protocol.CompletionRequest, request_id: str
+    ) -> openai_api_protocol.CompletionResponse:
+        """The implementation of non-streaming CompletionRequest handling.
+        The delta outputs are accumulated into per-choice buffers directly,
+        and the response, including the echo and suffix parts, is created
+        once when all generations finish.
+
+        Returns
+        -------
+        response : CompletionResponse
+            The response conforming to OpenAI API.
+            See mlc_llm/protocol/openai_api_protocol.py or
+            https://platform.openai.com/docs/api-reference/completions/object for specification.
+
+        Raises
+        ------
+        e : BadRequestError
+            BadRequestError is raised when the request is invalid.
+        """
+        timer = engine_base.RequestTimer() if request.include_timing else None
+        (
+            prompt,
+            generation_cfg,
+            prompt_length,
+            echo_response,
+        ) = await self._preprocess(
+            request,
+            engine_base.process_completion_request,
+            request,
+            request_id,
+            self.state,
+            self.model_config_dicts[0],
+            self.tokenizer,
+            self.max_input_sequence_length,
+        )
+        if timer is not None:
+            timer.record_tokenization()
+
+        aggregator = engine_base.StreamOutputAggregator(generation_cfg.n)
+        self.state.record_event(request_id, event="invoke generate")
+        async for delta_outputs in self._generate(
+            prompt, generation_cfg, request_id, timer  # type: ignore
+        ):
+            aggregator.add(delta_outputs)
+        self.state.record_event(request_id, event="finish")
+
+        finish_reasons = aggregator.finish_reasons
+        assert all(finish_reason is not None for finish_reason in finish_reasons)
+        output_texts = aggregator.output_texts()
+        if echo_response is not None:
+            output_texts = [
+                choice.text + output_text
+                for choice, output_text in zip(echo_response.choices, output_texts)
+            ]
+        if request.suffix is not None:
+            output_texts = [output_text + request.suffix for output_text in output_texts]
+        return engine_base.wrap_completion_response(
+            request_id=request_id,
+            model=request.model,
+            output_texts=output_texts,
+            finish_reasons=finish_reasons,  # type: ignore
+            logprob_results=aggregator.logprob_results(request.logprobs),
+            num_prompt_tokens=prompt_length,
+            num_completion_tokens=aggregator.num_completion_tokens,
+            timing=timer.timing_info() if timer is not None else None,
+        )
+
+    async def _preprocess(
+        self,
+        request: Union[
+            openai_api_protocol.CompletionRequest, openai_api_protocol.ChatCompletionRequest
+        ],
+        func: Callable[..., _T],
+        *args: Any,
+    ) -> _T:
+        """Run the request preprocessing function in the preprocessing thread
+        pool, or inline in the event loop when the request prompt is small."""
+        prompt_size = engine_utils.get_request_prompt_size(request)
+        if self._preprocess_executor is None or (
+            prompt_size is not None and prompt_size < self.preprocess_inline_threshold
+        ):
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._preprocess_executor, functools.partial(func, *args)
+        )
+
     async def _generate(
         self,
         prompt: Union[str, List[int], List[Union[str, List[int], data.Data]]],
         generation_config: GenerationConfig,
         request_id: str,
+        timer: Optional[engine_base.RequestTimer] = None,
     ) -> AsyncGenerator[List[engine_base.CallbackStreamOutput], Any]:
         """Internal asynchronous text generation interface of AsyncMLCEngine.
         The method is a coroutine that streams a list of CallbackStreamOutput
@@ -1244,6 +1598,9 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
         request_id : str
             The unique identifier (in string) or this generation request.
 
+        timer : Optional[engine_base.RequestTimer]
+            The timer to record the outputs of the request in, if the request includes timing.
+
         Yields
         ------
         request_output : List[engine_base.CallbackStreamOutput]
@@ -1256,14 +1613,32 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
             raise ValueError("The AsyncThreadedEngine has terminated.")
         self.state.async_lazy_init_event_loop()
 
+        cache_key = (
+            self.response_cache.get_key(prompt, generation_config)
+            if self.response_cache is not None
+            else None
+        )
+        if cache_key is not None:
+            assert self.response_cache is not None
+            cached_outputs = self.response_cache.get(cache_key)
+            if cached_outputs is not None:
+                # Replay the cached outputs of the deterministic request in one delta.
+                self.state.record_event(request_id, event="response cache hit")
+                if timer is not None:
+                    timer.record_output(
+                        max(output.num_delta_tokens for output in cached_outputs), None
+                    )
+                yield cached_outputs
+                return
+
         # Create the request with the given id, input data, generation
         # config and the created callback.
         input_data = engine_utils.convert_prompts_to_data(prompt)
         request = Request(request_id, input_data, generation_config)
 
         # Create the unique async request stream of the request.
-        stream = engine_base.AsyncRequestStream()
-        if request_id in self.state.async_streamers:
+        stream = engine_base.AsyncRequestStream(coalesce=self.enable_stream_coalescing)
+        if request_id in self.state.async_streams:
             # Report error in the stream if the request id already exists.
             stream.push(
                 RuntimeError(
@@ -1273,16 +1648,26 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
             )
         else:
             # Record the stream in the tracker
-            self.state.async_streamers[request_id] = (
-                stream,
-                [TextStreamer(self.tokenizer) for _ in range(generation_config.n)],
-            )
+            self.state.async_streams[request_id] = stream
             self.state.async_num_unfinished_generations[request_id] = generation_config.n
+            self.state.async_add_waiting_request(
+                request_id, engine_utils.get_prompt_length(input_data)
+            )
+            if timer is not None:
+                self.state.async_request_timers[request_id] = timer
             self._ffi["add_request"](request)
 
         # Iterate the stream asynchronously and yield the output.
+        # The complete outputs of each generation are accumulated for the response cache.
+        complete_outputs: Optional[List[engine_base.CallbackStreamOutput]] = None
         try:
             async for request_output in stream:
+                if cache_key is not None:
+                    if complete_outputs is None:
+                        complete_outputs = [copy.copy(output) for output in request_output]
+                    else:
+                        for complete_output, output in zip(complete_outputs, request_output):
+                            complete_output.merge(output)
                 yield request_output
         except (
             Exception,
@@ -1291,10 +1676,20 @@ class AsyncMLCEngine(engine_base.MLCEngineBase):
             await self.abort(request_id)
             raise exception
 
+        if (
+            cache_key is not None
+            and complete_outputs is not None
+            and all(output.finish_reason in ("stop", "length") for output in complete_outputs)
+        ):
+            assert self.response_cache is not None
+            self.response_cache.put(cache_key, complete_outputs)
+
     def _abort(self, request_id: str):
         """Internal implementation of request abortion."""
-        self.state.async_streamers.pop(request_id, None)
+        self.state.async_streams.pop(request_id, None)
         self.state.async_num_unfinished_generations.pop(request_id, None)
+        self.state.async_remove_waiting_request(request_id)
+        self.state.async_request_timers.pop(request_id, None)
         self._ffi["abort_request"](request_id)
 
 
@@ -1370,6 +1765,42 @@ class MLCEngine(engine_base.MLCEngineBase):
         significantly smaller than this number. Under mode "server", the actual
         memory usage may be slightly larger than this number.
 
+    prefix_cache_max_num_recycling_seqs : Optional[int]
+        The maximum number of finished sequences kept resident in the KV cache
+        so that later requests sharing their prefix skip prefilling the shared part.
+        The resident sequences are evicted in LRU order under memory pressure.
+        If not specified, this defaults to 0, which disables prefix caching.
+
+    adaptive_spec_draft_length : bool
+        A boolean indicating if to adapt the draft length of each request in
+        speculative decoding to its live draft acceptance rate, with
+        "spec_draft_length" as the max draft length. Each step drafts the length
+        which maximizes the expected accepted tokens per unit of the measured draft
+        and verification time, and falls back to plain decode for the requests
+        whose drafts are mostly rejected.
+
+    mixed_prefill_decode : bool
+        A boolean indicating if to piggyback the decode of the running requests
+        on the chunked prefill of new requests. Each prefill step then decodes one
+        token for every running request in the same ragged batch, so that the
+        running requests keep generating while long prompts are prefilled.
+        It only applies when speculative decoding is disabled.
+
+    target_step_latency_ms : Optional[float]
+        The target latency in milliseconds of a mixed prefill and decode step.
+        When specified, the number of prefill tokens in each mixed step is derived
+        from the measured decode and per-token prefill time so that the step fits
+        the target, which keeps the inter-token latency of the running requests flat.
+        Otherwise, each mixed step is bounded by the prefill chunk size only.
+
+    kv_swap_space_gb : float
+        The page-locked host memory in GB to hold the KV data of the requests
+        preempted under KV cache pressure. A preempted request is swapped out to
+        the host memory when copying its KV data out and back is measured to be
+        faster than recomputing them, and is recomputed otherwise. Swapping is
+        disabled when it is 0, or when the KV cache does not support copying
+        KV data to host memory. It only applies when speculative decoding is disabled.
+
     engine_config : Optional[EngineConfig]
         The MLCEngine execution configuration.
         Currently speculative decoding mode is specified via engine config.
@@ -1379,6 +1810,20 @@ class MLCEngine(engine_base.MLCEngineBase):
 
     enable_tracing : bool
         A boolean indicating if to enable event logging for requests.
+
+    trace_capacity : int
+        The maximum number of events kept in the ring buffer of the event trace
+        recorder, beyond which the oldest events are overwritten.
+
+    trace_sample_rate : float
+        The fraction of requests whose events are recorded, in range [0, 1].
+
+    trace_export_dir : Optional[str]
+        The directory to periodically export the recorded events to, in
+        Chrome Trace Event Format files. The events are not exported if it is None.
+
+    trace_export_interval : float
+        The interval in seconds to export the recorded events.
     """
 
     def __init__(  # pylint: disable=too-many-arguments
@@ -1395,7 +1840,16 @@ class MLCEngine(engine_base.MLCEngineBase):
         gpu_memory_utilization: Optional[float] = None,
         speculative_mode: SpeculativeMode = SpeculativeMode.DISABLE,
         spec_draft_length: int = 4,
+        adaptive_spec_draft_length: bool = False,
+        prefix_cache_max_num_recycling_seqs: Optional[int] = None,
+        mixed_prefill_decode: bool = False,
+        target_step_latency_ms: Optional[float] = None,
+        kv_swap_space_gb: float = 0.0,
         enable_tracing: bool = False,
+        trace_capacity: int = 1 << 20,
+        trace_sample_rate: float = 1.0,
+        trace_export_dir: Optional[str] = None,
+        trace_export_interval: float = 60.0,
     ) -> None:
         super().__init__(
             "sync",
@@ -1410,13 +1864,24 @@ class MLCEngine(engine_base.MLCEngineBase):
             gpu_memory_utilization=gpu_memory_utilization,
             speculative_mode=speculative_mode,
             spec_draft_length=spec_draft_length,
+            adaptive_spec_draft_length=adaptive_spec_draft_length,
+            prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+            mixed_prefill_decode=mixed_prefill_decode,
+            target_step_latency_ms=target_step_latency_ms,
+            kv_swap_space_gb=kv_swap_space_gb,
             enable_tracing=enable_tracing,
+            trace_capacity=trace_capacity,
+            trace_sample_rate=trace_sample_rate,
+            trace_export_dir=trace_export_dir,
+            trace_export_interval=trace_export_interval,
         )
         self.chat = Chat(weakref.ref(self))
         self.completions = Completion(weakref.ref(self))
 
     def abort(self, request_id: str) -> None:
         """Generation abortion interface.
+        The future of the aborted request is cancelled, and the stream of
+        the aborted request stops.
 
         Parameter
         ---------
@@ -1424,6 +1889,98 @@ class MLCEngine(engine_base.MLCEngineBase):
             The id of the request to abort.
         """
         self._ffi["abort_request"](request_id)
+        stream = self.state.sync_remove_stream(request_id)
+        if stream is not None:
+            stream.finish()
+
+    def submit(
+        self,
+        prompt: Union[str, List[int], List[Union[str, List[int], data.Data]]],
+        generation_config: Optional[GenerationConfig] = None,
+        request_id: Optional[str] = None,
+    ) -> concurrent.futures.Future:
+        """Submit a text generation request and return its future without blocking.
+        It is thread-safe, so that multiple threads can submit requests to the
+        same engine concurrently and wait for their results independently.
+
+        Parameters
+        ----------
+        prompt : Union[str, List[int], List[Union[str, List[int], data.Data]]]
+            The input prompt in forms of text strings, lists of token ids or data.
+
+        generation_config : Optional[GenerationConfig]
+            The generation config of the request.
+            The default generation config is used if it is not given.
+
+        request_id : Optional[str]
+            The optional request id.
+            A random one will be generated if it is not given.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            The future of the complete outputs of the request, which is a list of
+            engine_base.CallbackStreamOutput with one element for each parallel generation.
+            Cancelling the future aborts the request.
+        """
+        if self._terminated:
+            raise ValueError("The engine has terminated.")
+        if generation_config is None:
+            generation_config = GenerationConfig()
+        if request_id is None:
+            request_id = f"req-{engine_utils.random_uuid()}"
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        stream = engine_base.SyncRequestStream(generation_config.n, future)
+        self._add_request(prompt, generation_config, request_id, stream)
+
+        def _abort_if_cancelled(done_future: concurrent.futures.Future) -> None:
+            if done_future.cancelled():
+                self.abort(request_id)  # type: ignore
+
+        future.add_done_callback(_abort_if_cancelled)
+        return future
+
+    def stream(
+        self,
+        prompt: Union[str, List[int], List[Union[str, List[int], data.Data]]],
+        generation_config: Optional[GenerationConfig] = None,
+        request_id: Optional[str] = None,
+    ) -> Iterator[List[engine_base.CallbackStreamOutput]]:
+        """Submit a text generation request and return the iterator of its delta outputs.
+        It is thread-safe, so that multiple threads can stream their own requests
+        from the same engine concurrently. The request is submitted once this
+        method returns, and is aborted if the iterator is closed before it finishes.
+
+        Parameters
+        ----------
+        prompt : Union[str, List[int], List[Union[str, List[int], data.Data]]]
+            The input prompt in forms of text strings, lists of token ids or data.
+
+        generation_config : Optional[GenerationConfig]
+            The generation config of the request.
+            The default generation config is used if it is not given.
+
+        request_id : Optional[str]
+            The optional request id.
+            A random one will be generated if it is not given.
+
+        Returns
+        -------
+        iterator : Iterator[List[engine_base.CallbackStreamOutput]]
+            The iterator of the delta outputs in lists.
+            The number of list elements equals to `generation_config.n`,
+            and each element corresponds to the delta output of a parallel
+            generation.
+        """
+        if self._terminated:
+            raise ValueError("The engine has terminated.")
+        if generation_config is None:
+            generation_config = GenerationConfig()
+        if request_id is None:
+            request_id = f"req-{engine_utils.random_uuid()}"
+        stream = engine_base.SyncRequestStream(generation_config.n)
+        self._add_request(prompt, generation_config, request_id, stream)
+        return self._iterate_stream(stream, request_id)
 
     def _chat_completion(  # pylint: disable=too-many-arguments,too-many-locals
         self,
@@ -1447,6 +2004,8 @@ class MLCEngine(engine_base.MLCEngineBase):
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Union[
         Iterator[openai_api_protocol.ChatCompletionStreamResponse],
@@ -1497,6 +2056,8 @@ class MLCEngine(engine_base.MLCEngineBase):
                 tool_choice=tool_choice,
                 user=user,
                 ignore_eos=ignore_eos,
+                priority=priority,
+                ttft_deadline_ms=ttft_deadline_ms,
                 response_format=(
                     openai_api_protocol.RequestResponseFormat.model_validate(response_format)
                     if response_format is not None
@@ -1569,6 +2130,8 @@ class MLCEngine(engine_base.MLCEngineBase):
         user: Optional[str] = None,
         ignore_eos: bool = False,
         response_format: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        ttft_deadline_ms: Optional[float] = None,
         request_id: Optional[str] = None,
     ) -> Iterator[openai_api_protocol.CompletionResponse]:
         """Synchronous completion internal interface with OpenAI API compatibility.
@@ -1609,6 +2172,8 @@ class MLCEngine(engine_base.MLCEngineBase):
                 top_p=top_p,
                 user=user,
                 ignore_eos=ignore_eos,
+                priority=priority,
+                ttft_deadline_ms=ttft_deadline_ms,
                 response_format=(
                     openai_api_protocol.RequestResponseFormat.model_validate(response_format)
                     if response_format is not None
@@ -1680,7 +2245,7 @@ class MLCEngine(engine_base.MLCEngineBase):
             request_id,
             self.state,
             self.model_config_dicts[0],
-            self.tokenizer.encode,
+            self.tokenizer.encode_array,
             self.max_input_sequence_length,
             self.conv_template.model_copy(deep=True),
         )
@@ -1794,60 +2359,34 @@ class MLCEngine(engine_base.MLCEngineBase):
         if self._terminated:
             raise ValueError("The engine has terminated.")
 
+        stream = engine_base.SyncRequestStream(generation_config.n)
+        self._add_request(prompt, generation_config, request_id, stream)
+        yield from self._iterate_stream(stream, request_id)
+
+    def _add_request(
+        self,
+        prompt: Union[str, List[int], List[Union[str, List[int], data.Data]]],
+        generation_config: GenerationConfig,
+        request_id: str,
+        stream: engine_base.SyncRequestStream,
+    ) -> None:
+        """Register the stream of the request and add the request to the engine."""
         # Create the request with the given id, input data, generation
         # config and the created callback.
         input_data = engine_utils.convert_prompts_to_data(prompt)
         request = Request(request_id, input_data, generation_config)
 
-        # Record the stream in the tracker
-        self.state.sync_output_queue = queue.Queue()
-        self.state.sync_text_streamers = [
-            TextStreamer(self.tokenizer) for _ in range(generation_config.n)
-        ]
-        self.state.sync_num_unfinished_generations = generation_config.n
+        # Record the stream before adding the request, so that its outputs are never missed.
+        self.state.sync_add_stream(request_id, stream)
         self._ffi["add_request"](request)
 
-        # Iterate the stream asynchronously and yield the token.
+    def _iterate_stream(
+        self, stream: engine_base.SyncRequestStream, request_id: str
+    ) -> Iterator[List[engine_base.CallbackStreamOutput]]:
+        """Iterate the delta outputs in the stream of the request,
+        and abort the request when the iteration stops early."""
         try:
-            while self.state.sync_num_unfinished_generations > 0:
-                delta_outputs = self.state.sync_output_queue.get()
-                request_outputs = self._request_stream_callback_impl(delta_outputs)
-                for request_output in request_outputs:
-                    yield request_output
-        except Exception as exception:  # pylint: disable=broad-exception-caught
+            yield from stream
+        except (Exception, GeneratorExit) as exception:  # pylint: disable=broad-exception-caught
             self.abort(request_id)
             raise exception
-
-    def _request_stream_callback_impl(
-        self, delta_outputs: List[data.RequestStreamOutput]
-    ) -> List[List[engine_base.CallbackStreamOutput]]:
-        """The underlying implementation of request stream callback of MLCEngine."""
-        batch_outputs: List[List[engine_base.CallbackStreamOutput]] = []
-        for delta_output in delta_outputs:
-            request_id, stream_outputs = delta_output.unpack()
-            self.state.record_event(request_id, event="start callback")
-            outputs: List[engine_base.CallbackStreamOutput] = []
-            for stream_output, text_streamer in zip(stream_outputs, self.state.sync_text_streamers):
-                self.state.record_event(request_id, event="start detokenization")
-                delta_text = (
-                    text_streamer.put(stream_output.delta_token_ids)
-                    if len(stream_output.delta_token_ids) > 0
-                    else ""
-                )
-                if stream_output.finish_reason is not None:
-                    delta_text += text_streamer.finish()
-                self.state.record_event(request_id, event="finish detokenization")
-
-                outputs.append(
-                    engine_base.CallbackStreamOutput(
-                        delta_text=delta_text,
-                        num_delta_tokens=len(stream_output.delta_token_ids),
-                        delta_logprob_json_strs=stream_output.delta_logprob_json_strs,
-                        finish_reason=stream_output.finish_reason,
-                    )
-                )
-                if stream_output.finish_reason is not None:
-                    self.state.sync_num_unfinished_generations -= 1
-            batch_outputs.append(outputs)
-            self.state.record_event(request_id, event="finish callback")
-        return batch_outputs
@@ -4,15 +4,18 @@
 
 import ast
 import asyncio
+import concurrent.futures
 import json
 import queue
 import subprocess
 import sys
 import threading
+import time
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import tvm
 from tvm.runtime import Device
 
@@ -21,8 +24,7 @@ from mlc_llm.protocol import openai_api_protocol, protocol_utils
 from mlc_llm.protocol.conversation_protocol import Conversation
 from mlc_llm.serve import data, engine_utils
 from mlc_llm.serve.config import EngineConfig, GenerationConfig, SpeculativeMode
-from mlc_llm.serve.event_trace_recorder import EventTraceRecorder
-from mlc_llm.streamer import TextStreamer
+from mlc_llm.serve.event_trace_recorder import EventTraceExporter, EventTraceRecorder
 from mlc_llm.support import logging
 from mlc_llm.support.auto_device import detect_device
 from mlc_llm.support.style import green
@@ -177,12 +179,15 @@ def _estimate_mem_usage_and_max_total_sequence_length(  # pylint: disable=too-ma
         head_dim = kv_cache_metadata["head_dim"]
         num_qo_heads = kv_cache_metadata["num_attention_heads"]
         num_kv_heads = kv_cache_metadata["num_key_value_heads"]
+        # The model libraries compiled before the KV cache dtype was recorded use float16.
+        kv_dtype_bytes = tvm.runtime.DataType(kv_cache_metadata.get("dtype", "float16")).itemsize()
         hidden_size = head_dim * num_qo_heads
-        kv_bytes_per_token += head_dim * num_kv_heads * num_layers * 4 + 1.25
+        # The K and V data of each token in every layer.
+        kv_bytes_per_token += head_dim * num_kv_heads * num_layers * 2 * kv_dtype_bytes + 1.25
         kv_aux_workspace_bytes += (
             (max_num_sequence + 1) * 88
             + prefill_chunk_size * (num_qo_heads + 1) * 8
-            + prefill_chunk_size * head_dim * (num_qo_heads + num_kv_heads) * 4
+            + prefill_chunk_size * head_dim * (num_qo_heads + num_kv_heads) * 2 * kv_dtype_bytes
             + 48 * 1024 * 1024
         )
         model_workspace_bytes += (
@@ -304,13 +309,14 @@ def _infer_kv_cache_config(  # pylint: disable=too-many-arguments,too-many-local
     device: tvm.runtime.Device,
     model_config_dicts: List[Dict[str, Any]],
     model_config_paths: List[str],
-) -> Tuple[int, int, int, int]:
+) -> Tuple[int, int, int, int, float]:
     """Initialize the KV cache config with user input and GPU memory usage estimation.
-    The returned four integers are:
+    The returned five numbers are:
     - max_batch_size
     - max_total_sequence_length
     - prefill_chunk_size
     - model_max_single_sequence_length
+    - the estimated total single GPU memory usage in bytes
     """
     (
         model_max_single_sequence_length,
@@ -459,7 +465,54 @@ def _infer_kv_cache_config(  # pylint: disable=too-many-arguments,too-many-local
             override_msg,
         )
 
-    return *kv_cache_config, model_max_single_sequence_length
+    return *kv_cache_config, model_max_single_sequence_length, mem_usage_list[0]
+
+
+def _load_model_config_dicts(
+    models: List[ModelInfo], model_args: List[Tuple[str, str]], model_config_paths: List[str]
+) -> List[Dict[str, Any]]:
+    """Set the processed model lib paths of the models, and load the raw model configs."""
+    model_config_dicts = []
+    for i, model_info in enumerate(models):
+        model_info.model_lib_path = model_args[i][1]
+        with open(model_config_paths[i], "r", encoding="utf-8") as file:
+            model_config_dicts.append(json.load(file))
+    return model_config_dicts
+
+
+def estimate_engine_memory_usage(  # pylint: disable=too-many-arguments
+    model: str,
+    device: Union[str, tvm.runtime.Device],
+    model_lib_path: Optional[str],
+    mode: Literal["local", "interactive", "server"],
+    additional_models: Optional[List[str]],
+    max_batch_size: Optional[int],
+    max_total_sequence_length: Optional[int],
+    prefill_chunk_size: Optional[int],
+    gpu_memory_utilization: Optional[float],
+) -> float:
+    """Estimate the single GPU memory usage in bytes of the engine with the given
+    configuration, without loading the engine.
+    Checkout AsyncMLCEngine/MLCEngine for the docstring of the parameters.
+    """
+    models = _parse_models(model, model_lib_path, additional_models)
+    if isinstance(device, str):
+        device = detect_device(device)
+    assert isinstance(device, Device)
+    model_args, model_config_paths, _ = _process_model_args(models, device)
+    model_config_dicts = _load_model_config_dicts(models, model_args, model_config_paths)
+    *_, memory_usage = _infer_kv_cache_config(
+        mode,
+        max_batch_size,
+        max_total_sequence_length,
+        prefill_chunk_size,
+        gpu_memory_utilization,
+        models,
+        device,
+        model_config_dicts,
+        model_config_paths,
+    )
+    return memory_usage
 
 
 @dataclass
@@ -487,6 +540,163 @@ class CallbackStreamOutput:
     delta_logprob_json_strs: Optional[List[str]]
     finish_reason: Optional[str]
 
+    def merge(self, other: "CallbackStreamOutput") -> None:
+        """Merge the later delta output of the same generation into this output in place."""
+        self.delta_text += other.delta_text
+        self.num_delta_tokens += other.num_delta_tokens
+        if other.delta_logprob_json_strs is not None:
+            self.delta_logprob_json_strs = list(self.delta_logprob_json_strs or []) + list(
+                other.delta_logprob_json_strs
+            )
+        if other.finish_reason is not None:
+            self.finish_reason = other.finish_reason
+
+
+class StreamOutputAggregator:
+    """The accumulator of the delta outputs of a non-streaming request.
+
+    The delta texts and logprob JSON strings of each generation are kept in
+    per-generation buffers and joined or parsed only once when the final response
+    is created, rather than being converted to a stream response per delta.
+
+    Parameters
+    ----------
+    n : int
+        The number of parallel generations of the request.
+
+    use_function_calling : bool
+        A boolean flag indicating if the request uses function call,
+        in which case the finish reasons are reported as "tool_calls".
+    """
+
+    def __init__(self, n: int, use_function_calling: bool = False) -> None:
+        self.use_function_calling = use_function_calling
+        self.num_completion_tokens = 0
+        self.finish_reasons: List[Optional[str]] = [None for _ in range(n)]
+        self._text_buffers: List[List[str]] = [[] for _ in range(n)]
+        self._logprob_buffers: List[Optional[List[str]]] = [None for _ in range(n)]
+
+    def add(self, delta_outputs: List[CallbackStreamOutput]) -> None:
+        """Accumulate the delta outputs of all generations of one step."""
+        assert len(delta_outputs) == len(self.finish_reasons)
+        for i, delta_output in enumerate(delta_outputs):
+            self.num_completion_tokens += delta_output.num_delta_tokens
+            if delta_output.delta_text != "":
+                self._text_buffers[i].append(delta_output.delta_text)
+            if delta_output.delta_logprob_json_strs is not None:
+                logprob_buffer = self._logprob_buffers[i]
+                if logprob_buffer is None:
+                    logprob_buffer = self._logprob_buffers[i] = []
+                logprob_buffer.extend(delta_output.delta_logprob_json_strs)
+            if delta_output.finish_reason is not None and self.finish_reasons[i] is None:
+                self.finish_reasons[i] = (
+                    delta_output.finish_reason if not self.use_function_calling else "tool_calls"
+                )
+
+    def output_texts(self) -> List[str]:
+        """Return the complete output text of each generation."""
+        return ["".join(text_buffer) for text_buffer in self._text_buffers]
+
+    def logprob_results(
+        self, logprobs: bool
+    ) -> Optional[List[List[openai_api_protocol.LogProbsContent]]]:
+        """Return the parsed logprobs of each generation, or None if not requested."""
+        if not logprobs:
+            return None
+        return [
+            [
+                openai_api_protocol.LogProbsContent.model_validate_json(logprob_json_str)
+                for logprob_json_str in (logprob_buffer or [])
+            ]
+            for logprob_buffer in self._logprob_buffers
+        ]
+
+
+class RequestTimer:
+    """The recorder of the timing breakdown of a request which sets `include_timing`.
+
+    It records the numeric timestamps when the request arrives, finishes
+    tokenization and receives outputs, and combines them with the engine-side
+    timing returned along with the request finish.
+    The inter-token times are measured when the engine outputs get received,
+    so they are not affected by the stream coalescing of slow consumers.
+    """
+
+    def __init__(self) -> None:
+        self.tarrival = time.perf_counter()
+        self.tokenization_time = 0.0
+        self.tfirst_token: Optional[float] = None
+        self.tlast_token: Optional[float] = None
+        # The inter-token times, each with the number of tokens it is averaged over.
+        self.inter_token_times: List[Tuple[float, int]] = []
+        self.engine_timing: Optional[data.RequestEngineTiming] = None
+
+    def record_tokenization(self, now: Optional[float] = None) -> None:
+        """Record the finish of request preprocessing and tokenization."""
+        if now is None:
+            now = time.perf_counter()
+        self.tokenization_time = now - self.tarrival
+
+    def record_output(
+        self,
+        num_delta_tokens: int,
+        engine_timing: Optional[data.RequestEngineTiming],
+        now: Optional[float] = None,
+    ) -> None:
+        """Record an output of the request from the engine.
+
+        Parameters
+        ----------
+        num_delta_tokens : int
+            The number of new tokens in the output. For parallel generations,
+            it is the maximum number of new tokens among the generations,
+            as the parallel generations are decoded in the same engine steps.
+
+        engine_timing : Optional[data.RequestEngineTiming]
+            The engine-side timing of the request carried by the output, if any.
+
+        now : Optional[float]
+            The time of receiving the output. The current time is used if not given.
+        """
+        if engine_timing is not None:
+            self.engine_timing = engine_timing
+        if num_delta_tokens == 0:
+            return
+        if now is None:
+            now = time.perf_counter()
+        if self.tfirst_token is None:
+            self.tfirst_token = now
+        else:
+            self.inter_token_times.append(
+                ((now - self.tlast_token) / num_delta_tokens, num_delta_tokens)
+            )
+        self.tlast_token = now
+
+    def timing_info(self) -> openai_api_protocol.TimingInfo:
+        """Return the timing breakdown of the request recorded so far."""
+        timing = openai_api_protocol.TimingInfo(tokenization_time=self.tokenization_time)
+        if self.engine_timing is not None:
+            timing.queue_time = self.engine_timing.queue_time
+            timing.prefill_time = self.engine_timing.prefill_time
+            timing.prefix_cache_hit_tokens = self.engine_timing.prefix_cache_hit_tokens
+        if self.tfirst_token is not None:
+            timing.ttft = self.tfirst_token - self.tarrival
+            timing.decode_time = self.tlast_token - self.tfirst_token
+        if len(self.inter_token_times) > 0:
+            num_tokens = sum(count for _, count in self.inter_token_times)
+            timing.inter_token_time_mean = (
+                sum(inter_token_time * count for inter_token_time, count in self.inter_token_times)
+                / num_tokens
+            )
+            # The weighted 99th percentile, where each time counts once per token.
+            num_accumulated_tokens = 0
+            for inter_token_time, count in sorted(self.inter_token_times):
+                num_accumulated_tokens += count
+                if num_accumulated_tokens >= 0.99 * num_tokens:
+                    timing.inter_token_time_p99 = inter_token_time
+                    break
+        return timing
+
 
 class AsyncRequestStream:
     """The asynchronous stream for requests in AsyncMLCEngine.
@@ -498,6 +708,11 @@ class AsyncRequestStream:
 
     The stream implements `__aiter__` and `__anext__`, which the engine
     can use to iterates all the generated tokens in order asynchronously.
+
+    When coalescing is enabled, the delta outputs pushed while the consumer
+    has not yet pulled the previous outputs are merged into the pending
+    outputs, so that a slow consumer receives one merged item for all the
+    outputs accumulated since its last pull, rather than one item per engine step.
     """
 
     # The asynchronous queue to hold elements of either a list of
@@ -510,10 +725,16 @@ class AsyncRequestStream:
         _queue: asyncio.Queue
     # The finish flag.
     _finished: bool
+    # The flag indicating if to merge the outputs pushed before being pulled.
+    _coalesce: bool
+    # The last pushed outputs which are still in the queue, or None.
+    _pending_outputs: Optional[List[CallbackStreamOutput]]
 
-    def __init__(self) -> None:
+    def __init__(self, coalesce: bool = False) -> None:
         self._queue = asyncio.Queue()
         self._finished = False
+        self._coalesce = coalesce
+        self._pending_outputs = None
 
     def push(self, item_or_exception: Union[List[CallbackStreamOutput], Exception]) -> None:
         """Push a new token to the stream."""
@@ -526,11 +747,21 @@ class AsyncRequestStream:
                 )
             )
             return
+        if isinstance(item_or_exception, Exception):
+            self._pending_outputs = None
+        elif self._coalesce and self._pending_outputs is not None:
+            # The consumer has not pulled the pending outputs yet. Merge into them.
+            for pending_output, output in zip(self._pending_outputs, item_or_exception):
+                pending_output.merge(output)
+            return
+        elif self._coalesce:
+            self._pending_outputs = item_or_exception
         self._queue.put_nowait(item_or_exception)
 
     def finish(self) -> None:
         """Mark the finish of the generation in the stream."""
         self._queue.put_nowait(StopIteration())
+        self._pending_outputs = None
         self._finished = True
 
     def __aiter__(self):
@@ -538,6 +769,8 @@ class AsyncRequestStream:
 
     async def __anext__(self) -> List[CallbackStreamOutput]:
         result = await self._queue.get()
+        if result is self._pending_outputs:
+            self._pending_outputs = None
         if isinstance(result, StopIteration):
             raise StopAsyncIteration
         if isinstance(result, Exception):
@@ -545,6 +778,127 @@ class AsyncRequestStream:
         return result
 
 
+class SyncRequestStream:
+    """The thread-safe stream for requests in MLCEngine.
+
+    Each request has its own unique stream, to which the engine callback
+    routes the delta outputs of the request directly. The stream exposes
+    the method `push` for the engine to push new delta outputs from the
+    engine thread, and the method `finish` to mark the finish of generation.
+    The stream is finished automatically when all the generations finish.
+
+    When a future is given, the delta outputs are accumulated in the stream
+    and the future is resolved with the complete output of each generation
+    once the request finishes. Otherwise the stream implements `__iter__` and
+    `__next__`, which the consumer thread can use to iterate the delta outputs
+    in order.
+
+    Parameters
+    ----------
+    num_generations : int
+        The number of parallel generations of the request.
+
+    future : Optional[concurrent.futures.Future]
+        The future to resolve with the complete outputs of the request.
+    """
+
+    def __init__(
+        self, num_generations: int, future: Optional[concurrent.futures.Future] = None
+    ) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._num_unfinished_generations = num_generations
+        self._future = future
+        self._text_buffers: List[List[str]] = [[] for _ in range(num_generations)]
+        self._logprob_buffers: List[Optional[List[str]]] = [None] * num_generations
+        self._num_tokens = [0] * num_generations
+        self._finish_reasons: List[Optional[str]] = [None] * num_generations
+        # The lock between the engine thread and the thread aborting the request.
+        self._lock = threading.RLock()
+        self.finished = False
+
+    def push(self, item_or_exception: Union[List[CallbackStreamOutput], Exception]) -> None:
+        """Push the delta outputs of all generations, or an exception, to the stream."""
+        with self._lock:
+            self._push(item_or_exception)
+
+    def _push(self, item_or_exception: Union[List[CallbackStreamOutput], Exception]) -> None:
+        if self.finished:
+            return
+        if isinstance(item_or_exception, Exception):
+            if self._future is not None:
+                self._set_future(self._future.set_exception, item_or_exception)
+            else:
+                self._queue.put_nowait(item_or_exception)
+            self.finished = True
+            return
+        for i, output in enumerate(item_or_exception):
+            if output.finish_reason is not None:
+                self._num_unfinished_generations -= 1
+            if self._future is None:
+                continue
+            self._text_buffers[i].append(output.delta_text)
+            self._num_tokens[i] += output.num_delta_tokens
+            if output.delta_logprob_json_strs is not None:
+                logprob_buffer = self._logprob_buffers[i]
+                if logprob_buffer is None:
+                    logprob_buffer = self._logprob_buffers[i] = []
+                logprob_buffer.extend(output.delta_logprob_json_strs)
+            if output.finish_reason is not None:
+                self._finish_reasons[i] = output.finish_reason
+        if self._future is None:
+            self._queue.put_nowait(item_or_exception)
+        if self._num_unfinished_generations <= 0:
+            self._finish()
+
+    def finish(self) -> None:
+        """Mark the finish of the generation in the stream. The future of
+        the stream is cancelled if some generation has not finished."""
+        with self._lock:
+            self._finish()
+
+    def _finish(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        if self._future is None:
+            self._queue.put_nowait(StopIteration())
+        elif self._num_unfinished_generations > 0:
+            self._future.cancel()
+        else:
+            outputs = [
+                CallbackStreamOutput(
+                    delta_text="".join(self._text_buffers[i]),
+                    num_delta_tokens=self._num_tokens[i],
+                    delta_logprob_json_strs=self._logprob_buffers[i],
+                    finish_reason=self._finish_reasons[i],
+                )
+                for i in range(len(self._finish_reasons))
+            ]
+            self._set_future(self._future.set_result, outputs)
+
+    @staticmethod
+    def _set_future(setter: Callable[[Any], None], value: Any) -> None:
+        try:
+            setter(value)
+        except concurrent.futures.InvalidStateError:
+            # The future has been cancelled by the consumer.
+            pass
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> List[CallbackStreamOutput]:
+        assert self._future is None, "The stream with a future is not iterable."
+        result = self._queue.get()
+        if isinstance(result, StopIteration):
+            # Keep the finish mark for the later pulls.
+            self._queue.put_nowait(result)
+            raise StopIteration
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
 class EngineState:
     """The engine states that the request stream callback function may use.
 
@@ -555,30 +909,57 @@ class EngineState:
     - For AsyncMLCEngine, the state contains an asynchronous event loop,
     the streamers and the number of unfinished generations for each request
     being processed.
-    - For MLCEngine, the state contains a callback output blocking queue,
-    the text streamers and the number of unfinished requests.
+    - For MLCEngine, the state contains the thread-safe stream of each request
+    being processed, to which the callback routes the delta outputs directly,
+    and a callback output blocking queue for the outputs of the requests which
+    are added to the engine without a stream.
 
     We use this state class to avoid the callback function from capturing
     the AsyncMLCEngine.
 
     The state also optionally maintains an event trace recorder, which can
     provide Chrome tracing when enabled.
+
+    All the states are per instance, so that multiple engines in the same
+    process do not share the request streams.
     """
 
-    trace_recorder = None
-    # States used for AsyncMLCEngine
-    async_event_loop: Optional[asyncio.AbstractEventLoop] = None
-    async_streamers: Dict[str, Tuple[AsyncRequestStream, List[TextStreamer]]] = {}
-    async_num_unfinished_generations: Dict[str, int] = {}
-    # States used for MLCEngine
-    sync_output_queue: queue.Queue = queue.Queue()
-    sync_text_streamers: List[TextStreamer] = []
-    sync_num_unfinished_generations: int = 0
-
-    def __init__(self, enable_tracing: bool) -> None:
+    def __init__(
+        self,
+        enable_tracing: bool,
+        trace_capacity: int = 1 << 20,
+        trace_sample_rate: float = 1.0,
+        trace_export_dir: Optional[str] = None,
+        trace_export_interval: float = 60.0,
+    ) -> None:
         """Constructor."""
-        if enable_tracing:
-            self.trace_recorder = EventTraceRecorder()
+        self.trace_recorder: Optional[EventTraceRecorder] = (
+            EventTraceRecorder(trace_capacity, trace_sample_rate) if enable_tracing else None
+        )
+        self.trace_exporter: Optional[EventTraceExporter] = (
+            EventTraceExporter(self.trace_recorder, trace_export_dir, trace_export_interval)
+            if self.trace_recorder is not None and trace_export_dir is not None
+            else None
+        )
+        # States used for AsyncMLCEngine
+        self.async_event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.async_streams: Dict[str, AsyncRequestStream] = {}
+        self.async_num_unfinished_generations: Dict[str, int] = {}
+        # States used for MLCEngine
+        self.sync_streams: Dict[str, SyncRequestStream] = {}
+        self.sync_streams_lock = threading.Lock()
+        self.sync_output_queue: queue.Queue = queue.Queue()
+        # The delta outputs received from the engine thread and not yet
+        # processed in the event loop, and whether their processing is scheduled.
+        self._async_pending_delta_outputs: List[data.RequestStreamOutputBatch] = []
+        self._async_pending_lock = threading.Lock()
+        self._async_flush_scheduled = False
+        # The prompt lengths of the requests which are added to the engine
+        # but have not received any output, i.e., waiting for prefill.
+        self.async_waiting_prompt_lengths: Dict[str, int] = {}
+        self.async_num_waiting_prompt_tokens = 0
+        # The timers of the requests which set `include_timing`.
+        self.async_request_timers: Dict[str, RequestTimer] = {}
 
     def record_event(self, request_id: str, event: str) -> None:
         """Record a event for the input request in the trace
@@ -603,14 +984,13 @@ class EngineState:
 
     def get_request_stream_callback(
         self, kind: Literal["async", "sync"]
-    ) -> Callable[[List[data.RequestStreamOutput]], None]:
+    ) -> Callable[[data.RequestStreamOutputBatch], None]:
         """Construct a callback function and return.
 
         The callback function has signature
-        "Callable[[List[data.RequestStreamOutput]], None]",
-        whose input is a list of "data.RequestStreamOutput".
-        Each "data.RequestStreamOutput" is the delta output of a request,
-        generated from the engine.
+        "Callable[[data.RequestStreamOutputBatch], None]",
+        whose input is a "data.RequestStreamOutputBatch" that packs
+        the delta outputs of a batch of requests generated from the engine.
         """
 
         f_callback = (
@@ -619,7 +999,7 @@ class EngineState:
             else self._sync_request_stream_callback
         )
 
-        def _callback(delta_outputs: List[data.RequestStreamOutput]) -> None:
+        def _callback(delta_outputs: data.RequestStreamOutputBatch) -> None:
             f_callback(delta_outputs)
 
         return _callback
@@ -631,7 +1011,7 @@ class EngineState:
         if self.async_event_loop is None:
             self.async_event_loop = asyncio.get_event_loop()
 
-    def _async_request_stream_callback(self, delta_outputs: List[data.RequestStreamOutput]) -> None:
+    def _async_request_stream_callback(self, delta_outputs: data.RequestStreamOutputBatch) -> None:
         """The request stream callback function for AsyncMLCEngine to stream back
         the request generation results.
 
@@ -641,41 +1021,65 @@ class EngineState:
         schedule the invocation in the event loop, so that the underlying
         callback logic will be executed asynchronously in the future rather
         than right now.
+        The delta outputs are buffered, and at most one invocation is scheduled
+        until the buffered outputs get processed. So the cross-thread wakeups
+        of all requests are batched into one per event loop tick.
         """
+        with self._async_pending_lock:
+            self._async_pending_delta_outputs.append(delta_outputs)
+            if self._async_flush_scheduled:
+                return
+            self._async_flush_scheduled = True
 
         # Schedule a callback run in the event loop without executing right now.
         # NOTE: This function causes GIL during execution.
-        self.async_event_loop.call_soon_threadsafe(
-            self._async_request_stream_callback_impl, delta_outputs
-        )
+        self.async_event_loop.call_soon_threadsafe(self._async_request_stream_flush)
+
+    def async_add_waiting_request(self, request_id: str, prompt_length: int) -> None:
+        """Mark the input request as waiting for its first output."""
+        self.async_waiting_prompt_lengths[request_id] = prompt_length
+        self.async_num_waiting_prompt_tokens += prompt_length
+
+    def async_remove_waiting_request(self, request_id: str) -> None:
+        """Unmark the input request as waiting, when it receives the first
+        output or gets aborted. No-op if the request is not waiting."""
+        prompt_length = self.async_waiting_prompt_lengths.pop(request_id, None)
+        if prompt_length is not None:
+            self.async_num_waiting_prompt_tokens -= prompt_length
+
+    def _async_request_stream_flush(self) -> None:
+        """Process all the buffered delta outputs in the event loop."""
+        with self._async_pending_lock:
+            delta_outputs = self._async_pending_delta_outputs
+            self._async_pending_delta_outputs = []
+            self._async_flush_scheduled = False
+        for batch in delta_outputs:
+            self._async_request_stream_callback_impl(batch)
 
     def _async_request_stream_callback_impl(
-        self, delta_outputs: List[data.RequestStreamOutput]
+        self, delta_outputs: data.RequestStreamOutputBatch
     ) -> None:
         """The underlying implementation of request stream callback for AsyncMLCEngine."""
-        for delta_output in delta_outputs:
-            request_id, stream_outputs = delta_output.unpack()
-            streamers = self.async_streamers.get(request_id, None)
-            if streamers is None:
+        for request_id, stream_outputs in delta_outputs.unpack():
+            stream = self.async_streams.get(request_id, None)
+            if stream is None:
                 continue
 
             self.record_event(request_id, event="start callback")
-            stream, text_streamers = streamers
-            outputs = []
-            for stream_output, text_streamer in zip(stream_outputs, text_streamers):
-                self.record_event(request_id, event="start detokenization")
-                delta_text = (
-                    text_streamer.put(stream_output.delta_token_ids)
-                    if len(stream_output.delta_token_ids) > 0
-                    else ""
+            self.async_remove_waiting_request(request_id)
+            timer = self.async_request_timers.get(request_id, None)
+            if timer is not None:
+                timer.record_output(
+                    max(len(stream_output.delta_token_ids) for stream_output in stream_outputs),
+                    stream_outputs[0].engine_timing,
                 )
-                if stream_output.finish_reason is not None:
-                    delta_text += text_streamer.finish()
-                self.record_event(request_id, event="finish detokenization")
-
+            outputs = []
+            for stream_output in stream_outputs:
+                # The delta texts are detokenized by the engine in batch.
+                assert stream_output.delta_text is not None
                 outputs.append(
                     CallbackStreamOutput(
-                        delta_text=delta_text,
+                        delta_text=stream_output.delta_text,
                         num_delta_tokens=len(stream_output.delta_token_ids),
                         delta_logprob_json_strs=stream_output.delta_logprob_json_strs,
                         finish_reason=stream_output.finish_reason,
@@ -688,16 +1092,68 @@ class EngineState:
             stream.push(outputs)
             if self.async_num_unfinished_generations[request_id] == 0:
                 stream.finish()
-                self.async_streamers.pop(request_id, None)
+                self.async_streams.pop(request_id, None)
                 self.async_num_unfinished_generations.pop(request_id, None)
+                self.async_request_timers.pop(request_id, None)
             self.record_event(request_id, event="finish callback")
 
-    def _sync_request_stream_callback(self, delta_outputs: List[data.RequestStreamOutput]) -> None:
+    def sync_add_stream(self, request_id: str, stream: SyncRequestStream) -> None:
+        """Register the stream of the input request for MLCEngine.
+        It can be invoked from any thread."""
+        with self.sync_streams_lock:
+            if request_id in self.sync_streams:
+                raise RuntimeError(
+                    f'The request id "{request_id}" already exists. '
+                    "Please make sure the request id is unique."
+                )
+            self.sync_streams[request_id] = stream
+
+    def sync_remove_stream(self, request_id: str) -> Optional[SyncRequestStream]:
+        """Unregister and return the stream of the input request,
+        or None if the request has no stream. It can be invoked from any thread."""
+        with self.sync_streams_lock:
+            return self.sync_streams.pop(request_id, None)
+
+    def _sync_request_stream_callback(self, delta_outputs: data.RequestStreamOutputBatch) -> None:
         """The request stream callback function for MLCEngine to stream back
         the request generation results.
+
+        Note
+        ----
+        The delta outputs of each request are routed to the stream of the request
+        on the engine thread, so the consumer threads of different requests
+        are woken up independently. The batch is put into the output queue only
+        when it contains the outputs of some request without a stream.
         """
-        # Put the delta outputs to the queue in the unblocking way.
-        self.sync_output_queue.put_nowait(delta_outputs)
+        has_unrouted_outputs = False
+        for request_id, stream_outputs in delta_outputs.unpack():
+            with self.sync_streams_lock:
+                stream = self.sync_streams.get(request_id, None)
+            if stream is None:
+                has_unrouted_outputs = True
+                continue
+
+            self.record_event(request_id, event="start callback")
+            outputs = []
+            for stream_output in stream_outputs:
+                # The delta texts are detokenized by the engine in batch.
+                assert stream_output.delta_text is not None
+                outputs.append(
+                    CallbackStreamOutput(
+                        delta_text=stream_output.delta_text,
+                        num_delta_tokens=len(stream_output.delta_token_ids),
+                        delta_logprob_json_strs=stream_output.delta_logprob_json_strs,
+                        finish_reason=stream_output.finish_reason,
+                    )
+                )
+            stream.push(outputs)
+            if stream.finished:
+                self.sync_remove_stream(request_id)
+            self.record_event(request_id, event="finish callback")
+
+        if has_unrouted_outputs:
+            # Put the delta outputs to the queue in the unblocking way.
+            self.sync_output_queue.put_nowait(delta_outputs)
 
 
 class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
@@ -731,7 +1187,16 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
         gpu_memory_utilization: Optional[float],
         speculative_mode: SpeculativeMode,
         spec_draft_length: int,
+        adaptive_spec_draft_length: bool,
+        prefix_cache_max_num_recycling_seqs: Optional[int],
+        mixed_prefill_decode: bool,
+        target_step_latency_ms: Optional[float],
+        kv_swap_space_gb: float,
         enable_tracing: bool,
+        trace_capacity: int = 1 << 20,
+        trace_sample_rate: float = 1.0,
+        trace_export_dir: Optional[str] = None,
+        trace_export_interval: float = 60.0,
     ) -> None:
         # - Initialize model loading info.
         models = _parse_models(model, model_lib_path, additional_models)
@@ -745,11 +1210,7 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
         ) = _process_model_args(models, device)
 
         # - Load the raw model config into dict
-        self.model_config_dicts = []
-        for i, model_info in enumerate(models):
-            model_info.model_lib_path = model_args[i][1]
-            with open(model_config_paths[i], "r", encoding="utf-8") as file:
-                self.model_config_dicts.append(json.load(file))
+        self.model_config_dicts = _load_model_config_dicts(models, model_args, model_config_paths)
 
         # - Decide the KV cache config based on mode and user input.
         (
@@ -757,6 +1218,7 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
             max_total_sequence_length,
             prefill_chunk_size,
             max_single_sequence_length,
+            self.estimated_memory_usage,
         ) = _infer_kv_cache_config(
             mode,
             max_batch_size,
@@ -769,15 +1231,26 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
             model_config_paths,
         )
         self.max_input_sequence_length = min(max_single_sequence_length, max_total_sequence_length)
+        if prefix_cache_max_num_recycling_seqs is None:
+            # Prefix caching is opt-in, since the resident sequences hold KV cache memory.
+            prefix_cache_max_num_recycling_seqs = 0
 
         # - Initialize engine state and engine.
-        self.state = EngineState(enable_tracing)
+        self.state = EngineState(
+            enable_tracing,
+            trace_capacity,
+            trace_sample_rate,
+            trace_export_dir,
+            trace_export_interval,
+        )
         module = tvm.get_global_func("mlc.serve.create_threaded_engine", allow_missing=False)()
         self._ffi = {
             key: module[key]
             for key in [
                 "add_request",
                 "abort_request",
+                "stats",
+                "metrics",
                 "run_background_loop",
                 "run_background_stream_back_loop",
                 "reload",
@@ -786,10 +1259,13 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
                 "debug_call_func_on_all_worker",
             ]
         }
-        self.tokenizer = Tokenizer(model_args[0][0])
+        self.model_path = model_args[0][0]
+        self.tokenizer = Tokenizer(self.model_path)
         self._ffi["init_background_engine"](
             self.state.get_request_stream_callback(kind),
             self.state.trace_recorder,
+            True,  # pack_stream_outputs
+            True,  # detokenize_stream_outputs
         )
         self._ffi["reload"](
             EngineConfig(
@@ -805,6 +1281,13 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
                 prefill_chunk_size=prefill_chunk_size,
                 speculative_mode=speculative_mode,
                 spec_draft_length=spec_draft_length,
+                prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+                adaptive_spec_draft_length=adaptive_spec_draft_length,
+                mixed_prefill_decode=mixed_prefill_decode,
+                target_step_latency_ms=(
+                    target_step_latency_ms if target_step_latency_ms is not None else 0.0
+                ),
+                kv_swap_space_gb=kv_swap_space_gb,
             )
         )
 
@@ -829,6 +1312,38 @@ class MLCEngineBase:  # pylint: disable=too-many-instance-attributes,too-few-pub
         self._ffi["exit_background_loop"]()
         self._background_loop_thread.join()
         self._background_stream_back_loop_thread.join()
+        if self.state.trace_exporter is not None:
+            self.state.trace_exporter.stop()
+
+    def stats(self) -> Dict[str, float]:
+        """The engine runtime statistics.
+        We collect the following entries:
+        - single token prefill latency (s/tok): avg latency of processing one token in prefill
+        - single token decode latency (s/tok): avg latency of processing one token in decode
+        - engine time for prefill (sec)
+        - engine time for decode (sec)
+        - total number of processed tokens in prefill.
+        - total number of processed tokens in decode.
+        The statistics are a snapshot periodically refreshed by the background engine loop,
+        and are empty before the engine is loaded.
+        """
+        stats_json_str = self._ffi["stats"]()
+        return json.loads(stats_json_str)
+
+    def metrics(self) -> Dict[str, Any]:
+        """The engine runtime metrics for monitoring, which include
+        - the histograms of queue time, time to first token, inter-token latency
+          and end-to-end latency of requests, each in a dict of "bucket_bounds",
+          "bucket_counts" (non-cumulative, the last one for +inf), "sum" and "count",
+        - the number of running and waiting requests,
+        - the total and used number of KV cache pages,
+        - the total number of prefill, decode, draft and accepted draft tokens,
+        - and the total engine time on prefill and decode.
+        The metrics are read from the lock-free counters updated by the engine on the fly,
+        and are empty before the engine is loaded.
+        """
+        metrics_json_str = self._ffi["metrics"]()
+        return json.loads(metrics_json_str)
 
     def _debug_call_func_on_all_worker(self, func_name: str) -> None:
         """Call the given global function on all workers. Only for debug purpose."""
@@ -840,10 +1355,10 @@ def process_chat_completion_request(  # pylint: disable=too-many-arguments
     request_id: str,
     engine_state: EngineState,
     model_config: Dict[str, Any],
-    f_tokenize: Callable[[str], List[int]],
+    f_tokenize: Callable[[str], Sequence[int]],
     max_input_sequence_length: int,
     conv_template: Conversation,
-) -> Tuple[List[Union[List[int], data.Data]], GenerationConfig, bool, int]:
+) -> Tuple[List[Union[Sequence[int], data.Data]], GenerationConfig, bool, int]:
     """Process the given ChatCompletionRequest, apply request validity
     checks, and return the processed prompts, and other info.
 
@@ -861,8 +1376,9 @@ def process_chat_completion_request(  # pylint: disable=too-many-arguments
     model_config : Dict[str, Any]
         The model configuration dictionary.
 
-    f_tokenize : Callable[[str], List[int]]
-        The tokenizer encode function.
+    f_tokenize : Callable[[str], Sequence[int]]
+        The tokenizer encode function. `Tokenizer.encode_array` is preferred,
+        which keeps the token ids in a NumPy array.
 
     max_input_sequence_length : int
         The maximum allowed total prompt length.
@@ -872,9 +1388,9 @@ def process_chat_completion_request(  # pylint: disable=too-many-arguments
 
     Returns
     -------
-    prompts : List[Union[List[int], data.Data]]
+    prompts : List[Union[Sequence[int], data.Data]]
         The prompts, in a list.
-        Each element is a list of token ids or a "data.Data" instance.
+        Each element is the token ids (a list or a NumPy array) or a "data.Data" instance.
 
     generation_cfg : GenerationConfig
         The generation config of the request got from the input request.
@@ -917,7 +1433,10 @@ def process_chat_completion_request(  # pylint: disable=too-many-arguments
     engine_state.record_event(request_id, event="finish tokenization")
 
     if conv_template.system_prefix_token_ids is not None:
-        if isinstance(prompts[0], list):
+        if isinstance(prompts[0], np.ndarray):
+            system_prefix = np.array(conv_template.system_prefix_token_ids, dtype=prompts[0].dtype)
+            prompts[0] = np.concatenate([system_prefix, prompts[0]])
+        elif isinstance(prompts[0], list):
             prompts[0] = conv_template.system_prefix_token_ids + prompts[0]
         else:
             prompts.insert(0, conv_template.system_prefix_token_ids)
@@ -1054,7 +1573,12 @@ def process_completion_request(  # pylint: disable=too-many-arguments
     model_config: Dict[str, Any],
     tokenizer: Tokenizer,
     max_input_sequence_length: int,
-) -> Tuple[List[int], GenerationConfig, int, Optional[openai_api_protocol.CompletionResponse]]:
+) -> Tuple[
+    Union[List[int], np.ndarray],
+    GenerationConfig,
+    int,
+    Optional[openai_api_protocol.CompletionResponse],
+]:
     """Process the given CompletionRequest, apply request validity
     checks, and return the processed prompts, and other info.
 
@@ -1077,8 +1601,9 @@ def process_completion_request(  # pylint: disable=too-many-arguments
 
     Returns
     -------
-    prompt : List[int]
-        The prompt in a list of token ids.
+    prompt : Union[List[int], np.ndarray]
+        The prompt token ids, in a NumPy array when the prompt is tokenized
+        from a string, or the list of token ids given in the request.
 
     generation_cfg : GenerationConfig
         The generation config of the request got from the input request.
@@ -1096,11 +1621,11 @@ def process_completion_request(  # pylint: disable=too-many-arguments
 
     # - Process prompt and check validity.
     engine_state.record_event(request_id, event="start tokenization")
-    prompts = engine_utils.process_prompts(request.prompt, tokenizer.encode)
+    prompts = engine_utils.process_prompts(request.prompt, tokenizer.encode_array)
     engine_state.record_event(request_id, event="finish tokenization")
     prompt_length = engine_utils.check_and_get_prompts_length(prompts, max_input_sequence_length)
     prompt = prompts[0]
-    assert isinstance(prompt, list)
+    assert isinstance(prompt, (list, np.ndarray))
 
     # Process generation config. Create request id.
     generation_cfg = protocol_utils.get_generation_config(request, model_config)
@@ -1358,6 +1883,7 @@ def wrap_chat_completion_response(  # pylint: disable=too-many-arguments
     use_function_calling: bool,
     num_prompt_tokens: int,
     num_completion_tokens: int,
+    timing: Optional[openai_api_protocol.TimingInfo] = None,
 ) -> openai_api_protocol.ChatCompletionResponse:
     """Wrap the non-streaming chat completion results to ChatCompletionResponse instance."""
     return openai_api_protocol.ChatCompletionResponse(
@@ -1386,7 +1912,9 @@ def wrap_chat_completion_response(  # pylint: disable=too-many-arguments
         model=model,
         system_fingerprint="",
         usage=openai_api_protocol.UsageInfo(
-            prompt_tokens=num_prompt_tokens, completion_tokens=num_completion_tokens
+            prompt_tokens=num_prompt_tokens,
+            completion_tokens=num_completion_tokens,
+            timing=timing,
         ),
     )
 
@@ -1399,6 +1927,7 @@ def wrap_completion_response(  # pylint: disable=too-many-arguments
     logprob_results: Optional[List[List[openai_api_protocol.LogProbsContent]]],
     num_prompt_tokens: int,
     num_completion_tokens: int,
+    timing: Optional[openai_api_protocol.TimingInfo] = None,
 ) -> openai_api_protocol.CompletionResponse:
     """Wrap the non-streaming completion results to CompletionResponse instance."""
     return openai_api_protocol.CompletionResponse(
@@ -1418,6 +1947,8 @@ def wrap_completion_response(  # pylint: disable=too-many-arguments
         ],
         model=model,
         usage=openai_api_protocol.UsageInfo(
-            prompt_tokens=num_prompt_tokens, completion_tokens=num_completion_tokens
+            prompt_tokens=num_prompt_tokens,
+            completion_tokens=num_completion_tokens,
+            timing=timing,
         ),
     )
@@ -1,11 +1,13 @@
 """Utility functions for MLC Serve engine"""
 
 import uuid
-from typing import Callable, List, Union
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
 
 from mlc_llm.serve import data
 
-from ..protocol import RequestProtocol, error_protocol, protocol_utils
+from ..protocol import RequestProtocol, error_protocol, openai_api_protocol, protocol_utils
 
 
 def random_uuid() -> str:
@@ -23,8 +25,32 @@ def check_unsupported_fields(request: RequestProtocol) -> None:
         )
 
 
+def get_request_prompt_size(
+    request: Union[
+        openai_api_protocol.CompletionRequest, openai_api_protocol.ChatCompletionRequest
+    ]
+) -> Optional[int]:
+    """Get the number of characters (or token ids) in the prompt of the request,
+    which estimates the cost of preprocessing the request.
+    Return None if the request has image contents, whose fetching and
+    processing cost cannot be estimated beforehand.
+    """
+    if isinstance(request, openai_api_protocol.CompletionRequest):
+        return len(request.prompt)
+    size = 0
+    for message in request.messages:
+        if isinstance(message.content, str):
+            size += len(message.content)
+        elif isinstance(message.content, list):
+            for item in message.content:
+                if item.get("type") != "text":
+                    return None
+                size += len(item.get("text", ""))
+    return size
+
+
 def check_and_get_prompts_length(
-    prompts: List[Union[List[int], data.ImageData]], max_input_sequence_length: int
+    prompts: List[Union[Sequence[int], data.ImageData]], max_input_sequence_length: int
 ) -> int:
     """Check if the total prompt length exceeds the max single sequence
     sequence length allowed by the served model. Raise BadRequestError if so.
@@ -41,13 +67,23 @@ def check_and_get_prompts_length(
     return total_length
 
 
+def get_prompt_length(input_data: List[data.Data]) -> int:
+    """Get the number of prompt tokens in the given request input data.
+    Text data are not tokenized until the engine processes them,
+    and are not counted.
+    """
+    return sum(len(item) for item in input_data if not isinstance(item, data.TextData))
+
+
 def process_prompts(
     input_prompts: Union[str, List[int], List[Union[str, List[int], data.ImageData]]],
-    ftokenize: Callable[[str], List[int]],
-) -> List[Union[List[int], data.ImageData]]:
+    ftokenize: Callable[[str], Sequence[int]],
+) -> List[Union[Sequence[int], data.ImageData]]:
     """Convert all input tokens to list of token ids with regard to the
     given tokenization function.
-    For each input prompt, return the list of token ids after tokenization.
+    For each input prompt, return the token ids after tokenization, in the
+    form returned by the tokenization function (e.g., a NumPy array returned
+    by `Tokenizer.encode_array`) or as given in the input.
     """
     error_msg = f"Invalid request prompt {input_prompts}"
 
@@ -67,7 +103,7 @@ def process_prompts(
         return [input_prompts]  # type: ignore
 
     # Case 3. A list of prompts.
-    output_prompts: List[Union[List[int], data.ImageData]] = []
+    output_prompts: List[Union[Sequence[int], data.ImageData]] = []
     for input_prompt in input_prompts:
         if isinstance(input_prompt, str):
             output_prompts.append(ftokenize(input_prompt))
@@ -83,14 +119,19 @@ def process_prompts(
 
 
 def convert_prompts_to_data(
-    prompts: Union[str, List[int], List[Union[str, List[int], data.Data]]]
+    prompts: Union[
+        str, List[int], np.ndarray, List[Union[str, List[int], np.ndarray, data.Data]]
+    ]
 ) -> List[data.Data]:
     """Convert the given prompts in the combination of token id lists
-    and/or data to all data."""
+    and/or data to all data. Token ids in NumPy arrays are passed to
+    TokenData in bulk without conversion to Python lists."""
     if isinstance(prompts, data.Data):
         return [prompts]
     if isinstance(prompts, str):
         return [data.TextData(prompts)]
+    if isinstance(prompts, np.ndarray):
+        return [data.TokenData(prompts)]
     if isinstance(prompts[0], int):
         assert isinstance(prompts, list) and all(isinstance(token_id, int) for token_id in prompts)
         return [data.TokenData(prompts)]  # type: ignore
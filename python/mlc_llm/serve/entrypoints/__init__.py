@@ -1,2 +1,7 @@
 """The entrypoints for MLC LLM server."""
-from . import debug_entrypoints, openai_entrypoints
+from . import (
+    batch_entrypoints,
+    debug_entrypoints,
+    metrics_entrypoints,
+    openai_entrypoints,
+)
@@ -0,0 +1,155 @@
+"""OpenAI API-compatible file and batch entrypoints in MLC LLM"""
+
+from http import HTTPStatus
+from typing import Optional, Union
+
+import fastapi
+
+from mlc_llm.protocol import error_protocol
+from mlc_llm.protocol.openai_api_protocol import BatchRequest, ListResponse
+from mlc_llm.serve.server import BatchManager, ServerContext
+
+app = fastapi.APIRouter()
+
+
+async def _resume_batches() -> None:
+    """Resume the unfinished batches of the previous server runs when the server starts."""
+    server_context: Optional[ServerContext] = ServerContext.current()
+    if server_context is not None and server_context.batch_manager is not None:
+        server_context.batch_manager.resume()
+
+
+# The startup handlers of the router are added to the app which includes the router.
+app.add_event_handler("startup", _resume_batches)
+
+
+def _get_batch_manager() -> Union[BatchManager, fastapi.responses.JSONResponse]:
+    """Get the batch manager of the server, or the error response if the batch API is disabled."""
+    server_context: ServerContext = ServerContext.current()
+    batch_manager: Optional[BatchManager] = server_context.batch_manager
+    if batch_manager is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.NOT_FOUND, message='The batch API is disabled. Please set "--batch-dir".'
+        )
+    return batch_manager
+
+
+################ v1/files ################
+
+
+@app.post("/v1/files")
+async def upload_file(raw_request: fastapi.Request):
+    """OpenAI-compatible file upload API. Only the "batch" purpose is supported.
+    API reference: https://platform.openai.com/docs/api-reference/files/create
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    form = await raw_request.form()
+    file = form.get("file", None)
+    purpose = form.get("purpose", "batch")
+    if file is None or isinstance(file, str):
+        return error_protocol.create_error_response(
+            HTTPStatus.BAD_REQUEST, message='The form field "file" is missing.'
+        )
+    if purpose != "batch":
+        return error_protocol.create_error_response(
+            HTTPStatus.BAD_REQUEST, message=f'The file purpose "{purpose}" is not supported.'
+        )
+    try:
+        # The form spools the uploaded file, which is copied to disk from the spooled file.
+        return await batch_manager.upload_file(file.filename or "input.jsonl", purpose, file.file)
+    finally:
+        await file.close()
+
+
+@app.get("/v1/files/{file_id}")
+async def retrieve_file(file_id: str):
+    """OpenAI-compatible file retrieval API.
+    API reference: https://platform.openai.com/docs/api-reference/files/retrieve
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    file = batch_manager.get_file(file_id)
+    if file is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.NOT_FOUND, message=f'The file "{file_id}" does not exist.'
+        )
+    return file
+
+
+@app.get("/v1/files/{file_id}/content")
+async def retrieve_file_content(file_id: str):
+    """OpenAI-compatible file content retrieval API. The output file of a
+    running batch can be downloaded for the results finished so far.
+    API reference: https://platform.openai.com/docs/api-reference/files/retrieve-contents
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    if batch_manager.get_file(file_id) is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.NOT_FOUND, message=f'The file "{file_id}" does not exist.'
+        )
+    return fastapi.responses.FileResponse(
+        batch_manager.get_file_content_path(file_id), media_type="application/jsonl"
+    )
+
+
+################ v1/batches ################
+
+
+@app.post("/v1/batches")
+async def create_batch(request: BatchRequest):
+    """OpenAI-compatible batch creation API.
+    API reference: https://platform.openai.com/docs/api-reference/batch/create
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    return batch_manager.create_batch(request)
+
+
+@app.get("/v1/batches")
+async def list_batches():
+    """OpenAI-compatible batch listing API.
+    API reference: https://platform.openai.com/docs/api-reference/batch/list
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    return ListResponse(data=batch_manager.list_batches())
+
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_batch(batch_id: str):
+    """OpenAI-compatible batch retrieval API, which reports the progress
+    and the throughput of the batch.
+    API reference: https://platform.openai.com/docs/api-reference/batch/retrieve
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    batch = batch_manager.get_batch(batch_id)
+    if batch is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.NOT_FOUND, message=f'The batch "{batch_id}" does not exist.'
+        )
+    return batch
+
+
+@app.post("/v1/batches/{batch_id}/cancel")
+async def cancel_batch(batch_id: str):
+    """OpenAI-compatible batch cancellation API.
+    API reference: https://platform.openai.com/docs/api-reference/batch/cancel
+    """
+    batch_manager = _get_batch_manager()
+    if not isinstance(batch_manager, BatchManager):
+        return batch_manager
+    batch = batch_manager.cancel_batch(batch_id)
+    if batch is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.NOT_FOUND, message=f'The batch "{batch_id}" does not exist.'
+        )
+    return batch
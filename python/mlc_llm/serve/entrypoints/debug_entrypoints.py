@@ -62,6 +62,8 @@ async def debug_cuda_profiler_start(_request: fastapi.Request):
     # Since the CUDA profiler is process-wise, call the function for one model is sufficient.
     for model in server_context.get_model_list():
         async_engine = server_context.get_engine(model)
+        if async_engine is None:
+            continue
         async_engine._debug_call_func_on_all_worker(  # pylint: disable=protected-access
             "mlc.debug_cuda_profiler_start"
         )
@@ -75,6 +77,8 @@ async def debug_cuda_profiler_stop(_request: fastapi.Request):
     # Since the CUDA profiler is process-wise, call the function for one model is sufficient.
     for model in server_context.get_model_list():
         async_engine = server_context.get_engine(model)
+        if async_engine is None:
+            continue
         async_engine._debug_call_func_on_all_worker(  # pylint: disable=protected-access
             "mlc.debug_cuda_profiler_stop"
         )
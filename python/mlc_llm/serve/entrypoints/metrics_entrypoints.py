@@ -0,0 +1,192 @@
+"""MLC LLM server metrics entrypoints, in Prometheus text exposition format."""
+
+from typing import Any, Dict, List, Tuple
+
+import fastapi
+
+from mlc_llm.serve.server import ServerContext
+
+app = fastapi.APIRouter()
+
+# The histogram metrics, in (metric name, engine metrics key, help).
+_HISTOGRAMS = [
+    (
+        "mlc_llm_request_queue_time_seconds",
+        "queue_time",
+        "Time of requests waiting in the engine until their prefill starts.",
+    ),
+    (
+        "mlc_llm_time_to_first_token_seconds",
+        "time_to_first_token",
+        "Time from requests being added to the engine to their first tokens.",
+    ),
+    (
+        "mlc_llm_inter_token_latency_seconds",
+        "inter_token_latency",
+        "Average time between two consecutive output tokens of requests.",
+    ),
+    (
+        "mlc_llm_request_latency_seconds",
+        "end_to_end_latency",
+        "Time from requests being added to the engine to their finish.",
+    ),
+]
+
+# The counter metrics, in (metric name, engine metrics key, help).
+# The token throughputs are not exported as gauges, since they depend on the scrape
+# interval. They are computed from the token counters by the scrapers, e.g. with `rate()`.
+_COUNTERS = [
+    ("mlc_llm_prefill_tokens_total", "num_prefill_tokens", "Number of prefilled tokens."),
+    ("mlc_llm_decode_tokens_total", "num_decode_tokens", "Number of generated tokens."),
+    ("mlc_llm_spec_draft_tokens_total", "num_draft_tokens", "Number of speculated draft tokens."),
+    (
+        "mlc_llm_spec_accepted_tokens_total",
+        "num_accepted_tokens",
+        "Number of draft tokens accepted in speculation verification.",
+    ),
+    ("mlc_llm_engine_prefill_seconds_total", "engine_prefill_time", "Engine time on prefill."),
+    ("mlc_llm_engine_decode_seconds_total", "engine_decode_time", "Engine time on decode."),
+]
+
+# The response cache metrics, in (metric name, response cache metrics key, help).
+_RESPONSE_CACHE_COUNTERS = [
+    ("mlc_llm_response_cache_hits_total", "num_hits", "Number of response cache hits."),
+    ("mlc_llm_response_cache_misses_total", "num_misses", "Number of response cache misses."),
+    (
+        "mlc_llm_response_cache_evictions_total",
+        "num_evictions",
+        "Number of responses evicted from the response cache.",
+    ),
+]
+_RESPONSE_CACHE_GAUGES = [
+    ("mlc_llm_response_cache_entries", "num_entries", "Number of cached responses."),
+    ("mlc_llm_response_cache_bytes", "num_bytes", "Total bytes of the cached responses."),
+]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    items = []
+    for key, value in labels.items():
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        items.append(f'{key}="{value}"')
+    return "{" + ",".join(items) + "}"
+
+
+def export_prometheus_metrics(model_metrics: Dict[str, Dict[str, Any]]) -> str:
+    """Export the engine metrics of each served model in Prometheus text exposition format.
+
+    Parameters
+    ----------
+    model_metrics : Dict[str, Dict[str, Any]]
+        The engine metrics returned by `AsyncMLCEngine.metrics` of each model.
+
+    Returns
+    -------
+    text : str
+        The metrics in Prometheus text exposition format.
+    """
+    # Metric name -> (type, help, samples)
+    families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def _add(name: str, kind: str, help_text: str, sample: str) -> None:
+        if name not in families:
+            families[name] = (kind, help_text, [])
+        families[name][2].append(sample)
+
+    for model, metrics in model_metrics.items():
+        if len(metrics) == 0:
+            # The engine is not loaded.
+            continue
+        labels = {"model": model}
+        label_str = _format_labels(labels)
+        for name, key, help_text in _HISTOGRAMS:
+            histogram = metrics[key]
+            cumulative_count = 0
+            bounds = histogram["bucket_bounds"] + [float("inf")]
+            for bound, count in zip(bounds, histogram["bucket_counts"]):
+                cumulative_count += count
+                bucket_label_str = _format_labels({**labels, "le": _format_value(bound)})
+                _add(
+                    name,
+                    "histogram",
+                    help_text,
+                    f"{name}_bucket{bucket_label_str} {cumulative_count}",
+                )
+            _add(
+                name,
+                "histogram",
+                help_text,
+                f"{name}_sum{label_str} {_format_value(histogram['sum'])}",
+            )
+            _add(name, "histogram", help_text, f"{name}_count{label_str} {histogram['count']}")
+        for name, key, help_text in _COUNTERS:
+            _add(name, "counter", help_text, f"{name}{label_str} {_format_value(metrics[key])}")
+
+        kv_cache_usage = metrics["kv_cache_num_used_pages"] / max(
+            metrics["kv_cache_num_total_pages"], 1
+        )
+        gauges = [
+            (
+                "mlc_llm_num_running_requests",
+                "Number of running requests.",
+                metrics["num_running_requests"],
+            ),
+            (
+                "mlc_llm_num_waiting_requests",
+                "Number of requests waiting for prefill.",
+                metrics["num_waiting_requests"],
+            ),
+            (
+                "mlc_llm_kv_cache_usage_ratio",
+                "Fraction of the KV cache pages in use.",
+                kv_cache_usage,
+            ),
+            (
+                "mlc_llm_spec_acceptance_rate",
+                "Fraction of the speculated draft tokens accepted in verification.",
+                metrics["num_accepted_tokens"] / max(metrics["num_draft_tokens"], 1),
+            ),
+        ]
+        for name, help_text, value in gauges:
+            _add(name, "gauge", help_text, f"{name}{label_str} {_format_value(value)}")
+
+        response_cache = metrics.get("response_cache", None)
+        if response_cache is not None:
+            for name, key, help_text in _RESPONSE_CACHE_COUNTERS:
+                value = _format_value(response_cache[key])
+                _add(name, "counter", help_text, f"{name}{label_str} {value}")
+            for name, key, help_text in _RESPONSE_CACHE_GAUGES:
+                value = _format_value(response_cache[key])
+                _add(name, "gauge", help_text, f"{name}{label_str} {value}")
+
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines += samples
+    return "\n".join(lines) + "\n"
+
+
+################ /metrics ################
+
+
+@app.get("/metrics")
+async def metrics(_request: fastapi.Request):
+    """Return the engine metrics of the served models in Prometheus text exposition format."""
+    server_context: ServerContext = ServerContext.current()
+    model_metrics = {}
+    for model in server_context.get_model_list():
+        async_engine = server_context.get_engine(model)
+        # The engines in the engine pool may not be loaded.
+        model_metrics[model] = async_engine.metrics() if async_engine is not None else {}
+    return fastapi.responses.PlainTextResponse(
+        export_prometheus_metrics(model_metrics), media_type="text/plain; version=0.0.4"
+    )
@@ -1,24 +1,87 @@
 """OpenAI API-compatible server entrypoints in MLC LLM"""
 
 # pylint: disable=too-many-locals,too-many-return-statements,too-many-statements
+import asyncio
+import base64
 from http import HTTPStatus
-from typing import AsyncGenerator, List, Optional
+from typing import AsyncGenerator, Awaitable, Optional, TypeVar, Union
 
 import fastapi
+from pydantic import BaseModel
 
 from mlc_llm.protocol import error_protocol
 from mlc_llm.protocol.openai_api_protocol import (
     ChatCompletionRequest,
     CompletionRequest,
+    EmbeddingData,
+    EmbeddingRequest,
+    EmbeddingResponse,
     ListResponse,
-    LogProbsContent,
     ModelResponse,
+    UsageInfo,
 )
-from mlc_llm.serve import engine_base, engine_utils
-from mlc_llm.serve.server import ServerContext
+from mlc_llm.serve import engine_utils
+from mlc_llm.serve.server import InsufficientEngineMemoryError, ServerContext
 
 app = fastapi.APIRouter()
 
+# The request header to opt in the timing breakdown in usage,
+# as an alternative to the `include_timing` request field.
+INCLUDE_TIMING_HEADER = "x-mlc-include-timing"
+# The interval in seconds to check if the client of a non-streaming request has disconnected.
+DISCONNECT_CHECK_INTERVAL = 0.2
+
+_T = TypeVar("_T")
+
+
+def _to_server_sent_event(response: Union[BaseModel, str]) -> str:
+    """Convert a stream response to a server-sent event.
+    The response is already a server-sent event when it is encoded by the fast stream encoders.
+    """
+    if isinstance(response, str):
+        return response
+    return f"data: {response.model_dump_json()}\n\n"
+
+
+def _apply_include_timing_header(
+    request: Union[CompletionRequest, ChatCompletionRequest], raw_request: fastapi.Request
+) -> None:
+    """Set `include_timing` of the request when the request header opts in."""
+    if raw_request.headers.get(INCLUDE_TIMING_HEADER, "").lower() in ("1", "true"):
+        request.include_timing = True
+
+
+async def _run_until_disconnected(
+    response_coroutine: Awaitable[_T], raw_request: fastapi.Request
+) -> Optional[_T]:
+    """Run the aggregation of a non-streaming request, and return its response,
+    or None if the client disconnects first.
+
+    In non-streaming cases, the engine is not notified when the request is disconnected.
+    Therefore, a single watcher task checks the connection periodically, and the aggregation
+    is cancelled on disconnection, which aborts the request from the engine.
+    """
+
+    async def _watch_disconnection() -> None:
+        while not await raw_request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_CHECK_INTERVAL)
+
+    response_task = asyncio.ensure_future(response_coroutine)
+    watcher_task = asyncio.ensure_future(_watch_disconnection())
+    try:
+        await asyncio.wait([response_task, watcher_task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher_task.cancel()
+    if not response_task.done():
+        response_task.cancel()
+        try:
+            await response_task
+        except asyncio.CancelledError:
+            pass
+        return None
+    return response_task.result()
+
+
 ################ v1/models ################
 
 
@@ -41,11 +104,24 @@ async def request_completion(request: CompletionRequest, raw_request: fastapi.Re
     """
     # - Check the requested model.
     server_context: ServerContext = ServerContext.current()
-    async_engine = server_context.get_engine(request.model)
+    try:
+        async_engine = await server_context.load_engine(request.model)
+    except InsufficientEngineMemoryError as err:
+        if not err.retryable:
+            return error_protocol.create_error_response(
+                HTTPStatus.SERVICE_UNAVAILABLE, message=err.args[0]
+            )
+        # The engine can be loaded once some loaded engine becomes idle.
+        return error_protocol.create_too_many_requests_response(retry_after=1)
     if async_engine is None:
         return error_protocol.create_error_response(
             HTTPStatus.BAD_REQUEST, message=f'The requested model "{request.model}" is not served.'
         )
+    # - Reject the request early when the engine is overloaded.
+    retry_after = server_context.check_admission(request.model)
+    if retry_after is not None:
+        return error_protocol.create_too_many_requests_response(retry_after)
+    _apply_include_timing_header(request, raw_request)
     request_id = f"cmpl-{engine_utils.random_uuid()}"
 
     # Streaming response.
@@ -54,7 +130,7 @@ async def request_completion(request: CompletionRequest, raw_request: fastapi.Re
         # capture potential exceptions in this scope, rather then
         # the StreamingResponse scope.
         stream_generator = async_engine._handle_completion(  # pylint: disable=protected-access
-            request, request_id
+            request, request_id, encode_sse=async_engine.enable_fast_stream_encoding
         )
         first_response = await anext(  # type: ignore  # pylint: disable=undefined-variable
             stream_generator
@@ -64,9 +140,9 @@ async def request_completion(request: CompletionRequest, raw_request: fastapi.Re
             if isinstance(first_response, StopAsyncIteration):
                 yield "data: [DONE]\n\n"
                 return
-            yield f"data: {first_response.model_dump_json()}\n\n"
+            yield _to_server_sent_event(first_response)
             async for response in stream_generator:
-                yield f"data: {response.model_dump_json()}\n\n"
+                yield _to_server_sent_event(response)
             yield "data: [DONE]\n\n"
 
         return fastapi.responses.StreamingResponse(
@@ -74,46 +150,17 @@ async def request_completion(request: CompletionRequest, raw_request: fastapi.Re
         )
 
     # Normal response.
-    num_prompt_tokens = 0
-    num_completion_tokens = 0
-    output_texts = ["" for _ in range(request.n)]
-    finish_reasons: List[Optional[str]] = [None for _ in range(request.n)]
-    logprob_results: Optional[List[List[LogProbsContent]]] = (
-        [[] for _ in range(request.n)] if request.logprobs else None
-    )
-
-    async for response in async_engine._handle_completion(  # pylint: disable=protected-access
-        request, request_id
-    ):
-        if await raw_request.is_disconnected():
-            # In non-streaming cases, the engine will not be notified
-            # when the request is disconnected.
-            # Therefore, we check if it is disconnected each time,
-            # and abort the request from engine if so.
-            await async_engine.abort(request_id)
-            return error_protocol.create_error_response(
-                HTTPStatus.BAD_REQUEST, message="The request has disconnected"
-            )
-        num_prompt_tokens = response.usage.prompt_tokens
-        num_completion_tokens = response.usage.completion_tokens
-        for choice in response.choices:
-            output_texts[choice.index] += choice.text
-            if choice.finish_reason is not None and finish_reasons[choice.index] is None:
-                finish_reasons[choice.index] = choice.finish_reason
-            if choice.logprobs is not None:
-                assert logprob_results is not None
-                logprob_results[choice.index] += choice.logprobs.content
-
-    assert all(finish_reason is not None for finish_reason in finish_reasons)
-    return engine_base.wrap_completion_response(
-        request_id=request_id,
-        model=request.model,
-        output_texts=output_texts,
-        finish_reasons=finish_reasons,
-        logprob_results=logprob_results,
-        num_prompt_tokens=num_prompt_tokens,
-        num_completion_tokens=num_completion_tokens,
+    response = await _run_until_disconnected(
+        async_engine._aggregate_completion(  # pylint: disable=protected-access
+            request, request_id
+        ),
+        raw_request,
     )
+    if response is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.BAD_REQUEST, message="The request has disconnected"
+        )
+    return response
 
 
 ################ v1/chat/completions ################
@@ -128,11 +175,24 @@ async def request_chat_completion(
     """
     # - Check the requested model.
     server_context: ServerContext = ServerContext.current()
-    async_engine = server_context.get_engine(request.model)
+    try:
+        async_engine = await server_context.load_engine(request.model)
+    except InsufficientEngineMemoryError as err:
+        if not err.retryable:
+            return error_protocol.create_error_response(
+                HTTPStatus.SERVICE_UNAVAILABLE, message=err.args[0]
+            )
+        # The engine can be loaded once some loaded engine becomes idle.
+        return error_protocol.create_too_many_requests_response(retry_after=1)
     if async_engine is None:
         return error_protocol.create_error_response(
             HTTPStatus.BAD_REQUEST, message=f'The requested model "{request.model}" is not served.'
         )
+    # - Reject the request early when the engine is overloaded.
+    retry_after = server_context.check_admission(request.model)
+    if retry_after is not None:
+        return error_protocol.create_too_many_requests_response(retry_after)
+    _apply_include_timing_header(request, raw_request)
     request_id = f"chatcmpl-{engine_utils.random_uuid()}"
 
     # Streaming response.
@@ -141,7 +201,7 @@ async def request_chat_completion(
         # capture potential exceptions in this scope, rather then
         # the StreamingResponse scope.
         stream_generator = async_engine._handle_chat_completion(  # pylint: disable=protected-access
-            request, request_id
+            request, request_id, encode_sse=async_engine.enable_fast_stream_encoding
         )
         first_response = await anext(  # type: ignore  # pylint: disable=undefined-variable
             stream_generator
@@ -151,9 +211,9 @@ async def request_chat_completion(
             if isinstance(first_response, StopAsyncIteration):
                 yield "data: [DONE]\n\n"
                 return
-            yield f"data: {first_response.model_dump_json()}\n\n"
+            yield _to_server_sent_event(first_response)
             async for response in stream_generator:
-                yield f"data: {response.model_dump_json()}\n\n"
+                yield _to_server_sent_event(response)
             yield "data: [DONE]\n\n"
 
         return fastapi.responses.StreamingResponse(
@@ -161,49 +221,50 @@ async def request_chat_completion(
         )
 
     # Normal response.
-    num_prompt_tokens = 0
-    num_completion_tokens = 0
-    output_texts = ["" for _ in range(request.n)]
-    finish_reasons: List[Optional[str]] = [None for _ in range(request.n)]
-    logprob_results: Optional[List[List[LogProbsContent]]] = (
-        [[] for _ in range(request.n)] if request.logprobs else None
+    response = await _run_until_disconnected(
+        async_engine._aggregate_chat_completion(  # pylint: disable=protected-access
+            request, request_id
+        ),
+        raw_request,
     )
+    if response is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.BAD_REQUEST, message="The request has disconnected"
+        )
+    return response
 
-    async for response in async_engine._handle_chat_completion(  # pylint: disable=protected-access
-        request, request_id
-    ):
-        if await raw_request.is_disconnected():
-            # In non-streaming cases, the engine will not be notified
-            # when the request is disconnected.
-            # Therefore, we check if it is disconnected each time,
-            # and abort the request from engine if so.
-            await async_engine.abort(request_id)
-            return error_protocol.create_error_response(
-                HTTPStatus.BAD_REQUEST, message="The request has disconnected"
-            )
-        num_prompt_tokens = response.usage.prompt_tokens
-        num_completion_tokens = response.usage.completion_tokens
-        for choice in response.choices:
-            assert isinstance(choice.delta.content, str)
-            output_texts[choice.index] += choice.delta.content
-            if choice.finish_reason is not None and finish_reasons[choice.index] is None:
-                finish_reasons[choice.index] = choice.finish_reason
-            if choice.logprobs is not None:
-                assert logprob_results is not None
-                logprob_results[choice.index] += choice.logprobs.content
-
-    assert all(finish_reason is not None for finish_reason in finish_reasons)
-    use_function_calling, tool_calls_list = engine_base.process_function_call_output(
-        output_texts, finish_reasons
+
+################ v1/embeddings ################
+
+
+@app.post("/v1/embeddings")
+async def request_embeddings(request: EmbeddingRequest):
+    """OpenAI-compatible embedding API. The inputs of the concurrent
+    requests are batched into the same prefills of the embedding model.
+    API reference: https://platform.openai.com/docs/api-reference/embeddings/create
+    """
+    server_context: ServerContext = ServerContext.current()
+    embedding_engine = server_context.get_embedding_engine(request.model)
+    if embedding_engine is None:
+        return error_protocol.create_error_response(
+            HTTPStatus.BAD_REQUEST,
+            message=f'The requested embedding model "{request.model}" is not served.',
+        )
+    embeddings, num_prompt_tokens = await embedding_engine.embed(
+        request.input, pooling=request.pooling, dimensions=request.dimensions
     )
-    return engine_base.wrap_chat_completion_response(
-        request_id=request_id,
+    return EmbeddingResponse(
+        data=[
+            EmbeddingData(
+                embedding=(
+                    base64.b64encode(embedding.astype("<f4").tobytes()).decode("ascii")
+                    if request.encoding_format == "base64"
+                    else embedding.tolist()
+                ),
+                index=i,
+            )
+            for i, embedding in enumerate(embeddings)
+        ],
         model=request.model,
-        output_texts=output_texts,
-        finish_reasons=finish_reasons,
-        tool_calls_list=tool_calls_list,
-        logprob_results=logprob_results,
-        use_function_calling=use_function_calling,
-        num_prompt_tokens=num_prompt_tokens,
-        num_completion_tokens=num_completion_tokens,
+        usage=UsageInfo(prompt_tokens=num_prompt_tokens),
     )
@@ -1,19 +1,47 @@
 """The event trace recorder in MLC LLM serving"""
 
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
 import tvm._ffi
 from tvm.runtime import Object
 
+from mlc_llm.support import logging
+
 from . import _ffi_api
 
+logger = logging.getLogger(__name__)
+
 
 @tvm._ffi.register_object("mlc.serve.EventTraceRecorder")  # pylint: disable=protected-access
 class EventTraceRecorder(Object):
-    """The event trace recorder for requests."""
+    """The event trace recorder for requests.
+
+    The events are recorded in a bounded ring buffer, where the oldest
+    events are overwritten when the buffer is full, so that the tracing
+    can stay enabled in long-running servers.
+
+    Parameters
+    ----------
+    capacity : int
+        The maximum number of events kept in the buffer.
+        Each event takes 24 bytes in the buffer.
 
-    def __init__(self) -> None:
+    sample_rate : float
+        The fraction of requests whose events are recorded, in range [0, 1].
+        Whether a request is sampled is decided by the hash of its id,
+        so that either all or none of the events of a request are recorded.
+    """
+
+    def __init__(self, capacity: int = 1 << 20, sample_rate: float = 1.0) -> None:
         """Initialize a trace recorder."""
         self.__init_handle_by_constructor__(
-            _ffi_api.EventTraceRecorder  # type: ignore  # pylint: disable=no-member
+            _ffi_api.EventTraceRecorder,  # type: ignore  # pylint: disable=no-member
+            capacity,
+            sample_rate,
         )
 
     def add_event(self, request_id: str, event: str) -> None:
@@ -37,5 +65,91 @@ class EventTraceRecorder(Object):
         )
 
     def dump_json(self) -> str:
-        """Dump the logged events in Chrome Trace Event Format in JSON string."""
+        """Dump the events in the buffer in Chrome Trace Event Format in JSON string."""
         return _ffi_api.EventTraceRecorderDumpJSON(self)  # type: ignore  # pylint: disable=no-member
+
+    def export_json(self) -> str:
+        """Dump the events recorded since the last export in Chrome Trace Event Format
+        in JSON string, and mark them exported."""
+        return _ffi_api.EventTraceRecorderExportJSON(self)  # type: ignore  # pylint: disable=no-member
+
+    @property
+    def num_dropped_events(self) -> int:
+        """The number of events overwritten in the buffer before they are exported."""
+        return _ffi_api.EventTraceRecorderGetNumDroppedEvents(self)  # type: ignore  # pylint: disable=no-member
+
+
+class EventTraceExporter:
+    """The background exporter that periodically writes the events recorded
+    since the last export to a new trace file in Chrome Trace Event Format,
+    which can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+    Parameters
+    ----------
+    trace_recorder : EventTraceRecorder
+        The trace recorder to export the events of.
+
+    directory : str
+        The directory to write the trace files in.
+
+    interval : float
+        The export interval in seconds.
+
+    max_num_files : Optional[int]
+        The maximum number of trace files of this exporter kept in the directory,
+        beyond which the oldest files are removed. No limit if it is None.
+    """
+
+    def __init__(
+        self,
+        trace_recorder: EventTraceRecorder,
+        directory: str,
+        interval: float = 60.0,
+        max_num_files: Optional[int] = None,
+    ) -> None:
+        self.trace_recorder = trace_recorder
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.max_num_files = max_num_files
+        self._files: List[Path] = []
+        self._num_exports = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the exporter, after exporting the remaining events."""
+        self._stop_event.set()
+        self._thread.join()
+
+    def export(self) -> Optional[Path]:
+        """Export the events recorded since the last export to a new trace file.
+        Return the path of the file, or None if there is no new event."""
+        events_json = self.trace_recorder.export_json()
+        if events_json == "[]":
+            return None
+        # The process id distinguishes the exporters of different processes.
+        path = self.directory / f"trace-{os.getpid()}-{int(time.time())}-{self._num_exports}.json"
+        self._num_exports += 1
+        path.write_text(events_json, encoding="utf-8")
+        self._files.append(path)
+        if self.max_num_files is not None:
+            while len(self._files) > self.max_num_files:
+                self._files.pop(0).unlink(missing_ok=True)
+        return path
+
+    def _run(self) -> None:
+        num_dropped_events = 0
+        stopped = False
+        while not stopped:
+            # Export the remaining events once more after stopped.
+            stopped = self._stop_event.wait(self.interval)
+            self.export()
+            if self.trace_recorder.num_dropped_events > num_dropped_events:
+                num_dropped_events = self.trace_recorder.num_dropped_events
+                logger.warning(
+                    "%d trace events are dropped before export in total. Please increase "
+                    "the trace capacity, or decrease the export interval or the sample rate.",
+                    num_dropped_events,
+                )
@@ -45,6 +45,11 @@ class Request(Object):
             generation_config.asjson(),
         )
 
+    @property
+    def request_id(self) -> str:
+        """The unique identifier of the request."""
+        return _ffi_api.RequestGetRequestId(self)  # type: ignore  # pylint: disable=no-member
+
     @property
     def inputs(self) -> List[Data]:
         """The inputs of the request."""
@@ -0,0 +1,139 @@
+"""The response cache of the deterministic requests in MLC LLM serving."""
+
+import collections
+import copy
+import dataclasses
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from . import data
+from .config import GenerationConfig
+from .engine_base import CallbackStreamOutput
+
+# The generation config fields which do not affect the generated outputs.
+_SCHEDULING_FIELDS = ("priority", "ttft_deadline_ms")
+# The estimated bytes of a cache entry other than its texts.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+class ResponseCache:
+    """The LRU cache of the generated outputs of deterministic requests,
+    i.e., the requests with zero temperature or a fixed seed.
+
+    The outputs are keyed by the hash of the prompt tokens and the generation
+    config except the scheduling fields, so the prompts which render to the same
+    tokens share the entry. The cache of each engine only holds the outputs of
+    the engine's model. The entries are evicted in the least recently used order
+    when the cache exceeds the number of entries or the number of bytes, and
+    expire after the time to live.
+
+    Parameters
+    ----------
+    max_num_entries : int
+        The maximum number of cached responses.
+
+    max_num_bytes : int
+        The maximum total bytes of the cached responses, estimated from their texts.
+
+    ttl : Optional[float]
+        The time to live of the cached responses in seconds. No expiration if it is None.
+    """
+
+    def __init__(
+        self, max_num_entries: int, max_num_bytes: int, ttl: Optional[float] = None
+    ) -> None:
+        self.max_num_entries = max_num_entries
+        self.max_num_bytes = max_num_bytes
+        self.ttl = ttl
+        # The key -> (outputs, number of bytes, insertion time) in LRU order.
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self.num_bytes = 0
+        self.num_hits = 0
+        self.num_misses = 0
+        self.num_evictions = 0
+
+    @staticmethod
+    def get_key(
+        prompts: Union[str, Sequence[int], np.ndarray, List[Any]],
+        generation_config: GenerationConfig,
+    ) -> Optional[str]:
+        """Get the cache key of a request, or None if the request is not cacheable,
+        which is non-deterministic or has image inputs."""
+        if generation_config.temperature != 0.0 and generation_config.seed is None:
+            return None
+        hasher = hashlib.sha256()
+        if isinstance(prompts, (str, np.ndarray, data.Data)) or (
+            len(prompts) > 0 and isinstance(prompts[0], int)
+        ):
+            prompts = [prompts]
+        for prompt in prompts:
+            if isinstance(prompt, str):
+                prompt_bytes = b"s" + prompt.encode("utf-8")
+            elif isinstance(prompt, data.TokenData):
+                prompt_bytes = b"t" + prompt.token_ids_array.astype(np.int32).tobytes()
+            elif isinstance(prompt, (list, np.ndarray)):
+                prompt_bytes = b"t" + np.asarray(prompt, dtype=np.int32).tobytes()
+            else:
+                return None
+            hasher.update(len(prompt_bytes).to_bytes(8, "little"))
+            hasher.update(prompt_bytes)
+        config = dataclasses.asdict(generation_config)
+        for field in _SCHEDULING_FIELDS:
+            config.pop(field)
+        hasher.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[List[CallbackStreamOutput]]:
+        """Get a copy of the cached outputs of each generation, or None on miss."""
+        if now is None:
+            now = time.monotonic()
+        entry = self._entries.get(key, None)
+        if entry is not None and self.ttl is not None and now - entry[2] > self.ttl:
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.num_misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.num_hits += 1
+        return [copy.copy(output) for output in entry[0]]
+
+    def put(
+        self, key: str, outputs: List[CallbackStreamOutput], now: Optional[float] = None
+    ) -> None:
+        """Cache the complete outputs of each generation of a request."""
+        if now is None:
+            now = time.monotonic()
+        num_bytes = _ENTRY_OVERHEAD_BYTES
+        for output in outputs:
+            num_bytes += len(output.delta_text.encode("utf-8"))
+            if output.delta_logprob_json_strs is not None:
+                num_bytes += sum(len(logprob) for logprob in output.delta_logprob_json_strs)
+        if num_bytes > self.max_num_bytes or self.max_num_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = ([copy.copy(output) for output in outputs], num_bytes, now)
+        self.num_bytes += num_bytes
+        while len(self._entries) > self.max_num_entries or self.num_bytes > self.max_num_bytes:
+            self._remove(next(iter(self._entries)))
+            self.num_evictions += 1
+
+    def metrics(self) -> Dict[str, int]:
+        """The cache metrics, with the number of hits, misses and evictions,
+        and the current number of entries and bytes."""
+        return {
+            "num_hits": self.num_hits,
+            "num_misses": self.num_misses,
+            "num_evictions": self.num_evictions,
+            "num_entries": len(self._entries),
+            "num_bytes": self.num_bytes,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, num_bytes, _ = self._entries.pop(key)
+        self.num_bytes -= num_bytes
@@ -1,4 +1,9 @@
 """The server related data structure and tools in MLC LLM serve."""
 
+from .admission_control import AdmissionController
+from .batch_manager import BatchManager
+from .engine_pool import EnginePool, InsufficientEngineMemoryError
+from .multi_process import EngineHost, FrontendAsyncMLCEngine
 from .popen_server import PopenServer
 from .server_context import ServerContext
+from .shared_memory_ring import SharedMemoryRing
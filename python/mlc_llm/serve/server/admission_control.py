@@ -0,0 +1,136 @@
+"""The admission control of the server, which rejects new requests
+when the engine waiting queue is too long to serve them in time."""
+
+import math
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from ..engine import AsyncMLCEngine
+
+
+class AdmissionController:
+    """The admission controller of an engine served by the server.
+
+    A new request is rejected when the number of requests waiting for
+    prefill in the engine reaches `max_num_waiting_requests`, or when
+    the estimated delay for the engine to start the waiting requests
+    exceeds `max_queue_delay`. The rejection is cheap, so that clients
+    (or load balancers) can quickly retry on other servers instead of
+    stacking latency in this one.
+
+    The queue delay is the total prompt length of the waiting requests
+    multiplied by the recent engine time spent per prompt token, which is
+    measured from the engine runtime statistics over a sliding window.
+    The engine time includes both prefill and decode, so that the estimate
+    accounts for the decode steps of running requests interleaving with
+    the prefill of waiting requests.
+
+    Parameters
+    ----------
+    max_num_waiting_requests : Optional[int]
+        The maximum number of requests waiting for prefill in the engine.
+        No limit if it is None.
+
+    max_queue_delay : Optional[float]
+        The maximum estimated queue delay in seconds. No limit if it is None.
+
+    stats_window : float
+        The minimum time span in seconds of the engine statistics
+        samples used to measure the recent engine throughput.
+    """
+
+    def __init__(
+        self,
+        max_num_waiting_requests: Optional[int] = None,
+        max_queue_delay: Optional[float] = None,
+        stats_window: float = 5.0,
+    ) -> None:
+        self.max_num_waiting_requests = max_num_waiting_requests
+        self.max_queue_delay = max_queue_delay
+        self.stats_window = stats_window
+        # The last engine statistics sample in (time, total prompt tokens, total engine time).
+        self._last_sample: Optional[Tuple[float, float, float]] = None
+        # The smoothed engine time in seconds spent per prompt token.
+        self._seconds_per_prompt_token: Optional[float] = None
+
+    def update_throughput(self, stats: Dict[str, float], now: Optional[float] = None) -> None:
+        """Update the recent engine throughput with the given engine runtime statistics.
+
+        Parameters
+        ----------
+        stats : Dict[str, float]
+            The engine runtime statistics returned by `AsyncMLCEngine.stats`.
+
+        now : Optional[float]
+            The time of the statistics. The current time is used if not given.
+        """
+        if "total_prefill_tokens" not in stats:
+            # The engine is not loaded yet.
+            return
+        if now is None:
+            now = time.monotonic()
+        num_tokens = float(stats["total_prefill_tokens"])
+        engine_time = stats["engine_total_prefill_time"] + stats["engine_total_decode_time"]
+        if (
+            self._last_sample is None
+            or num_tokens < self._last_sample[1]
+            or engine_time < self._last_sample[2]
+        ):
+            # Start over when the statistics are reset.
+            self._last_sample = (now, num_tokens, engine_time)
+            return
+        last_time, last_num_tokens, last_engine_time = self._last_sample
+        if now - last_time < self.stats_window:
+            return
+        delta_num_tokens = num_tokens - last_num_tokens
+        delta_engine_time = engine_time - last_engine_time
+        if delta_num_tokens == 0 and delta_engine_time > 0:
+            # The prompt tokens are counted when requests finish.
+            # Extend the window until some request finishes.
+            return
+        if delta_num_tokens > 0:
+            seconds_per_prompt_token = delta_engine_time / delta_num_tokens
+            self._seconds_per_prompt_token = (
+                seconds_per_prompt_token
+                if self._seconds_per_prompt_token is None
+                else (self._seconds_per_prompt_token + seconds_per_prompt_token) / 2
+            )
+        self._last_sample = (now, num_tokens, engine_time)
+
+    def estimate_queue_delay(self, num_waiting_prompt_tokens: int) -> Optional[float]:
+        """Estimate the delay in seconds for the engine to start the waiting requests.
+        Return None if the engine throughput is not measured yet."""
+        if self._seconds_per_prompt_token is None:
+            return None
+        return num_waiting_prompt_tokens * self._seconds_per_prompt_token
+
+    def check(self, async_engine: "AsyncMLCEngine") -> Optional[int]:
+        """Check if a new request can be admitted to the given engine.
+
+        Parameters
+        ----------
+        async_engine : AsyncMLCEngine
+            The engine to admit the new request.
+
+        Returns
+        -------
+        retry_after : Optional[int]
+            None if the request is admitted. Otherwise, the number of
+            seconds the client is suggested to wait before retrying.
+        """
+        self.update_throughput(async_engine.stats())
+        num_waiting_requests = len(async_engine.state.async_waiting_prompt_lengths)
+        queue_delay = self.estimate_queue_delay(async_engine.state.async_num_waiting_prompt_tokens)
+        if (
+            self.max_num_waiting_requests is not None
+            and num_waiting_requests >= self.max_num_waiting_requests
+        ):
+            return max(1, math.ceil(queue_delay or 0))
+        if (
+            self.max_queue_delay is not None
+            and queue_delay is not None
+            and queue_delay > self.max_queue_delay
+        ):
+            return max(1, math.ceil(queue_delay - self.max_queue_delay))
+        return None
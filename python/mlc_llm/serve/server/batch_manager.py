@@ -0,0 +1,501 @@
+"""The offline batch API of the server, which runs the requests in an uploaded
+JSONL file through the engine and writes the results to an output JSONL file."""
+
+import asyncio
+import json
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from mlc_llm.protocol import error_protocol
+from mlc_llm.protocol.openai_api_protocol import (
+    BatchObject,
+    BatchRequest,
+    ChatCompletionRequest,
+    ChatCompletionResponse,
+    CompletionRequest,
+    CompletionResponse,
+    FileObject,
+)
+from mlc_llm.support import logging
+
+from .. import engine_utils
+from ..engine import AsyncMLCEngine
+from .engine_pool import InsufficientEngineMemoryError
+
+logger = logging.getLogger(__name__)
+
+# The ids of files and batches, which are also their file names.
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+# The batch statuses in which the batch is run (or resumed) by the manager.
+_RUNNING_STATUSES = ("validating", "in_progress", "finalizing")
+# The size in bytes of the chunks in which the uploaded files are copied to disk.
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class BatchManager:
+    """The manager of the uploaded files and the batches, which are stored in a
+    directory so that the unfinished batches are resumed when the server restarts.
+
+    A batch runs the requests in its input file through the engine with bounded
+    concurrency, so that the engine is kept at its maximum batch size without
+    flooding its waiting queue. The input file is read as a stream in a worker
+    thread, in windows of `sort_window_size` requests. The requests in each window
+    are sorted by prompt length, so that the requests running together have similar
+    lengths, while only a bounded number of requests are held in memory. The requests
+    are not streamed, and each result is appended to the output file as soon as the
+    request finishes. When a batch is resumed, the requests whose results are
+    already in the output file are skipped.
+
+    The requests that do not specify `priority` get priority -1, so that the online
+    requests are scheduled ahead of the batch requests on the same engine.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to store the files and the batches in.
+
+    load_engine : Callable[[Optional[str]], Awaitable[Optional[AsyncMLCEngine]]]
+        The function that gets the async engine of the requested model.
+
+    max_concurrency : int
+        The maximum number of requests of a batch running in the engine at the same time.
+
+    sort_window_size : int
+        The number of requests read from the input file at a time and sorted by prompt length.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        load_engine: Callable[[Optional[str]], Awaitable[Optional[AsyncMLCEngine]]],
+        max_concurrency: int = 256,
+        sort_window_size: int = 4096,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_concurrency = max_concurrency
+        self.sort_window_size = sort_window_size
+        self._load_engine = load_engine
+        (self.directory / "files").mkdir(parents=True, exist_ok=True)
+        (self.directory / "batches").mkdir(parents=True, exist_ok=True)
+        self._batches: Dict[str, BatchObject] = {}
+        for path in (self.directory / "batches").glob("*.json"):
+            batch = BatchObject.model_validate_json(path.read_text(encoding="utf-8"))
+            self._batches[batch.id] = batch
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._resumed = False
+
+    ################ files ################
+
+    def create_file(self, filename: str, purpose: str, content: bytes) -> FileObject:
+        """Store a file of the given content."""
+        file = FileObject(
+            id=f"file-{engine_utils.random_uuid()}",
+            bytes=len(content),
+            filename=filename,
+            purpose=purpose,
+        )
+        self.get_file_content_path(file.id).write_bytes(content)
+        self._save_file(file)
+        return file
+
+    async def upload_file(self, filename: str, purpose: str, stream: BinaryIO) -> FileObject:
+        """Store an uploaded file by copying the stream to disk in chunks in a worker
+        thread, so that neither the whole file is held in memory nor the event loop
+        is blocked."""
+        file_id = f"file-{engine_utils.random_uuid()}"
+        content_path = self.get_file_content_path(file_id)
+
+        def _copy() -> int:
+            with open(content_path, "wb") as content_file:
+                shutil.copyfileobj(stream, content_file, _UPLOAD_CHUNK_SIZE)
+                return content_file.tell()
+
+        num_bytes = await asyncio.get_running_loop().run_in_executor(None, _copy)
+        file = FileObject(id=file_id, bytes=num_bytes, filename=filename, purpose=purpose)
+        self._save_file(file)
+        return file
+
+    def get_file(self, file_id: str) -> Optional[FileObject]:
+        """Get the file of the given id, or None if it does not exist."""
+        if not _ID_PATTERN.match(file_id):
+            return None
+        path = self.directory / "files" / f"{file_id}.json"
+        if not path.exists():
+            return None
+        return FileObject.model_validate_json(path.read_text(encoding="utf-8"))
+
+    def get_file_content_path(self, file_id: str) -> Path:
+        """Get the path of the content of the file of the given id."""
+        assert _ID_PATTERN.match(file_id)
+        return self.directory / "files" / f"{file_id}.jsonl"
+
+    def _save_file(self, file: FileObject) -> None:
+        path = self.directory / "files" / f"{file.id}.json"
+        path.write_text(file.model_dump_json(), encoding="utf-8")
+
+    ################ batches ################
+
+    def create_batch(self, request: BatchRequest) -> BatchObject:
+        """Create a batch and start running it.
+
+        Raises
+        ------
+        e : BadRequestError
+            BadRequestError is raised when the input file does not exist.
+        """
+        if self.get_file(request.input_file_id) is None:
+            raise error_protocol.BadRequestError(
+                f'The input file "{request.input_file_id}" does not exist.'
+            )
+        batch_id = f"batch_{engine_utils.random_uuid()}"
+        output_file = self.create_file(f"{batch_id}_output.jsonl", "batch_output", b"")
+        batch = BatchObject(
+            id=batch_id,
+            endpoint=request.endpoint,
+            input_file_id=request.input_file_id,
+            completion_window=request.completion_window,
+            output_file_id=output_file.id,
+            metadata=request.metadata,
+        )
+        self._batches[batch.id] = batch
+        self._save_batch(batch)
+        self._start(batch)
+        return batch
+
+    def get_batch(self, batch_id: str) -> Optional[BatchObject]:
+        """Get the batch of the given id, or None if it does not exist."""
+        return self._batches.get(batch_id, None)
+
+    def list_batches(self) -> List[BatchObject]:
+        """List the batches, the most recently created first."""
+        return sorted(self._batches.values(), key=lambda batch: batch.created_at, reverse=True)
+
+    def cancel_batch(self, batch_id: str) -> Optional[BatchObject]:
+        """Cancel the batch of the given id. The results of the finished requests
+        are kept in the output file. Return None if the batch does not exist."""
+        batch = self._batches.get(batch_id, None)
+        if batch is None or batch.status not in _RUNNING_STATUSES:
+            return batch
+        task = self._tasks.get(batch_id, None)
+        if task is None:
+            self._set_cancelled(batch)
+        else:
+            batch.status = "cancelling"
+            self._save_batch(batch)
+            task.cancel()
+        return batch
+
+    def resume(self) -> None:
+        """Resume the batches which were running when the server stopped. It is invoked
+        when the server starts, takes effect only once, and should be invoked in the
+        event loop."""
+        if self._resumed:
+            return
+        self._resumed = True
+        for batch in self._batches.values():
+            if batch.status in _RUNNING_STATUSES and batch.id not in self._tasks:
+                logger.info('Resuming batch "%s"', batch.id)
+                self._start(batch)
+            elif batch.status == "cancelling":
+                self._set_cancelled(batch)
+
+    def _save_batch(self, batch: BatchObject) -> None:
+        path = self.directory / "batches" / f"{batch.id}.json"
+        path.write_text(batch.model_dump_json(), encoding="utf-8")
+
+    def _set_cancelled(self, batch: BatchObject) -> None:
+        batch.status = "cancelled"
+        batch.cancelled_at = int(time.time())
+        self._update_output_file_size(batch)
+        self._save_batch(batch)
+
+    def _update_output_file_size(self, batch: BatchObject) -> None:
+        assert batch.output_file_id is not None
+        output_file = self.get_file(batch.output_file_id)
+        assert output_file is not None
+        output_file.bytes = self.get_file_content_path(output_file.id).stat().st_size
+        self._save_file(output_file)
+
+    def _start(self, batch: BatchObject) -> None:
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks[batch.id] = task
+
+        def _on_done(_task: asyncio.Task) -> None:
+            self._tasks.pop(batch.id, None)
+            # The task may be cancelled before it starts running.
+            if batch.status == "cancelling":
+                self._set_cancelled(batch)
+                logger.info('Cancelled batch "%s"', batch.id)
+
+        task.add_done_callback(_on_done)
+
+    async def _run_batch(self, batch: BatchObject) -> None:
+        try:
+            await self._run_batch_requests(batch)
+        except asyncio.CancelledError:
+            # The batch is marked cancelled when the task is done.
+            pass
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            batch.status = "failed"
+            batch.failed_at = int(time.time())
+            batch.errors = {"object": "list", "data": [{"code": "failed", "message": str(err)}]}
+            self._save_batch(batch)
+            logger.error('Batch "%s" failed: %s', batch.id, err)
+
+    async def _run_batch_requests(  # pylint: disable=too-many-locals,too-many-statements
+        self, batch: BatchObject
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        input_path = self.get_file_content_path(batch.input_file_id)
+        assert batch.output_file_id is not None
+        output_path = self.get_file_content_path(batch.output_file_id)
+        # - Skip the requests whose results are written by the previous runs.
+        # The files are read in worker threads, off the event loop.
+        finished_custom_ids = await loop.run_in_executor(
+            None, self._load_finished_results, batch, output_path
+        )
+        num_requests = await loop.run_in_executor(None, _count_requests, input_path)
+
+        batch.status = "in_progress"
+        if batch.in_progress_at is None:
+            batch.in_progress_at = int(time.time())
+        batch.request_counts.total = num_requests
+        self._save_batch(batch)
+
+        # The requests to run, where None tells a worker that all the requests are read.
+        pending_queue: asyncio.Queue[
+            Optional[Tuple[str, Union[CompletionRequest, ChatCompletionRequest, str]]]
+        ] = asyncio.Queue(maxsize=self.sort_window_size)
+        num_workers = self.max_concurrency
+        throughput = batch.throughput
+        prev_elapsed_time = throughput.elapsed_time
+        tstart = time.monotonic()
+        last_save_time = tstart
+        last_log_time = tstart
+
+        with open(input_path, "r", encoding="utf-8") as input_file, open(
+            output_path, "a", encoding="utf-8"
+        ) as output_file:
+            lines = enumerate(input_file)
+
+            async def _reader() -> None:
+                while True:
+                    window = await loop.run_in_executor(
+                        None, self._read_requests, batch, lines, self.sort_window_size
+                    )
+                    if window is None:
+                        break
+                    window = [item for item in window if item[0] not in finished_custom_ids]
+                    # The longer prompts of the window run first.
+                    window.sort(key=lambda item: _get_prompt_size(item[1]), reverse=True)
+                    for item in window:
+                        await pending_queue.put(item)
+                for _ in range(num_workers):
+                    await pending_queue.put(None)
+
+            async def _worker() -> None:
+                nonlocal last_save_time, last_log_time
+                while True:
+                    item = await pending_queue.get()
+                    if item is None:
+                        return
+                    custom_id, request = item
+                    result, usage = await self._run_request(batch, custom_id, request)
+                    output_file.write(json.dumps(result) + "\n")
+                    output_file.flush()
+                    if result["error"] is None:
+                        batch.request_counts.completed += 1
+                    else:
+                        batch.request_counts.failed += 1
+                    if usage is not None:
+                        throughput.prompt_tokens += usage["prompt_tokens"]
+                        throughput.completion_tokens += usage["completion_tokens"]
+                    now = time.monotonic()
+                    _update_throughput(batch, prev_elapsed_time + now - tstart)
+                    if now - last_save_time >= 1.0:
+                        self._save_batch(batch)
+                        last_save_time = now
+                    if now - last_log_time >= 10.0:
+                        _log_progress(batch)
+                        last_log_time = now
+
+            tasks = [loop.create_task(_reader())]
+            tasks += [loop.create_task(_worker()) for _ in range(num_workers)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # Stop the other tasks when any of them fails or the batch is cancelled.
+                for task in tasks:
+                    task.cancel()
+
+        batch.status = "completed"
+        batch.completed_at = int(time.time())
+        self._update_output_file_size(batch)
+        self._save_batch(batch)
+        _log_progress(batch)
+
+    @staticmethod
+    def _read_requests(
+        batch: BatchObject, lines: Iterator[Tuple[int, str]], max_num_lines: int
+    ) -> Optional[List[Tuple[str, Union[CompletionRequest, ChatCompletionRequest, str]]]]:
+        """Read the requests in the next lines of the input file of the batch, at most
+        `max_num_lines` lines. The request is replaced with the error message if the line
+        is invalid. Return None if all the lines are read. It runs in a worker thread."""
+        request_cls = (
+            ChatCompletionRequest if batch.endpoint == "/v1/chat/completions" else CompletionRequest
+        )
+        requests: List[Tuple[str, Union[CompletionRequest, ChatCompletionRequest, str]]] = []
+        num_lines = 0
+        for line_number, line in lines:
+            num_lines += 1
+            if line.strip() != "":
+                custom_id = f"line-{line_number}"
+                try:
+                    item = json.loads(line)
+                    custom_id = str(item.get("custom_id", custom_id))
+                    url = item.get("url", batch.endpoint)
+                    if url != batch.endpoint:
+                        raise ValueError(f'The url "{url}" differs from the batch endpoint.')
+                    body = dict(item["body"])
+                    body["stream"] = False
+                    body.setdefault("priority", -1)
+                    requests.append((custom_id, request_cls.model_validate(body)))
+                except (KeyError, TypeError, ValueError) as err:
+                    requests.append((custom_id, f"Invalid request: {err}"))
+            if num_lines == max_num_lines:
+                break
+        return requests if num_lines > 0 else None
+
+    @staticmethod
+    def _load_finished_results(batch: BatchObject, output_path: Path) -> Set[str]:
+        """Load the results written in the output file by the previous runs line by line,
+        and recount the batch progress from them. A partially written last line is removed.
+        It runs in a worker thread."""
+        finished_custom_ids: Set[str] = set()
+        batch.request_counts.completed = 0
+        batch.request_counts.failed = 0
+        batch.throughput.prompt_tokens = 0
+        batch.throughput.completion_tokens = 0
+        complete_size = 0
+        with open(output_path, "rb") as output_file:
+            for line in output_file:
+                if not line.endswith(b"\n"):
+                    break
+                complete_size += len(line)
+                result = json.loads(line)
+                finished_custom_ids.add(result["custom_id"])
+                if result["error"] is None:
+                    batch.request_counts.completed += 1
+                    usage = result["response"]["body"]["usage"]
+                    batch.throughput.prompt_tokens += usage["prompt_tokens"]
+                    batch.throughput.completion_tokens += usage["completion_tokens"]
+                else:
+                    batch.request_counts.failed += 1
+        if complete_size < output_path.stat().st_size:
+            with open(output_path, "rb+") as output_file:
+                output_file.truncate(complete_size)
+        return finished_custom_ids
+
+    async def _run_request(  # pylint: disable=protected-access
+        self,
+        batch: BatchObject,
+        custom_id: str,
+        request: Union[CompletionRequest, ChatCompletionRequest, str],
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Run a request to its finish, and return the result line of the output
+        file together with the usage of the request if it succeeds."""
+        result: Dict[str, Any] = {
+            "id": f"batch_req_{engine_utils.random_uuid()}",
+            "custom_id": custom_id,
+            "response": None,
+            "error": None,
+        }
+        if isinstance(request, str):
+            result["error"] = {"code": "invalid_request", "message": request}
+            return result, None
+
+        while True:
+            try:
+                async_engine = await self._load_engine(request.model)
+                break
+            except InsufficientEngineMemoryError as err:
+                if not err.retryable:
+                    result["error"] = {"code": "model_not_loadable", "message": err.args[0]}
+                    return result, None
+                # Wait for some loaded engine to become idle.
+                await asyncio.sleep(1.0)
+        if async_engine is None:
+            result["error"] = {
+                "code": "model_not_found",
+                "message": f'The requested model "{request.model}" is not served.',
+            }
+            return result, None
+
+        try:
+            if isinstance(request, ChatCompletionRequest):
+                request_id = f"chatcmpl-{engine_utils.random_uuid()}"
+                response: Union[ChatCompletionResponse, CompletionResponse] = (
+                    await async_engine._aggregate_chat_completion(request, request_id)
+                )
+            else:
+                request_id = f"cmpl-{engine_utils.random_uuid()}"
+                response = await async_engine._aggregate_completion(request, request_id)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            result["error"] = {"code": "request_failed", "message": str(err)}
+            return result, None
+
+        body = response.model_dump()
+        result["response"] = {"status_code": 200, "request_id": request_id, "body": body}
+        return result, body["usage"]
+
+
+def _count_requests(input_path: Path) -> int:
+    """Count the non-empty lines of the input file without parsing them."""
+    with open(input_path, "rb") as input_file:
+        return sum(1 for line in input_file if line.strip() != b"")
+
+
+def _get_prompt_size(request: Union[CompletionRequest, ChatCompletionRequest, str]) -> int:
+    if isinstance(request, str):
+        return 0
+    prompt_size = engine_utils.get_request_prompt_size(request)
+    return prompt_size if prompt_size is not None else 0
+
+
+def _update_throughput(batch: BatchObject, elapsed_time: float) -> None:
+    throughput = batch.throughput
+    throughput.elapsed_time = elapsed_time
+    if elapsed_time > 0:
+        num_finished = batch.request_counts.completed + batch.request_counts.failed
+        throughput.requests_per_second = num_finished / elapsed_time
+        throughput.completion_tokens_per_second = throughput.completion_tokens / elapsed_time
+
+
+def _log_progress(batch: BatchObject) -> None:
+    counts = batch.request_counts
+    logger.info(
+        'Batch "%s": %d/%d requests finished (%d failed), %.2f requests/s, '
+        "%.2f completion tokens/s",
+        batch.id,
+        counts.completed + counts.failed,
+        counts.total,
+        counts.failed,
+        batch.throughput.requests_per_second,
+        batch.throughput.completion_tokens_per_second,
+    )
+
@@ -0,0 +1,183 @@
+"""The pool of the engines of multiple models, which loads the engines on demand
+and unloads the least recently used ones to stay within a device memory budget."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from mlc_llm.support import logging
+
+from ..engine import AsyncMLCEngine
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientEngineMemoryError(RuntimeError):
+    """The error raised when the engine of a model cannot be loaded within the
+    memory budget. It is retryable when the engines to unload for it to fit are
+    all in use, and not retryable when it exceeds the whole memory budget."""
+
+    def __init__(self, message: str, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class _LoadedEngine:
+    """The engine loaded in the pool, with its estimated memory usage in bytes,
+    the seconds it took to load and the time it was last used."""
+
+    engine: AsyncMLCEngine
+    memory_usage: float
+    load_time: float
+    last_used: float
+
+
+class EnginePool:
+    """The pool of the engines of multiple models within a device memory budget.
+
+    The engine of a model is loaded when the model is requested for the first time.
+    When the engine does not fit in the memory budget, the loaded engines are unloaded
+    in the least recently used order. The last use time of each engine is credited
+    with the time it took to load, so that the engines expensive to reload stay
+    resident longer than the cheap ones used around the same time.
+
+    Parameters
+    ----------
+    models : List[str]
+        The models hosted by the pool.
+
+    create_engine : Callable[[str, float], AsyncMLCEngine]
+        The function that creates the engine of a model within the given device memory
+        budget in bytes, which is the budget left by the other loaded engines.
+        It runs in a worker thread.
+
+    estimate_memory_usage : Callable[[str, float], float]
+        The function that estimates the device memory usage in bytes of the engine
+        of a model within the given device memory budget in bytes without loading it.
+        It is called with the whole memory budget, and runs in a worker thread.
+
+    memory_budget : float
+        The device memory budget in bytes of all the loaded engines.
+
+    min_idle_time : float
+        The seconds since an engine was last requested before it can be unloaded.
+        It covers the requests that got the engine but are still being preprocessed
+        before being added to the engine. An engine with running requests is never unloaded.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        models: List[str],
+        create_engine: Callable[[str, float], AsyncMLCEngine],
+        estimate_memory_usage: Callable[[str, float], float],
+        memory_budget: float,
+        min_idle_time: float = 2.0,
+    ) -> None:
+        self.models = list(models)
+        self.memory_budget = memory_budget
+        self.min_idle_time = min_idle_time
+        self._create_engine = create_engine
+        self._estimate_memory_usage = estimate_memory_usage
+        self._engines: Dict[str, _LoadedEngine] = {}
+        # The estimated memory usage of each model, which is estimated once.
+        self._memory_usages: Dict[str, float] = {}
+        # The lock that serializes the engine loading, created in the event loop.
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    def get_loaded_engine(self, model: str) -> Optional[AsyncMLCEngine]:
+        """Get the engine of the model if it is loaded, without loading it."""
+        loaded = self._engines.get(model, None)
+        return loaded.engine if loaded is not None else None
+
+    def get_loaded_model_list(self) -> List[str]:
+        """Get the list of the models whose engines are loaded."""
+        return list(self._engines.keys())
+
+    def get_memory_usage(self) -> float:
+        """Get the total estimated memory usage in bytes of the loaded engines."""
+        return sum(loaded.memory_usage for loaded in self._engines.values())
+
+    async def acquire(self, model: str) -> AsyncMLCEngine:
+        """Get the engine of the model, and load it if it is not loaded.
+
+        Raises
+        ------
+        e : InsufficientEngineMemoryError
+            InsufficientEngineMemoryError is raised when the engine does not fit in the
+            memory budget unless unloading the engines which are in use, or when the
+            engine exceeds the whole memory budget, in which case it is not retryable.
+        """
+        assert model in self.models, f'Model "{model}" is not hosted in the engine pool.'
+        loaded = self._engines.get(model, None)
+        if loaded is not None:
+            loaded.last_used = time.monotonic()
+            return loaded.engine
+
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            # The engine may have been loaded while waiting for the lock.
+            loaded = self._engines.get(model, None)
+            if loaded is not None:
+                loaded.last_used = time.monotonic()
+                return loaded.engine
+
+            loop = asyncio.get_running_loop()
+            memory_usage = self._memory_usages.get(model, None)
+            if memory_usage is None:
+                memory_usage = await loop.run_in_executor(
+                    None, self._estimate_memory_usage, model, self.memory_budget
+                )
+                self._memory_usages[model] = memory_usage
+            if memory_usage > self.memory_budget:
+                raise InsufficientEngineMemoryError(
+                    f'The estimated memory usage {memory_usage / 1024 / 1024:.2f} MB of model "'
+                    f'{model}" exceeds the memory budget '
+                    f"{self.memory_budget / 1024 / 1024:.2f} MB.",
+                    retryable=False,
+                )
+            models_to_unload = self._select_models_to_unload(memory_usage, time.monotonic())
+            if models_to_unload is None:
+                raise InsufficientEngineMemoryError(
+                    f'Model "{model}" cannot be loaded as the loaded models are all in use.'
+                )
+            for model_to_unload in models_to_unload:
+                unloaded = self._engines.pop(model_to_unload)
+                logger.info('Unloading model "%s"', model_to_unload)
+                await loop.run_in_executor(None, unloaded.engine.terminate)
+
+            # The engine is created within the budget left by the other loaded engines,
+            # which is no less than its estimated memory usage.
+            remaining_budget = self.memory_budget - self.get_memory_usage()
+            tstart = time.monotonic()
+            engine = await loop.run_in_executor(None, self._create_engine, model, remaining_budget)
+            tfinish = time.monotonic()
+            self._engines[model] = _LoadedEngine(engine, memory_usage, tfinish - tstart, tfinish)
+            logger.info('Loaded model "%s" in %.2f seconds', model, tfinish - tstart)
+            return engine
+
+    def _select_models_to_unload(self, memory_usage: float, now: float) -> Optional[List[str]]:
+        """Select the loaded models to unload so that an engine of the given memory usage fits.
+        Return None if it cannot fit even when all the idle engines are unloaded."""
+        free_memory = self.memory_budget - self.get_memory_usage()
+        models_to_unload: List[str] = []
+        for model, loaded in sorted(
+            self._engines.items(), key=lambda item: item[1].last_used + item[1].load_time
+        ):
+            if free_memory >= memory_usage:
+                break
+            if len(loaded.engine.state.async_streams) > 0:
+                continue
+            if now - loaded.last_used < self.min_idle_time:
+                continue
+            models_to_unload.append(model)
+            free_memory += loaded.memory_usage
+        return models_to_unload if free_memory >= memory_usage else None
+
+    def terminate(self) -> None:
+        """Terminate all the loaded engines."""
+        for loaded in self._engines.values():
+            loaded.engine.terminate()
+        self._engines.clear()
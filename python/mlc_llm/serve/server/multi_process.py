@@ -0,0 +1,461 @@
+"""The multi-process serving, where multiple front-end processes serve HTTP and
+share a single engine that runs in the engine process.
+
+Each front-end process runs the HTTP server, the request validation, the tokenization
+and the response encoding, which are bound by the Python interpreter. The engine process
+runs the engine alone. The front-ends submit the tokenized requests to the engine
+process through a queue, and the engine process streams the delta outputs of each
+front-end's requests back through a shared memory ring."""
+
+import collections
+import concurrent.futures
+import dataclasses
+import json
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from mlc_llm.protocol import error_protocol
+from mlc_llm.protocol.conversation_protocol import Conversation
+from mlc_llm.support import logging
+from mlc_llm.tokenizer import Tokenizer
+
+from .. import data, engine_base
+from ..config import GenerationConfig
+from ..engine import AsyncCompletion, AsyncMLCEngine, Chat, MLCEngine
+from ..request import Request
+from ..response_cache import ResponseCache
+from .shared_memory_ring import SharedMemoryRing
+
+logger = logging.getLogger(__name__)
+
+# The tags of the messages in the rings, which are the delta outputs of requests,
+# the engine status, and the requests aborted as the front-end falls behind.
+_OUTPUT_MESSAGE = b"O"
+_STATUS_MESSAGE = b"S"
+_ABORT_MESSAGE = b"A"
+# The interval in seconds to retry writing the pending messages into the rings.
+_PENDING_RETRY_INTERVAL = 0.001
+
+
+@dataclasses.dataclass
+class FrontendSpec:  # pylint: disable=too-many-instance-attributes
+    """The specification of a front-end process to connect to the engine process,
+    which is passed to the front-end process when it starts."""
+
+    frontend_id: int
+    model_path: str
+    conv_template: Conversation
+    model_config_dicts: List[Dict[str, Any]]
+    max_input_sequence_length: int
+    submit_queue: Any
+    ring: SharedMemoryRing
+
+
+class EngineHost:
+    """The host of the engine in the engine process, which adds the requests
+    submitted by the front-end processes to the engine, and streams the delta
+    outputs back to the front-end process of each request.
+
+    Parameters
+    ----------
+    engine : MLCEngine
+        The engine to host, whose delta outputs are consumed by this host.
+
+    num_frontends : int
+        The number of front-end processes.
+
+    mp_context : Any
+        The multiprocessing context to create the submission queue and the rings in.
+
+    ring_capacity : int
+        The capacity in bytes of the ring of each front-end.
+
+    status_interval : float
+        The interval in seconds to broadcast the engine statistics and metrics
+        to the front-ends.
+
+    max_pending_bytes : int
+        The maximum bytes of the output messages of each front-end that wait for
+        space in its ring. When a front-end stops reading and its pending messages
+        exceed the limit, its requests are aborted and the messages are dropped,
+        so that a stalled front-end never blocks the outputs of the others.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        engine: MLCEngine,
+        num_frontends: int,
+        mp_context: Any,
+        ring_capacity: int = 16 * 1024 * 1024,
+        status_interval: float = 0.1,
+        max_pending_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.engine = engine
+        self.status_interval = status_interval
+        self.max_pending_bytes = max_pending_bytes
+        self.submit_queue = mp_context.Queue()
+        self.rings = [SharedMemoryRing(ring_capacity, mp_context) for _ in range(num_frontends)]
+        # The front-end id and the front-end request id of each engine request,
+        # and the number of unfinished generations of each engine request.
+        self._requests: Dict[str, Tuple[int, str]] = {}
+        self._num_unfinished_generations: Dict[str, int] = {}
+        # The messages of each front-end waiting for space in its ring, their total bytes,
+        # and the front-end request ids that have outputs in them.
+        self._pending: List[Deque[bytes]] = [collections.deque() for _ in range(num_frontends)]
+        self._pending_bytes: List[int] = [0] * num_frontends
+        self._pending_request_ids: List[Set[str]] = [set() for _ in range(num_frontends)]
+        self._stopped = False
+
+    def get_frontend_spec(self, frontend_id: int) -> FrontendSpec:
+        """Get the specification of the front-end process of the given id."""
+        return FrontendSpec(
+            frontend_id=frontend_id,
+            model_path=self.engine.model_path,
+            conv_template=self.engine.conv_template,
+            model_config_dicts=self.engine.model_config_dicts,
+            max_input_sequence_length=self.engine.max_input_sequence_length,
+            submit_queue=self.submit_queue,
+            ring=self.rings[frontend_id],
+        )
+
+    def run(self) -> None:
+        """Run the loop that streams back the delta outputs until the host is stopped.
+        The requests are submitted to the engine in a background thread."""
+        submit_thread = threading.Thread(target=self._submit_loop, daemon=True)
+        submit_thread.start()
+        last_status_time = 0.0
+        while not self._stopped:
+            has_pending = any(len(pending) > 0 for pending in self._pending)
+            try:
+                delta_outputs = self.engine.state.sync_output_queue.get(
+                    timeout=_PENDING_RETRY_INTERVAL if has_pending else self.status_interval
+                )
+                self._dispatch(delta_outputs)
+            except queue.Empty:
+                pass
+            if has_pending:
+                for frontend_id in range(len(self.rings)):
+                    self._flush(frontend_id)
+            if time.monotonic() - last_status_time >= self.status_interval:
+                self._broadcast_status()
+                last_status_time = time.monotonic()
+
+    def stop(self) -> None:
+        """Stop the host. It can be invoked from any thread."""
+        self.submit_queue.put(("stop",))
+
+    def close(self) -> None:
+        """Free the rings after the front-end processes exit."""
+        for ring in self.rings:
+            ring.close()
+
+    def _submit_loop(self) -> None:
+        while True:
+            message = self.submit_queue.get()
+            if message[0] == "add":
+                _, frontend_id, request_id, token_ids_list, generation_config_json = message
+                engine_request_id = f"{frontend_id}-{request_id}"
+                generation_config = GenerationConfig.from_json(generation_config_json)
+                # Record the request before adding it, so that its outputs are never missed.
+                self._requests[engine_request_id] = (frontend_id, request_id)
+                self._num_unfinished_generations[engine_request_id] = generation_config.n
+                self.engine._ffi["add_request"](  # pylint: disable=protected-access
+                    Request(
+                        engine_request_id,
+                        [data.TokenData(token_ids) for token_ids in token_ids_list],
+                        generation_config,
+                    )
+                )
+            elif message[0] == "abort":
+                _, frontend_id, request_id = message
+                engine_request_id = f"{frontend_id}-{request_id}"
+                self._requests.pop(engine_request_id, None)
+                self._num_unfinished_generations.pop(engine_request_id, None)
+                self.engine.abort(engine_request_id)
+            elif message[0] == "debug":
+                self.engine._debug_call_func_on_all_worker(  # pylint: disable=protected-access
+                    message[1]
+                )
+            else:
+                assert message[0] == "stop"
+                self._stopped = True
+                return
+
+    def _dispatch(self, delta_outputs: data.RequestStreamOutputBatch) -> None:
+        """Group the delta outputs by front-end, and write them into the rings
+        without blocking. The messages that do not fit are kept pending."""
+        frontend_outputs: Dict[int, List[Any]] = {}
+        for engine_request_id, stream_outputs in delta_outputs.unpack():
+            request = self._requests.get(engine_request_id, None)
+            if request is None:
+                continue
+            frontend_id, request_id = request
+            outputs = []
+            for stream_output in stream_outputs:
+                outputs.append(
+                    [
+                        stream_output.delta_token_ids,
+                        stream_output.delta_logprob_json_strs,
+                        stream_output.finish_reason,
+                        stream_output.delta_text,
+                        (
+                            dataclasses.astuple(stream_output.engine_timing)
+                            if stream_output.engine_timing is not None
+                            else None
+                        ),
+                    ]
+                )
+            num_finished = sum(output[2] is not None for output in outputs)
+            if num_finished > 0:
+                # The request may have been aborted concurrently by the submission thread.
+                num_unfinished = (
+                    self._num_unfinished_generations.get(engine_request_id, 0) - num_finished
+                )
+                if num_unfinished <= 0:
+                    self._requests.pop(engine_request_id, None)
+                    self._num_unfinished_generations.pop(engine_request_id, None)
+                else:
+                    self._num_unfinished_generations[engine_request_id] = num_unfinished
+            frontend_outputs.setdefault(frontend_id, []).append([request_id, outputs])
+
+        for frontend_id, outputs in frontend_outputs.items():
+            self._pending_request_ids[frontend_id].update(request_id for request_id, _ in outputs)
+            message = _OUTPUT_MESSAGE + json.dumps(outputs).encode("utf-8")
+            self._pending[frontend_id].append(message)
+            self._pending_bytes[frontend_id] += len(message)
+            if self._pending_bytes[frontend_id] > self.max_pending_bytes:
+                self._abort_frontend_requests(frontend_id)
+            self._flush(frontend_id)
+
+    def _flush(self, frontend_id: int) -> None:
+        """Write the pending messages of the front-end into its ring in order,
+        until the ring is full."""
+        pending = self._pending[frontend_id]
+        while len(pending) > 0 and self.rings[frontend_id].write(pending[0], block=False):
+            self._pending_bytes[frontend_id] -= len(pending.popleft())
+        if len(pending) == 0:
+            self._pending_request_ids[frontend_id].clear()
+
+    def _abort_frontend_requests(self, frontend_id: int) -> None:
+        """Abort all the requests of the front-end which falls behind, and replace its
+        pending messages with the abort message of the requests, so that the front-end
+        fails the requests once it resumes reading."""
+        request_ids = self._pending_request_ids[frontend_id]
+        for engine_request_id, (request_frontend_id, request_id) in list(self._requests.items()):
+            if request_frontend_id == frontend_id:
+                request_ids.add(request_id)
+                # Stop dispatching the outputs of the request, which is aborted
+                # in the submission thread.
+                self._requests.pop(engine_request_id, None)
+                self._num_unfinished_generations.pop(engine_request_id, None)
+                self.submit_queue.put(("abort", frontend_id, request_id))
+        logger.warning(
+            "Front-end %d falls behind reading the engine outputs. Aborting its %d requests.",
+            frontend_id,
+            len(request_ids),
+        )
+        message = _ABORT_MESSAGE + json.dumps(sorted(request_ids)).encode("utf-8")
+        self._pending[frontend_id].clear()
+        self._pending[frontend_id].append(message)
+        self._pending_bytes[frontend_id] = len(message)
+
+    def _broadcast_status(self) -> None:
+        status = json.dumps(
+            {
+                "stats": self.engine._ffi["stats"](),  # pylint: disable=protected-access
+                "metrics": self.engine._ffi["metrics"](),  # pylint: disable=protected-access
+            }
+        ).encode("utf-8")
+        for ring in self.rings:
+            # The status is dropped rather than waited for, so that a front-end which
+            # stops reading does not block the host.
+            ring.write(_STATUS_MESSAGE + status, block=False)
+
+
+class _DecodedStreamOutputBatch:  # pylint: disable=too-few-public-methods
+    """The delta outputs decoded from a ring message, which are unpacked
+    in the same way as data.RequestStreamOutputBatch."""
+
+    def __init__(self, outputs: List[Tuple[str, List[data.SingleRequestStreamOutput]]]) -> None:
+        self.outputs = outputs
+
+    def unpack(self) -> List[Tuple[str, List[data.SingleRequestStreamOutput]]]:
+        """Return the request id and the output instances of each request."""
+        return self.outputs
+
+
+def _decode_outputs(payload: bytes) -> _DecodedStreamOutputBatch:
+    outputs = []
+    for request_id, request_outputs in json.loads(payload):
+        stream_outputs = []
+        for delta_token_ids, logprob_json_strs, finish_reason, delta_text, timing in (
+            request_outputs
+        ):
+            stream_outputs.append(
+                data.SingleRequestStreamOutput(
+                    delta_token_ids=delta_token_ids,
+                    delta_logprob_json_strs=logprob_json_strs,
+                    finish_reason=finish_reason,
+                    delta_text=delta_text,
+                    engine_timing=(
+                        data.RequestEngineTiming(*timing) if timing is not None else None
+                    ),
+                )
+            )
+        outputs.append((request_id, stream_outputs))
+    return _DecodedStreamOutputBatch(outputs)
+
+
+class FrontendAsyncMLCEngine(AsyncMLCEngine):
+    """The AsyncMLCEngine in a front-end process, which submits the requests to
+    the shared engine in the engine process and receives the delta outputs from
+    the ring of this front-end. It preprocesses the requests and postprocesses
+    the outputs in this process in the same way as AsyncMLCEngine.
+
+    Only the requests with token inputs are supported.
+
+    Parameters
+    ----------
+    spec : FrontendSpec
+        The specification of this front-end given by the engine process.
+
+    Checkout AsyncMLCEngine for the docstring of the other parameters.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        spec: FrontendSpec,
+        *,
+        enable_tracing: bool = False,
+        trace_capacity: int = 1 << 20,
+        trace_sample_rate: float = 1.0,
+        trace_export_dir: Optional[str] = None,
+        trace_export_interval: float = 60.0,
+        enable_stream_coalescing: bool = True,
+        enable_fast_stream_encoding: bool = True,
+        preprocess_num_threads: int = 4,
+        preprocess_inline_threshold: int = 8192,
+        response_cache_max_num_entries: int = 0,
+        response_cache_max_num_bytes: int = 256 * 1024 * 1024,
+        response_cache_ttl: Optional[float] = None,
+    ) -> None:
+        self.conv_template = spec.conv_template
+        self.model_config_dicts = spec.model_config_dicts
+        self.max_input_sequence_length = spec.max_input_sequence_length
+        self.model_path = spec.model_path
+        self.tokenizer = Tokenizer(spec.model_path)
+        self.state = engine_base.EngineState(
+            enable_tracing,
+            trace_capacity,
+            trace_sample_rate,
+            trace_export_dir,
+            trace_export_interval,
+        )
+        self.enable_stream_coalescing = enable_stream_coalescing
+        self.enable_fast_stream_encoding = enable_fast_stream_encoding
+        self.preprocess_inline_threshold = preprocess_inline_threshold
+        self._preprocess_executor: Optional[concurrent.futures.ThreadPoolExecutor] = (
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=preprocess_num_threads, thread_name_prefix="mlc_llm_preprocess"
+            )
+            if preprocess_num_threads > 0
+            else None
+        )
+        # The response cache of each front-end holds the responses it has served.
+        self.response_cache: Optional[ResponseCache] = (
+            ResponseCache(
+                response_cache_max_num_entries, response_cache_max_num_bytes, response_cache_ttl
+            )
+            if response_cache_max_num_entries > 0
+            else None
+        )
+        self.chat = Chat(weakref.ref(self))
+        self.completions = AsyncCompletion(weakref.ref(self))
+
+        self._frontend_id = spec.frontend_id
+        self._submit_queue = spec.submit_queue
+        self._ring = spec.ring
+        # The latest engine statistics and metrics in JSON strings.
+        self._status = {"stats": "{}", "metrics": "{}"}
+        self._ffi = {
+            "add_request": self._submit_request,
+            "abort_request": lambda request_id: self._submit_queue.put(
+                ("abort", self._frontend_id, request_id)
+            ),
+            "stats": lambda: self._status["stats"],
+            "metrics": lambda: self._status["metrics"],
+            "debug_call_func_on_all_worker": lambda func_name: self._submit_queue.put(
+                ("debug", func_name)
+            ),
+        }
+        self._terminated = False
+        self._receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self._receive_thread.start()
+
+    def terminate(self):
+        """Terminate the engine."""
+        self._terminated = True
+        self._receive_thread.join()
+        self._ring.close()
+        if self._preprocess_executor is not None:
+            self._preprocess_executor.shutdown(wait=True)
+        if self.state.trace_exporter is not None:
+            self.state.trace_exporter.stop()
+
+    def _submit_request(self, request: Request) -> None:
+        token_ids_list = []
+        for input_data in request.inputs:
+            if not isinstance(input_data, data.TokenData):
+                # Report the error in the stream, which aborts the request.
+                self.state.async_streams[request.request_id].push(
+                    error_protocol.BadRequestError(
+                        f"Input data of type {type(input_data).__name__} is not supported "
+                        "when serving with multiple front-end processes."
+                    )
+                )
+                return
+            token_ids_list.append(input_data.token_ids_array)
+        self._submit_queue.put(
+            (
+                "add",
+                self._frontend_id,
+                request.request_id,
+                token_ids_list,
+                request.generation_config.asjson(),
+            )
+        )
+
+    def _receive_loop(self) -> None:
+        """Receive the messages from the ring and pass the delta outputs
+        to the request stream callback, until the engine is terminated."""
+        while not self._terminated:
+            if not self._ring.wait(timeout=0.1):
+                continue
+            for message in self._ring.read_all():
+                if message[:1] == _OUTPUT_MESSAGE:
+                    # Decode the outputs in this thread, off the event loop.
+                    self.state._async_request_stream_callback(  # pylint: disable=protected-access
+                        _decode_outputs(message[1:])
+                    )
+                elif message[:1] == _ABORT_MESSAGE:
+                    self.state.async_event_loop.call_soon_threadsafe(
+                        self._fail_aborted_requests, json.loads(message[1:])
+                    )
+                else:
+                    self._status = json.loads(message[1:])
+
+    def _fail_aborted_requests(self, request_ids: List[str]) -> None:
+        """Report the error in the streams of the requests aborted by the engine
+        process as this front-end fell behind reading the outputs."""
+        for request_id in request_ids:
+            stream = self.state.async_streams.get(request_id, None)
+            if stream is not None:
+                stream.push(
+                    RuntimeError(
+                        "The request is aborted as the front-end fell behind "
+                        "reading the engine outputs."
+                    )
+                )
@@ -32,7 +32,30 @@ class PopenServer:  # pylint: disable=too-many-instance-attributes
         gpu_memory_utilization: Optional[float] = None,
         speculative_mode: SpeculativeMode = SpeculativeMode.DISABLE,
         spec_draft_length: int = 4,
+        adaptive_spec_draft_length: bool = False,
+        prefix_cache_max_num_recycling_seqs: Optional[int] = None,
+        mixed_prefill_decode: bool = False,
+        target_step_latency_ms: Optional[float] = None,
+        kv_swap_space_gb: float = 0.0,
+        enable_fast_stream_encoding: bool = True,
+        preprocess_num_threads: Optional[int] = None,
+        preprocess_inline_threshold: Optional[int] = None,
+        response_cache_max_num_entries: Optional[int] = None,
+        response_cache_max_num_bytes: Optional[int] = None,
+        response_cache_ttl: Optional[float] = None,
+        max_num_waiting_requests: Optional[int] = None,
+        max_queue_delay: Optional[float] = None,
+        hosted_models: Optional[List[str]] = None,
+        memory_budget: Optional[float] = None,
+        num_frontends: int = 1,
+        batch_dir: Optional[str] = None,
+        embedding_model: Optional[str] = None,
+        embedding_pooling: Optional[str] = None,
         enable_tracing: bool = False,
+        trace_capacity: Optional[int] = None,
+        trace_sample_rate: Optional[float] = None,
+        trace_export_dir: Optional[str] = None,
+        trace_export_interval: Optional[float] = None,
         host: str = "127.0.0.1",
         port: int = 8000,
     ) -> None:
@@ -48,7 +71,30 @@ class PopenServer:  # pylint: disable=too-many-instance-attributes
         self.gpu_memory_utilization = gpu_memory_utilization
         self.speculative_mode = speculative_mode
         self.spec_draft_length = spec_draft_length
+        self.adaptive_spec_draft_length = adaptive_spec_draft_length
+        self.prefix_cache_max_num_recycling_seqs = prefix_cache_max_num_recycling_seqs
+        self.mixed_prefill_decode = mixed_prefill_decode
+        self.target_step_latency_ms = target_step_latency_ms
+        self.kv_swap_space_gb = kv_swap_space_gb
+        self.enable_fast_stream_encoding = enable_fast_stream_encoding
+        self.preprocess_num_threads = preprocess_num_threads
+        self.preprocess_inline_threshold = preprocess_inline_threshold
+        self.response_cache_max_num_entries = response_cache_max_num_entries
+        self.response_cache_max_num_bytes = response_cache_max_num_bytes
+        self.response_cache_ttl = response_cache_ttl
+        self.max_num_waiting_requests = max_num_waiting_requests
+        self.max_queue_delay = max_queue_delay
+        self.hosted_models = hosted_models
+        self.memory_budget = memory_budget
+        self.num_frontends = num_frontends
+        self.batch_dir = batch_dir
+        self.embedding_model = embedding_model
+        self.embedding_pooling = embedding_pooling
         self.enable_tracing = enable_tracing
+        self.trace_capacity = trace_capacity
+        self.trace_sample_rate = trace_sample_rate
+        self.trace_export_dir = trace_export_dir
+        self.trace_export_interval = trace_export_interval
         self.host = host
         self.port = port
         self._proc: Optional[subprocess.Popen] = None
@@ -79,10 +125,59 @@ class PopenServer:  # pylint: disable=too-many-instance-attributes
                 "--spec-draft-length",
                 str(self.spec_draft_length),
             ]
+            if self.adaptive_spec_draft_length:
+                cmd += ["--adaptive-spec-draft-length"]
         if self.gpu_memory_utilization is not None:
             cmd += ["--gpu-memory-utilization", str(self.gpu_memory_utilization)]
+        if self.prefix_cache_max_num_recycling_seqs is not None:
+            cmd += [
+                "--prefix-cache-max-num-recycling-seqs",
+                str(self.prefix_cache_max_num_recycling_seqs),
+            ]
+        if self.mixed_prefill_decode:
+            cmd += ["--mixed-prefill-decode"]
+        if self.target_step_latency_ms is not None:
+            cmd += ["--target-step-latency-ms", str(self.target_step_latency_ms)]
+        if self.kv_swap_space_gb > 0:
+            cmd += ["--kv-swap-space-gb", str(self.kv_swap_space_gb)]
+        if not self.enable_fast_stream_encoding:
+            cmd += ["--stream-encoding", "pydantic"]
+        if self.preprocess_num_threads is not None:
+            cmd += ["--preprocess-num-threads", str(self.preprocess_num_threads)]
+        if self.preprocess_inline_threshold is not None:
+            cmd += ["--preprocess-inline-threshold", str(self.preprocess_inline_threshold)]
+        if self.response_cache_max_num_entries is not None:
+            cmd += ["--response-cache-max-num-entries", str(self.response_cache_max_num_entries)]
+        if self.response_cache_max_num_bytes is not None:
+            cmd += ["--response-cache-max-num-bytes", str(self.response_cache_max_num_bytes)]
+        if self.response_cache_ttl is not None:
+            cmd += ["--response-cache-ttl", str(self.response_cache_ttl)]
+        if self.max_num_waiting_requests is not None:
+            cmd += ["--max-num-waiting-requests", str(self.max_num_waiting_requests)]
+        if self.max_queue_delay is not None:
+            cmd += ["--max-queue-delay", str(self.max_queue_delay)]
+        if self.hosted_models is not None:
+            cmd += ["--hosted-models", *self.hosted_models]
+        if self.memory_budget is not None:
+            cmd += ["--memory-budget", str(self.memory_budget)]
+        if self.num_frontends != 1:
+            cmd += ["--num-frontends", str(self.num_frontends)]
+        if self.batch_dir is not None:
+            cmd += ["--batch-dir", self.batch_dir]
+        if self.embedding_model is not None:
+            cmd += ["--embedding-model", self.embedding_model]
+        if self.embedding_pooling is not None:
+            cmd += ["--embedding-pooling", self.embedding_pooling]
         if self.enable_tracing:
             cmd += ["--enable-tracing"]
+        if self.trace_capacity is not None:
+            cmd += ["--trace-capacity", str(self.trace_capacity)]
+        if self.trace_sample_rate is not None:
+            cmd += ["--trace-sample-rate", str(self.trace_sample_rate)]
+        if self.trace_export_dir is not None:
+            cmd += ["--trace-export-dir", self.trace_export_dir]
+        if self.trace_export_interval is not None:
+            cmd += ["--trace-export-interval", str(self.trace_export_interval)]
 
         cmd += ["--host", self.host]
         cmd += ["--port", str(self.port)]
@@ -2,18 +2,54 @@
 
 from typing import Dict, List, Optional
 
+from ..embedding_engine import AsyncEmbeddingEngine
 from ..engine import AsyncMLCEngine
+from .admission_control import AdmissionController
+from .batch_manager import BatchManager
+from .engine_pool import EnginePool
 
 
 class ServerContext:
     """The global server context, including the running models
     and corresponding async engines.
+
+    Parameters
+    ----------
+    max_num_waiting_requests : Optional[int]
+        The maximum number of requests waiting for prefill in each engine,
+        beyond which new requests are rejected. No limit if it is None.
+
+    max_queue_delay : Optional[float]
+        The maximum estimated queue delay in seconds of each engine,
+        beyond which new requests are rejected. No limit if it is None.
+
+    engine_pool : Optional[EnginePool]
+        The pool of the models whose engines are loaded on demand,
+        in addition to the models added with their engines.
+
+    batch_dir : Optional[str]
+        The directory to store the files and the batches of the batch API in.
+        The batch API is disabled if it is None.
     """
 
     server_context: Optional["ServerContext"] = None
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_num_waiting_requests: Optional[int] = None,
+        max_queue_delay: Optional[float] = None,
+        engine_pool: Optional[EnginePool] = None,
+        batch_dir: Optional[str] = None,
+    ):
         self._models: Dict[str, AsyncMLCEngine] = {}
+        self._admission_controllers: Dict[str, AdmissionController] = {}
+        self._embedding_engines: Dict[str, AsyncEmbeddingEngine] = {}
+        self.max_num_waiting_requests = max_num_waiting_requests
+        self.max_queue_delay = max_queue_delay
+        self.engine_pool = engine_pool
+        self.batch_manager: Optional[BatchManager] = (
+            BatchManager(batch_dir, self.load_engine) if batch_dir is not None else None
+        )
 
     def __enter__(self):
         if ServerContext.server_context is not None:
@@ -25,6 +61,11 @@ class ServerContext:
         for model_engine in self._models.values():
             model_engine.terminate()
         self._models.clear()
+        for embedding_engine in self._embedding_engines.values():
+            embedding_engine.terminate()
+        self._embedding_engines.clear()
+        if self.engine_pool is not None:
+            self.engine_pool.terminate()
 
     @staticmethod
     def current():
@@ -36,14 +77,69 @@ class ServerContext:
         if hosted_model in self._models:
             raise RuntimeError(f"Model {hosted_model} already running.")
         self._models[hosted_model] = engine
+        self._add_admission_controller(hosted_model)
+
+    def add_embedding_engine(self, hosted_model: str, engine: AsyncEmbeddingEngine) -> None:
+        """Add a new embedding model to the server context together with the engine."""
+        if hosted_model in self._embedding_engines:
+            raise RuntimeError(f"Embedding model {hosted_model} already running.")
+        self._embedding_engines[hosted_model] = engine
+
+    def get_embedding_engine(self, model: Optional[str]) -> Optional[AsyncEmbeddingEngine]:
+        """Get the embedding engine of the requested model, or the unique
+        embedding engine if only one embedding engine is served."""
+        if len(self._embedding_engines) == 1:
+            return next(iter(self._embedding_engines.values()))
+        return self._embedding_engines.get(model, None)
+
+    def _add_admission_controller(self, hosted_model: str) -> None:
+        """Add the admission controller of the model when the admission limits are set."""
+        if hosted_model in self._admission_controllers:
+            return
+        if self.max_num_waiting_requests is not None or self.max_queue_delay is not None:
+            self._admission_controllers[hosted_model] = AdmissionController(
+                self.max_num_waiting_requests, self.max_queue_delay
+            )
 
     def get_engine(self, model: Optional[str]) -> Optional[AsyncMLCEngine]:
         """Get the async engine of the requested model, or the unique async engine
-        if only one engine is served."""
-        if len(self._models) == 1:
+        if only one engine is served. The engines in the engine pool are returned
+        only when they are loaded."""
+        if self.engine_pool is not None and model in self.engine_pool.models:
+            return self.engine_pool.get_loaded_engine(model)
+        if len(self._models) == 1 and self.engine_pool is None:
             return next(iter(self._models.values()))
         return self._models.get(model, None)
 
+    async def load_engine(self, model: Optional[str]) -> Optional[AsyncMLCEngine]:
+        """Get the async engine of the requested model like `get_engine`, and load
+        the engine when the model is in the engine pool but not loaded.
+        Raise `InsufficientEngineMemoryError` if the engine cannot be loaded within
+        the memory budget."""
+        if self.engine_pool is None or model not in self.engine_pool.models:
+            return self.get_engine(model)
+        async_engine = await self.engine_pool.acquire(model)
+        self._add_admission_controller(model)
+        return async_engine
+
+    def check_admission(self, model: Optional[str]) -> Optional[int]:
+        """Check if a new request of the requested model can be admitted.
+        Return None if admitted, or the number of seconds the client is
+        suggested to wait before retrying if rejected."""
+        async_engine = self.get_engine(model)
+        if async_engine is None:
+            return None
+        if len(self._models) == 1 and self.engine_pool is None:
+            admission_controller = next(iter(self._admission_controllers.values()), None)
+        else:
+            admission_controller = self._admission_controllers.get(model, None)
+        if admission_controller is None:
+            return None
+        return admission_controller.check(async_engine)
+
     def get_model_list(self) -> List[str]:
-        """Get the list of models on serve."""
-        return list(self._models.keys())
+        """Get the list of models on serve, including the unloaded ones in the engine pool."""
+        model_list = list(self._models.keys()) + list(self._embedding_engines.keys())
+        if self.engine_pool is not None:
+            model_list += self.engine_pool.models
+        return model_list
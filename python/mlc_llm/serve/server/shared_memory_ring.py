@@ -0,0 +1,131 @@
+"""The single-producer single-consumer message ring over shared memory,
+which passes the engine outputs from the engine process to a front-end process."""
+
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+# The header of the ring, which has the monotonic write position (head)
+# and the monotonic read position (tail) in bytes.
+_POSITION = struct.Struct("<Q")
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = _POSITION.size
+_HEADER_SIZE = 2 * _POSITION.size
+# The length prefix of each message.
+_LENGTH = struct.Struct("<I")
+
+
+class SharedMemoryRing:
+    """The single-producer single-consumer ring of byte messages over shared memory.
+
+    Each message is written into the ring with a length prefix, wrapping around at the
+    end of the buffer. The producer only advances the head and the consumer only advances
+    the tail, so no lock is needed between them. When the ring is full, the producer waits
+    for the consumer to read, which backpressures the producer rather than dropping
+    messages. The producer signals a semaphore for every message written, so that the
+    consumer can sleep until new messages arrive.
+
+    The ring is created by its owner process, and can be passed to another process
+    as a `multiprocessing.Process` argument, where it attaches to the same shared memory.
+
+    Parameters
+    ----------
+    capacity : int
+        The capacity of the ring in bytes.
+
+    mp_context : Optional[Any]
+        The multiprocessing context to create the semaphore in.
+        The default context is used if it is None.
+    """
+
+    def __init__(self, capacity: int = 16 * 1024 * 1024, mp_context: Optional[Any] = None):
+        if mp_context is None:
+            mp_context = multiprocessing.get_context()
+        self.capacity = capacity
+        self._shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + capacity)
+        self._owner = True
+        self._wakeup = mp_context.Semaphore(0)
+        _POSITION.pack_into(self._shm.buf, _HEAD_OFFSET, 0)
+        _POSITION.pack_into(self._shm.buf, _TAIL_OFFSET, 0)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self._shm.name, "capacity": self.capacity, "wakeup": self._wakeup}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.capacity = state["capacity"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._wakeup = state["wakeup"]
+
+    def write(self, payload: bytes, block: bool = True, poll_interval: float = 0.0005) -> bool:
+        """Write a message into the ring. When the ring does not have enough space, wait
+        until it has if `block` is True, or otherwise drop the message and return False.
+        Only the producer can invoke this method."""
+        size = _LENGTH.size + len(payload)
+        if size > self.capacity:
+            raise ValueError(
+                f"The message of {len(payload)} bytes exceeds the ring capacity {self.capacity}."
+            )
+        head = self._load(_HEAD_OFFSET)
+        while head + size - self._load(_TAIL_OFFSET) > self.capacity:
+            if not block:
+                return False
+            time.sleep(poll_interval)
+        self._copy_in(head, _LENGTH.pack(len(payload)))
+        self._copy_in(head + _LENGTH.size, payload)
+        # Publish the message after its bytes are written.
+        _POSITION.pack_into(self._shm.buf, _HEAD_OFFSET, head + size)
+        self._wakeup.release()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until some message is written after the last wait, or until timeout.
+        Return whether there may be new messages. Only the consumer can invoke this method."""
+        if not self._wakeup.acquire(timeout=timeout):
+            return False
+        # Consume the signals of all the messages written so far,
+        # which are read together by the following `read_all`.
+        while self._wakeup.acquire(block=False):
+            pass
+        return True
+
+    def read_all(self) -> List[bytes]:
+        """Read all the messages in the ring. Only the consumer can invoke this method."""
+        head = self._load(_HEAD_OFFSET)
+        tail = self._load(_TAIL_OFFSET)
+        messages = []
+        while tail < head:
+            (length,) = _LENGTH.unpack(self._copy_out(tail, _LENGTH.size))
+            messages.append(self._copy_out(tail + _LENGTH.size, length))
+            tail += _LENGTH.size + length
+        # Release the space of the messages after they are copied out.
+        _POSITION.pack_into(self._shm.buf, _TAIL_OFFSET, tail)
+        return messages
+
+    def close(self) -> None:
+        """Close the ring in this process. The shared memory is freed when the owner closes."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def _load(self, offset: int) -> int:
+        return _POSITION.unpack_from(self._shm.buf, offset)[0]
+
+    def _copy_in(self, position: int, data: bytes) -> None:
+        offset = position % self.capacity
+        first = min(len(data), self.capacity - offset)
+        start = _HEADER_SIZE + offset
+        self._shm.buf[start : start + first] = data[:first]
+        if first < len(data):
+            self._shm.buf[_HEADER_SIZE : _HEADER_SIZE + len(data) - first] = data[first:]
+
+    def _copy_out(self, position: int, length: int) -> bytes:
+        offset = position % self.capacity
+        first = min(length, self.capacity - offset)
+        start = _HEADER_SIZE + offset
+        data = bytes(self._shm.buf[start : start + first])
+        if first < length:
+            data += bytes(self._shm.buf[_HEADER_SIZE : _HEADER_SIZE + length - first])
+        return data
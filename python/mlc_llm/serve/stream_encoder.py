@@ -0,0 +1,278 @@
+"""The validation-free encoders of OpenAI streaming responses.
+
+The encoders write the server-sent event payload of each streaming chunk
+directly from the CallbackStreamOutput of the engine, without constructing
+and validating the pydantic models in `mlc_llm.protocol.openai_api_protocol`.
+The encoded JSON is byte-identical to `model_dump_json()` of the response
+which `engine_base.process_chat_completion_stream_output` and
+`engine_base.process_completion_stream_output` would build.
+"""
+
+import json
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from mlc_llm.serve.engine_base import CallbackStreamOutput, EngineState
+
+
+_dump_str = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _dump_float(value: float) -> str:
+    """Dump a float in the format of pydantic's JSON serializer.
+
+    Python's `repr` and pydantic both print the shortest round-trip digits,
+    and they only differ in where they switch to the scientific notation
+    and in how the exponent is written.
+    """
+    text = repr(float(value))
+    if "e" not in text:
+        return text if text[-1].isdigit() else "null"
+    sign = ""
+    if text[0] == "-":
+        sign, text = "-", text[1:]
+    mantissa, exponent = text.split("e")
+    int_part, _, frac_part = mantissa.partition(".")
+    digits = int_part + frac_part
+    # The value is `digits * 10 ** k`, and `10 ** (kk - 1) <= value < 10 ** kk`.
+    k = int(exponent) - len(frac_part)
+    kk = len(digits) + k
+    if 0 <= k and kk <= 16:
+        return sign + digits + "0" * k + ".0"
+    if 0 < kk <= 16:
+        return sign + digits[:kk] + "." + digits[kk:]
+    if -5 < kk <= 0:
+        return sign + "0." + "0" * -kk + digits
+    if len(digits) == 1:
+        return f"{sign}{digits}e{kk - 1}"
+    return f"{sign}{digits[0]}.{digits[1:]}e{kk - 1}"
+
+
+def _dump_token_logprob(logprob: Dict[str, Any]) -> str:
+    token_bytes = logprob["bytes"]
+    token_bytes_json = (
+        "null" if token_bytes is None else json.dumps(token_bytes, separators=(",", ":"))
+    )
+    return (
+        f'{{"token":{_dump_str(logprob["token"])},'
+        f'"logprob":{_dump_float(logprob["logprob"])},'
+        f'"bytes":{token_bytes_json}'
+    )
+
+
+def _dump_logprobs(logprob_json_strs: Optional[List[str]]) -> str:
+    """Convert the logprob JSON strings generated by the engine
+    to the JSON of `openai_api_protocol.LogProbs`."""
+    if logprob_json_strs is None:
+        return "null"
+    contents = []
+    for logprob_json_str in logprob_json_strs:
+        logprob = json.loads(logprob_json_str)
+        top_logprobs = ",".join(
+            _dump_token_logprob(top_logprob) + "}"
+            for top_logprob in logprob.get("top_logprobs", [])
+        )
+        contents.append(f'{_dump_token_logprob(logprob)},"top_logprobs":[{top_logprobs}]}}')
+    return f'{{"content":[{",".join(contents)}]}}'
+
+
+class ChatCompletionStreamEncoder:  # pylint: disable=too-few-public-methods
+    """The encoder of the server-sent events of a streaming ChatCompletion request.
+    It is the validation-free equivalent of `engine_base.process_chat_completion_stream_output`
+    followed by `model_dump_json()`.
+
+    Parameters
+    ----------
+    request_id : str
+        The id of the request.
+
+    engine_state : EngineState
+        The state of the engine.
+
+    model : Optional[str]
+        The requested model.
+
+    use_function_calling : bool
+        A boolean flag indicating if the request uses function call.
+
+    prompt_length : int
+        The total prompt length.
+    """
+
+    def __init__(
+        self,
+        request_id: str,
+        engine_state: "EngineState",
+        model: Optional[str],
+        use_function_calling: bool,
+        prompt_length: int,
+    ) -> None:
+        self.request_id = request_id
+        self.engine_state = engine_state
+        self.use_function_calling = use_function_calling
+        self.prompt_length = prompt_length
+        self._prefix = f'data: {{"id":{_dump_str(request_id)},"choices":['
+        self._model_fragment = (
+            f',"model":{"null" if model is None else _dump_str(model)},'
+            '"system_fingerprint":"","object":"chat.completion.chunk",'
+            f'"usage":{{"prompt_tokens":{prompt_length},"completion_tokens":'
+        )
+
+    def encode(
+        self,
+        delta_outputs: List["CallbackStreamOutput"],
+        finish_reasons: List[Optional[str]],
+        num_completion_tokens: int,
+        created: Optional[int] = None,
+    ) -> Tuple[Optional[str], int]:
+        """Encode the delta outputs of the request to a server-sent event.
+
+        Parameters
+        ----------
+        delta_outputs : List[CallbackStreamOutput]
+            The delta outputs of a request.
+            The list length is the number of parallel generation specified by "n".
+
+        finish_reasons : List[Optional[str]]
+            The list of finish reasons of each generation.
+            This list is updated in place.
+
+        num_completion_tokens : int
+            The number of total completion tokens so far.
+
+        created : Optional[int]
+            The creation timestamp of the chunk. The current time is used if not given.
+
+        Returns
+        -------
+        event : Optional[str]
+            The encoded "data: ..." server-sent event.
+            It can be none when there is no content.
+
+        num_completion_tokens : int
+            The updated number of total completion tokens.
+        """
+        assert len(delta_outputs) == len(finish_reasons)
+        choices = []
+        num_new_completion_tokens = 0
+        for i, delta_output in enumerate(delta_outputs):
+            finish_reason_updated = False
+            num_new_completion_tokens += delta_output.num_delta_tokens
+            if delta_output.finish_reason is not None and finish_reasons[i] is None:
+                finish_reasons[i] = (
+                    delta_output.finish_reason if not self.use_function_calling else "tool_calls"
+                )
+                finish_reason_updated = True
+            if not finish_reason_updated and delta_output.delta_text == "":
+                # Ignore empty delta text when finish reason is not updated.
+                self.engine_state.record_event(self.request_id, event="skip empty delta text")
+                continue
+
+            finish_reason = finish_reasons[i]
+            finish_reason_json = "null" if finish_reason is None else _dump_str(finish_reason)
+            choices.append(
+                f'{{"finish_reason":{finish_reason_json},'
+                f'"index":{i},'
+                f'"delta":{{"content":{_dump_str(delta_output.delta_text)},"role":"assistant",'
+                '"name":null,"tool_calls":null,"tool_call_id":null},'
+                f'"logprobs":{_dump_logprobs(delta_output.delta_logprob_json_strs)}}}'
+            )
+
+        if len(choices) == 0 and num_new_completion_tokens == 0:
+            # Skip return when there is no delta output and no number of completion tokens.
+            return None, num_completion_tokens
+        num_completion_tokens += num_new_completion_tokens
+        if created is None:
+            created = int(time.time())
+        event = (
+            f'{self._prefix}{",".join(choices)}],"created":{created}{self._model_fragment}'
+            f"{num_completion_tokens},"
+            f'"total_tokens":{self.prompt_length + num_completion_tokens}}}}}\n\n'
+        )
+        self.engine_state.record_event(self.request_id, event="yield delta output")
+        return event, num_completion_tokens
+
+
+class CompletionStreamEncoder:  # pylint: disable=too-few-public-methods
+    """The encoder of the server-sent events of a streaming Completion request.
+    It is the validation-free equivalent of `engine_base.process_completion_stream_output`
+    followed by `model_dump_json()`.
+
+    Parameters
+    ----------
+    request_id : str
+        The id of the request.
+
+    engine_state : EngineState
+        The state of the engine.
+
+    model : Optional[str]
+        The requested model.
+
+    prompt_length : int
+        The total prompt length.
+    """
+
+    def __init__(
+        self,
+        request_id: str,
+        engine_state: "EngineState",
+        model: Optional[str],
+        prompt_length: int,
+    ) -> None:
+        self.request_id = request_id
+        self.engine_state = engine_state
+        self.prompt_length = prompt_length
+        self._prefix = f'data: {{"id":{_dump_str(request_id)},"choices":['
+        self._model_fragment = (
+            f',"model":{"null" if model is None else _dump_str(model)},'
+            '"object":"text_completion",'
+            f'"usage":{{"prompt_tokens":{prompt_length},"completion_tokens":'
+        )
+
+    def encode(
+        self,
+        delta_outputs: List["CallbackStreamOutput"],
+        finish_reasons: List[Optional[str]],
+        num_completion_tokens: int,
+        created: Optional[int] = None,
+    ) -> Tuple[Optional[str], int]:
+        """Encode the delta outputs of the request to a server-sent event.
+        See `ChatCompletionStreamEncoder.encode` for the parameters and returns.
+        """
+        assert len(delta_outputs) == len(finish_reasons)
+        choices = []
+        num_new_completion_tokens = 0
+        for i, delta_output in enumerate(delta_outputs):
+            finish_reason_updated = False
+            if delta_output.finish_reason is not None and finish_reasons[i] is None:
+                finish_reasons[i] = delta_output.finish_reason
+                finish_reason_updated = True
+            num_new_completion_tokens += delta_output.num_delta_tokens
+            if not finish_reason_updated and delta_output.delta_text == "":
+                # Ignore empty delta text when finish reason is not updated.
+                continue
+
+            finish_reason = finish_reasons[i]
+            finish_reason_json = "null" if finish_reason is None else _dump_str(finish_reason)
+            choices.append(
+                f'{{"finish_reason":{finish_reason_json},'
+                f'"index":{i},'
+                f'"logprobs":{_dump_logprobs(delta_output.delta_logprob_json_strs)},'
+                f'"text":{_dump_str(delta_output.delta_text)}}}'
+            )
+
+        if len(choices) == 0 and num_new_completion_tokens == 0:
+            # Skip return when there is no delta output and no number of completion tokens.
+            return None, num_completion_tokens
+        num_completion_tokens += num_new_completion_tokens
+        if created is None:
+            created = int(time.time())
+        event = (
+            f'{self._prefix}{",".join(choices)}],"created":{created}{self._model_fragment}'
+            f"{num_completion_tokens},"
+            f'"total_tokens":{self.prompt_length + num_completion_tokens}}}}}\n\n'
+        )
+        self.engine_state.record_event(self.request_id, event="yield delta output")
+        return event, num_completion_tokens
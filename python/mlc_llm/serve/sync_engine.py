@@ -11,6 +11,7 @@ the test and debug purpose because of its simplicity.
 import json
 from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import tvm
 
 from mlc_llm.serve import data
@@ -23,7 +24,7 @@ from mlc_llm.serve.engine_base import (
 )
 from mlc_llm.serve.event_trace_recorder import EventTraceRecorder
 from mlc_llm.serve.request import Request
-from mlc_llm.streamer import TextStreamer
+from mlc_llm.streamer import BatchTextStreamer
 from mlc_llm.support import logging
 from mlc_llm.tokenizer import Tokenizer
 
@@ -102,6 +103,11 @@ class SyncMLCEngine:
         enable_tracing: bool = False,
         speculative_mode: SpeculativeMode = SpeculativeMode.DISABLE,
         spec_draft_length: int = 4,
+        adaptive_spec_draft_length: bool = False,
+        prefix_cache_max_num_recycling_seqs: Optional[int] = None,
+        mixed_prefill_decode: bool = False,
+        target_step_latency_ms: Optional[float] = None,
+        kv_swap_space_gb: float = 0.0,
         request_stream_callback: Optional[Callable[[List[data.RequestStreamOutput]], None]] = None,
     ):
         # - Initialize model loading info.
@@ -128,6 +134,7 @@ class SyncMLCEngine:
             max_total_sequence_length,
             prefill_chunk_size,
             max_single_sequence_length,
+            _,
         ) = _infer_kv_cache_config(
             mode,
             max_batch_size,
@@ -140,6 +147,9 @@ class SyncMLCEngine:
             model_config_paths,
         )
         self.max_input_sequence_length = min(max_single_sequence_length, max_total_sequence_length)
+        if prefix_cache_max_num_recycling_seqs is None:
+            # Prefix caching is opt-in, since the resident sequences hold KV cache memory.
+            prefix_cache_max_num_recycling_seqs = 0
 
         self._ffi = _create_tvm_module(
             "mlc.serve.create_engine",
@@ -170,6 +180,13 @@ class SyncMLCEngine:
                 prefill_chunk_size=prefill_chunk_size,
                 speculative_mode=speculative_mode,
                 spec_draft_length=spec_draft_length,
+                adaptive_spec_draft_length=adaptive_spec_draft_length,
+                prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+                mixed_prefill_decode=mixed_prefill_decode,
+                target_step_latency_ms=(
+                    target_step_latency_ms if target_step_latency_ms is not None else 0.0
+                ),
+                kv_swap_space_gb=kv_swap_space_gb,
             ),
             request_stream_callback,
             self.trace_recorder,
@@ -235,14 +252,13 @@ class SyncMLCEngine:
         num_finished_generations = 0
         output_texts: List[List[str]] = []
         output_logprobs_str: List[Optional[List[List[str]]]] = []
-        text_streamers: List[List[TextStreamer]] = []
+        # The text streamer detokenizes the delta outputs of all requests in one call.
+        text_streamer = BatchTextStreamer(self.tokenizer)
         for i in range(num_requests):
             output_texts.append([])
             output_logprobs_str.append([] if generation_config[i].logprobs else None)
-            text_streamers.append([])
             for _ in range(generation_config[i].n):
                 output_texts[i].append("")
-                text_streamers[i].append(TextStreamer(self.tokenizer))
                 if output_logprobs_str[i] is not None:
                     output_logprobs_str[i].append([])
 
@@ -256,43 +272,49 @@ class SyncMLCEngine:
         # Define the callback function for request generation results
         def request_stream_callback(delta_outputs: List[data.RequestStreamOutput]):
             nonlocal num_finished_generations
-            for delta_output in delta_outputs:
-                request_id, stream_outputs = delta_output.unpack()
+            for request_id, stream_outputs in data.unpack_request_stream_outputs(
+                delta_outputs, text_streamer
+            ):
                 rid = int(request_id)
 
                 assert len(stream_outputs) == generation_config[rid].n
-                for i, (stream_output, text_streamer) in enumerate(
-                    zip(stream_outputs, text_streamers[rid])
-                ):
+                for i, stream_output in enumerate(stream_outputs):
                     if output_logprobs_str[rid] is not None:
                         assert stream_output.delta_logprob_json_strs is not None
                         output_logprobs_str[rid][i] += stream_output.delta_logprob_json_strs
 
-                    delta_text = (
-                        text_streamer.put(stream_output.delta_token_ids)
-                        if len(stream_output.delta_token_ids) > 0
-                        else ""
-                    )
-                    if stream_output.finish_reason is not None:
-                        delta_text += text_streamer.finish()
-
-                    output_texts[rid][i] += delta_text
+                    assert stream_output.delta_text is not None
+                    output_texts[rid][i] += stream_output.delta_text
                     if stream_output.finish_reason is not None:
                         num_finished_generations += 1
 
         # Override the callback function in engine.
         self._ffi["set_request_stream_callback"](request_stream_callback)
 
-        def convert_to_data(prompt: Union[str, List[int], List[data.Data]]) -> List[data.Data]:
+        # Tokenize all the string prompts in parallel in one batch.
+        str_prompt_indices = [i for i, prompt in enumerate(prompts) if isinstance(prompt, str)]
+        tokenized_prompts: Dict[int, np.ndarray] = {}
+        if len(str_prompt_indices) > 0:
+            token_ids, offsets = self.tokenizer.encode_batch(
+                [prompts[i] for i in str_prompt_indices]  # type: ignore
+            )
+            token_ids_np = token_ids.numpy()
+            offsets_np = offsets.numpy()
+            for j, i in enumerate(str_prompt_indices):
+                tokenized_prompts[i] = token_ids_np[offsets_np[j] : offsets_np[j + 1]]
+
+        def convert_to_data(
+            req_id: int, prompt: Union[str, List[int], List[data.Data]]
+        ) -> List[data.Data]:
             if isinstance(prompt, str):
-                return [data.TextData(prompt)]
+                return [data.TokenData(tokenized_prompts[req_id])]
             if isinstance(prompt[0], int):
                 return [data.TokenData(prompt)]  # type: ignore
             return prompt  # type: ignore
 
         # Add requests to engine.
         for req_id, (prompt, generation_cfg) in enumerate(zip(prompts, generation_config)):
-            input_data = convert_to_data(prompt)  # type: ignore
+            input_data = convert_to_data(req_id, prompt)  # type: ignore
             self.add_request(
                 Request(
                     request_id=str(req_id),
@@ -49,6 +49,59 @@ class TextStreamer(Object):
         return _ffi_api.TextStreamerFinish(self)  # type: ignore  # pylint: disable=no-member
 
 
+@tvm._ffi.register_object("mlc.BatchTextStreamer")  # pylint: disable=protected-access
+class BatchTextStreamer(Object):
+    """The class that streams back validated utf-8 text strings of a batch
+    of streams at a time. Each stream is identified by a string key, and
+    is detokenized by its own text streamer, which is created when the key
+    is put for the first time and is released after the stream finishes.
+    """
+
+    def __init__(self, tokenizer: Tokenizer) -> None:
+        """Create the batch text streamer from tokenizer"""
+        self.__init_handle_by_constructor__(
+            _ffi_api.BatchTextStreamer, tokenizer  # type: ignore  # pylint: disable=no-member
+        )
+
+    def put(
+        self, keys: List[str], delta_tokens: List[List[int]], finished: List[bool]
+    ) -> List[str]:
+        """Put the new delta tokens of a batch of streams into the streamer,
+        and get the UTF-8-valid delta string of each stream in one call.
+        For a finished stream, the returned string also contains the string
+        decoded by the remaining tokens.
+
+        Parameters
+        ----------
+        keys : List[str]
+            The key of each stream in the batch.
+            A key may appear multiple times, whose delta tokens are put in order.
+
+        delta_tokens : List[List[int]]
+            The new delta tokens of each stream in the batch.
+
+        finished : List[bool]
+            The flags denoting if each stream finishes after the delta tokens.
+
+        Returns
+        -------
+        delta_texts : List[str]
+            The decoded delta string of each stream in the batch.
+        """
+        return list(
+            _ffi_api.BatchTextStreamerPut(  # type: ignore  # pylint: disable=no-member
+                self,
+                keys,
+                [ShapeTuple(tokens) for tokens in delta_tokens],
+                ShapeTuple([int(flag) for flag in finished]),
+            )
+        )
+
+    def reset(self) -> None:
+        """Release the text streamers of all the unfinished streams."""
+        _ffi_api.BatchTextStreamerReset(self)  # type: ignore  # pylint: disable=no-member
+
+
 @tvm._ffi.register_object("mlc.StopStrHandler")  # pylint: disable=protected-access
 class StopStrHandler(Object):
     """The stop string handler in MLC LLM, which takes input delta tokens
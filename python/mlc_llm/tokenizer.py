@@ -3,11 +3,12 @@ This tokenizer essentially wraps and binds the HuggingFace tokenizer
 library and sentencepiece.
 Reference: https://github.com/mlc-ai/tokenizers-cpp
 """
-from typing import List
+from typing import List, Tuple, Union
 
+import numpy as np
 import tvm
 import tvm._ffi
-from tvm.runtime import Object
+from tvm.runtime import NDArray, Object
 
 from . import _ffi_api
 
@@ -37,12 +38,30 @@ class Tokenizer(Object):
         """
         return list(_ffi_api.TokenizerEncode(self, text))  # type: ignore  # pylint: disable=no-member
 
-    def decode(self, token_ids: List[int]) -> str:
+    def encode_array(self, text: str) -> np.ndarray:
+        """Encode text into ids, returned as a 1-D int32 NumPy array.
+        Unlike `encode`, it does not create a Python int for each token,
+        which is much faster for long texts.
+
+        Parameters
+        ----------
+        text : str
+            The text string to encode.
+
+        Returns
+        -------
+        token_ids : np.ndarray
+            The encoded token ids.
+        """
+        token_ids, _ = self.encode_batch([text])
+        return token_ids.numpy()
+
+    def decode(self, token_ids: Union[List[int], np.ndarray]) -> str:
         """Decode token ids into text.
 
         Parameters
         ----------
-        token_ids : List[int]
+        token_ids : Union[List[int], np.ndarray]
             The token ids to decode to string.
 
         Returns
@@ -50,6 +69,67 @@ class Tokenizer(Object):
         text : str
             The decoded text string.
         """
+        if isinstance(token_ids, np.ndarray):
+            return self.decode_batch(token_ids, [0, token_ids.shape[0]])[0]
         return _ffi_api.TokenizerDecode(  # type: ignore  # pylint: disable=no-member
             self, tvm.runtime.ShapeTuple(token_ids)
         )
+
+    def encode_batch(self, texts: List[str]) -> Tuple[NDArray, NDArray]:
+        """Encode a batch of texts into ids. The texts are encoded in parallel
+        in a single call to the native tokenizer.
+
+        Parameters
+        ----------
+        texts : List[str]
+            The text strings to encode.
+
+        Returns
+        -------
+        token_ids : NDArray
+            The flattened int32 token ids of all the texts.
+
+        offsets : NDArray
+            The int64 offsets of length `len(texts) + 1`. The token ids of
+            the i-th text are `token_ids[offsets[i] : offsets[i + 1]]`.
+        """
+        token_ids, offsets = _ffi_api.TokenizerEncodeBatch(self, texts)  # type: ignore  # pylint: disable=no-member
+        return token_ids, offsets
+
+    def decode_batch(
+        self,
+        token_ids: Union[NDArray, np.ndarray, List[int]],
+        offsets: Union[NDArray, np.ndarray, List[int]],
+    ) -> List[str]:
+        """Decode a batch of token id sequences into texts. The sequences are
+        decoded in parallel in a single call to the native tokenizer.
+
+        Parameters
+        ----------
+        token_ids : Union[NDArray, np.ndarray, List[int]]
+            The flattened token ids of all the sequences, in the layout
+            returned by `encode_batch`.
+
+        offsets : Union[NDArray, np.ndarray, List[int]]
+            The offsets of each sequence in the flattened token ids,
+            of length the number of sequences plus one.
+
+        Returns
+        -------
+        texts : List[str]
+            The decoded text strings.
+        """
+        return list(
+            _ffi_api.TokenizerDecodeBatch(  # type: ignore  # pylint: disable=no-member
+                self, _as_cpu_ndarray(token_ids, "int32"), _as_cpu_ndarray(offsets, "int64")
+            )
+        )
+
+
+def _as_cpu_ndarray(array: Union[NDArray, np.ndarray, List[int]], dtype: str) -> NDArray:
+    """Convert the input array to a CPU NDArray of the given dtype, without copy if possible."""
+    if isinstance(array, NDArray):
+        if array.dtype == dtype and array.device.device_type == tvm.cpu().device_type:
+            return array
+        array = array.numpy()
+    return tvm.nd.array(np.asarray(array, dtype=dtype))
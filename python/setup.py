@@ -99,6 +99,7 @@ def main():
         install_requires=[
             "fastapi",
             "uvicorn",
+            "python-multipart",
             "shortuuid",
             "torch",
             "safetensors",
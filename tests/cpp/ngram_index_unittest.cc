@@ -0,0 +1,32 @@
+#include <gtest/gtest.h>
+#include <serve/ngram_index.h>
+
+using mlc::llm::serve::NGramIndex;
+
+void _TestNGramIndexPropose() {
+  NGramIndex index;
+  for (int32_t token_id : {1, 2, 3, 4, 5, 9, 2, 3}) {
+    index.Append(token_id);
+  }
+  // The trailing "2 3" occurred before, followed by "4 5 9 2 3".
+  EXPECT_EQ(index.Propose(3), std::vector<int32_t>({4, 5, 9}));
+  EXPECT_EQ(index.Propose(10), std::vector<int32_t>({4, 5, 9, 2, 3}));
+  EXPECT_EQ(index.Propose(0), std::vector<int32_t>());
+  // The trailing "7" did not occur before.
+  index.Append(7);
+  EXPECT_EQ(index.Propose(3), std::vector<int32_t>());
+  EXPECT_EQ(index.GetNumTokens(), 9);
+}
+
+void _TestNGramIndexLatestMatch() {
+  NGramIndex index;
+  for (int32_t token_id : {1, 2, 3, 1, 2, 4, 1, 2}) {
+    index.Append(token_id);
+  }
+  // The latest previous occurrence of "1 2" is followed by "4".
+  EXPECT_EQ(index.Propose(2), std::vector<int32_t>({4, 1}));
+}
+
+TEST(NGramIndexTest, NGramIndexPropose) { _TestNGramIndexPropose(); }
+
+TEST(NGramIndexTest, NGramIndexLatestMatch) { _TestNGramIndexLatestMatch(); }
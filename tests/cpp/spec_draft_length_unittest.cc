@@ -0,0 +1,46 @@
+#include <gtest/gtest.h>
+#include <serve/engine_state.h>
+
+using mlc::llm::serve::RequestStateEntry;
+using mlc::llm::serve::RequestStateEntryNode;
+using mlc::llm::serve::SpecDraftLengthController;
+
+SpecDraftLengthController _CreateController(int min_draft_length) {
+  SpecDraftLengthController controller;
+  controller.adaptive = true;
+  controller.max_draft_length = 4;
+  controller.min_draft_length = min_draft_length;
+  // Drafting is slow and never accepted, so that no draft is the most efficient.
+  controller.UpdateDraftTime(1.0, 1);
+  controller.UpdateVerifyTime(0.1);
+  return controller;
+}
+
+void _TestSpecDraftLengthZeroRound() {
+  SpecDraftLengthController controller = _CreateController(/*min_draft_length=*/0);
+  RequestStateEntry rsentry(tvm::runtime::make_object<RequestStateEntryNode>());
+  for (int i = 0; i < 4; ++i) {
+    controller.UpdateAcceptance(rsentry, /*draft_length=*/4, /*num_accepted=*/0);
+  }
+  EXPECT_EQ(controller.GetDraftLength(rsentry), 0);
+  EXPECT_EQ(rsentry->spec_num_steps_without_draft, 1);
+}
+
+void _TestSpecDraftLengthDraftModelRound() {
+  // With a draft model, a zero-length round is raised to one draft token, so that the
+  // last committed token always enters the KV cache of the draft model.
+  SpecDraftLengthController controller = _CreateController(/*min_draft_length=*/1);
+  RequestStateEntry rsentry(tvm::runtime::make_object<RequestStateEntryNode>());
+  for (int i = 0; i < 4; ++i) {
+    controller.UpdateAcceptance(rsentry, /*draft_length=*/4, /*num_accepted=*/0);
+  }
+  for (int step = 0; step < 32; ++step) {
+    EXPECT_EQ(controller.GetDraftLength(rsentry), 1);
+    controller.UpdateAcceptance(rsentry, /*draft_length=*/1, /*num_accepted=*/0);
+  }
+  EXPECT_EQ(rsentry->spec_num_steps_without_draft, 0);
+}
+
+TEST(SpecDraftLengthTest, ZeroRound) { _TestSpecDraftLengthZeroRound(); }
+
+TEST(SpecDraftLengthTest, DraftModelRound) { _TestSpecDraftLengthDraftModelRound(); }
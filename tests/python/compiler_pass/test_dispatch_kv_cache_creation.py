@@ -0,0 +1,90 @@
+# pylint: disable=invalid-name,missing-docstring,too-few-public-methods,line-too-long
+import tvm
+from tvm.ir import assert_structural_equal
+from tvm.script import ir as I
+from tvm.script import relax as R
+from tvm.script import tir as T
+
+from mlc_llm.compiler_pass.dispatch_kv_cache_creation import DispatchKVCacheCreation
+
+# mypy: disable-error-code="attr-defined"
+
+
+def test_fp8_attention():
+    # fmt: off
+    @I.ir_module
+    class Before:
+        @R.function
+        def create_paged_kv_cache(
+            max_batch_size: R.Shape(["max_batch_size_1"]),  # type: ignore
+            max_total_seq_len: R.Shape(["max_total_seq_len_1"]),  # type: ignore
+            prefill_chunk_size: R.Shape(["prefill_chunk_size_1"]),  # type: ignore
+            page_size: R.Shape(["page_size_1"]),  # type: ignore
+            support_sliding_window: R.Shape(["support_sliding_window_1"]),  # type: ignore
+        ) -> R.Object:
+            max_batch_size_1 = T.int64()
+            max_total_seq_len_1 = T.int64()
+            prefill_chunk_size_1 = T.int64()
+            page_size_1 = T.int64()
+            support_sliding_window_1 = T.int64()
+            R.func_attr({"num_input": 5})
+            with R.dataflow():
+                paged_kv_cache: R.Object = R.call_pure_packed("mlc.create_paged_kv_cache_generic", R.shape([max_batch_size_1, max_total_seq_len_1, prefill_chunk_size_1, page_size_1, support_sliding_window_1]), R.prim_value(32), R.prim_value(32), R.prim_value(32), R.prim_value(128), R.prim_value(1), R.prim_value(1), R.prim_value(10000), R.prim_value(128), R.dtype("float16"), sinfo_args=(R.Object,))
+                gv1: R.Object = paged_kv_cache
+                R.output(gv1)
+            return gv1
+
+        @R.function
+        def forward(
+            cache: R.Object, qkv: R.Tensor((100, 96, 128), dtype="float16")  # type: ignore
+        ) -> R.Tensor((100, 32, 128), dtype="float16"):  # type: ignore
+            R.func_attr({"num_input": 2})
+            with R.dataflow():
+                lv = R.call_dps_packed(
+                    "vm.builtin.attention_kv_cache_attention_with_fused_qkv",
+                    (cache, R.prim_value(0), R.prim_value(T.float32(1)), qkv),
+                    out_sinfo=R.Tensor((100, 32, 128), dtype="float16"),
+                )
+                gv: R.Tensor((100, 32, 128), dtype="float16") = lv  # type: ignore
+                R.output(gv)
+            return gv
+
+    @I.ir_module
+    class Expected:
+        @R.function
+        def forward(
+            cache: R.Object, qkv: R.Tensor((100, 96, 128), dtype="float16")  # type: ignore
+        ) -> R.Tensor((100, 32, 128), dtype="float16"):  # type: ignore
+            R.func_attr({"num_input": 2})
+            with R.dataflow():
+                qkv_fp8 = R.astype(qkv, "e4m3_float8")
+                lv_fp8 = R.call_dps_packed(
+                    "vm.builtin.attention_kv_cache_attention_with_fused_qkv",
+                    (cache, R.prim_value(0), R.prim_value(T.float32(1)), qkv_fp8),
+                    out_sinfo=R.Tensor((100, 32, 128), dtype="e4m3_float8"),
+                )
+                lv = R.astype(lv_fp8, "float16")
+                gv: R.Tensor((100, 32, 128), dtype="float16") = lv  # type: ignore
+                R.output(gv)
+            return gv
+    # fmt: on
+
+    metadata = {"model_type": "llama"}
+    After = DispatchKVCacheCreation(
+        tvm.target.Target("cuda"),
+        flashinfer=True,
+        metadata=metadata,
+        fp8_attention_dtype="e4m3_float8",
+    )(Before)
+    # The queries and the attention output are cast to float8 as well as the K/V data.
+    assert_structural_equal(After["forward"], Expected["forward"])
+    # The KV data are stored in float8, which FlashInfer does not support.
+    assert metadata["kv_cache"]["dtype"] == "e4m3_float8"
+    assert "create_tir_paged_kv_cache" in [g_var.name_hint for g_var in After.get_global_vars()]
+    assert "create_flashinfer_paged_kv_cache" not in [
+        g_var.name_hint for g_var in After.get_global_vars()
+    ]
+
+
+if __name__ == "__main__":
+    test_fp8_attention()
@@ -118,6 +118,7 @@ class JSONFFIEngine:
             max_total_sequence_length,
             prefill_chunk_size,
             max_single_sequence_length,
+            _,
         ) = _infer_kv_cache_config(
             mode,
             max_batch_size,
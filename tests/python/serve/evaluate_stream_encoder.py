@@ -0,0 +1,110 @@
+# pylint: disable=line-too-long,missing-docstring
+import argparse
+import json
+import random
+import string
+import time
+from typing import Callable, List, Optional
+
+from mlc_llm.serve import engine_base, stream_encoder
+from mlc_llm.serve.config import GenerationConfig
+from mlc_llm.serve.engine_base import CallbackStreamOutput, EngineState
+
+
+def _parse_args():
+    args = argparse.ArgumentParser()
+    args.add_argument("--num-chunks", type=int, default=20000)
+    args.add_argument("--tokens-per-chunk", type=int, default=1)
+    args.add_argument("--seed", type=int, default=0)
+    return args.parse_args()
+
+
+def generate_delta_outputs(
+    num_chunks: int, tokens_per_chunk: int, n: int, top_logprobs: Optional[int]
+) -> List[List[CallbackStreamOutput]]:
+    def _logprob_json_str(token: str) -> str:
+        def _entry(tok: str) -> str:
+            token_bytes = ", ".join(str(b) for b in tok.encode("utf-8"))
+            logprob = -random.random() * 10
+            return f'"token": {json.dumps(tok)}, "logprob": {logprob:.6g}, "bytes": [{token_bytes}]'
+
+        top = ", ".join("{" + _entry(token + str(i)) + "}" for i in range(top_logprobs or 0))
+        return "{" + _entry(token) + ', "top_logprobs": [' + top + "]}"
+
+    chunks = []
+    for _ in range(num_chunks):
+        outputs = []
+        for _ in range(n):
+            tokens = [
+                " " + "".join(random.choices(string.ascii_letters, k=random.randint(1, 8)))
+                for _ in range(tokens_per_chunk)
+            ]
+            outputs.append(
+                CallbackStreamOutput(
+                    delta_text="".join(tokens),
+                    num_delta_tokens=tokens_per_chunk,
+                    delta_logprob_json_strs=(
+                        [_logprob_json_str(token) for token in tokens]
+                        if top_logprobs is not None
+                        else None
+                    ),
+                    finish_reason=None,
+                )
+            )
+        chunks.append(outputs)
+    return chunks
+
+
+def _time(name: str, num_chunks: int, func: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10}{elapsed * 1e6 / num_chunks:10.2f} us/chunk")
+    return elapsed
+
+
+def benchmark(args: argparse.Namespace):
+    random.seed(args.seed)
+    state = EngineState(enable_tracing=False)
+    print(args)
+    for n in [1, 4]:
+        for top_logprobs in [None, 0, 5]:
+            print(f"n={n}\tlogprobs={top_logprobs is not None}\ttop_logprobs={top_logprobs or 0}")
+            chunks = generate_delta_outputs(args.num_chunks, args.tokens_per_chunk, n, top_logprobs)
+            generation_cfg = GenerationConfig(n=n)
+
+            def run_pydantic():
+                finish_reasons: List[Optional[str]] = [None] * n
+                num_tokens = 0
+                for delta_outputs in chunks:  # pylint: disable=cell-var-from-loop
+                    response, num_tokens = engine_base.process_chat_completion_stream_output(
+                        delta_outputs,
+                        "chatcmpl-0",
+                        state,
+                        "model",
+                        generation_cfg,  # pylint: disable=cell-var-from-loop
+                        False,
+                        128,
+                        finish_reasons,
+                        num_tokens,
+                    )
+                    _ = f"data: {response.model_dump_json()}\n\n"
+
+            def run_fast():
+                encoder = stream_encoder.ChatCompletionStreamEncoder(
+                    "chatcmpl-0", state, "model", False, 128
+                )
+                finish_reasons: List[Optional[str]] = [None] * n
+                num_tokens = 0
+                for delta_outputs in chunks:  # pylint: disable=cell-var-from-loop
+                    _, num_tokens = encoder.encode(delta_outputs, finish_reasons, num_tokens)
+
+            pydantic_time = _time("pydantic", args.num_chunks, run_pydantic)
+            fast_time = _time("fast", args.num_chunks, run_fast)
+            print(f"speedup   {pydantic_time / fast_time:10.2f}x")
+            print()
+
+
+if __name__ == "__main__":
+    ARGS = _parse_args()
+    benchmark(ARGS)
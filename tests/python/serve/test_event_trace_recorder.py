@@ -1,7 +1,9 @@
 # pylint: disable=missing-module-docstring,missing-function-docstring
 import json
+import tempfile
+from pathlib import Path
 
-from mlc_llm.serve.event_trace_recorder import EventTraceRecorder
+from mlc_llm.serve.event_trace_recorder import EventTraceExporter, EventTraceRecorder
 
 
 def test_event_trace_recorder():
@@ -40,5 +42,59 @@ def test_event_trace_recorder():
         assert decode_cnt == num_decode * 2, decode_cnt
 
 
+def test_event_trace_recorder_ring_buffer():
+    trace_recorder = EventTraceRecorder(capacity=4)
+    for i in range(3):
+        trace_recorder.add_event("x", event="start decode")
+        trace_recorder.add_event("x", event="finish decode")
+    events = json.loads(trace_recorder.dump_json())
+    # Only the latest events are kept.
+    assert [event["name"] for event in events] == ["decode (1)"] * 2 + ["decode (2)"] * 2
+    assert [event["ph"] for event in events] == ["B", "E", "B", "E"]
+    assert len(json.loads(trace_recorder.export_json())) == 4
+    assert trace_recorder.num_dropped_events == 2
+    # The exported events are not exported again.
+    assert json.loads(trace_recorder.export_json()) == []
+    trace_recorder.add_event("y", event="add request")
+    assert [event["tid"] for event in json.loads(trace_recorder.export_json())] == ["y"]
+    assert len(json.loads(trace_recorder.dump_json())) == 4
+
+
+def test_event_trace_recorder_sampling():
+    trace_recorder = EventTraceRecorder(sample_rate=0.25)
+    num_requests = 1000
+    for i in range(num_requests):
+        trace_recorder.add_event(f"request-{i}", event="start prefill")
+        trace_recorder.add_event(f"request-{i}", event="finish prefill")
+    events = json.loads(trace_recorder.dump_json())
+    num_events = {}
+    for event in events:
+        num_events[event["tid"]] = num_events.get(event["tid"], 0) + 1
+    # Either all or none of the events of a request are recorded.
+    assert all(count == 2 for count in num_events.values())
+    assert 0.15 * num_requests < len(num_events) < 0.35 * num_requests
+    assert EventTraceRecorder(sample_rate=0.0).dump_json() == "[]"
+
+
+def test_event_trace_exporter():
+    trace_recorder = EventTraceRecorder()
+    with tempfile.TemporaryDirectory() as directory:
+        exporter = EventTraceExporter(trace_recorder, directory, interval=3600, max_num_files=2)
+        paths = []
+        for i in range(3):
+            trace_recorder.add_event(f"request-{i}", event="add request")
+            paths.append(exporter.export())
+        assert exporter.export() is None
+        trace_recorder.add_event("request-3", event="add request")
+        exporter.stop()
+        files = sorted(Path(directory).iterdir())
+        assert len(files) == 2 and not paths[0].exists()
+        tids = [json.loads(file.read_text())[0]["tid"] for file in files]
+        assert sorted(tids) == ["request-2", "request-3"]
+
+
 if __name__ == "__main__":
     test_event_trace_recorder()
+    test_event_trace_recorder_ring_buffer()
+    test_event_trace_recorder_sampling()
+    test_event_trace_exporter()
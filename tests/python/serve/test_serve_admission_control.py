@@ -0,0 +1,79 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+from typing import Dict
+
+from mlc_llm.serve.engine_base import EngineState
+from mlc_llm.serve.server import AdmissionController
+
+
+def _stats(num_prompt_tokens: int, prefill_time: float, decode_time: float) -> Dict[str, float]:
+    return {
+        "total_prefill_tokens": num_prompt_tokens,
+        "engine_total_prefill_time": prefill_time,
+        "engine_total_decode_time": decode_time,
+    }
+
+
+class _FakeAsyncEngine:  # pylint: disable=too-few-public-methods
+    def __init__(self) -> None:
+        self.state = EngineState(enable_tracing=False)
+        self.engine_stats: Dict[str, float] = {}
+
+    def stats(self) -> Dict[str, float]:
+        return self.engine_stats
+
+
+def test_admission_control_throughput():
+    controller = AdmissionController(stats_window=1.0)
+    assert controller.estimate_queue_delay(1000) is None
+    controller.update_throughput({}, now=0.0)
+    controller.update_throughput(_stats(0, 0.0, 0.0), now=0.0)
+    # The window is too short.
+    controller.update_throughput(_stats(1000, 1.0, 1.0), now=0.5)
+    assert controller.estimate_queue_delay(1000) is None
+    # 1000 prompt tokens are served in 2 seconds of engine time.
+    controller.update_throughput(_stats(1000, 1.0, 1.0), now=1.0)
+    assert abs(controller.estimate_queue_delay(1000) - 2.0) < 1e-9
+    # The window extends when no request finishes.
+    controller.update_throughput(_stats(1000, 2.0, 3.0), now=2.0)
+    assert abs(controller.estimate_queue_delay(1000) - 2.0) < 1e-9
+    controller.update_throughput(_stats(2000, 2.0, 3.0), now=3.0)
+    assert abs(controller.estimate_queue_delay(1000) - 2.5) < 1e-9
+    # The statistics are reset.
+    controller.update_throughput(_stats(0, 0.0, 0.0), now=4.0)
+    assert abs(controller.estimate_queue_delay(1000) - 2.5) < 1e-9
+
+
+def test_admission_control_max_num_waiting_requests():
+    async_engine = _FakeAsyncEngine()
+    controller = AdmissionController(max_num_waiting_requests=2)
+    assert controller.check(async_engine) is None
+    async_engine.state.async_add_waiting_request("a", 10)
+    assert controller.check(async_engine) is None
+    async_engine.state.async_add_waiting_request("b", 20)
+    assert async_engine.state.async_num_waiting_prompt_tokens == 30
+    assert controller.check(async_engine) == 1
+    async_engine.state.async_remove_waiting_request("a")
+    async_engine.state.async_remove_waiting_request("a")
+    assert async_engine.state.async_num_waiting_prompt_tokens == 20
+    assert controller.check(async_engine) is None
+
+
+def test_admission_control_max_queue_delay():
+    async_engine = _FakeAsyncEngine()
+    controller = AdmissionController(max_queue_delay=5.0, stats_window=0.0)
+    async_engine.state.async_add_waiting_request("a", 4000)
+    # The throughput is unknown.
+    assert controller.check(async_engine) is None
+    controller.update_throughput(_stats(0, 0.0, 0.0), now=0.0)
+    controller.update_throughput(_stats(1000, 1.0, 1.0), now=1.0)
+    # The estimated queue delay is 8 seconds.
+    assert controller.check(async_engine) == 3
+    async_engine.state.async_remove_waiting_request("a")
+    async_engine.state.async_add_waiting_request("b", 2000)
+    assert controller.check(async_engine) is None
+
+
+if __name__ == "__main__":
+    test_admission_control_throughput()
+    test_admission_control_max_num_waiting_requests()
+    test_admission_control_max_queue_delay()
@@ -0,0 +1,62 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+import asyncio
+from typing import List
+
+from mlc_llm.serve.engine_base import AsyncRequestStream, CallbackStreamOutput
+
+
+def _make_outputs(texts: List[str], finish_reason=None) -> List[CallbackStreamOutput]:
+    return [
+        CallbackStreamOutput(
+            delta_text=text,
+            num_delta_tokens=1,
+            delta_logprob_json_strs=[f'"{text}"'],
+            finish_reason=finish_reason,
+        )
+        for text in texts
+    ]
+
+
+async def _collect(stream: AsyncRequestStream) -> List[List[CallbackStreamOutput]]:
+    return [outputs async for outputs in stream]
+
+
+def test_async_request_stream_no_coalescing():
+    async def _run():
+        stream = AsyncRequestStream()
+        for text in ["a", "b", "c"]:
+            stream.push(_make_outputs([text, text.upper()]))
+        stream.finish()
+        return await _collect(stream)
+
+    results = asyncio.run(_run())
+    assert len(results) == 3
+    assert [outputs[1].delta_text for outputs in results] == ["A", "B", "C"]
+
+
+def test_async_request_stream_coalescing():
+    async def _run():
+        stream = AsyncRequestStream(coalesce=True)
+        stream.push(_make_outputs(["a", "A"]))
+        stream.push(_make_outputs(["b", "B"]))
+        first = await stream.__anext__()
+        stream.push(_make_outputs(["c", "C"]))
+        stream.push(_make_outputs(["d", "D"], finish_reason="stop"))
+        stream.finish()
+        return [first] + await _collect(stream)
+
+    results = asyncio.run(_run())
+    assert len(results) == 2
+    assert [output.delta_text for output in results[0]] == ["ab", "AB"]
+    assert [output.delta_text for output in results[1]] == ["cd", "CD"]
+    for outputs in results:
+        for output in outputs:
+            assert output.num_delta_tokens == 2
+            assert len(output.delta_logprob_json_strs) == 2
+    assert results[0][0].finish_reason is None
+    assert results[1][0].finish_reason == "stop"
+
+
+if __name__ == "__main__":
+    test_async_request_stream_no_coalescing()
+    test_async_request_stream_coalescing()
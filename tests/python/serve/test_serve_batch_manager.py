@@ -0,0 +1,178 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,protected-access
+import asyncio
+import io
+import json
+import tempfile
+from typing import List, Optional
+
+from mlc_llm.protocol.openai_api_protocol import (
+    BatchObject,
+    BatchRequest,
+    CompletionRequest,
+    CompletionResponse,
+    CompletionResponseChoice,
+    UsageInfo,
+)
+from mlc_llm.serve.server import BatchManager
+
+
+class _FakeAsyncEngine:  # pylint: disable=too-few-public-methods
+    def __init__(self) -> None:
+        self.prompts: List[str] = []
+
+    async def _aggregate_completion(self, request: CompletionRequest, request_id: str):
+        assert not request.stream
+        self.prompts.append(request.prompt)
+        return CompletionResponse(
+            id=request_id,
+            choices=[CompletionResponseChoice(text=request.prompt[::-1], finish_reason="stop")],
+            model=request.model,
+            usage=UsageInfo(prompt_tokens=len(request.prompt), completion_tokens=2),
+        )
+
+
+def _create_manager(
+    directory: str, engine: _FakeAsyncEngine, sort_window_size: int = 4096
+) -> BatchManager:
+    async def _load_engine(model: Optional[str]) -> Optional[_FakeAsyncEngine]:
+        return engine if model is None else None
+
+    return BatchManager(
+        directory, _load_engine, max_concurrency=1, sort_window_size=sort_window_size
+    )
+
+
+def _request_line(custom_id: str, body) -> str:
+    return json.dumps(
+        {"custom_id": custom_id, "method": "POST", "url": "/v1/completions", "body": body}
+    )
+
+
+async def _wait_for_batches(manager: BatchManager) -> None:
+    while len(manager._tasks) > 0:
+        await asyncio.sleep(0.01)
+
+
+def _read_results(manager: BatchManager, batch: BatchObject):
+    with open(manager.get_file_content_path(batch.output_file_id), encoding="utf-8") as file:
+        return {result["custom_id"]: result for result in map(json.loads, file)}
+
+
+def test_batch_manager():
+    async def _run():
+        engine = _FakeAsyncEngine()
+        with tempfile.TemporaryDirectory() as directory:
+            manager = _create_manager(directory, engine)
+            lines = [
+                _request_line("a", {"prompt": "x"}),
+                _request_line("b", {"prompt": "xyz"}),
+                _request_line("c", {"prompt": "xy", "model": "unknown"}),
+                "not a json line",
+            ]
+            input_file = manager.create_file("input.jsonl", "batch", "\n".join(lines).encode())
+            batch = manager.create_batch(
+                BatchRequest(input_file_id=input_file.id, endpoint="/v1/completions")
+            )
+            await _wait_for_batches(manager)
+
+            assert batch.status == "completed"
+            assert batch.request_counts.total == 4
+            assert batch.request_counts.completed == 2
+            assert batch.request_counts.failed == 2
+            assert batch.throughput.prompt_tokens == 4
+            assert batch.throughput.completion_tokens == 4
+            # The longer prompt runs first.
+            assert engine.prompts == ["xyz", "x"]
+            results = _read_results(manager, batch)
+            assert results["b"]["response"]["body"]["choices"][0]["text"] == "zyx"
+            assert results["c"]["error"]["code"] == "model_not_found"
+            assert results["line-3"]["error"]["code"] == "invalid_request"
+            assert manager.get_file(batch.output_file_id).bytes > 0
+
+    asyncio.run(_run())
+
+
+def test_batch_manager_sort_window():
+    async def _run():
+        engine = _FakeAsyncEngine()
+        with tempfile.TemporaryDirectory() as directory:
+            manager = _create_manager(directory, engine, sort_window_size=2)
+            prompts = ["x", "xyz", "", "xy", "xyzw", "xyzwv"]
+            lines = [
+                _request_line(str(i), {"prompt": prompt}) if prompt else ""
+                for i, prompt in enumerate(prompts)
+            ]
+            input_file = manager.create_file("input.jsonl", "batch", "\n".join(lines).encode())
+            batch = manager.create_batch(
+                BatchRequest(input_file_id=input_file.id, endpoint="/v1/completions")
+            )
+            await _wait_for_batches(manager)
+
+            assert batch.status == "completed"
+            assert batch.request_counts.total == 5
+            assert batch.request_counts.completed == 5
+            # The requests are sorted by prompt length within each window of two lines.
+            assert engine.prompts == ["xyz", "x", "xy", "xyzwv", "xyzw"]
+
+    asyncio.run(_run())
+
+
+def test_batch_manager_upload_file():
+    async def _run():
+        with tempfile.TemporaryDirectory() as directory:
+            manager = _create_manager(directory, _FakeAsyncEngine())
+            content = b"".join(f"{i}\n".encode() for i in range(300000))
+            file = await manager.upload_file("input.jsonl", "batch", io.BytesIO(content))
+            assert file.bytes == len(content)
+            assert manager.get_file(file.id) == file
+            assert manager.get_file_content_path(file.id).read_bytes() == content
+
+    asyncio.run(_run())
+
+
+def test_batch_manager_resume():
+    async def _run():
+        with tempfile.TemporaryDirectory() as directory:
+            manager = _create_manager(directory, _FakeAsyncEngine())
+            lines = [_request_line("a", {"prompt": "x"}), _request_line("b", {"prompt": "xyz"})]
+            input_file = manager.create_file("input.jsonl", "batch", "\n".join(lines).encode())
+            output_file = manager.create_file("output.jsonl", "batch_output", b"")
+            batch = BatchObject(
+                id="batch_resume",
+                endpoint="/v1/completions",
+                input_file_id=input_file.id,
+                completion_window="24h",
+                output_file_id=output_file.id,
+                status="in_progress",
+            )
+            manager._save_batch(batch)
+            # The server stopped after writing the result of "a" and a part of the next line.
+            previous_result = {
+                "id": "batch_req_0",
+                "custom_id": "a",
+                "response": {"status_code": 200, "body": {"usage": UsageInfo(1, 2).model_dump()}},
+                "error": None,
+            }
+            manager.get_file_content_path(output_file.id).write_text(
+                json.dumps(previous_result) + '\n{"id": "batch_', encoding="utf-8"
+            )
+
+            engine = _FakeAsyncEngine()
+            manager = _create_manager(directory, engine)
+            manager.resume()
+            await _wait_for_batches(manager)
+            batch = manager.get_batch("batch_resume")
+            assert batch.status == "completed"
+            assert engine.prompts == ["xyz"]
+            assert batch.request_counts.completed == 2
+            assert batch.throughput.completion_tokens == 4
+            assert sorted(_read_results(manager, batch).keys()) == ["a", "b"]
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    test_batch_manager()
+    test_batch_manager_sort_window()
+    test_batch_manager_upload_file()
+    test_batch_manager_resume()
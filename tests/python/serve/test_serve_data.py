@@ -0,0 +1,56 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+import numpy as np
+import tvm
+
+from mlc_llm.serve import data, engine_utils
+
+
+def test_token_data_construction():
+    token_ids = [1, 15043, 29892, 590, 1024, 338]
+    inputs = [
+        token_ids,
+        np.array(token_ids, dtype="int32"),
+        np.array(token_ids, dtype="int64"),
+        np.array(token_ids + [0], dtype="int32")[:-1],
+        tvm.nd.array(np.array(token_ids, dtype="int32")),
+        tvm.runtime.ShapeTuple(token_ids),
+    ]
+    for token_input in inputs:
+        token_data = data.TokenData(token_input)
+        assert token_data.token_ids == token_ids
+        assert token_data.token_ids_array.dtype == "int32"
+        assert token_data.token_ids_array.tolist() == token_ids
+        assert len(token_data) == len(token_ids)
+    assert data.TokenData([]).token_ids == []
+
+
+def test_convert_prompts_to_data():
+    token_ids = np.arange(100000, dtype="int32") % 32000
+    prompts = engine_utils.convert_prompts_to_data(token_ids)
+    assert len(prompts) == 1 and isinstance(prompts[0], data.TokenData)
+    assert np.array_equal(prompts[0].token_ids_array, token_ids)
+
+    prompts = engine_utils.convert_prompts_to_data([[1, 2, 3], token_ids[:5]])
+    assert [prompt.token_ids for prompt in prompts] == [[1, 2, 3], token_ids[:5].tolist()]
+
+
+def test_request_stream_output_batch_unpack():
+    delta_outputs = [
+        data._ffi_api.RequestStreamOutput("req-0", [[1, 2]], None, [None]),
+        data._ffi_api.RequestStreamOutput("req-\u00e9", [[3], [4, 5, 6]], None, ["stop", None]),
+        data._ffi_api.RequestStreamOutput("req-2", [[]], None, ["length"]),
+    ]
+    outputs = data.unpack_request_stream_outputs(delta_outputs)
+    assert [request_id for request_id, _ in outputs] == ["req-0", "req-\u00e9", "req-2"]
+    assert [
+        [output.delta_token_ids for output in stream_outputs] for _, stream_outputs in outputs
+    ] == [[[1, 2]], [[3], [4, 5, 6]], [[]]]
+    assert [
+        [output.finish_reason for output in stream_outputs] for _, stream_outputs in outputs
+    ] == [[None], ["stop", None], ["length"]]
+
+
+if __name__ == "__main__":
+    test_token_data_construction()
+    test_convert_prompts_to_data()
+    test_request_stream_output_batch_unpack()
@@ -0,0 +1,47 @@
+# pylint: disable=missing-docstring
+import asyncio
+
+import numpy as np
+
+from mlc_llm.serve import AsyncEmbeddingEngine
+from mlc_llm.serve.embedding_engine import pool_hidden_states
+
+texts = [
+    "What is the meaning of life?",
+    "Introduce the history of Pittsburgh to me.",
+    "Where is milk tea originated from?",
+]
+
+
+def test_pool_hidden_states():
+    hidden_states = np.arange(12, dtype="float16").reshape(6, 2)
+    pooled = pool_hidden_states(hidden_states, [1, 3, 2], ["last", "mean", "cls"])
+    assert pooled.dtype == np.float32
+    np.testing.assert_allclose(pooled, [[0, 1], [4, 5], [8, 9]])
+
+
+async def test_embedding_engine():
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    embedding_engine = AsyncEmbeddingEngine(model=model, model_lib_path=model_lib_path)
+
+    # The concurrent requests are packed into the same prefills.
+    results = await asyncio.gather(
+        embedding_engine.embed(texts),
+        *[embedding_engine.embed(text) for text in texts],
+        embedding_engine.embed(texts, pooling="mean", dimensions=64),
+    )
+    batched_embeddings, num_tokens = results[0]
+    assert num_tokens == sum(results[i + 1][1] for i in range(len(texts)))
+    for i, embedding in enumerate(batched_embeddings):
+        np.testing.assert_allclose(np.linalg.norm(embedding), 1.0, rtol=1e-3)
+        np.testing.assert_allclose(embedding, results[i + 1][0][0], atol=1e-2)
+    mean_embeddings, _ = results[-1]
+    assert all(embedding.shape == (64,) for embedding in mean_embeddings)
+
+    embedding_engine.terminate()
+
+
+if __name__ == "__main__":
+    test_pool_hidden_states()
+    asyncio.run(test_embedding_engine())
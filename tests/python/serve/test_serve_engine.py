@@ -1,5 +1,6 @@
 # pylint: disable=chained-comparison,line-too-long,missing-docstring,
 # pylint: disable=too-many-arguments,too-many-locals,unused-argument,unused-variable
+import concurrent.futures
 from typing import List
 
 from mlc_llm.serve import GenerationConfig, MLCEngine
@@ -231,9 +232,156 @@ def test_completion_non_stream():
     del engine
 
 
+def test_engine_prefix_cache():
+    # Create engines with and without prefix cache
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    system_prompt = "You are a helpful, respectful and honest assistant. " * 8
+    max_tokens = 32
+    generation_cfg = GenerationConfig(temperature=0, max_tokens=max_tokens)
+
+    def generate_all(prefix_cache_max_num_recycling_seqs: int) -> List[str]:
+        engine = MLCEngine(
+            model=model,
+            model_lib_path=model_lib_path,
+            mode="server",
+            max_total_sequence_length=4096,
+            prefix_cache_max_num_recycling_seqs=prefix_cache_max_num_recycling_seqs,
+        )
+        output_texts = []
+        # Requests are issued one after another, so that every request after the
+        # first one shares the system prompt with the finished requests.
+        for rid, prompt in enumerate(prompts[:4]):
+            output_text = ""
+            for delta_outputs in engine._generate(
+                system_prompt + prompt, generation_cfg, request_id=str(rid)
+            ):
+                output_text += delta_outputs[0].delta_text
+            output_texts.append(output_text)
+        engine.terminate()
+        del engine
+        return output_texts
+
+    outputs_without_cache = generate_all(prefix_cache_max_num_recycling_seqs=0)
+    outputs_with_cache = generate_all(prefix_cache_max_num_recycling_seqs=4)
+    for output_without_cache, output_with_cache in zip(outputs_without_cache, outputs_with_cache):
+        print(f"Output without prefix cache: {output_without_cache}")
+        print(f"Output with prefix cache: {output_with_cache}\n")
+        assert output_without_cache == output_with_cache
+
+
+def test_engine_submit_from_threads():
+    # Create engine
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    engine = MLCEngine(
+        model=model,
+        model_lib_path=model_lib_path,
+        mode="server",
+        max_total_sequence_length=4096,
+    )
+    generation_cfg = GenerationConfig(temperature=0, max_tokens=32)
+
+    def stream_one(prompt: str) -> str:
+        output_text = ""
+        for delta_outputs in engine.stream(prompt, generation_cfg):
+            output_text += delta_outputs[0].delta_text
+        return output_text
+
+    # Each worker thread submits its own requests and collects the results independently.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(lambda prompt: engine.submit(prompt, generation_cfg).result(), prompt)
+            for prompt in prompts
+        ]
+        streamed_texts = list(executor.map(stream_one, prompts))
+        outputs = [future.result() for future in futures]
+
+    for prompt, output, streamed_text in zip(prompts, outputs, streamed_texts):
+        assert len(output) == 1
+        assert output[0].finish_reason in ["stop", "length"]
+        print(f"Prompt: {prompt}\nOutput: {output[0].delta_text}\n")
+        assert output[0].delta_text == streamed_text
+
+    # Cancelling the future aborts the request.
+    future = engine.submit(prompts[0], GenerationConfig(max_tokens=4096, ignore_eos=True))
+    assert future.cancel()
+    assert len(engine.state.sync_streams) == 0
+
+    engine.terminate()
+    del engine
+
+
+def test_engine_mixed_prefill_decode():
+    # Create engines with and without mixing prefill and decode
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    generation_cfg = GenerationConfig(temperature=0, max_tokens=64)
+
+    def generate_all(mixed_prefill_decode: bool) -> List[str]:
+        engine = MLCEngine(
+            model=model,
+            model_lib_path=model_lib_path,
+            mode="server",
+            max_total_sequence_length=4096,
+            # A small prefill chunk so that the prompts are prefilled over several steps
+            # while the earlier requests decode.
+            prefill_chunk_size=64,
+            mixed_prefill_decode=mixed_prefill_decode,
+            target_step_latency_ms=50.0 if mixed_prefill_decode else None,
+        )
+        futures = [engine.submit(prompt * 4, generation_cfg) for prompt in prompts]
+        output_texts = [future.result()[0].delta_text for future in futures]
+        engine.terminate()
+        del engine
+        return output_texts
+
+    outputs_without_mixing = generate_all(mixed_prefill_decode=False)
+    outputs_with_mixing = generate_all(mixed_prefill_decode=True)
+    for output_without_mixing, output_with_mixing in zip(
+        outputs_without_mixing, outputs_with_mixing
+    ):
+        print(f"Output without mixing: {output_without_mixing}")
+        print(f"Output with mixing: {output_with_mixing}\n")
+        assert output_without_mixing == output_with_mixing
+
+
+def test_engine_swap_preemption():
+    # Create engines with and without KV swap space
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    generation_cfg = GenerationConfig(temperature=0, max_tokens=256)
+
+    def generate_all(kv_swap_space_gb: float) -> List[str]:
+        engine = MLCEngine(
+            model=model,
+            model_lib_path=model_lib_path,
+            mode="server",
+            # A small KV cache so that the running requests are preempted while decoding.
+            max_total_sequence_length=1024,
+            kv_swap_space_gb=kv_swap_space_gb,
+        )
+        futures = [engine.submit(prompt, generation_cfg) for prompt in prompts]
+        output_texts = [future.result()[0].delta_text for future in futures]
+        engine.terminate()
+        del engine
+        return output_texts
+
+    outputs_without_swap = generate_all(kv_swap_space_gb=0)
+    outputs_with_swap = generate_all(kv_swap_space_gb=1)
+    for output_without_swap, output_with_swap in zip(outputs_without_swap, outputs_with_swap):
+        print(f"Output without swap: {output_without_swap}")
+        print(f"Output with swap: {output_with_swap}\n")
+        assert output_without_swap == output_with_swap
+
+
 if __name__ == "__main__":
     test_engine_generate()
     test_chat_completion()
     test_chat_completion_non_stream()
     test_completion()
     test_completion_non_stream()
+    test_engine_prefix_cache()
+    test_engine_submit_from_threads()
+    test_engine_mixed_prefill_decode()
+    test_engine_swap_preemption()
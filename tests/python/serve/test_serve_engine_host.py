@@ -0,0 +1,83 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,protected-access
+import json
+import multiprocessing
+from typing import List, Optional
+
+from mlc_llm.serve import data
+from mlc_llm.serve.server import multi_process
+
+
+class _FakeEngine:  # pylint: disable=too-few-public-methods
+    pass
+
+
+def _outputs(
+    engine_request_id: str, num_tokens: int, finish_reason: Optional[str] = None
+) -> multi_process._DecodedStreamOutputBatch:
+    return multi_process._DecodedStreamOutputBatch(
+        [
+            (
+                engine_request_id,
+                [
+                    data.SingleRequestStreamOutput(
+                        delta_token_ids=[1] * num_tokens,
+                        delta_logprob_json_strs=None,
+                        finish_reason=finish_reason,
+                        delta_text="a" * num_tokens,
+                        engine_timing=None,
+                    )
+                ],
+            )
+        ]
+    )
+
+
+def _read_request_ids(ring) -> List[List[str]]:
+    request_ids = []
+    for message in ring.read_all():
+        assert message[:1] == multi_process._OUTPUT_MESSAGE
+        request_ids.append([request_id for request_id, _ in json.loads(message[1:])])
+    return request_ids
+
+
+def test_engine_host_stalled_frontend():
+    host = multi_process.EngineHost(
+        _FakeEngine(),
+        num_frontends=2,
+        mp_context=multiprocessing.get_context(),
+        ring_capacity=400,
+        max_pending_bytes=512,
+    )
+    try:
+        host._requests = {"0-x": (0, "x"), "0-y": (0, "y"), "1-z": (1, "z")}
+        host._num_unfinished_generations = {"0-x": 1, "0-y": 1, "1-z": 1}
+        # Front-end 0 does not read. The outputs that do not fit in its ring are kept
+        # pending, and do not block the outputs of front-end 1.
+        for _ in range(3):
+            host._dispatch(_outputs("0-x", 30))
+            host._dispatch(_outputs("1-z", 1))
+            assert _read_request_ids(host.rings[1]) == [["z"]]
+        assert len(host._pending[0]) == 1
+        # The pending outputs are written once front-end 0 reads.
+        assert _read_request_ids(host.rings[0]) == [["x"], ["x"]]
+        host._flush(0)
+        assert _read_request_ids(host.rings[0]) == [["x"]]
+        assert len(host._pending[0]) == 0
+
+        # The requests of front-end 0 are aborted when its pending outputs exceed the limit.
+        for _ in range(8):
+            host._dispatch(_outputs("0-x", 30))
+        assert sorted(host._requests.keys()) == ["1-z"]
+        aborted = [host.submit_queue.get(timeout=1.0) for _ in range(2)]
+        assert sorted(aborted) == [("abort", 0, "x"), ("abort", 0, "y")]
+        # The pending outputs are replaced by the abort message of the requests.
+        messages = host.rings[0].read_all()
+        assert [message[:1] for message in messages] == [b"O", b"O", b"A"]
+        assert json.loads(messages[-1][1:]) == ["x", "y"]
+        assert len(host._pending[0]) == 0
+    finally:
+        host.close()
+
+
+if __name__ == "__main__":
+    test_engine_host_stalled_frontend()
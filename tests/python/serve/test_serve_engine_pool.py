@@ -0,0 +1,98 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+import asyncio
+from typing import Dict, List, Optional
+
+from mlc_llm.serve.engine_base import EngineState
+from mlc_llm.serve.server import EnginePool, InsufficientEngineMemoryError
+
+
+class _FakeAsyncEngine:  # pylint: disable=too-few-public-methods
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self.state = EngineState(enable_tracing=False)
+        self.terminated = False
+
+    def terminate(self) -> None:
+        self.terminated = True
+
+
+def _create_pool(
+    memory_usages: Dict[str, float], created: List[str], budgets: Optional[List[float]] = None
+) -> EnginePool:
+    def _create_engine(model: str, memory_budget: float) -> _FakeAsyncEngine:
+        created.append(model)
+        if budgets is not None:
+            budgets.append(memory_budget)
+        return _FakeAsyncEngine(model)
+
+    def _estimate_memory_usage(model: str, memory_budget: float) -> float:
+        assert memory_budget == 10.0
+        return memory_usages[model]
+
+    return EnginePool(
+        models=list(memory_usages.keys()),
+        create_engine=_create_engine,
+        estimate_memory_usage=_estimate_memory_usage,
+        memory_budget=10.0,
+        min_idle_time=0.0,
+    )
+
+
+def test_engine_pool_lru_unload():
+    async def _run():
+        created: List[str] = []
+        budgets: List[float] = []
+        pool = _create_pool({"a": 4.0, "b": 4.0, "c": 4.0}, created, budgets)
+        engine_a = await pool.acquire("a")
+        engine_b = await pool.acquire("b")
+        await asyncio.sleep(0.1)
+        assert await pool.acquire("a") is engine_a
+        assert pool.get_loaded_engine("c") is None
+        # Loading "c" unloads "b", which is less recently used than "a".
+        await pool.acquire("c")
+        assert engine_b.terminated and not engine_a.terminated
+        assert sorted(pool.get_loaded_model_list()) == ["a", "c"]
+        assert pool.get_memory_usage() == 8.0
+        assert created == ["a", "b", "c"]
+        # Each engine is created within the budget left by the other loaded engines.
+        assert budgets == [10.0, 6.0, 6.0]
+
+    asyncio.run(_run())
+
+
+def test_engine_pool_in_use():
+    async def _run():
+        pool = _create_pool({"a": 6.0, "b": 6.0, "c": 20.0}, [])
+        engine_a = await pool.acquire("a")
+        # The engine with running requests is not unloaded.
+        engine_a.state.async_streams["request"] = None
+        try:
+            await pool.acquire("b")
+            assert False, "The engine in use should not be unloaded."
+        except InsufficientEngineMemoryError as err:
+            assert err.retryable
+        engine_a.state.async_streams.clear()
+        await pool.acquire("b")
+        assert engine_a.terminated
+        # The model exceeding the budget is never loaded, and is not retryable.
+        try:
+            await pool.acquire("c")
+            assert False, "The model exceeding the memory budget should not be loaded."
+        except InsufficientEngineMemoryError as err:
+            assert not err.retryable
+        assert pool.get_loaded_model_list() == ["b"]
+
+    asyncio.run(_run())
+
+
+def test_engine_state_isolation():
+    state_a = EngineState(enable_tracing=False)
+    state_b = EngineState(enable_tracing=False)
+    state_a.async_streams["request"] = None
+    assert len(state_b.async_streams) == 0
+
+
+if __name__ == "__main__":
+    test_engine_pool_lru_unload()
+    test_engine_pool_in_use()
+    test_engine_state_isolation()
@@ -471,6 +471,89 @@ def test_engine_eagle_generate():
                 print(f"Output {req_id}({i}):{output}\n")
 
 
+def test_engine_adaptive_draft_length_generate():
+    # Create engine
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    small_model = "dist/Llama-2-7b-chat-hf-q4f16_1-MLC"
+    small_model_lib_path = (
+        "dist/Llama-2-7b-chat-hf-q4f16_1-MLC/Llama-2-7b-chat-hf-q4f16_1-MLC-cuda.so"
+    )
+
+    num_requests = 10
+    generation_config = GenerationConfig(
+        temperature=0.0, top_p=0, max_tokens=256, stop_token_ids=[2], n=1
+    )
+    output_texts = []
+    for adaptive_spec_draft_length in [False, True]:
+        engine = SyncMLCEngine(
+            model=model,
+            model_lib_path=model_lib_path,
+            mode="server",
+            max_total_sequence_length=4096,
+            additional_models=[small_model + ":" + small_model_lib_path],
+            speculative_mode=SpeculativeMode.SMALL_DRAFT,
+            spec_draft_length=6,
+            adaptive_spec_draft_length=adaptive_spec_draft_length,
+        )
+        outputs, _ = engine.generate(prompts[:num_requests], generation_config)
+        output_texts.append(outputs)
+        stats = engine.stats()
+        print(f"adaptive draft length: {adaptive_spec_draft_length}")
+        print("total draft tokens:", stats["total_draft_tokens"])
+        print("total accepted tokens:", stats["total_accepted_tokens"])
+        print("engine total decode time:", stats["engine_total_decode_time"])
+        del engine
+
+    # The draft length does not change the greedy outputs.
+    if compare_output_text(output_texts[0], output_texts[1]):
+        print("Accuracy verification succeed\n")
+    else:
+        print("Accuracy verification failed\n")
+
+
+def test_engine_ngram_generate():
+    # Create engine
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+
+    # The outputs copy the spans of the prompts.
+    copy_prompts = [
+        f"Repeat the following text word by word, and then summarize it.\n{prompt}"
+        for prompt in prompts
+    ]
+    num_requests = 10
+    generation_config = GenerationConfig(
+        temperature=0.0, top_p=0, max_tokens=256, stop_token_ids=[2], n=1
+    )
+    output_texts = []
+    for speculative_mode in [SpeculativeMode.DISABLE, SpeculativeMode.NGRAM]:
+        engine = SyncMLCEngine(
+            model=model,
+            model_lib_path=model_lib_path,
+            mode="server",
+            max_total_sequence_length=4096,
+            speculative_mode=speculative_mode,
+            spec_draft_length=6,
+        )
+        outputs, _ = engine.generate(copy_prompts[:num_requests], generation_config)
+        output_texts.append(outputs)
+        stats = engine.stats()
+        print(f"speculative mode: {speculative_mode.name}")
+        print("total draft tokens:", stats["total_draft_tokens"])
+        print("total accepted tokens:", stats["total_accepted_tokens"])
+        print("engine total decode time:", stats["engine_total_decode_time"])
+        if speculative_mode == SpeculativeMode.NGRAM:
+            assert stats["total_draft_tokens"] > 0
+        del engine
+
+    # The n-gram draft does not change the greedy outputs.
+    if compare_output_text(output_texts[0], output_texts[1]):
+        print("Accuracy verification succeed\n")
+    else:
+        print("Accuracy verification failed\n")
+
+
 def test_engine_efficiency():
     """Test engine speculative decoding efficiency."""
 
@@ -686,6 +769,8 @@ if __name__ == "__main__":
     test_engine_eagle_continuous_batching_1()
     test_engine_generate(compare_precision=True)
     test_engine_eagle_generate()
+    test_engine_adaptive_draft_length_generate()
+    test_engine_ngram_generate()
     test_engine_efficiency()
     test_engine_spec_efficiency()
     test_engine_eagle_spec_efficiency()
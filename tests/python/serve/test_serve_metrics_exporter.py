@@ -0,0 +1,67 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+from typing import Any, Dict
+
+from mlc_llm.serve.entrypoints.metrics_entrypoints import export_prometheus_metrics
+
+
+def _histogram(bucket_counts, total) -> Dict[str, Any]:
+    return {
+        "bucket_bounds": [0.1, 1.0],
+        "bucket_counts": bucket_counts,
+        "sum": total,
+        "count": sum(bucket_counts),
+    }
+
+
+def _metrics(num_prefill_tokens: int, num_decode_tokens: int) -> Dict[str, Any]:
+    return {
+        "queue_time": _histogram([2, 1, 0], 0.75),
+        "time_to_first_token": _histogram([0, 2, 1], 3.5),
+        "inter_token_latency": _histogram([3, 0, 0], 0.06),
+        "end_to_end_latency": _histogram([0, 0, 3], 12.0),
+        "num_running_requests": 2,
+        "num_waiting_requests": 1,
+        "kv_cache_num_total_pages": 100,
+        "kv_cache_num_used_pages": 25,
+        "num_prefill_tokens": num_prefill_tokens,
+        "num_decode_tokens": num_decode_tokens,
+        "num_draft_tokens": 8,
+        "num_accepted_tokens": 6,
+        "engine_prefill_time": 1.5,
+        "engine_decode_time": 2.5,
+        "response_cache": {
+            "num_hits": 3,
+            "num_misses": 5,
+            "num_evictions": 1,
+            "num_entries": 4,
+            "num_bytes": 2048,
+        },
+    }
+
+
+def test_prometheus_exporter():
+    text = export_prometheus_metrics({"llama": _metrics(1000, 200), "unloaded": {}})
+    lines = text.splitlines()
+    assert "# TYPE mlc_llm_time_to_first_token_seconds histogram" in lines
+    assert 'mlc_llm_time_to_first_token_seconds_bucket{model="llama",le="0.1"} 0' in lines
+    assert 'mlc_llm_time_to_first_token_seconds_bucket{model="llama",le="1.0"} 2' in lines
+    assert 'mlc_llm_time_to_first_token_seconds_bucket{model="llama",le="+Inf"} 3' in lines
+    assert 'mlc_llm_time_to_first_token_seconds_sum{model="llama"} 3.5' in lines
+    assert 'mlc_llm_time_to_first_token_seconds_count{model="llama"} 3' in lines
+    assert "# TYPE mlc_llm_prefill_tokens_total counter" in lines
+    assert 'mlc_llm_prefill_tokens_total{model="llama"} 1000' in lines
+    assert 'mlc_llm_num_waiting_requests{model="llama"} 1' in lines
+    assert 'mlc_llm_kv_cache_usage_ratio{model="llama"} 0.25' in lines
+    assert 'mlc_llm_spec_acceptance_rate{model="llama"} 0.75' in lines
+    # The throughputs are computed by the scrapers from the token counters.
+    assert "tokens_per_second" not in text
+    assert "# TYPE mlc_llm_response_cache_hits_total counter" in lines
+    assert 'mlc_llm_response_cache_hits_total{model="llama"} 3' in lines
+    assert 'mlc_llm_response_cache_bytes{model="llama"} 2048' in lines
+    assert "unloaded" not in text
+    # The export keeps no state, so the scrapers do not affect each other.
+    assert export_prometheus_metrics({"llama": _metrics(1000, 200), "unloaded": {}}) == text
+
+
+if __name__ == "__main__":
+    test_prometheus_exporter()
@@ -0,0 +1,40 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+from mlc_llm.protocol.openai_api_protocol import UsageInfo
+from mlc_llm.serve.data import RequestEngineTiming
+from mlc_llm.serve.engine_base import RequestTimer
+
+
+def test_request_timer():
+    timer = RequestTimer()
+    timer.tarrival = 0.0
+    timer.record_tokenization(now=0.5)
+    # The engine has not sent back any output.
+    timing = timer.timing_info()
+    assert timing.tokenization_time == 0.5
+    assert timing.ttft is None and timing.inter_token_time_mean is None
+
+    timer.record_output(1, None, now=2.0)
+    for i in range(99):
+        timer.record_output(1, None, now=2.0 + 0.01 * (i + 1))
+    # A slow step that outputs two tokens.
+    timer.record_output(2, RequestEngineTiming(0.25, 1.0, 16), now=3.99)
+    timing = timer.timing_info()
+    assert timing.queue_time == 0.25
+    assert timing.prefill_time == 1.0
+    assert timing.prefix_cache_hit_tokens == 16
+    assert timing.ttft == 2.0
+    assert abs(timing.decode_time - 1.99) < 1e-9
+    assert abs(timing.inter_token_time_mean - 1.99 / 101) < 1e-9
+    assert abs(timing.inter_token_time_p99 - 0.5) < 1e-9
+
+
+def test_usage_info_timing_serialization():
+    usage = UsageInfo(prompt_tokens=3, completion_tokens=4)
+    assert usage.model_dump_json() == '{"prompt_tokens":3,"completion_tokens":4,"total_tokens":7}'
+    usage.timing = RequestTimer().timing_info()
+    assert usage.model_dump()["timing"]["tokenization_time"] == 0.0
+
+
+if __name__ == "__main__":
+    test_request_timer()
+    test_usage_info_timing_serialization()
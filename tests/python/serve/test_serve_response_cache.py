@@ -0,0 +1,69 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+from mlc_llm.serve.config import GenerationConfig
+from mlc_llm.serve.engine_base import CallbackStreamOutput
+from mlc_llm.serve.response_cache import ResponseCache
+
+
+def _outputs(text: str):
+    return [CallbackStreamOutput(text, len(text), None, "stop")]
+
+
+def test_response_cache_key():
+    greedy = GenerationConfig(temperature=0.0, max_tokens=16)
+    key = ResponseCache.get_key([1, 2, 3], greedy)
+    assert key is not None
+    # The scheduling fields do not change the key.
+    prioritized = GenerationConfig(temperature=0.0, max_tokens=16, priority=5)
+    assert ResponseCache.get_key([1, 2, 3], prioritized) == key
+    assert ResponseCache.get_key([1, 2, 4], greedy) != key
+    assert ResponseCache.get_key([[1, 2], [3]], greedy) != key
+    assert ResponseCache.get_key([1, 2, 3], GenerationConfig(temperature=0.0, max_tokens=8)) != key
+    assert ResponseCache.get_key("abc", greedy) != ResponseCache.get_key("abd", greedy)
+    # The sampled requests are cacheable only with a fixed seed.
+    assert ResponseCache.get_key([1, 2, 3], GenerationConfig(temperature=0.7)) is None
+    assert ResponseCache.get_key([1, 2, 3], GenerationConfig(temperature=0.7, seed=1)) is not None
+
+
+def test_response_cache_lru_eviction():
+    cache = ResponseCache(max_num_entries=2, max_num_bytes=1 << 20)
+    cache.put("a", _outputs("aa"))
+    cache.put("b", _outputs("bb"))
+    outputs = cache.get("a")
+    assert outputs[0].delta_text == "aa" and outputs[0].finish_reason == "stop"
+    # The returned outputs are copies which do not change the cache.
+    outputs[0].merge(CallbackStreamOutput("x", 1, None, None))
+    assert cache.get("a")[0].delta_text == "aa"
+    cache.put("c", _outputs("cc"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    metrics = cache.metrics()
+    assert metrics["num_entries"] == 2
+    assert metrics["num_evictions"] == 1
+    assert metrics["num_hits"] == 4
+    assert metrics["num_misses"] == 1
+
+
+def test_response_cache_byte_limit_and_ttl():
+    entry_bytes = ResponseCache(1, 1 << 20)
+    entry_bytes.put("a", _outputs("x" * 100))
+    num_bytes = entry_bytes.num_bytes
+    cache = ResponseCache(max_num_entries=10, max_num_bytes=2 * num_bytes, ttl=10.0)
+    cache.put("a", _outputs("x" * 100), now=0.0)
+    cache.put("b", _outputs("y" * 100), now=0.0)
+    cache.put("c", _outputs("z" * 100), now=5.0)
+    assert cache.num_bytes == 2 * num_bytes
+    assert cache.get("a", now=5.0) is None
+    # The responses larger than the cache are not cached.
+    cache.put("d", _outputs("w" * 1000), now=5.0)
+    assert cache.get("d", now=5.0) is None
+    assert cache.get("b", now=9.0) is not None
+    assert cache.get("b", now=10.5) is None
+    assert cache.get("c", now=10.5) is not None
+    assert cache.metrics()["num_entries"] == 1
+    assert cache.num_bytes == num_bytes
+
+
+if __name__ == "__main__":
+    test_response_cache_key()
+    test_response_cache_lru_eviction()
+    test_response_cache_byte_limit_and_ttl()
@@ -0,0 +1,66 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+import multiprocessing
+
+from mlc_llm.serve.server.shared_memory_ring import SharedMemoryRing
+
+
+def test_shared_memory_ring_wrap_around():
+    ring = SharedMemoryRing(capacity=64)
+    try:
+        assert not ring.wait(timeout=0.01)
+        for i in range(20):
+            messages = [bytes([i]) * (i % 7), b"x" * 10]
+            for message in messages:
+                assert ring.write(message)
+            assert ring.wait(timeout=0.01)
+            assert ring.read_all() == messages
+        # The signals are consumed together with the messages.
+        assert not ring.wait(timeout=0.01)
+    finally:
+        ring.close()
+
+
+def test_shared_memory_ring_full():
+    ring = SharedMemoryRing(capacity=32)
+    try:
+        assert ring.write(b"a" * 20)
+        assert not ring.write(b"b" * 20, block=False)
+        assert ring.read_all() == [b"a" * 20]
+        assert ring.write(b"b" * 20, block=False)
+        assert ring.read_all() == [b"b" * 20]
+        try:
+            ring.write(b"c" * 40)
+            assert False, "The message exceeding the capacity should not be written."
+        except ValueError:
+            pass
+    finally:
+        ring.close()
+
+
+def _produce(ring: SharedMemoryRing, num_messages: int) -> None:
+    for i in range(num_messages):
+        ring.write(str(i).encode() * 8)
+
+
+def test_shared_memory_ring_across_processes():
+    mp_context = multiprocessing.get_context("fork")
+    ring = SharedMemoryRing(capacity=256, mp_context=mp_context)
+    num_messages = 1000
+    process = mp_context.Process(target=_produce, args=(ring, num_messages))
+    process.start()
+    try:
+        # The producer waits for the reads when the ring is full.
+        messages = []
+        while len(messages) < num_messages:
+            if ring.wait(timeout=10):
+                messages += ring.read_all()
+        assert messages == [str(i).encode() * 8 for i in range(num_messages)]
+    finally:
+        process.join()
+        ring.close()
+
+
+if __name__ == "__main__":
+    test_shared_memory_ring_wrap_around()
+    test_shared_memory_ring_full()
+    test_shared_memory_ring_across_processes()
@@ -0,0 +1,161 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+import json
+from typing import List, Optional
+
+from mlc_llm.serve import engine_base, stream_encoder
+from mlc_llm.serve.config import GenerationConfig
+from mlc_llm.serve.engine_base import CallbackStreamOutput, EngineState
+
+
+def _logprob_json_str(token: str, logprob: float, num_top: int) -> str:
+    def _entry(tok: str, value: float) -> str:
+        token_bytes = ", ".join(str(b) for b in tok.encode("utf-8"))
+        return f'"token": {json.dumps(tok)}, "logprob": {value}, "bytes": [{token_bytes}]'
+
+    top = ", ".join("{" + _entry(f"{token}{i}", logprob * (i + 2)) + "}" for i in range(num_top))
+    return "{" + _entry(token, logprob) + ', "top_logprobs": [' + top + "]}"
+
+
+def _delta_output_groups(with_logprobs: bool) -> List[List[CallbackStreamOutput]]:
+    texts = [["Hello", ""], [" wörld\n", "\"quoted\"\t"], ["", "\\ \x01 🙂"], ["!", ""]]
+    finish_reasons: List[List[Optional[str]]] = [
+        [None, None],
+        [None, None],
+        [None, "length"],
+        ["stop", None],
+    ]
+    logprobs = [-0.693147, -1.5e-05, -3e-07, 0, -12.25]
+    groups = []
+    for step, (step_texts, step_finish_reasons) in enumerate(zip(texts, finish_reasons)):
+        groups.append(
+            [
+                CallbackStreamOutput(
+                    delta_text=text,
+                    num_delta_tokens=1 if text else 0,
+                    delta_logprob_json_strs=(
+                        [_logprob_json_str(text, logprobs[(step + i) % len(logprobs)], 2)]
+                        if with_logprobs and text
+                        else ([] if with_logprobs else None)
+                    ),
+                    finish_reason=finish_reason,
+                )
+                for i, (text, finish_reason) in enumerate(zip(step_texts, step_finish_reasons))
+            ]
+        )
+    return groups
+
+
+def test_chat_completion_stream_encoder():
+    for with_logprobs in [False, True]:
+        for use_function_calling in [False, True]:
+            state = EngineState(enable_tracing=False)
+            generation_cfg = GenerationConfig(n=2)
+            encoder = stream_encoder.ChatCompletionStreamEncoder(
+                "chatcmpl-0", state, "model", use_function_calling, prompt_length=7
+            )
+            finish_reasons_ref: List[Optional[str]] = [None, None]
+            finish_reasons: List[Optional[str]] = [None, None]
+            num_tokens_ref = num_tokens = 0
+            for delta_outputs in _delta_output_groups(with_logprobs):
+                response, num_tokens_ref = engine_base.process_chat_completion_stream_output(
+                    delta_outputs,
+                    "chatcmpl-0",
+                    state,
+                    "model",
+                    generation_cfg,
+                    use_function_calling,
+                    7,
+                    finish_reasons_ref,
+                    num_tokens_ref,
+                )
+                event, num_tokens = encoder.encode(
+                    delta_outputs,
+                    finish_reasons,
+                    num_tokens,
+                    created=response.created if response is not None else None,
+                )
+                assert num_tokens == num_tokens_ref
+                assert finish_reasons == finish_reasons_ref
+                if response is None:
+                    assert event is None
+                else:
+                    assert event == f"data: {response.model_dump_json()}\n\n"
+
+
+def test_completion_stream_encoder():
+    for with_logprobs in [False, True]:
+        for model in ["model", None]:
+            state = EngineState(enable_tracing=False)
+            generation_cfg = GenerationConfig(n=2)
+            encoder = stream_encoder.CompletionStreamEncoder(
+                "cmpl-0", state, model, prompt_length=5
+            )
+            finish_reasons_ref: List[Optional[str]] = [None, None]
+            finish_reasons: List[Optional[str]] = [None, None]
+            num_tokens_ref = num_tokens = 0
+            for delta_outputs in _delta_output_groups(with_logprobs):
+                response, num_tokens_ref = engine_base.process_completion_stream_output(
+                    delta_outputs,
+                    "cmpl-0",
+                    state,
+                    model,
+                    generation_cfg,
+                    5,
+                    finish_reasons_ref,
+                    num_tokens_ref,
+                )
+                event, num_tokens = encoder.encode(
+                    delta_outputs,
+                    finish_reasons,
+                    num_tokens,
+                    created=response.created if response is not None else None,
+                )
+                assert num_tokens == num_tokens_ref
+                assert finish_reasons == finish_reasons_ref
+                if response is None:
+                    assert event is None
+                else:
+                    assert event == f"data: {response.model_dump_json()}\n\n"
+
+
+def test_stream_output_aggregator():
+    for with_logprobs in [False, True]:
+        for use_function_calling in [False, True]:
+            state = EngineState(enable_tracing=False)
+            generation_cfg = GenerationConfig(n=2)
+            aggregator = engine_base.StreamOutputAggregator(2, use_function_calling)
+            finish_reasons_ref: List[Optional[str]] = [None, None]
+            num_tokens_ref = 0
+            output_texts_ref = ["", ""]
+            logprob_results_ref: List[list] = [[], []]
+            for delta_outputs in _delta_output_groups(with_logprobs):
+                aggregator.add(delta_outputs)
+                response, num_tokens_ref = engine_base.process_chat_completion_stream_output(
+                    delta_outputs,
+                    "chatcmpl-0",
+                    state,
+                    "model",
+                    generation_cfg,
+                    use_function_calling,
+                    7,
+                    finish_reasons_ref,
+                    num_tokens_ref,
+                )
+                for choice in response.choices if response is not None else []:
+                    output_texts_ref[choice.index] += choice.delta.content
+                    if choice.logprobs is not None:
+                        logprob_results_ref[choice.index] += choice.logprobs.content
+            assert aggregator.num_completion_tokens == num_tokens_ref
+            assert aggregator.finish_reasons == finish_reasons_ref
+            assert aggregator.output_texts() == output_texts_ref
+            logprob_results = aggregator.logprob_results(with_logprobs)
+            if with_logprobs:
+                assert logprob_results == logprob_results_ref
+            else:
+                assert logprob_results is None
+
+
+if __name__ == "__main__":
+    test_chat_completion_stream_encoder()
+    test_completion_stream_encoder()
+    test_stream_output_aggregator()
@@ -361,6 +361,62 @@ def test_engine_continuous_batching_3():
         print(f"Output {req_id}:{engine.tokenizer.decode(output)}\n")
 
 
+def test_engine_priority_scheduling():
+    """Test the engine schedules the waiting requests by priority and deadline.
+
+    - Add all requests to the engine altogether in the beginning.
+    - Request 3 has the highest priority, and request 2 has a TTFT deadline.
+    - The engine runs one request at a time, so the requests finish in the
+    scheduled order.
+    """
+    max_tokens = 16
+    finish_order = []
+
+    # Define the callback function for request generation results
+    def fcallback(delta_outputs: List[RequestStreamOutput]):
+        for delta_output in delta_outputs:
+            request_id, stream_outputs = delta_output.unpack()
+            if stream_outputs[0].finish_reason is not None:
+                finish_order.append(int(request_id))
+
+    # Create engine
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    engine = SyncMLCEngine(
+        model=model,
+        model_lib_path=model_lib_path,
+        mode="server",
+        max_batch_size=1,
+        request_stream_callback=fcallback,
+    )
+
+    # Create requests
+    requests = []
+    for req_id, prompt in enumerate(prompts[:4]):
+        requests.append(
+            Request(
+                request_id=str(req_id),
+                inputs=data.TextData(prompt),
+                generation_config=GenerationConfig(
+                    max_tokens=max_tokens,
+                    ignore_eos=True,
+                    priority=1 if req_id == 3 else 0,
+                    ttft_deadline_ms=100.0 if req_id == 2 else None,
+                ),
+            )
+        )
+
+    # Add all requests to engine
+    for request in requests:
+        engine.add_request(request)
+
+    # Run steps
+    for _ in range(len(requests) * max_tokens):
+        engine.step()
+
+    assert finish_order == [3, 2, 0, 1]
+
+
 def test_engine_generate():
     # Create engine
     model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
@@ -388,9 +444,43 @@ def test_engine_generate():
                 print(f"Output {req_id}({i}):{output}\n")
 
 
+def test_engine_swap_preemption():
+    # Create engines with and without KV swap space
+    model = "dist/Llama-2-7b-chat-hf-q0f16-MLC"
+    model_lib_path = "dist/Llama-2-7b-chat-hf-q0f16-MLC/Llama-2-7b-chat-hf-q0f16-MLC-cuda.so"
+    num_requests = 10
+    generation_config = GenerationConfig(temperature=0, max_tokens=256)
+
+    def generate_all(kv_swap_space_gb: float):
+        engine = SyncMLCEngine(
+            model=model,
+            model_lib_path=model_lib_path,
+            mode="server",
+            # A small KV cache so that the running requests are preempted while decoding.
+            max_total_sequence_length=1024,
+            kv_swap_space_gb=kv_swap_space_gb,
+        )
+        output_texts, _ = engine.generate(prompts[:num_requests], generation_config)
+        stats = engine.stats()
+        del engine
+        return output_texts, stats
+
+    outputs_recompute, stats_recompute = generate_all(kv_swap_space_gb=0)
+    outputs_swap, stats_swap = generate_all(kv_swap_space_gb=1)
+    # The preempted requests are recomputed without swap space, and swapped back in with it.
+    assert stats_recompute["total_swap_in_tokens"] == 0
+    assert stats_swap["total_swap_in_tokens"] > 0
+    for req_id, (output_recompute, output_swap) in enumerate(zip(outputs_recompute, outputs_swap)):
+        print(f"Output {req_id} with recompute: {output_recompute[0]}")
+        print(f"Output {req_id} with swap: {output_swap[0]}\n")
+        assert output_recompute == output_swap
+
+
 if __name__ == "__main__":
     test_engine_basic()
     test_engine_continuous_batching_1()
     test_engine_continuous_batching_2()
     test_engine_continuous_batching_3()
+    test_engine_priority_scheduling()
     test_engine_generate()
+    test_engine_swap_preemption()
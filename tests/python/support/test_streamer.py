@@ -22,7 +22,8 @@ from typing import List, Tuple
 
 import pytest
 
-from mlc_llm.streamer import StopStrHandler, TextStreamer
+from mlc_llm.serve import data
+from mlc_llm.streamer import BatchTextStreamer, StopStrHandler, TextStreamer
 from mlc_llm.tokenizer import Tokenizer
 
 # fmt: off
@@ -76,6 +77,49 @@ def test_text_streamer(llama_tokenizer_path: str):  # pylint: disable=redefined-
     assert total_text == DECODED_PARAGRAPH
 
 
+def test_batch_text_streamer(llama_tokenizer_path: str):  # pylint: disable=redefined-outer-name
+    batch_text_streamer = BatchTextStreamer(Tokenizer(llama_tokenizer_path))
+    emoji_tokens = [243, 162, 148, 131, 162, 148, 131, 505, 243, 162, 148, 131]
+    total_texts = {"para": "", "emoji": ""}
+    # Put the two streams in the same batches, where the paragraph stream
+    # appears twice in each batch.
+    for i in range(0, len(para_input_tokens), 2):
+        j = i // 2
+        keys = ["para", "para"]
+        delta_tokens = [para_input_tokens[i : i + 1], para_input_tokens[i + 1 : i + 2]]
+        finished = [False, i + 2 >= len(para_input_tokens)]
+        if j < len(emoji_tokens):
+            keys.append("emoji")
+            delta_tokens.append([emoji_tokens[j]])
+            finished.append(j == len(emoji_tokens) - 1)
+        for key, delta_text in zip(keys, batch_text_streamer.put(keys, delta_tokens, finished)):
+            total_texts[key] += delta_text
+
+    assert total_texts["para"] == DECODED_PARAGRAPH
+    assert total_texts["emoji"] == "👀��� have👀"
+
+
+def test_request_stream_output_batch_delta_texts(
+    llama_tokenizer_path: str,  # pylint: disable=redefined-outer-name
+):
+    # Token 3 is the byte fallback token of the NUL character, which should
+    # not truncate the delta texts of the generations after it.
+    delta_outputs = [
+        data._ffi_api.RequestStreamOutput(  # pylint: disable=protected-access
+            "req-0", [[18585, 3, 29892]], None, ["stop"]
+        ),
+        data._ffi_api.RequestStreamOutput(  # pylint: disable=protected-access
+            "req-1", [para_input_tokens[:2], para_input_tokens[:3]], None, [None, "stop"]
+        ),
+    ]
+    outputs = data.unpack_request_stream_outputs(
+        delta_outputs, BatchTextStreamer(Tokenizer(llama_tokenizer_path))
+    )
+    assert [request_id for request_id, _ in outputs] == ["req-0", "req-1"]
+    assert outputs[0][1][0].delta_text == "Sure\0,"
+    assert [output.delta_text for output in outputs[1][1]] == ["Sure,", "Sure, here"]
+
+
 def stop_handler_process_tokens(
     stop_handler: StopStrHandler, tokens: List[int], tokenizer: Tokenizer
 ) -> str:
@@ -189,6 +233,8 @@ def test_text_streamer_emojis(
 if __name__ == "__main__":
     tokenizer_path = _get_tokenizer_path()
     test_text_streamer(tokenizer_path)
+    test_batch_text_streamer(tokenizer_path)
+    test_request_stream_output_batch_delta_texts(tokenizer_path)
     test_stop_str_handler_stop(tokenizer_path)
     test_stop_str_handler_not_stop(tokenizer_path)
     test_stop_str_handler_return_cached_tokens(tokenizer_path)
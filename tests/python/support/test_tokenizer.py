@@ -0,0 +1,109 @@
+"""Tokenizer tests in MLC LLM.
+
+Please specify the local path to llama2 tokenizer via environment
+variable before running this test.
+The recommended way to run the tests is to use the following command:
+  MLC_LLAMA_TOKENIZER_PATH="path/to/llama/tokenizer" \
+  pytest -vv tests/python/support/test_tokenizer.py
+
+Here "MLC_LLAMA_TOKENIZER_PATH" can be chosen from
+- a llama2 weight directory (e.g., "path/to/Llama-2-7b-chat-hf"),
+- a sentencepiece llama2 tokenizer path
+  (e.g., "path/to/Llama-2-7b-chat-hf/tokenizer.model").
+"""
+
+# pylint: disable=missing-function-docstring
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from mlc_llm.tokenizer import Tokenizer
+
+TEXTS = [
+    "Hello, my name is",
+    "",
+    "The capital of France is",
+    "Hey there! 👋 I'm here to help answer any questions you have about emoji 🤔.",
+    "a" * 1000,
+]
+
+
+def _get_tokenizer_path() -> str:
+    path = os.environ.get("MLC_LLAMA_TOKENIZER_PATH")
+    if path is None:
+        raise ValueError(
+            'Environment variable "MLC_LLAMA_TOKENIZER_PATH" not found. '
+            "Please set it to the a valid llama tokenizer path."
+        )
+    return path
+
+
+@pytest.fixture
+def llama_tokenizer_path() -> str:
+    return _get_tokenizer_path()
+
+
+def test_encode_batch(llama_tokenizer_path: str):  # pylint: disable=redefined-outer-name
+    tokenizer = Tokenizer(llama_tokenizer_path)
+    token_ids, offsets = tokenizer.encode_batch(TEXTS)
+    assert token_ids.dtype == "int32"
+    assert offsets.dtype == "int64"
+    token_ids_np = token_ids.numpy()
+    offsets_np = offsets.numpy()
+    assert offsets_np.shape == (len(TEXTS) + 1,)
+    assert offsets_np[0] == 0 and offsets_np[-1] == token_ids_np.shape[0]
+    for i, text in enumerate(TEXTS):
+        assert token_ids_np[offsets_np[i] : offsets_np[i + 1]].tolist() == tokenizer.encode(text)
+
+
+def test_decode_batch(llama_tokenizer_path: str):  # pylint: disable=redefined-outer-name
+    tokenizer = Tokenizer(llama_tokenizer_path)
+    token_ids, offsets = tokenizer.encode_batch(TEXTS)
+    texts = tokenizer.decode_batch(token_ids, offsets)
+    token_ids_np = token_ids.numpy()
+    offsets_np = offsets.numpy()
+    assert texts == [
+        tokenizer.decode(token_ids_np[offsets_np[i] : offsets_np[i + 1]].tolist())
+        for i in range(len(TEXTS))
+    ]
+    # NumPy arrays of other integer types are accepted as well.
+    assert tokenizer.decode_batch(token_ids_np.astype("int64"), offsets_np) == texts
+    assert tokenizer.decode_batch(np.zeros((0,), dtype="int32"), [0]) == []
+
+
+def test_batch_concurrency(llama_tokenizer_path: str):  # pylint: disable=redefined-outer-name
+    tokenizer = Tokenizer(llama_tokenizer_path)
+    texts = [f"{text} {i}" for i in range(32) for text in TEXTS]
+    serial_token_ids = [tokenizer.encode(text) for text in texts]
+    serial_texts = [tokenizer.decode(token_ids) for token_ids in serial_token_ids]
+
+    def _encode_decode(i):
+        return tokenizer.encode(texts[i]), tokenizer.decode(serial_token_ids[i])
+
+    def _encode_decode_batch(_):
+        token_ids, offsets = tokenizer.encode_batch(texts)
+        token_ids_np = token_ids.numpy()
+        offsets_np = offsets.numpy()
+        batch_token_ids = [
+            token_ids_np[offsets_np[i] : offsets_np[i + 1]].tolist() for i in range(len(texts))
+        ]
+        return batch_token_ids, tokenizer.decode_batch(token_ids, offsets)
+
+    # The batches on the same tokenizer from concurrent threads match the serial results.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for batch_token_ids, batch_texts in executor.map(_encode_decode_batch, range(16)):
+            assert batch_token_ids == serial_token_ids
+            assert batch_texts == serial_texts
+        # The single-text calls from concurrent threads run on separate native handles.
+        assert list(executor.map(_encode_decode, range(len(texts)))) == list(
+            zip(serial_token_ids, serial_texts)
+        )
+
+
+if __name__ == "__main__":
+    tokenizer_path = _get_tokenizer_path()
+    test_encode_batch(tokenizer_path)
+    test_decode_batch(tokenizer_path)
+    test_batch_concurrency(tokenizer_path)